@@ -6,18 +6,26 @@ from app.view_model.inventario_vm import InventarioViewModel
 from app.view_model.finanzas_vm import FinanzasViewModel
 from app.view_model.personal_vm import PersonalViewModel
 from app.view_model.ai_vm import AIViewModel
+from app.model.data.instrumentacion import marcar_accion, reporte_estadisticas
 
+# La pantalla de cocina se redibuja al menos cada tanto (minutos de espera).
+REFRESCO_COCINA_SEGUNDOS = 30
+# Comando oculto (en cualquier menú): lecturas y latencia por acción y por método.
+COMANDOS_ESTADISTICAS = ('#estadisticas', '#stats')
 
 
 class InterfazConsola: 
  
-    def __init__(self, auth_vm, pedidos_vm, inventario_vm, finanzas_vm, personal_vm, ai_vm):
+    def __init__(self, auth_vm, pedidos_vm, inventario_vm, finanzas_vm, personal_vm, ai_vm,
+                 fuente_estadisticas=reporte_estadisticas):
         self.auth_vm = auth_vm
         self.pedidos_vm = pedidos_vm
         self.inventario_vm = inventario_vm
         self.finanzas_vm = finanzas_vm
         self.personal_vm = personal_vm
         self.ai_vm = ai_vm
+        # En una terminal del servicio local las estadísticas vienen del servicio.
+        self.fuente_estadisticas = fuente_estadisticas
       
         self.usuario_actual = None
         
@@ -28,6 +36,22 @@ class InterfazConsola:
     def _pausa(self):
         input("\nPresiona Enter para continuar...")
 
+    def _leer_opcion(self, menu: str) -> str:
+        """
+        Lee la opción elegida y la marca como acción actual, para que el costo
+        de lo que haga (lecturas, tiempo) quede anotado a nombre de esa opción.
+        """
+        while True:
+            opcion = input("Selecciona una opción: ").strip()
+            if opcion.lower() in COMANDOS_ESTADISTICAS:
+                if self.auth_vm.puede_usar('estadisticas'):
+                    self.mostrar_lineas(self.fuente_estadisticas(), pausa=True)
+                else:
+                    self.mostrar_resultado("Las estadísticas requieren una sesión de administrador o gerente.", pausa=True)
+                continue
+            marcar_accion(f"{menu} > {opcion}")
+            return opcion
+
     def mostrar_resultado(self, resultado, pausa=True):
         print("\n--- Resultado ---")
         if isinstance(resultado, str):
@@ -48,6 +72,15 @@ class InterfazConsola:
         if pausa:
             self._pausa()
 
+    def mostrar_lineas(self, lineas, pausa=True):
+        """ Imprime un resultado que llega línea por línea (reportes largos). """
+        print("\n--- Resultado ---")
+        for linea in lineas:
+            print(linea)
+        print("-----------------")
+        if pausa:
+            self._pausa()
+
     # --- MENÚ DE INICIO (LOGIN) ---
     def mostrar_menu_inicio(self):
         """ Bucle principal del menú de inicio de sesión. """
@@ -59,7 +92,7 @@ class InterfazConsola:
             print("1. Iniciar Sesión")
             print("2. Salir")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Inicio')
             
             if opcion == '1':
                 email, password = self._obtener_datos_login() 
@@ -135,7 +168,7 @@ class InterfazConsola:
             print("6. 🤖 ASISTENTE AI (Análisis de Datos) 🤖")
             print("9. Cerrar Sesión")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Administrador')
 
             if opcion == '1': self.run_menu_pedidos()
             elif opcion == '2': self.run_menu_inventario()
@@ -168,7 +201,7 @@ class InterfazConsola:
             print("5. 🤖 ASISTENTE AI (Análisis de Datos) 🤖")
             print("9. Cerrar Sesión")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Gerente')
 
             if opcion == '1': self.run_menu_pedidos()
             elif opcion == '2': self.run_menu_inventario()
@@ -191,15 +224,19 @@ class InterfazConsola:
             self._limpiar_pantalla()
             print(f"Sesión activa: {nombre} ({rol.upper()})")
             print(f"==== MÓDULO {rol.upper()} ====")
-            print("1. Módulo de Pedidos")
-            if rol == 'cocinero':
+            # Mismo mapa de módulos por rol que aplica el servicio local.
+            ver_pedidos = self.auth_vm.puede_usar('pedidos')
+            ver_inventario = self.auth_vm.puede_usar('inventario')
+            if ver_pedidos:
+                print("1. Módulo de Pedidos")
+            if ver_inventario:
                 print("2. Módulo de Inventario")
             print("9. Cerrar Sesión")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Operativo')
             
-            if opcion == '1': self.run_menu_pedidos()
-            elif opcion == '2' and rol == 'cocinero': self.run_menu_inventario()
+            if opcion == '1' and ver_pedidos: self.run_menu_pedidos()
+            elif opcion == '2' and ver_inventario: self.run_menu_inventario()
             elif opcion == '9':
                 self.auth_vm.cerrar_sesion()
                 self.usuario_actual = None
@@ -220,34 +257,73 @@ class InterfazConsola:
             print("2. Crear nuevo pedido")
             print("3. Marcar pedido como 'Completado'")
             print("4. Marcar pedido como 'Cancelado'")
+            print("5. Pantalla de cocina (en vivo)")
             print("9. Volver al menú principal")
             print("------------------------------------")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Pedidos')
             
             if opcion == '1':
-                resultado = self.pedidos_vm.listar_pedidos_activos()
+                resultado = self.pedidos_vm.ver_pedidos_activos()
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '2':
                 print("--- Nuevo Pedido ---")
-                mesa = input("Mesa: ")
-                items_str = input("Items (ej: tomate,papa,arroz): ")
-                items = [item.strip() for item in items_str.split(',')]
-                resultado = self.pedidos_vm.crear_pedido(mesa, items) 
+                self.mostrar_resultado(self.pedidos_vm.obtener_menu(), pausa=False)
+                items_str = input("Items (ID x cantidad, ej: 1x2, 3): ")
+                items = self._leer_items_pedido(items_str)
+                if items is None:
+                    self.mostrar_resultado("Formato de items no válido.", pausa=True)
+                    continue
+                resultado = self.pedidos_vm.crear_pedido(items, self.usuario_actual.uid)
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '3':
-                pedido_id = input("ID del pedido a completar: ")
-                resultado = self.pedidos_vm.actualizar_estado_pedido(pedido_id, "completado") 
+                pedido_id = input("ID del pedido a completar: ").strip()
+                resultado = self.pedidos_vm.finalizar_pedido(pedido_id)
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '4':
-                pedido_id = input("ID del pedido a cancelar: ")
-                resultado = self.pedidos_vm.actualizar_estado_pedido(pedido_id, "cancelado") 
+                pedido_id = input("ID del pedido a cancelar: ").strip()
+                resultado = self.pedidos_vm.cancelar_pedido(pedido_id)
                 self.mostrar_resultado(resultado, pausa=True)
+            elif opcion == '5':
+                self._pantalla_cocina()
             elif opcion == '9':
                 break
             else:
                 self.mostrar_resultado("Opción no válida.", pausa=True)
 
+    def _leer_items_pedido(self, texto: str):
+        """ Convierte '1x2, 3' en [{'item_id': '1', 'cantidad': 2}, {'item_id': '3', 'cantidad': 1}]. """
+        items = []
+        for parte in texto.split(','):
+            parte = parte.strip()
+            if not parte:
+                continue
+            item_id, _, cantidad = parte.partition('x')
+            try:
+                cantidad = int(cantidad) if cantidad.strip() else 1
+            except ValueError:
+                return None
+            if cantidad <= 0:
+                return None
+            items.append({'item_id': item_id.strip(), 'cantidad': cantidad})
+        return items
+
+    def _pantalla_cocina(self):
+        """
+        Muestra los pedidos activos y se redibuja cuando cambian (los cambios
+        llegan por el listener, sin consultar). Ctrl+C vuelve al menú.
+        """
+        try:
+            while True:
+                version = self.pedidos_vm.version_pedidos()
+                self._limpiar_pantalla()
+                print(self.pedidos_vm.pantalla_cocina())
+                print("\n(Ctrl+C para volver)")
+                # También se redibuja cada cierto tiempo para actualizar los minutos de espera.
+                self.pedidos_vm.esperar_cambio_pedidos(version, timeout=REFRESCO_COCINA_SEGUNDOS)
+        except KeyboardInterrupt:
+            pass
+
     def run_menu_inventario(self):
         """ Muestra el submenú de gestión de inventario. """
         while True:
@@ -259,16 +335,19 @@ class InterfazConsola:
             print("2. Buscar producto")
             print("3. Agregar o Actualizar producto")
             print("4. Eliminar producto")
+            print("5. Importar productos desde archivo (CSV/JSON)")
+            print("6. Exportar inventario a archivo")
+            print("7. Ajustar stock (sumar o restar unidades)")
             print("9. Volver al menú principal")
             print("------------------------------------")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Inventario')
             
             if opcion == '1':
                 resultado = self.inventario_vm.listar_inventario() 
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '2':
-                nombre = input("Ingresa el nombre (o parte del nombre) a buscar: ")
+                nombre = input("Ingresa el nombre (o el inicio del nombre) a buscar: ")
                 resultado = self.inventario_vm.buscar_producto(nombre) 
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '3':
@@ -283,6 +362,30 @@ class InterfazConsola:
                 nombre = input("Nombre EXACTO del producto a eliminar: ").strip()
                 resultado = self.inventario_vm.eliminar_producto(nombre) 
                 self.mostrar_resultado(resultado, pausa=True)
+            elif opcion == '5':
+                print("--- Importar Productos ---")
+                if not hasattr(self.inventario_vm, 'importar_inventario'):
+                    self.mostrar_resultado("Importar solo está disponible en el equipo del servicio local.", pausa=True)
+                    continue
+                print("Columnas: nombre, cantidad, costo (.csv, .jsonl o .json)")
+                ruta = input("Ruta del archivo: ").strip()
+                print("Importando...")
+                resultado = self.inventario_vm.importar_inventario(ruta)
+                self.mostrar_resultado(resultado, pausa=True)
+            elif opcion == '6':
+                print("--- Exportar Inventario ---")
+                if not hasattr(self.inventario_vm, 'exportar_inventario'):
+                    self.mostrar_resultado("Exportar solo está disponible en el equipo del servicio local.", pausa=True)
+                    continue
+                ruta = input("Ruta del archivo de salida (ej: inventario.csv): ").strip()
+                resultado = self.inventario_vm.exportar_inventario(ruta)
+                self.mostrar_resultado(resultado, pausa=True)
+            elif opcion == '7':
+                print("--- Ajustar Stock ---")
+                nombre = input("Nombre EXACTO del producto: ").strip()
+                delta_str = input("Unidades a sumar (negativo para restar, ej: -3): ").strip()
+                resultado = self.inventario_vm.ajustar_stock(nombre, delta_str)
+                self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '9':
                 break
             else:
@@ -298,14 +401,15 @@ class InterfazConsola:
             print("1. Ver balance de movimientos")
             print("2. Registrar gasto manual")
             print("3. Registrar ingreso manual")
+            print("4. Reporte de ingresos (últimos 7 días)")
+            print("5. Reporte de ingresos (últimos 30 días)")
             print("9. Volver al menú principal")
             print("------------------------------------")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Finanzas')
             
             if opcion == '1':
-                resultado = self.finanzas_vm.obtener_balance() 
-                self.mostrar_resultado(resultado, pausa=True)
+                self.mostrar_lineas(self.finanzas_vm.iterar_reporte_gastos(), pausa=True)
             elif opcion == '2':
                 print("--- Registrar Gasto ---")
                 descripcion = input("Descripción del gasto: ")
@@ -318,6 +422,10 @@ class InterfazConsola:
                 monto_str = input("Monto (ej: 100000): ")
                 resultado = self.finanzas_vm.registrar_movimiento(descripcion, monto_str, "ingreso") 
                 self.mostrar_resultado(resultado, pausa=True)
+            elif opcion == '4':
+                self.mostrar_lineas(self.finanzas_vm.iterar_reporte_ingresos(7), pausa=True)
+            elif opcion == '5':
+                self.mostrar_lineas(self.finanzas_vm.iterar_reporte_ingresos(30), pausa=True)
             elif opcion == '9':
                 break
             else:
@@ -331,21 +439,21 @@ class InterfazConsola:
             print("==== MÓDULO DE PERSONAL ====")
             print("====================================")
             print("1. Listar todo el personal")
-            print("2. Eliminar empleado (por email)")
+            print("2. Eliminar empleado (por nombre o email)")
             print("9. Volver al menú principal")
             print("------------------------------------")
             
-            opcion = input("Selecciona una opción: ")
+            opcion = self._leer_opcion('Personal')
             
             if opcion == '1':
                 resultado = self.personal_vm.listar_personal() 
                 self.mostrar_resultado(resultado, pausa=True)
             elif opcion == '2':
                 print("--- Eliminar Empleado ---")
-                email = input("Email del empleado a eliminar: ").strip()
+                email = input("Nombre o email del empleado a eliminar: ").strip()
                 confirmacion = input(f"¿Seguro que deseas eliminar a {email}? Esta acción no se puede deshacer. (s/n): ").lower()
                 if confirmacion == 's':
-                    resultado = self.personal_vm.eliminar_empleado(email) 
+                    resultado = self.personal_vm.despedir_empleado(email) 
                     self.mostrar_resultado(resultado, pausa=True)
                 else:
                     self.mostrar_resultado("Eliminación cancelada.", pausa=True)
@@ -366,12 +474,15 @@ class InterfazConsola:
             self.mostrar_resultado("El Asistente AI no está disponible. Revisa la GEMINI_API_KEY en tu .env.", pausa=True)
             return
 
+        # Mientras se lee la primera pregunta se carga Gemini y el contexto.
+        self.ai_vm.precalentar()
+
         print("======================================================")
         print("====== ASISTENTE DE ANÁLISIS DEL NEGOCIO (Gemini) ======")
         print("======================================================")
         print("Puedo ver Inventario, Finanzas (manuales) y Personal.")
         print("Pregúntame: '¿Cómo mejorar ventas?' o '¿Quién es el cajero?'")
-        print("Escribe 'salir' para volver al menú principal.")
+        print("Escribe 'nuevo' para empezar otra conversación o 'salir' para volver al menú principal.")
         print("-" * 54)
         
         while True:
@@ -383,6 +494,32 @@ class InterfazConsola:
             if not pregunta.strip():
                 continue
 
-            respuesta_ia = self.ai_vm.preguntar_al_asistente(pregunta)
-            
-            self.mostrar_resultado(respuesta_ia, pausa=False)
+            if pregunta.lower().strip() == 'nuevo':
+                self.mostrar_resultado(self.ai_vm.reiniciar_conversacion(), pausa=False)
+                continue
+
+            self._mostrar_respuesta_asistente(pregunta)
+
+    def _mostrar_respuesta_asistente(self, pregunta: str):
+        """
+        Imprime la respuesta del asistente a medida que llega.
+        Ctrl-C cancela solo esta respuesta; la conversación sigue abierta.
+        """
+        en_curso = self.ai_vm.iniciar_respuesta(pregunta)
+        if isinstance(en_curso, str):
+            self.mostrar_resultado(en_curso, pausa=False)
+            return
+
+        print("\n[Asistente]: ", end="", flush=True)
+        try:
+            for fragmento in en_curso.fragmentos():
+                print(fragmento, end="", flush=True)
+            print()
+        except KeyboardInterrupt:
+            en_curso.cancelar()
+            print("\n(Respuesta cancelada)")
+            return
+
+        if os.getenv('DEBUG'):
+            ttft = f"{en_curso.ttft * 1000:.0f} ms" if en_curso.ttft is not None else "-"
+            print(f"[debug] Primer token en {ttft} | total {en_curso.duracion * 1000:.0f} ms")
@@ -0,0 +1,113 @@
+# app/backend/auth_memoria.py
+"""
+Sustituto en memoria del servicio firebase_admin.auth.
+
+Implementa las llamadas que usa AuthRepo (get_user_by_email, create_user,
+update_user, set_custom_user_claims, delete_user) y lanza las mismas excepciones del
+Admin SDK, para que AuthRepo se comporte igual que contra Firebase.
+"""
+
+import random
+import string
+import threading
+import time
+
+from firebase_admin import auth as firebase_auth
+
+
+class UsuarioMemoria:
+    """ Equivalente mínimo de UserRecord. """
+
+    def __init__(self, uid: str, email: str, display_name: str | None):
+        self.uid = uid
+        self.email = email
+        self.display_name = display_name
+        self.custom_claims = None
+        self.disabled = False
+
+
+class AuthMemoria:
+    """ Servicio de Authentication en memoria, con contador de llamadas. """
+
+    UserNotFoundError = firebase_auth.UserNotFoundError
+    EmailAlreadyExistsError = firebase_auth.EmailAlreadyExistsError
+
+    def __init__(self, latencia_ms: float = 0.0):
+        self._por_uid: dict[str, UsuarioMemoria] = {}
+        self._por_email: dict[str, str] = {}
+        self._lock = threading.RLock()
+        self.latencia_ms = latencia_ms
+        self.llamadas = 0
+
+    def _rpc(self):
+        self.llamadas += 1
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000.0)
+
+    def get_user_by_email(self, email: str):
+        self._rpc()
+        with self._lock:
+            uid = self._por_email.get(email)
+            if uid is None:
+                raise firebase_auth.UserNotFoundError(f"No user record found for the provided email: {email}.")
+            return self._por_uid[uid]
+
+    def get_user(self, uid: str):
+        self._rpc()
+        with self._lock:
+            if uid not in self._por_uid:
+                raise firebase_auth.UserNotFoundError(f"No user record found for the provided user ID: {uid}.")
+            return self._por_uid[uid]
+
+    def create_user(self, email: str = None, password: str = None, display_name: str = None, uid: str = None, **kwargs):
+        self._rpc()
+        with self._lock:
+            if email in self._por_email:
+                raise firebase_auth.EmailAlreadyExistsError(
+                    "The user with the provided email already exists.", None, None
+                )
+            uid = uid or ''.join(random.choices(string.ascii_letters + string.digits, k=28))
+            usuario = UsuarioMemoria(uid, email, display_name)
+            self._por_uid[uid] = usuario
+            self._por_email[email] = uid
+            return usuario
+
+    def update_user(self, uid: str, display_name=None, disabled=None, **kwargs):
+        self._rpc()
+        with self._lock:
+            if uid not in self._por_uid:
+                raise firebase_auth.UserNotFoundError(f"No user record found for the provided user ID: {uid}.")
+            usuario = self._por_uid[uid]
+            if display_name is not None:
+                usuario.display_name = display_name
+            if disabled is not None:
+                usuario.disabled = bool(disabled)
+            return usuario
+
+    def set_custom_user_claims(self, uid: str, custom_claims: dict | None):
+        self._rpc()
+        with self._lock:
+            if uid not in self._por_uid:
+                raise firebase_auth.UserNotFoundError(f"No user record found for the provided user ID: {uid}.")
+            self._por_uid[uid].custom_claims = dict(custom_claims) if custom_claims else None
+
+    def delete_user(self, uid: str):
+        self._rpc()
+        with self._lock:
+            usuario = self._por_uid.pop(uid, None)
+            if usuario is None:
+                raise firebase_auth.UserNotFoundError(f"No user record found for the provided user ID: {uid}.")
+            self._por_email.pop(usuario.email, None)
+
+    # --- Utilidades del sustituto ---
+    def cargar(self, usuarios: list[tuple[str, str, str, dict | None]]):
+        """ Carga masiva de (uid, email, display_name, claims) sin latencia. """
+        with self._lock:
+            for uid, email, nombre, claims in usuarios:
+                usuario = UsuarioMemoria(uid, email, nombre)
+                usuario.custom_claims = dict(claims) if claims else None
+                self._por_uid[uid] = usuario
+                self._por_email[email] = uid
+
+    def reiniciar_contadores(self):
+        self.llamadas = 0
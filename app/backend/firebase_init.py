@@ -1,49 +1,101 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
 import os
+import threading
 
-CRED_PATH = 'serviceAccountKey.json' 
-DATABASE_URL = "https://TU_PROYECTO_ID.firebaseio.com" 
+CRED_PATH = 'serviceAccountKey.json'
+DATABASE_URL = "https://TU_PROYECTO_ID.firebaseio.com"
+
+# El SDK de Firebase (y gRPC detrás de Firestore) tarda en importarse, así que
+# no se conecta al importar este módulo: 'db' y 'auth_service' son clientes
+# diferidos que se inicializan la primera vez que un repositorio los usa.
+_lock = threading.Lock()
+_db_real = None
+_db_async_real = None
+_auth_real = None
+_error_inicio = None
+
+
+def configuracion_disponible() -> bool:
+    """ Revisión rápida (sin importar el SDK) de que existen las credenciales. """
+    return os.path.exists(CRED_PATH)
 
-db = None
-auth_service = None 
-is_ready = False 
 
 def inicializar_firebase():
-    global db, auth_service, is_ready
-    
-    if firebase_admin._apps:
+    """
+    Conecta con Firebase una sola vez y deja listos los clientes reales.
+    Retorna True si quedó conectado.
+    """
+    global _db_real, _auth_real, _error_inicio
+
+    with _lock:
+        if _db_real is not None:
+            return True
+        if _error_inicio is not None:
+            return False
+
         try:
-            db = firestore.client()
-            auth_service = auth
-            is_ready = True
-            return
-        except Exception:
-            pass
-
-    try:
-        if not os.path.exists(CRED_PATH):
-            raise FileNotFoundError(f"El archivo de credenciales '{CRED_PATH}' no se encontró.")
-
-        cred = credentials.Certificate(CRED_PATH)
-        firebase_admin.initialize_app(cred, {
-            'databaseURL': DATABASE_URL
-        })
-
-        db = firestore.client()
-        auth_service = auth
-        is_ready = True
-        
-        print("✅ Conexión con Firebase establecida. Clientes de Auth y Firestore listos.")
-
-    except FileNotFoundError as e:
-        print(f"\n❌ ERROR CRÍTICO DE CONFIGURACIÓN: {e}")
-        print("Asegúrate de tener el archivo 'serviceAccountKey.json' en la raíz del proyecto.")
-        is_ready = False
-    except Exception as e:
-        print(f"\n❌ ERROR FATAL AL INICIAR: No se pudo conectar a Firebase.")
-        print(f"Detalle: {e}")
-        print("Verifica si el ID de proyecto en DATABASE_URL es correcto.")
-        is_ready = False
-        
-inicializar_firebase()
\ No newline at end of file
+            import firebase_admin
+            from firebase_admin import credentials, firestore, auth
+
+            if not firebase_admin._apps:
+                if not os.path.exists(CRED_PATH):
+                    raise FileNotFoundError(f"El archivo de credenciales '{CRED_PATH}' no se encontró.")
+
+                cred = credentials.Certificate(CRED_PATH)
+                firebase_admin.initialize_app(cred, {
+                    'databaseURL': DATABASE_URL
+                })
+
+            _db_real = firestore.client()
+            _auth_real = auth
+            return True
+
+        except FileNotFoundError as e:
+            _error_inicio = e
+            print(f"\n❌ ERROR CRÍTICO DE CONFIGURACIÓN: {e}")
+            print("Asegúrate de tener el archivo 'serviceAccountKey.json' en la raíz del proyecto.")
+            return False
+        except Exception as e:
+            _error_inicio = e
+            print(f"\n❌ ERROR FATAL AL INICIAR: No se pudo conectar a Firebase.")
+            print(f"Detalle: {e}")
+            print("Verifica si el ID de proyecto en DATABASE_URL es correcto.")
+            return False
+
+
+def precalentar():
+    """ Inicia la conexión en segundo plano (p. ej. mientras el usuario escribe su login). """
+    threading.Thread(target=inicializar_firebase, name='firebase-init', daemon=True).start()
+
+
+def _cliente_async():
+    """ AsyncClient de Firestore (para los repositorios asíncronos), creado en el primer uso. """
+    global _db_async_real
+    with _lock:
+        if _db_async_real is None:
+            from firebase_admin import firestore_async
+            _db_async_real = firestore_async.client()
+        return _db_async_real
+
+
+class _ClienteDiferido:
+    """ Se comporta como el cliente real, que se crea en el primer uso. """
+
+    def __init__(self, nombre: str):
+        self._nombre = nombre
+
+    def _real(self):
+        if not inicializar_firebase():
+            raise RuntimeError(f"Firebase no está disponible: {_error_inicio}")
+        if self._nombre == 'db_async':
+            return _cliente_async()
+        return _db_real if self._nombre == 'db' else _auth_real
+
+    def __getattr__(self, atributo):
+        return getattr(self._real(), atributo)
+
+
+db = _ClienteDiferido('db')
+db_async = _ClienteDiferido('db_async')
+auth_service = _ClienteDiferido('auth')
+# Solo indica que hay credenciales; la conexión se valida en el primer uso.
+is_ready = configuracion_disponible()
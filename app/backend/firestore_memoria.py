@@ -0,0 +1,1133 @@
+# app/backend/firestore_memoria.py
+"""
+Sustituto en memoria del cliente de Firestore.
+
+Imita la parte del API que usan los repositorios (collection, document,
+get/set/update/delete, add, where, order_by, limit, start_after, select,
+stream, batch, on_snapshot, las agregaciones count/sum/avg y las
+precondiciones de escritura con write_option(last_update_time=...) sobre
+el update_time de cada documento) y lleva la cuenta de
+documentos leídos y escritos, con la misma regla de facturación de
+Firestore: cada documento devuelto es una lectura, una consulta sin
+resultados cuesta una lectura y una agregación cuesta una lectura por cada
+1000 entradas de índice recorridas. Un listener (on_snapshot) paga el
+snapshot inicial como una consulta y después una lectura por cada
+documento que entra o cambia en el resultado.
+
+Sirve para medir los repositorios sin red (ver benchmarks/bench_repos.py);
+simular_fallos() hace fallar las próximas llamadas para probar los reintentos.
+asincrono() devuelve una vista del mismo cliente con el API de AsyncClient
+(await get/set/commit, async for en stream) cuya latencia espera con
+asyncio.sleep, para medir los repositorios asíncronos.
+Las consultas se resuelven recorriendo la colección, no con índices: el
+tiempo medido incluye ese recorrido y la métrica fiable de coste es la
+cuenta de documentos leídos.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import datetime
+import enum
+import queue
+import random
+import string
+import threading
+import time
+
+from google.api_core import exceptions as gexc
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_ALFABETO_ID = string.ascii_letters + string.digits
+
+# Dentro de una llamada asíncrona la latencia no duerme el hilo: se anota aquí
+# y la corrutina la espera con asyncio.sleep (ver _esperar).
+_esperas_async = contextvars.ContextVar('firestore_memoria_esperas', default=None)
+
+
+def _nuevo_id() -> str:
+    """ ID aleatorio de 20 caracteres, como los auto-IDs de Firestore. """
+    return ''.join(random.choices(_ALFABETO_ID, k=20))
+
+
+def _copiar(valor):
+    """ Copia profunda de mapas y listas (más rápida que copy.deepcopy). """
+    if isinstance(valor, dict):
+        return {k: _copiar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_copiar(v) for v in valor]
+    return valor
+
+
+def _ahora():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# --- Orden de tipos de Firestore ---
+# null < bool < número < timestamp < string < bytes < array < map.
+# Los filtros de rango solo comparan valores del mismo tipo.
+
+_CLASES_TIPO = {
+    type(None): 0, bool: 1, int: 2, float: 2, datetime.datetime: 3,
+    str: 4, bytes: 5, list: 7, tuple: 7, dict: 8,
+}
+
+# Tipos escalares cuya igualdad en Python coincide con la de Firestore.
+_ESCALARES = (str, int, float, bool)
+
+
+def _clase_tipo(valor) -> int:
+    clase = _CLASES_TIPO.get(type(valor))
+    if clase is not None:
+        return clase
+    if isinstance(valor, bool):
+        return 1
+    if isinstance(valor, (int, float)):
+        return 2
+    if isinstance(valor, datetime.datetime):
+        return 3
+    if isinstance(valor, str):
+        return 4
+    if isinstance(valor, bytes):
+        return 5
+    if isinstance(valor, (list, tuple)):
+        return 7
+    if isinstance(valor, dict):
+        return 8
+    return 9
+
+
+def _clave_valor(valor):
+    """ Clave comparable dentro de una misma clase de tipo. """
+    if isinstance(valor, datetime.datetime):
+        if valor.tzinfo is None:
+            valor = valor.replace(tzinfo=datetime.timezone.utc)
+        return valor.timestamp()
+    if isinstance(valor, (list, tuple)):
+        return tuple((_clase_tipo(v), _clave_valor(v)) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _clase_tipo(v), _clave_valor(v)) for k, v in valor.items()))
+    if valor is None:
+        return 0
+    return valor
+
+
+def _clave_orden(valor):
+    return (_clase_tipo(valor), _clave_valor(valor))
+
+
+_FALTA = object()
+
+
+def _leer_campo(data: dict, ruta: str):
+    """ Lee un campo con ruta de puntos ('a.b.c'). Devuelve _FALTA si no existe. """
+    actual = data
+    for parte in ruta.split('.'):
+        if not isinstance(actual, dict) or parte not in actual:
+            return _FALTA
+        actual = actual[parte]
+    return actual
+
+
+def _aplicar_valor(destino: dict, clave: str, valor):
+    """ Asigna un valor resolviendo los transforms (Increment, DELETE_FIELD...). """
+    if valor is transforms.DELETE_FIELD:
+        destino.pop(clave, None)
+    elif valor is transforms.SERVER_TIMESTAMP:
+        destino[clave] = _ahora()
+    elif isinstance(valor, transforms.Increment):
+        previo = destino.get(clave)
+        if not isinstance(previo, (int, float)) or isinstance(previo, bool):
+            previo = 0
+        destino[clave] = previo + valor.value
+    elif isinstance(valor, transforms.ArrayUnion):
+        previo = destino.get(clave)
+        lista = list(previo) if isinstance(previo, list) else []
+        for v in valor.values:
+            if v not in lista:
+                lista.append(_copiar(v))
+        destino[clave] = lista
+    elif isinstance(valor, transforms.ArrayRemove):
+        previo = destino.get(clave)
+        lista = list(previo) if isinstance(previo, list) else []
+        destino[clave] = [v for v in lista if v not in valor.values]
+    elif isinstance(valor, dict):
+        destino[clave] = _resolver_mapa(valor)
+    else:
+        destino[clave] = _copiar(valor)
+
+
+def _resolver_mapa(data: dict) -> dict:
+    resultado = {}
+    for clave, valor in data.items():
+        _aplicar_valor(resultado, clave, valor)
+    return resultado
+
+
+def _fusionar(destino: dict, data: dict):
+    """ Semántica de set(..., merge=True): fusiona mapas anidados. """
+    for clave, valor in data.items():
+        if isinstance(valor, dict) and isinstance(destino.get(clave), dict):
+            _fusionar(destino[clave], valor)
+        elif isinstance(valor, dict):
+            destino[clave] = {}
+            _fusionar(destino[clave], valor)
+        else:
+            _aplicar_valor(destino, clave, valor)
+
+
+def _actualizar_rutas(destino: dict, data: dict):
+    """ Semántica de update(): las claves con puntos son rutas de campo. """
+    for ruta, valor in data.items():
+        partes = ruta.split('.')
+        actual = destino
+        for parte in partes[:-1]:
+            if not isinstance(actual.get(parte), dict):
+                actual[parte] = {}
+            actual = actual[parte]
+        _aplicar_valor(actual, partes[-1], valor)
+
+
+def _cumple(valor_doc, op: str, valor) -> bool:
+    if op == '==' and type(valor_doc) is type(valor) and type(valor) in _ESCALARES:
+        return valor_doc == valor
+    if op == '==':
+        return valor_doc is not _FALTA and _clave_orden(valor_doc) == _clave_orden(valor)
+    if op == '!=':
+        return valor_doc is not _FALTA and valor_doc is not None and _clave_orden(valor_doc) != _clave_orden(valor)
+    if op == 'in':
+        return valor_doc is not _FALTA and any(_clave_orden(valor_doc) == _clave_orden(v) for v in valor)
+    if op == 'not-in':
+        return valor_doc is not _FALTA and valor_doc is not None and all(_clave_orden(valor_doc) != _clave_orden(v) for v in valor)
+    if op == 'array-contains':
+        return isinstance(valor_doc, list) and any(_clave_orden(v) == _clave_orden(valor) for v in valor_doc)
+    if op == 'array-contains-any':
+        return isinstance(valor_doc, list) and any(_clave_orden(v) == _clave_orden(x) for v in valor_doc for x in valor)
+    if valor_doc is _FALTA or _clase_tipo(valor_doc) != _clase_tipo(valor):
+        return False
+    if type(valor_doc) is str:
+        a, b = valor_doc, valor
+    else:
+        a, b = _clave_valor(valor_doc), _clave_valor(valor)
+    if op == '<':
+        return a < b
+    if op == '<=':
+        return a <= b
+    if op == '>':
+        return a > b
+    if op == '>=':
+        return a >= b
+    raise ValueError(f"Operador no soportado: {op}")
+
+
+class SnapshotMemoria:
+    """ Equivalente de DocumentSnapshot. """
+
+    def __init__(self, referencia, data: dict | None, update_time=None):
+        self.reference = referencia
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return _copiar(self._data) if self._data is not None else None
+
+    def get(self, ruta: str):
+        if self._data is None:
+            return None
+        valor = _leer_campo(self._data, ruta)
+        if valor is _FALTA:
+            raise KeyError(ruta)
+        return _copiar(valor)
+
+
+class DocumentoMemoria:
+    """ Equivalente de DocumentReference. """
+
+    def __init__(self, coleccion, doc_id: str):
+        self._coleccion = coleccion
+        self.id = doc_id
+
+    @property
+    def parent(self):
+        return self._coleccion
+
+    @property
+    def path(self):
+        return f"{self._coleccion.id}/{self.id}"
+
+    def _docs(self):
+        return self._coleccion._docs
+
+    def get(self, field_paths=None, **kwargs):
+        cliente = self._coleccion._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            data = self._docs().get(self.id)
+            cliente._contar_lecturas(1)
+            if data is not None and field_paths:
+                data = _proyectar(data, field_paths)
+            return SnapshotMemoria(self, data, cliente._tiempos.get(self.path))
+
+    def set(self, document_data: dict, merge=False, **kwargs):
+        cliente = self._coleccion._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            self._set(document_data, merge)
+            cliente._contar_escrituras(1)
+        return _ahora()
+
+    def create(self, document_data: dict, **kwargs):
+        cliente = self._coleccion._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            if self.id in self._docs():
+                raise gexc.AlreadyExists(f"Document already exists: {self.path}")
+            self._set(document_data, False)
+            cliente._contar_escrituras(1)
+        return _ahora()
+
+    def update(self, field_updates: dict, option=None, **kwargs):
+        cliente = self._coleccion._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            self._verificar_existe()
+            self._verificar_precondicion(option)
+            self._update(field_updates)
+            cliente._contar_escrituras(1)
+        return _ahora()
+
+    def delete(self, **kwargs):
+        cliente = self._coleccion._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            self._docs().pop(self.id, None)
+            self._tocar()
+            cliente._contar_escrituras(1)
+        return _ahora()
+
+    # Operaciones sin latencia ni contadores, usadas también por los lotes.
+    def _tocar(self):
+        cliente = self._coleccion._cliente
+        cliente._versiones[self._coleccion.id] = cliente._versiones.get(self._coleccion.id, 0) + 1
+        if self.id in self._docs():
+            cliente._tiempos[self.path] = cliente._nuevo_tiempo()
+        else:
+            cliente._tiempos.pop(self.path, None)
+        cliente._avisar_cambio(self._coleccion.id)
+
+    def _verificar_existe(self):
+        if self.id not in self._docs():
+            raise gexc.NotFound(f"No document to update: {self.path}")
+
+    def _verificar_precondicion(self, option):
+        if option is None:
+            return
+        actual = self._coleccion._cliente._tiempos.get(self.path)
+        if option.last_update_time is not None and actual != option.last_update_time:
+            raise gexc.FailedPrecondition(f"The document was modified after it was read: {self.path}")
+        if option.exists is not None and (self.id in self._docs()) != option.exists:
+            raise gexc.FailedPrecondition(f"Precondition 'exists={option.exists}' failed: {self.path}")
+
+    def _set(self, document_data: dict, merge: bool):
+        if merge and self.id in self._docs():
+            _fusionar(self._docs()[self.id], document_data)
+        elif merge:
+            nuevo = {}
+            _fusionar(nuevo, document_data)
+            self._docs()[self.id] = nuevo
+        else:
+            self._docs()[self.id] = _resolver_mapa(document_data)
+        self._tocar()
+
+    def _update(self, field_updates: dict):
+        _actualizar_rutas(self._docs()[self.id], field_updates)
+        self._tocar()
+
+
+def _proyectar(data: dict, campos) -> dict:
+    """ Aplica select(): solo conserva las rutas pedidas. """
+    resultado = {}
+    for ruta in campos:
+        valor = _leer_campo(data, ruta)
+        if valor is _FALTA:
+            continue
+        partes = ruta.split('.')
+        actual = resultado
+        for parte in partes[:-1]:
+            actual = actual.setdefault(parte, {})
+        actual[partes[-1]] = valor
+    return resultado
+
+
+class ConsultaMemoria:
+    """ Equivalente (inmutable) de Query. """
+
+    def __init__(self, coleccion, filtros=(), orden=(), limite=None, cursor=None, campos=None):
+        self._coleccion_ref = coleccion
+        self._filtros = tuple(filtros)
+        self._orden = tuple(orden)
+        self._limite = limite
+        self._cursor = cursor
+        self._campos = campos
+
+    def _copia(self, **cambios):
+        estado = dict(
+            filtros=self._filtros, orden=self._orden, limite=self._limite,
+            cursor=self._cursor, campos=self._campos
+        )
+        estado.update(cambios)
+        return ConsultaMemoria(self._coleccion_ref, **estado)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            if not isinstance(filter, FieldFilter):
+                raise NotImplementedError("Solo se soportan FieldFilter simples.")
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copia(filtros=self._filtros + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING):
+        return self._copia(orden=self._orden + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copia(limite=count)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copia(cursor=document_fields_or_snapshot)
+
+    def select(self, field_paths):
+        return self._copia(campos=tuple(field_paths))
+
+    def _ordenes_efectivos(self):
+        """ Como Firestore: los campos con desigualdad ordenan primero y el ID desempata. """
+        orden = list(self._orden)
+        campos_ordenados = {c for c, _ in orden}
+        for campo, op, _ in self._filtros:
+            if op in ('<', '<=', '>', '>=', '!=', 'not-in') and campo not in campos_ordenados:
+                orden.append((campo, ASCENDING))
+                campos_ordenados.add(campo)
+        return orden
+
+    def _clave_doc(self, orden, doc_id, data):
+        clave = []
+        for campo, direccion in orden:
+            valor = _leer_campo(data, campo)
+            k = _clave_orden(None if valor is _FALTA else valor)
+            clave.append(_Invertido(k) if direccion == DESCENDING else k)
+        ultima = orden[-1][1] if orden else ASCENDING
+        clave.append(_Invertido(doc_id) if ultima == DESCENDING else doc_id)
+        return tuple(clave)
+
+    def _clave_cursor(self, orden):
+        cursor = self._cursor
+        if isinstance(cursor, SnapshotMemoria):
+            return self._clave_doc(orden, cursor.id, cursor._data or {})
+        if isinstance(cursor, dict):
+            return self._clave_doc(orden, '', cursor)[:-1]
+        if isinstance(cursor, (list, tuple)):
+            valores = {campo: v for (campo, _), v in zip(orden, cursor)}
+            return self._clave_doc(orden, '', valores)[:len(cursor)]
+        raise TypeError("Cursor no soportado.")
+
+    def _candidatos_ordenados(self, orden):
+        """
+        Documentos que cumplen los filtros, ordenados, con su clave de orden.
+        Se guardan en caché hasta la próxima escritura en la colección, para
+        que paginar no vuelva a recorrer y ordenar la colección completa.
+        """
+        cliente = self._coleccion_ref._cliente
+        nombre = self._coleccion_ref.id
+        firma = (nombre, self._filtros, tuple(orden))
+        version = cliente._versiones.get(nombre, 0)
+        en_cache = cliente._cache_consultas.get(firma)
+        if en_cache is not None and en_cache[0] == version:
+            return en_cache[1], en_cache[2]
+
+        candidatos = []
+        for doc_id, data in self._coleccion_ref._docs.items():
+            if all(_cumple(_leer_campo(data, c), op, v) for c, op, v in self._filtros):
+                if all(_leer_campo(data, c) is not _FALTA for c, _ in orden):
+                    candidatos.append((self._clave_doc(orden, doc_id, data), doc_id, data))
+        candidatos.sort(key=lambda t: t[0])
+        claves = [t[0] for t in candidatos]
+        pares = [(doc_id, data) for _, doc_id, data in candidatos]
+
+        if len(cliente._cache_consultas) >= 32:
+            cliente._cache_consultas.clear()
+        cliente._cache_consultas[firma] = (version, claves, pares)
+        return claves, pares
+
+    def _ejecutar(self):
+        """ Devuelve la lista de (doc_id, data) que cumplen la consulta. """
+        orden = self._ordenes_efectivos()
+        claves, pares = self._candidatos_ordenados(orden)
+        desde = 0
+        if self._cursor is not None:
+            limite_cursor = self._clave_cursor(orden)
+            n = len(limite_cursor)
+            desde = bisect.bisect_right(claves, limite_cursor, key=lambda k: k[:n])
+        hasta = len(pares) if self._limite is None else desde + self._limite
+        return pares[desde:hasta]
+
+    def stream(self, transaction=None, **kwargs):
+        cliente = self._coleccion_ref._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            resultados = self._ejecutar()
+            cliente._contar_lecturas(max(1, len(resultados)))
+            snapshots = [
+                SnapshotMemoria(
+                    DocumentoMemoria(self._coleccion_ref, doc_id),
+                    _proyectar(data, self._campos) if self._campos is not None else data,
+                    cliente._tiempos.get(f"{self._coleccion_ref.id}/{doc_id}")
+                )
+                for doc_id, data in resultados
+            ]
+        cliente._latencia_docs(len(snapshots))
+        yield from snapshots
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream(transaction=transaction))
+
+    def on_snapshot(self, callback):
+        """
+        Llama a callback(docs, cambios, read_time) con el resultado inicial y
+        luego cada vez que la consulta cambia. Las llamadas llegan desde un
+        hilo aparte, como en el SDK real.
+        """
+        escucha = EscuchaMemoria(self, callback)
+        self._coleccion_ref._cliente._agregar_escucha(escucha)
+        return escucha
+
+    # --- Agregaciones (se calculan "en el servidor": no viajan documentos) ---
+    def count(self, alias: str | None = None):
+        return AgregacionMemoria(self).count(alias)
+
+    def sum(self, field_ref: str, alias: str | None = None):
+        return AgregacionMemoria(self).sum(field_ref, alias)
+
+    def avg(self, field_ref: str, alias: str | None = None):
+        return AgregacionMemoria(self).avg(field_ref, alias)
+
+
+class AgregacionMemoria:
+    """ Equivalente de AggregationQuery. """
+
+    def __init__(self, consulta: ConsultaMemoria):
+        self._consulta = consulta
+        self._agregaciones = []
+
+    def _agregar(self, tipo, campo, alias):
+        alias = alias or f"field_{len(self._agregaciones) + 1}"
+        self._agregaciones.append((tipo, campo, alias))
+        return self
+
+    def count(self, alias=None):
+        return self._agregar('count', None, alias)
+
+    def sum(self, field_ref, alias=None):
+        return self._agregar('sum', field_ref, alias)
+
+    def avg(self, field_ref, alias=None):
+        return self._agregar('avg', field_ref, alias)
+
+    def get(self, transaction=None, **kwargs):
+        cliente = self._consulta._coleccion_ref._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            pares = self._consulta._ejecutar()
+            cliente._contar_lecturas(max(1, -(-len(pares) // 1000)))
+            fila = []
+            for tipo, campo, alias in self._agregaciones:
+                if tipo == 'count':
+                    fila.append(AggregationResult(alias, len(pares)))
+                    continue
+                numeros = [
+                    v for v in (_leer_campo(data, campo) for _, data in pares)
+                    if isinstance(v, (int, float)) and not isinstance(v, bool)
+                ]
+                if tipo == 'sum':
+                    fila.append(AggregationResult(alias, sum(numeros)))
+                else:
+                    fila.append(AggregationResult(alias, sum(numeros) / len(numeros) if numeros else None))
+        return [fila]
+
+    def stream(self, transaction=None, **kwargs):
+        yield from self.get(transaction)
+
+
+class TipoCambio(enum.Enum):
+    """ Equivalente de ChangeType. """
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class CambioMemoria:
+    """ Equivalente de DocumentChange. """
+
+    def __init__(self, tipo: TipoCambio, documento: SnapshotMemoria, old_index: int, new_index: int):
+        self.type = tipo
+        self.document = documento
+        self.old_index = old_index
+        self.new_index = new_index
+
+
+class EscuchaMemoria:
+    """ Equivalente de Watch: un listener activo sobre una consulta. """
+
+    def __init__(self, consulta: ConsultaMemoria, callback):
+        self._consulta = consulta
+        self._callback = callback
+        self._anterior = None  # {doc_id: data} del último snapshot entregado
+        self._ids_anteriores = []
+        self.activa = True
+
+    @property
+    def coleccion(self) -> str:
+        return self._consulta._coleccion_ref.id
+
+    def unsubscribe(self):
+        self.activa = False
+        self._consulta._coleccion_ref._cliente._quitar_escucha(self)
+
+    def _calcular(self):
+        """ (docs, cambios) desde el último snapshot, o None si no cambió nada. Requiere el lock. """
+        consulta = self._consulta
+        cliente = consulta._coleccion_ref._cliente
+        resultados = [
+            (doc_id, _proyectar(data, consulta._campos) if consulta._campos is not None else _copiar(data))
+            for doc_id, data in consulta._ejecutar()
+        ]
+        actual = dict(resultados)
+        ids = [doc_id for doc_id, _ in resultados]
+        posicion = {doc_id: i for i, doc_id in enumerate(ids)}
+        anterior = self._anterior or {}
+        posicion_anterior = {doc_id: i for i, doc_id in enumerate(self._ids_anteriores)}
+
+        def snapshot(doc_id, data):
+            return SnapshotMemoria(DocumentoMemoria(consulta._coleccion_ref, doc_id), data)
+
+        cambios = [
+            CambioMemoria(TipoCambio.REMOVED, snapshot(doc_id, data), posicion_anterior[doc_id], -1)
+            for doc_id, data in anterior.items() if doc_id not in actual
+        ]
+        for doc_id, data in resultados:
+            if doc_id not in anterior:
+                cambios.append(CambioMemoria(TipoCambio.ADDED, snapshot(doc_id, data), -1, posicion[doc_id]))
+            elif anterior[doc_id] != data:
+                cambios.append(CambioMemoria(
+                    TipoCambio.MODIFIED, snapshot(doc_id, data), posicion_anterior[doc_id], posicion[doc_id]
+                ))
+
+        inicial = self._anterior is None
+        if not inicial and not cambios:
+            return None
+        if inicial:
+            cliente._contar_lecturas(max(1, len(resultados)))
+        else:
+            entrantes = sum(1 for c in cambios if c.type is not TipoCambio.REMOVED)
+            if entrantes:
+                cliente._contar_lecturas(entrantes)
+        self._anterior = actual
+        self._ids_anteriores = ids
+        return [snapshot(doc_id, data) for doc_id, data in resultados], cambios
+
+
+class _Invertido:
+    """ Envoltorio para ordenar de forma descendente dentro de una tupla. """
+    __slots__ = ('k',)
+
+    def __init__(self, k):
+        self.k = k
+
+    def __lt__(self, otro):
+        return otro.k < self.k
+
+    def __gt__(self, otro):
+        return otro.k > self.k
+
+    def __eq__(self, otro):
+        return self.k == otro.k
+
+    def __le__(self, otro):
+        return not self.__gt__(otro)
+
+    def __ge__(self, otro):
+        return not self.__lt__(otro)
+
+
+class ColeccionMemoria(ConsultaMemoria):
+    """ Equivalente de CollectionReference. """
+
+    def __init__(self, cliente, nombre: str):
+        self._cliente = cliente
+        self.id = nombre
+        super().__init__(self)
+
+    @property
+    def _docs(self):
+        return self._cliente._colecciones.setdefault(self.id, {})
+
+    def document(self, document_id: str | None = None):
+        return DocumentoMemoria(self, document_id or _nuevo_id())
+
+    def add(self, document_data: dict, document_id: str | None = None, **kwargs):
+        ref = self.document(document_id)
+        if document_id:
+            ref.create(document_data)
+        else:
+            ref.set(document_data)
+        return _ahora(), ref
+
+    def list_documents(self):
+        with self._cliente._lock:
+            return [DocumentoMemoria(self, doc_id) for doc_id in list(self._docs)]
+
+
+class PrecondicionMemoria:
+    """ Equivalente de LastUpdateOption / ExistsOption (ver ClienteFirestoreMemoria.write_option). """
+    __slots__ = ('last_update_time', 'exists')
+
+    def __init__(self, last_update_time=None, exists=None):
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+
+class LoteMemoria:
+    """ Equivalente de WriteBatch: se aplica de forma atómica en commit(). """
+
+    MAX_OPERACIONES = 500
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self._ops = []
+
+    def __len__(self):
+        return len(self._ops)
+
+    def set(self, referencia, document_data, merge=False):
+        self._ops.append(('set', referencia, document_data, merge, None))
+        return self
+
+    def create(self, referencia, document_data):
+        self._ops.append(('create', referencia, document_data, False, None))
+        return self
+
+    def update(self, referencia, field_updates, option=None, **kwargs):
+        self._ops.append(('update', referencia, field_updates, False, option))
+        return self
+
+    def delete(self, referencia, option=None, **kwargs):
+        self._ops.append(('delete', referencia, None, False, option))
+        return self
+
+    def commit(self, **kwargs):
+        if len(self._ops) > self.MAX_OPERACIONES:
+            raise gexc.InvalidArgument(
+                f"maximum {self.MAX_OPERACIONES} writes allowed per request"
+            )
+        cliente = self._cliente
+        cliente._inicio_rpc()
+        with cliente._lock:
+            # Validamos todo antes de escribir nada: el lote es atómico.
+            for tipo, ref, _, _, option in self._ops:
+                if tipo == 'update':
+                    ref._verificar_existe()
+                elif tipo == 'create' and ref.id in ref._docs():
+                    raise gexc.AlreadyExists(f"Document already exists: {ref.path}")
+                ref._verificar_precondicion(option)
+            for tipo, ref, data, merge, _ in self._ops:
+                if tipo in ('set', 'create'):
+                    ref._set(data, merge)
+                elif tipo == 'update':
+                    ref._update(data)
+                else:
+                    ref._docs().pop(ref.id, None)
+                    ref._tocar()
+            cliente._contar_escrituras(len(self._ops))
+        resultados = [_ahora()] * len(self._ops)
+        self._ops = []
+        return resultados
+
+
+class ClienteFirestoreMemoria:
+    """
+    Cliente de Firestore en memoria.
+
+    latencia_ms simula el tiempo de ida y vuelta de cada llamada y
+    latencia_doc_us el coste de transferir cada documento leído.
+    """
+
+    def __init__(self, latencia_ms: float = 0.0, latencia_doc_us: float = 0.0):
+        self._colecciones: dict[str, dict[str, dict]] = {}
+        self._versiones: dict[str, int] = {}
+        # update_time de cada documento ('coleccion/id'), siempre creciente.
+        self._tiempos: dict[str, datetime.datetime] = {}
+        self._ultimo_tiempo = None
+        self._cache_consultas = {}
+        self._lock = threading.RLock()
+        # Listeners activos y aviso de colecciones modificadas para el hilo que los atiende.
+        self._escuchas: list[EscuchaMemoria] = []
+        self._avisos = queue.Queue()
+        self._hilo_escuchas = None
+        self.latencia_ms = latencia_ms
+        self.latencia_doc_us = latencia_doc_us
+        self.lecturas = 0
+        self.escrituras = 0
+        self.llamadas = 0
+        # Errores que lanzarán las próximas llamadas (ver simular_fallos).
+        self._fallos_simulados: list[Exception] = []
+
+    # --- API de Firestore ---
+    def collection(self, nombre: str) -> ColeccionMemoria:
+        return ColeccionMemoria(self, nombre)
+
+    def document(self, ruta: str) -> DocumentoMemoria:
+        coleccion, doc_id = ruta.split('/', 1)
+        return self.collection(coleccion).document(doc_id)
+
+    def batch(self) -> LoteMemoria:
+        return LoteMemoria(self)
+
+    @staticmethod
+    def write_option(last_update_time=None, exists=None) -> 'PrecondicionMemoria':
+        """ Precondición para update/delete: el documento no cambió desde last_update_time. """
+        return PrecondicionMemoria(last_update_time, exists)
+
+    def get_all(self, referencias, field_paths=None, **kwargs):
+        referencias = list(referencias)
+        self._inicio_rpc()
+        with self._lock:
+            snapshots = []
+            for ref in referencias:
+                data = ref._docs().get(ref.id)
+                if data is not None and field_paths:
+                    data = _proyectar(data, field_paths)
+                snapshots.append(SnapshotMemoria(ref, data, self._tiempos.get(ref.path)))
+            self._contar_lecturas(len(referencias))
+        yield from snapshots
+
+    def collections(self):
+        return [self.collection(nombre) for nombre in list(self._colecciones)]
+
+    # --- Utilidades del sustituto ---
+    def cargar(self, coleccion: str, documentos: dict[str, dict]):
+        """ Carga masiva sin contadores ni latencia (para sembrar datos). """
+        with self._lock:
+            self._colecciones.setdefault(coleccion, {}).update(documentos)
+            self._versiones[coleccion] = self._versiones.get(coleccion, 0) + 1
+            for doc_id in documentos:
+                self._tiempos[f"{coleccion}/{doc_id}"] = self._nuevo_tiempo()
+            self._avisar_cambio(coleccion)
+
+    def tamano(self, coleccion: str) -> int:
+        return len(self._colecciones.get(coleccion, {}))
+
+    def simular_fallos(self, n: int, error: type[Exception] = gexc.ServiceUnavailable):
+        """ Las próximas n llamadas (no los listeners) fallan con 'error'. """
+        with self._lock:
+            self._fallos_simulados.extend(error(f"Fallo simulado ({error.__name__})") for _ in range(n))
+
+    def reiniciar_contadores(self):
+        with self._lock:
+            self.lecturas = 0
+            self.escrituras = 0
+            self.llamadas = 0
+
+    def contadores(self) -> dict:
+        with self._lock:
+            return {'lecturas': self.lecturas, 'escrituras': self.escrituras, 'llamadas': self.llamadas}
+
+    def _nuevo_tiempo(self) -> datetime.datetime:
+        """ update_time de una escritura: nunca repite ni retrocede (como en el servidor). """
+        tiempo = _ahora()
+        if self._ultimo_tiempo is not None and tiempo <= self._ultimo_tiempo:
+            tiempo = self._ultimo_tiempo + datetime.timedelta(microseconds=1)
+        self._ultimo_tiempo = tiempo
+        return tiempo
+
+    def _contar_lecturas(self, n: int):
+        self.lecturas += n
+        self.llamadas += 1
+
+    def _contar_escrituras(self, n: int):
+        self.escrituras += n
+        self.llamadas += 1
+
+    def _inicio_rpc(self):
+        """ Comienzo de una llamada: latencia de ida y vuelta y, si hay, un fallo simulado. """
+        self._latencia_rpc()
+        if self._fallos_simulados:
+            with self._lock:
+                error = self._fallos_simulados.pop(0) if self._fallos_simulados else None
+            if error is not None:
+                raise error
+
+    def _latencia_rpc(self):
+        if self.latencia_ms:
+            self._dormir(self.latencia_ms / 1000.0)
+
+    def _latencia_docs(self, n: int):
+        if self.latencia_doc_us and n:
+            self._dormir(self.latencia_doc_us * n / 1_000_000.0)
+
+    @staticmethod
+    def _dormir(segundos: float):
+        esperas = _esperas_async.get()
+        if esperas is None:
+            time.sleep(segundos)
+        else:
+            esperas.append(segundos)
+
+    def asincrono(self) -> 'ClienteFirestoreMemoriaAsync':
+        """ El mismo cliente (datos y contadores) con el API de AsyncClient. """
+        return ClienteFirestoreMemoriaAsync(self)
+
+    # --- Listeners ---
+    def _agregar_escucha(self, escucha: EscuchaMemoria):
+        with self._lock:
+            self._escuchas.append(escucha)
+            if self._hilo_escuchas is None:
+                self._hilo_escuchas = threading.Thread(
+                    target=self._atender_escuchas, name='firestore-memoria-escuchas', daemon=True
+                )
+                self._hilo_escuchas.start()
+        self._avisos.put(escucha)
+
+    def _quitar_escucha(self, escucha: EscuchaMemoria):
+        with self._lock:
+            if escucha in self._escuchas:
+                self._escuchas.remove(escucha)
+
+    def _avisar_cambio(self, coleccion: str):
+        if self._escuchas:
+            self._avisos.put(coleccion)
+
+    def _atender_escuchas(self):
+        """ Agrupa los avisos pendientes y entrega a cada listener afectado un solo snapshot. """
+        while True:
+            avisos = [self._avisos.get()]
+            while True:
+                try:
+                    avisos.append(self._avisos.get_nowait())
+                except queue.Empty:
+                    break
+            colecciones = {a for a in avisos if isinstance(a, str)}
+            nuevas = [a for a in avisos if isinstance(a, EscuchaMemoria)]
+
+            self._latencia_rpc()
+            entregas = []
+            with self._lock:
+                for escucha in list(self._escuchas):
+                    if escucha in nuevas or escucha.coleccion in colecciones:
+                        resultado = escucha._calcular()
+                        if resultado is not None:
+                            entregas.append((escucha, resultado))
+            for escucha, (docs, cambios) in entregas:
+                if not escucha.activa:
+                    continue
+                try:
+                    escucha._callback(docs, cambios, _ahora())
+                except Exception as e:
+                    print(f"ERROR Listener en memoria: {e}")
+
+
+# --- API asíncrono (equivalente de AsyncClient) ---
+
+async def _esperar(funcion, *args, **kwargs):
+    """
+    Corre una operación del cliente síncrono sin dormir el hilo y después
+    espera su latencia con asyncio.sleep, así varias corrutinas pueden tener
+    llamadas en curso a la vez. Si la operación falla, el error llega después
+    de la latencia, como en la red.
+    """
+    esperas = []
+    token = _esperas_async.set(esperas)
+    try:
+        resultado = funcion(*args, **kwargs)
+    except Exception:
+        _esperas_async.reset(token)
+        await asyncio.sleep(sum(esperas))
+        raise
+    _esperas_async.reset(token)
+    await asyncio.sleep(sum(esperas))
+    return resultado
+
+
+def _snapshot_async(snapshot: SnapshotMemoria) -> SnapshotMemoria:
+    """ El mismo snapshot, con una referencia asíncrona. """
+    return SnapshotMemoria(DocumentoMemoriaAsync(snapshot.reference), snapshot._data, snapshot.update_time)
+
+
+class DocumentoMemoriaAsync:
+    """ Equivalente de AsyncDocumentReference. """
+
+    def __init__(self, documento: DocumentoMemoria):
+        self._documento = documento
+        self.id = documento.id
+
+    @property
+    def path(self):
+        return self._documento.path
+
+    async def get(self, field_paths=None, **kwargs):
+        return _snapshot_async(await _esperar(self._documento.get, field_paths))
+
+    async def set(self, document_data: dict, merge=False, **kwargs):
+        return await _esperar(self._documento.set, document_data, merge)
+
+    async def create(self, document_data: dict, **kwargs):
+        return await _esperar(self._documento.create, document_data)
+
+    async def update(self, field_updates: dict, option=None, **kwargs):
+        return await _esperar(self._documento.update, field_updates, option)
+
+    async def delete(self, **kwargs):
+        return await _esperar(self._documento.delete)
+
+
+class ConsultaMemoriaAsync:
+    """ Equivalente de AsyncQuery: los filtros se arman igual, la lectura se espera. """
+
+    def __init__(self, consulta: ConsultaMemoria):
+        self._consulta = consulta
+
+    def where(self, *args, **kwargs):
+        return ConsultaMemoriaAsync(self._consulta.where(*args, **kwargs))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING):
+        return ConsultaMemoriaAsync(self._consulta.order_by(field_path, direction))
+
+    def limit(self, count: int):
+        return ConsultaMemoriaAsync(self._consulta.limit(count))
+
+    def start_after(self, document_fields_or_snapshot):
+        return ConsultaMemoriaAsync(self._consulta.start_after(document_fields_or_snapshot))
+
+    def select(self, field_paths):
+        return ConsultaMemoriaAsync(self._consulta.select(field_paths))
+
+    async def stream(self, transaction=None, **kwargs):
+        for snapshot in await _esperar(self._consulta.get):
+            yield _snapshot_async(snapshot)
+
+    async def get(self, transaction=None, **kwargs):
+        return [snapshot async for snapshot in self.stream(transaction)]
+
+    def count(self, alias: str | None = None):
+        return AgregacionMemoriaAsync(AgregacionMemoria(self._consulta).count(alias))
+
+    def sum(self, field_ref: str, alias: str | None = None):
+        return AgregacionMemoriaAsync(AgregacionMemoria(self._consulta).sum(field_ref, alias))
+
+    def avg(self, field_ref: str, alias: str | None = None):
+        return AgregacionMemoriaAsync(AgregacionMemoria(self._consulta).avg(field_ref, alias))
+
+
+class AgregacionMemoriaAsync:
+    """ Equivalente de AsyncAggregationQuery. """
+
+    def __init__(self, agregacion: AgregacionMemoria):
+        self._agregacion = agregacion
+
+    def count(self, alias=None):
+        self._agregacion.count(alias)
+        return self
+
+    def sum(self, field_ref, alias=None):
+        self._agregacion.sum(field_ref, alias)
+        return self
+
+    def avg(self, field_ref, alias=None):
+        self._agregacion.avg(field_ref, alias)
+        return self
+
+    async def get(self, transaction=None, **kwargs):
+        return await _esperar(self._agregacion.get)
+
+
+class ColeccionMemoriaAsync(ConsultaMemoriaAsync):
+    """ Equivalente de AsyncCollectionReference. """
+
+    def __init__(self, coleccion: ColeccionMemoria):
+        super().__init__(coleccion)
+        self.id = coleccion.id
+
+    def document(self, document_id: str | None = None):
+        return DocumentoMemoriaAsync(self._consulta.document(document_id))
+
+    async def add(self, document_data: dict, document_id: str | None = None, **kwargs):
+        momento, ref = await _esperar(self._consulta.add, document_data, document_id)
+        return momento, DocumentoMemoriaAsync(ref)
+
+
+class LoteMemoriaAsync:
+    """ Equivalente de AsyncWriteBatch. """
+
+    def __init__(self, lote: LoteMemoria):
+        self._lote = lote
+
+    def __len__(self):
+        return len(self._lote)
+
+    def set(self, referencia, document_data, merge=False):
+        self._lote.set(referencia._documento, document_data, merge)
+        return self
+
+    def create(self, referencia, document_data):
+        self._lote.create(referencia._documento, document_data)
+        return self
+
+    def update(self, referencia, field_updates, option=None, **kwargs):
+        self._lote.update(referencia._documento, field_updates, option)
+        return self
+
+    def delete(self, referencia, option=None, **kwargs):
+        self._lote.delete(referencia._documento, option)
+        return self
+
+    async def commit(self, **kwargs):
+        return await _esperar(self._lote.commit)
+
+
+class ClienteFirestoreMemoriaAsync:
+    """
+    Vista asíncrona de un ClienteFirestoreMemoria: comparte datos, contadores
+    y fallos simulados con él (ver ClienteFirestoreMemoria.asincrono).
+    """
+
+    def __init__(self, cliente: ClienteFirestoreMemoria):
+        self._cliente = cliente
+
+    def collection(self, nombre: str) -> ColeccionMemoriaAsync:
+        return ColeccionMemoriaAsync(self._cliente.collection(nombre))
+
+    def document(self, ruta: str) -> DocumentoMemoriaAsync:
+        return DocumentoMemoriaAsync(self._cliente.document(ruta))
+
+    def batch(self) -> LoteMemoriaAsync:
+        return LoteMemoriaAsync(self._cliente.batch())
+
+    write_option = staticmethod(ClienteFirestoreMemoria.write_option)
+
+    async def get_all(self, referencias, field_paths=None, **kwargs):
+        documentos = [ref._documento for ref in referencias]
+        snapshots = await _esperar(lambda: list(self._cliente.get_all(documentos, field_paths)))
+        for snapshot in snapshots:
+            yield _snapshot_async(snapshot)
+
+    def contadores(self) -> dict:
+        return self._cliente.contadores()
@@ -0,0 +1,44 @@
+# app/backend/migraciones.py
+"""
+Migraciones de datos que se ejecutan una sola vez contra Firestore.
+
+Uso:
+    python -m app.backend.migraciones
+"""
+
+from dotenv import load_dotenv
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.finanzas_repo import FinanzasRepo
+from app.model.data.inventario_repo import InventarioRepo
+
+
+def ejecutar_migraciones(db, is_ready) -> bool:
+    """ Corre todas las migraciones. Son idempotentes: se pueden repetir. """
+    inventario_repo = InventarioRepo(db, is_ready)
+
+    n = inventario_repo.migrar_campos_derivados()
+    if n < 0:
+        print("❌ Falló la migración de 'nombre_norm'/'valor_total' en inventario.")
+        return False
+    print(f"✅ Inventario: {n} productos con 'nombre_norm'/'valor_total' actualizados.")
+
+    finanzas_repo = FinanzasRepo(db, is_ready)
+    n = finanzas_repo.reconstruir_resumenes_diarios()
+    if n < 0:
+        print("❌ Falló la reconstrucción de los resúmenes diarios de ingresos.")
+        return False
+    print(f"✅ Finanzas: {n} resúmenes diarios reconstruidos desde el historial de pedidos.")
+
+    n = DbRepo(db, is_ready).migrar_indices_usuarios()
+    if n < 0:
+        print("❌ Falló la migración de 'nombre_norm'/'email_norm' en usuarios.")
+        return False
+    print(f"✅ Personal: {n} usuarios con 'nombre_norm'/'email_norm' actualizados.")
+    return True
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    from app.backend.firebase_init import db, is_ready
+    ejecutar_migraciones(db, is_ready)
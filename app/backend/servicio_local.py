@@ -0,0 +1,585 @@
+# app/backend/servicio_local.py
+"""
+Servicio local del restaurante: un solo proceso con los repositorios y los
+ViewModels, y terminales livianas que le hablan por la red local.
+
+Cada caja ya no abre su propio cliente de Firestore: el servicio tiene una
+sola conexión, un solo listener de pedidos activos y un solo juego de
+cachés (menú, perfiles, contexto del asistente) para todas las terminales.
+
+Protocolo: JSON, un mensaje por línea, sobre TCP.
+    → {"id": 1, "vm": "pedidos", "metodo": "crear_pedido", "args": [...], "kwargs": {...}, "accion": "Pedidos > 2"}
+    ← {"id": 1, "ok": true, "resultado": ...}    o    {"id": 1, "ok": false, "error": "..."}
+    → {"id": 2, "vm": "auth", "atributo": "usuario_actual"}
+    → {"id": 3, "describir": true}                 (métodos y atributos que la sesión puede usar)
+    → {"cancelar": 4}                              (corta una respuesta en curso)
+Los generadores y las respuestas del asistente llegan por partes:
+    ← {"id": 4, "ok": true, "flujo": true}, {"id": 4, "fragmento": ...}, ..., {"id": 4, "fin": true, ...}
+Si el servicio tiene clave, el primer mensaje debe ser {"clave": "..."}.
+Fuera de la máquina local (host que no es loopback) la clave es obligatoria.
+
+Todo se autoriza con la sesión de la conexión (métodos, atributos,
+describir y estadísticas): salvo iniciar y cerrar sesión, hace falta un
+usuario_actual en el ViewModel 'auth' cuyo rol incluya el módulo
+(auth.puede_usar, el mismo mapa de roles de la consola). describir solo
+muestra lo que la sesión puede usar; la terminal lo vuelve a pedir al
+iniciar o cerrar sesión. El usuario de argumentos como cajero_uid lo pone
+el servicio con la sesión, no la terminal. Los métodos que abren archivos
+por ruta (importar/exportar inventario) no se publican: la ruta sería del
+equipo del servicio, no de la terminal.
+
+Los ViewModels compartidos (pedidos, inventario, finanzas, personal) no
+guardan estado de usuario. auth y ai sí (sesión y conversación), así que se
+crea uno por conexión; los del asistente comparten la caché de contexto.
+"""
+
+import asyncio
+import contextvars
+import dataclasses
+import datetime
+import functools
+import hmac
+import inspect
+import ipaddress
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.model.data.instrumentacion import accion_actual, marcar_accion, reporte_estadisticas
+from app.model.domain.finanzas import MovimientoFinanciero
+from app.model.domain.pedido import ItemPedido, Pedido, ProductoInventario
+from app.model.domain.personal import Empleado
+from app.model.domain.usuario import Usuario
+
+HOST_POR_DEFECTO = '127.0.0.1'
+PUERTO_POR_DEFECTO = 8765
+# Hilos para las llamadas de los ViewModels (bloqueantes). Una pantalla de
+# cocina ocupa uno mientras espera cambios.
+MAX_HILOS_SERVICIO = 32
+# Tamaño máximo de una línea del protocolo.
+MAX_LINEA_BYTES = 16 * 1024 * 1024
+TIMEOUT_CONEXION_SEGUNDOS = 5.0
+
+# Registros de dominio que viajan como objetos (y no como diccionarios).
+TIPOS_TRANSPORTABLES = {
+    clase.__name__: clase
+    for clase in (Usuario, Empleado, ItemPedido, Pedido, ProductoInventario, MovimientoFinanciero)
+}
+
+# Métodos que se pueden llamar sin sesión iniciada: (vm, método).
+METODOS_SIN_SESION = frozenset({
+    ('auth', 'intentar_login'),
+    ('auth', 'cerrar_sesion'),
+    ('auth', 'verificar_rol_acceso'),
+    ('auth', 'puede_usar'),
+})
+# Atributos que se pueden leer sin sesión iniciada: (vm, atributo).
+ATRIBUTOS_SIN_SESION = frozenset({
+    ('auth', 'usuario_actual'),
+    ('ai', 'is_ready'),
+})
+# Métodos tras los que cambia lo que la sesión puede usar.
+METODOS_DE_SESION = frozenset({('auth', 'intentar_login'), ('auth', 'cerrar_sesion')})
+# Métodos que reciben una ruta de archivo: no se publican a las terminales.
+METODOS_SOLO_LOCALES = frozenset({
+    ('inventario', 'importar_inventario'),
+    ('inventario', 'exportar_inventario'),
+})
+# Argumento con el uid del usuario: lo completa el servicio con la sesión.
+IDENTIDAD_DE_SESION = {
+    ('pedidos', 'crear_pedido'): 'cajero_uid',
+}
+# Módulo que exigen las estadísticas de instrumentación.
+MODULO_ESTADISTICAS = 'estadisticas'
+# Módulo que exige un método cuando no es el nombre de su ViewModel.
+MODULO_DE_METODO = {
+    ('auth', 'registrar_usuario_y_rol'): 'registro',
+}
+
+_FIN = object()
+
+
+class ErrorServicio(Exception):
+    """ El servicio respondió con un error (o no se pudo hablar con él). """
+
+
+# --- Codificación ---
+
+def a_json(valor):
+    """ Convierte el resultado de un ViewModel en algo serializable. """
+    if valor is None or isinstance(valor, (str, bool, int, float)):
+        return valor
+    if isinstance(valor, (list, tuple, set)):
+        return [a_json(v) for v in valor]
+    if isinstance(valor, dict):
+        return {str(k): a_json(v) for k, v in valor.items()}
+    if isinstance(valor, datetime.datetime):
+        return {'__fecha__': valor.isoformat()}
+    if dataclasses.is_dataclass(valor) and type(valor).__name__ in TIPOS_TRANSPORTABLES:
+        campos = {c.name: a_json(getattr(valor, c.name)) for c in dataclasses.fields(valor)}
+        return {'__tipo__': type(valor).__name__, 'campos': campos}
+    return str(valor)
+
+
+def de_json(valor):
+    """ Inverso de a_json. """
+    if isinstance(valor, list):
+        return [de_json(v) for v in valor]
+    if isinstance(valor, dict):
+        if '__fecha__' in valor:
+            return datetime.datetime.fromisoformat(valor['__fecha__'])
+        if '__tipo__' in valor and valor['__tipo__'] in TIPOS_TRANSPORTABLES:
+            campos = {k: de_json(v) for k, v in valor['campos'].items()}
+            return TIPOS_TRANSPORTABLES[valor['__tipo__']](**campos)
+        return {k: de_json(v) for k, v in valor.items()}
+    return valor
+
+
+def _transportable(valor) -> bool:
+    if valor is None or isinstance(valor, (str, bool, int, float, datetime.datetime)):
+        return True
+    return dataclasses.is_dataclass(valor) and type(valor).__name__ in TIPOS_TRANSPORTABLES
+
+
+@functools.lru_cache(maxsize=None)
+def _miembros_de_clase(clase) -> tuple[frozenset, frozenset]:
+    metodos, propiedades = set(), set()
+    for nombre, miembro in inspect.getmembers(clase):
+        if nombre.startswith('_'):
+            continue
+        if inspect.isfunction(miembro):
+            metodos.add(nombre)
+        elif isinstance(miembro, property):
+            propiedades.add(nombre)
+    return frozenset(metodos), frozenset(propiedades)
+
+
+def es_local(host: str) -> bool:
+    """ True si el host solo acepta conexiones de esta misma máquina. """
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _usuario(sesion: dict):
+    auth = sesion.get('auth')
+    return getattr(auth, 'usuario_actual', None) if auth is not None else None
+
+
+def _motivo_modulo(sesion: dict, modulo: str) -> str | None:
+    """ Por qué la sesión no puede usar el módulo, o None si puede. """
+    if not _usuario(sesion):
+        return "Inicia sesión para usar el servicio."
+    if not sesion['auth'].puede_usar(modulo):
+        return f"Tu rol no tiene acceso al módulo '{modulo}'."
+    return None
+
+
+def _motivo(sesion: dict, nombre_vm: str, miembro: str, libres: frozenset) -> str | None:
+    """ Por qué la sesión no puede usar vm.miembro (método o atributo), o None si puede. """
+    if (nombre_vm, miembro) in METODOS_SOLO_LOCALES:
+        return f"'{miembro}' solo está disponible en el equipo del servicio."
+    if (nombre_vm, miembro) in libres:
+        return None
+    return _motivo_modulo(sesion, MODULO_DE_METODO.get((nombre_vm, miembro), nombre_vm))
+
+
+def autorizar(sesion: dict, nombre_vm: str, metodo: str, libres: frozenset = METODOS_SIN_SESION):
+    """ Lanza ErrorServicio si la sesión no puede llamar vm.metodo (o leer vm.atributo, con libres=ATRIBUTOS_SIN_SESION). """
+    motivo = _motivo(sesion, nombre_vm, metodo, libres)
+    if motivo:
+        raise ErrorServicio(motivo)
+
+
+def describir_sesion(sesion: dict) -> dict:
+    """ describir() de cada ViewModel, con solo lo que la sesión puede usar ahora. """
+    resultado = {}
+    for nombre, vm in sesion.items():
+        descripcion = describir(vm)
+        resultado[nombre] = {
+            'metodos': [m for m in descripcion['metodos'] if not _motivo(sesion, nombre, m, METODOS_SIN_SESION)],
+            'atributos': [a for a in descripcion['atributos'] if not _motivo(sesion, nombre, a, ATRIBUTOS_SIN_SESION)],
+        }
+    return resultado
+
+
+def _con_identidad(funcion, args: list, kwargs: dict, parametro: str, uid: str) -> tuple[tuple, dict]:
+    """ Los argumentos de la llamada con 'parametro' reemplazado por el uid de la sesión. """
+    enlazados = inspect.signature(funcion).bind_partial(*args, **kwargs)
+    enlazados.arguments[parametro] = uid
+    return enlazados.args, enlazados.kwargs
+
+
+def describir(vm) -> dict:
+    """ Métodos públicos y atributos de datos (no repositorios ni cachés) de un ViewModel. """
+    metodos, propiedades = _miembros_de_clase(type(vm))
+    atributos = propiedades | {n for n, v in vars(vm).items() if not n.startswith('_') and _transportable(v)}
+    return {'metodos': sorted(metodos), 'atributos': sorted(atributos)}
+
+
+# --- Servidor ---
+
+class ServicioLocal:
+    """
+    compartidos: {nombre: ViewModel} para todas las conexiones.
+    por_sesion: {nombre: fabrica()} para los ViewModels con estado de usuario;
+    debe incluir 'auth', que guarda el usuario de cada conexión.
+    Lanza ErrorServicio si se pide escuchar fuera de loopback sin clave.
+    """
+
+    def __init__(self, compartidos: dict, por_sesion: dict, host: str = HOST_POR_DEFECTO,
+                 puerto: int = PUERTO_POR_DEFECTO, clave: str | None = None,
+                 max_hilos: int = MAX_HILOS_SERVICIO):
+        if not clave and not es_local(host):
+            raise ErrorServicio(f"El servicio en {host} queda abierto a la red: configura una clave.")
+        self.compartidos = compartidos
+        self.por_sesion = por_sesion
+        self.host = host
+        self.puerto = puerto
+        self.clave = clave
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='servicio')
+        self._servidor = None
+        self._conexiones = 0
+
+    async def iniciar(self):
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto, limit=MAX_LINEA_BYTES)
+        # Con puerto=0 el sistema elige uno libre.
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def servir(self):
+        if self._servidor is None:
+            await self.iniciar()
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def conexiones(self) -> int:
+        return self._conexiones
+
+    def _crear_sesion(self) -> dict:
+        sesion = dict(self.compartidos)
+        for nombre, fabrica in self.por_sesion.items():
+            sesion[nombre] = fabrica()
+        return sesion
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        self._conexiones += 1
+        lock_escritura = asyncio.Lock()
+        # Flujos en curso de esta conexión: {id: respuesta del asistente o None}.
+        flujos: dict = {}
+        tareas: set = set()
+
+        async def responder(mensaje: dict):
+            async with lock_escritura:
+                escritor.write(json.dumps(mensaje, ensure_ascii=False).encode('utf-8') + b'\n')
+                await escritor.drain()
+
+        try:
+            if self.clave and not await self._autenticar(lector, responder):
+                return
+            sesion = await asyncio.get_running_loop().run_in_executor(self._pool, self._crear_sesion)
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    mensaje = json.loads(linea)
+                except ValueError:
+                    await responder({'id': None, 'ok': False, 'error': 'Mensaje no es JSON.'})
+                    continue
+                if 'cancelar' in mensaje:
+                    if mensaje['cancelar'] in flujos:
+                        en_curso = flujos.pop(mensaje['cancelar'])
+                        if en_curso is not None:
+                            en_curso.cancelar()
+                    continue
+                # Cada pedido en su tarea: una pantalla de cocina esperando no frena a los demás.
+                tarea = asyncio.create_task(self._procesar(mensaje, sesion, responder, flujos))
+                tareas.add(tarea)
+                tarea.add_done_callback(tareas.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conexiones -= 1
+            for tarea in tareas:
+                tarea.cancel()
+            escritor.close()
+
+    async def _autenticar(self, lector, responder) -> bool:
+        try:
+            mensaje = json.loads(await asyncio.wait_for(lector.readline(), TIMEOUT_CONEXION_SEGUNDOS))
+        except (ValueError, asyncio.TimeoutError):
+            mensaje = {}
+        if hmac.compare_digest(str(mensaje.get('clave', '')), self.clave):
+            await responder({'id': None, 'ok': True})
+            return True
+        await responder({'id': None, 'ok': False, 'error': 'Clave del servicio incorrecta.'})
+        return False
+
+    async def _procesar(self, mensaje: dict, sesion: dict, responder, flujos: dict):
+        id_ = mensaje.get('id')
+        loop = asyncio.get_running_loop()
+        try:
+            if mensaje.get('describir'):
+                await responder({'id': id_, 'ok': True, 'resultado': describir_sesion(sesion)})
+                return
+            if mensaje.get('estadisticas'):
+                motivo = _motivo_modulo(sesion, MODULO_ESTADISTICAS)
+                if motivo:
+                    raise ErrorServicio(motivo)
+                lineas = await loop.run_in_executor(self._pool, reporte_estadisticas)
+                await responder({'id': id_, 'ok': True, 'resultado': lineas})
+                return
+
+            vm = sesion.get(mensaje.get('vm'))
+            if vm is None:
+                raise ErrorServicio(f"ViewModel desconocido: {mensaje.get('vm')}")
+            descripcion = describir(vm)
+
+            if 'atributo' in mensaje:
+                if mensaje['atributo'] not in descripcion['atributos']:
+                    raise ErrorServicio(f"Atributo no disponible: {mensaje['atributo']}")
+                autorizar(sesion, mensaje['vm'], mensaje['atributo'], ATRIBUTOS_SIN_SESION)
+                valor = await loop.run_in_executor(self._pool, getattr, vm, mensaje['atributo'])
+                await responder({'id': id_, 'ok': True, 'resultado': a_json(valor)})
+                return
+
+            metodo = mensaje.get('metodo')
+            if metodo not in descripcion['metodos']:
+                raise ErrorServicio(f"Método no disponible: {metodo}")
+            autorizar(sesion, mensaje['vm'], metodo)
+            args = de_json(mensaje.get('args') or [])
+            kwargs = de_json(mensaje.get('kwargs') or {})
+            funcion = getattr(vm, metodo)
+            parametro = IDENTIDAD_DE_SESION.get((mensaje['vm'], metodo))
+            if parametro:
+                args, kwargs = _con_identidad(funcion, args, kwargs, parametro, _usuario(sesion).uid)
+
+            # Cada llamada corre con la acción de menú de la terminal que la pidió.
+            contexto = contextvars.copy_context()
+            contexto.run(marcar_accion, mensaje.get('accion'))
+            resultado = await loop.run_in_executor(
+                self._pool, functools.partial(contexto.run, funcion, *args, **kwargs)
+            )
+
+            if inspect.isgenerator(resultado):
+                await self._enviar_flujo(id_, resultado, None, contexto, responder, flujos)
+            elif hasattr(resultado, 'fragmentos') and hasattr(resultado, 'cancelar'):
+                await self._enviar_flujo(id_, resultado.fragmentos(), resultado, contexto, responder, flujos)
+            else:
+                await responder({'id': id_, 'ok': True, 'resultado': a_json(resultado)})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            try:
+                await responder({'id': id_, 'ok': False, 'error': str(e) or type(e).__name__})
+            except ConnectionError:
+                pass
+
+    async def _enviar_flujo(self, id_, iterador, en_curso, contexto, responder, flujos: dict):
+        """ Envía un generador (o una respuesta del asistente) fragmento por fragmento. """
+        loop = asyncio.get_running_loop()
+        flujos[id_] = en_curso
+        await responder({'id': id_, 'ok': True, 'flujo': True})
+        try:
+            # Un {"cancelar": id} saca el flujo del diccionario (y corta la respuesta del asistente).
+            while id_ in flujos:
+                fragmento = await loop.run_in_executor(self._pool, contexto.run, next, iterador, _FIN)
+                if fragmento is _FIN:
+                    break
+                await responder({'id': id_, 'fragmento': a_json(fragmento)})
+        except Exception as e:
+            await responder({'id': id_, 'fin': True, 'error': str(e)})
+            return
+        finally:
+            flujos.pop(id_, None)
+        fin = {'id': id_, 'fin': True}
+        if en_curso is not None:
+            fin.update(ttft=en_curso.ttft, duracion=en_curso.duracion)
+        await responder(fin)
+
+
+def ejecutar_servicio(servicio: ServicioLocal):
+    """ Corre el servicio hasta Ctrl-C. """
+    async def _principal():
+        await servicio.iniciar()
+        print(f"Servicio local escuchando en {servicio.host}:{servicio.puerto} (Ctrl-C para detener).")
+        try:
+            await servicio.servir()
+        finally:
+            await servicio.detener()
+
+    try:
+        asyncio.run(_principal())
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+
+
+# --- Cliente (terminal liviana) ---
+
+class ClienteServicio:
+    """ Conexión de una terminal con el servicio. Las llamadas son bloqueantes, como las de los ViewModels. """
+
+    def __init__(self, host: str = HOST_POR_DEFECTO, puerto: int = PUERTO_POR_DEFECTO, clave: str | None = None):
+        self.host = host
+        self.puerto = puerto
+        self._lock = threading.Lock()
+        self._siguiente_id = 0
+        self._socket = socket.create_connection((host, puerto), timeout=TIMEOUT_CONEXION_SEGUNDOS)
+        self._socket.settimeout(None)
+        self._lector = self._socket.makefile('rb')
+        if clave is not None:
+            self._enviar({'clave': clave})
+            respuesta = self._leer_mensaje()
+            if not respuesta.get('ok'):
+                self.cerrar()
+                raise ErrorServicio(respuesta.get('error', 'Clave rechazada.'))
+        self._descripcion = {}
+        self.actualizar_descripcion()
+
+    def _enviar(self, mensaje: dict):
+        self._socket.sendall(json.dumps(mensaje, ensure_ascii=False).encode('utf-8') + b'\n')
+
+    def _leer_mensaje(self) -> dict:
+        while True:
+            linea = self._lector.readline()
+            if not linea:
+                raise ErrorServicio("El servicio local cerró la conexión.")
+            try:
+                return json.loads(linea)
+            except ValueError:
+                # Resto de una línea que quedó a medias (p. ej. por un Ctrl-C): se descarta.
+                continue
+
+    def _nuevo_id(self) -> int:
+        self._siguiente_id += 1
+        return self._siguiente_id
+
+    def _esperar(self, id_) -> dict:
+        """ Siguiente mensaje de id_ (descarta lo que quede de pedidos cancelados). """
+        while True:
+            mensaje = self._leer_mensaje()
+            if mensaje.get('id') == id_:
+                return mensaje
+
+    def _pedir(self, mensaje: dict):
+        with self._lock:
+            id_ = mensaje['id'] = self._nuevo_id()
+            self._enviar(mensaje)
+            respuesta = self._esperar(id_)
+            if not respuesta.get('ok'):
+                raise ErrorServicio(respuesta.get('error', 'Error desconocido del servicio.'))
+            if not respuesta.get('flujo'):
+                return de_json(respuesta.get('resultado'))
+        return FlujoRemoto(self, id_)
+
+    def actualizar_descripcion(self):
+        """ Vuelve a pedir qué métodos y atributos puede usar la sesión (cambia al iniciar o cerrar sesión). """
+        self._descripcion = {
+            nombre: {'metodos': set(d['metodos']), 'atributos': set(d['atributos'])}
+            for nombre, d in self._pedir({'describir': True}).items()
+        }
+
+    def llamar(self, vm: str, metodo: str, *args, **kwargs):
+        resultado = self._pedir({
+            'vm': vm, 'metodo': metodo, 'args': a_json(list(args)), 'kwargs': a_json(kwargs),
+            'accion': accion_actual(),
+        })
+        if (vm, metodo) in METODOS_DE_SESION:
+            self.actualizar_descripcion()
+        return resultado
+
+    def leer(self, vm: str, atributo: str):
+        return self._pedir({'vm': vm, 'atributo': atributo})
+
+    def estadisticas(self) -> list[str]:
+        """ Reporte de instrumentación del servicio (el que cuenta: ahí están los repositorios). """
+        return self._pedir({'estadisticas': True})
+
+    def cancelar(self, id_):
+        with self._lock:
+            self._enviar({'cancelar': id_})
+
+    def vista(self, nombre: str) -> 'VistaRemota':
+        if nombre not in self._descripcion:
+            raise ErrorServicio(f"El servicio no publica el ViewModel '{nombre}'.")
+        return VistaRemota(self, nombre)
+
+    def cerrar(self):
+        try:
+            self._lector.close()
+            self._socket.close()
+        except OSError:
+            pass
+
+
+class FlujoRemoto:
+    """
+    Resultado que llega por partes. Se puede iterar como el generador
+    original y ofrece fragmentos()/cancelar()/ttft/duracion como una
+    RespuestaEnCurso del asistente.
+    """
+
+    def __init__(self, cliente: ClienteServicio, id_):
+        self._cliente = cliente
+        self._id = id_
+        self._terminado = False
+        self.ttft = None
+        self.duracion = None
+
+    def __iter__(self):
+        return self.fragmentos()
+
+    def fragmentos(self):
+        while not self._terminado:
+            with self._cliente._lock:
+                mensaje = self._cliente._esperar(self._id)
+            if mensaje.get('fin'):
+                self._terminado = True
+                self.ttft = mensaje.get('ttft')
+                self.duracion = mensaje.get('duracion')
+                if mensaje.get('error'):
+                    raise ErrorServicio(mensaje['error'])
+                return
+            yield de_json(mensaje.get('fragmento'))
+
+    def cancelar(self):
+        if not self._terminado:
+            self._terminado = True
+            self._cliente.cancelar(self._id)
+
+
+class VistaRemota:
+    """
+    Se usa igual que el ViewModel que representa, con los métodos y
+    atributos que la sesión puede usar (hasattr sirve para saber si uno está).
+    """
+
+    def __init__(self, cliente: ClienteServicio, nombre: str):
+        self._cliente = cliente
+        self._nombre = nombre
+
+    def __getattr__(self, atributo):
+        if atributo.startswith('_'):
+            raise AttributeError(atributo)
+        for intento in range(2):
+            descripcion = self._cliente._descripcion.get(self._nombre, {'metodos': (), 'atributos': ()})
+            if atributo in descripcion['metodos']:
+                return lambda *args, **kwargs: self._cliente.llamar(self._nombre, atributo, *args, **kwargs)
+            if atributo in descripcion['atributos']:
+                return self._cliente.leer(self._nombre, atributo)
+            if intento == 0:
+                # Pudo cambiar la sesión desde la última descripción.
+                self._cliente.actualizar_descripcion()
+        raise AttributeError(f"'{self._nombre}' no tiene '{atributo}' en el servicio local.")
@@ -0,0 +1,242 @@
+# app/model/data/archivos_inventario.py
+"""
+Lectura y escritura de archivos de inventario (CSV, JSON Lines y JSON).
+
+Todo se procesa fila por fila: un archivo de decenas de miles de productos
+no se carga completo en memoria, ni al importar ni al exportar.
+
+Columnas: nombre, cantidad, costo (también se aceptan 'producto', 'Nombre',
+'qty' y 'precio'/'precio_costo', como en los documentos antiguos).
+"""
+
+import csv
+import json
+import math
+import os
+import re
+
+COLUMNAS_EXPORTACION = ('nombre', 'cantidad', 'costo', 'valor_total')
+
+# Tamaño de cada lectura al recorrer un arreglo JSON.
+_TAM_BLOQUE_JSON = 64 * 1024
+# Espacios y comas entre los elementos del arreglo.
+_SEPARADORES = re.compile(r'[\s,]*')
+
+_ALIAS_NOMBRE = ('nombre', 'Nombre', 'producto', 'producto_nombre')
+_ALIAS_CANTIDAD = ('cantidad', 'Cantidad', 'qty')
+_ALIAS_COSTO = ('costo', 'Costo', 'precio', 'precio_costo')
+
+
+class FilaInvalida(ValueError):
+    """ Una fila del archivo que no se pudo interpretar. """
+
+    def __init__(self, linea: int, motivo: str):
+        super().__init__(f"Fila {linea}: {motivo}")
+        self.linea = linea
+        self.motivo = motivo
+
+
+def formato_de_ruta(ruta: str) -> str:
+    """ 'csv', 'jsonl' o 'json' según la extensión del archivo. """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        return 'json'
+    return 'csv'
+
+
+def _agrupado(entero: str, separador: str) -> bool:
+    """ '1.500.000' con separador '.': grupos de tres cifras tras el primero. """
+    return re.fullmatch(r'\d{1,3}(?:' + re.escape(separador) + r'\d{3})+', entero) is not None
+
+
+def _numero(texto) -> float:
+    """
+    Acepta '1500.5', '1500,5', '1.500,50', '1,500.50' y '1.500.000'. Con los
+    dos separadores, el último es el decimal (como en registrar_movimiento).
+    Un solo separador seguido de exactamente tres cifras ('1.500', '1,500')
+    puede ser de miles o decimal: se rechaza con ValueError.
+    """
+    if isinstance(texto, (int, float)):
+        return float(texto)
+    original = str(texto or '').strip()
+    texto = original.replace('$', '').replace(' ', '')
+    signo = ''
+    if texto[:1] in ('-', '+'):
+        signo, texto = texto[0], texto[1:]
+
+    puntos, comas = texto.count('.'), texto.count(',')
+    if puntos and comas:
+        decimal = '.' if texto.rfind('.') > texto.rfind(',') else ','
+        miles = ',' if decimal == '.' else '.'
+        entero, _, fraccion = texto.rpartition(decimal)
+        if decimal in entero or not _agrupado(entero, miles):
+            raise ValueError(f"'{original}' no es un número válido")
+        texto = entero.replace(miles, '') + '.' + fraccion
+    elif puntos + comas > 1:
+        separador = '.' if puntos else ','
+        if not _agrupado(texto, separador):
+            raise ValueError(f"'{original}' no es un número válido")
+        texto = texto.replace(separador, '')
+    elif puntos + comas == 1:
+        entero, _, fraccion = texto.partition('.' if puntos else ',')
+        if len(fraccion) == 3 and entero.lstrip('0'):
+            raise ValueError(f"'{original}' es ambiguo (¿separador de miles o decimal?)")
+        texto = entero + '.' + fraccion
+
+    if not re.fullmatch(r'\d+(?:\.\d*)?|\.\d+', texto):
+        raise ValueError(f"'{original}' no es un número válido")
+    valor = float(signo + texto)
+    if not math.isfinite(valor):
+        raise ValueError(f"'{original}' no es un número válido")
+    return valor
+
+
+def _primero(fila: dict, alias: tuple):
+    for clave in alias:
+        if fila.get(clave) not in (None, ''):
+            return fila[clave]
+    return None
+
+
+def _producto(linea: int, fila) -> tuple[str, float, float]:
+    if not isinstance(fila, dict):
+        raise FilaInvalida(linea, "no es un objeto con columnas.")
+    nombre = str(_primero(fila, _ALIAS_NOMBRE) or '').strip()
+    if not nombre:
+        raise FilaInvalida(linea, "falta el nombre.")
+    try:
+        cantidad = _numero(_primero(fila, _ALIAS_CANTIDAD) or 0)
+        costo = _numero(_primero(fila, _ALIAS_COSTO) or 0)
+    except ValueError as e:
+        raise FilaInvalida(linea, f"cantidad y costo deben ser números ({e}).")
+    return nombre, cantidad, costo
+
+
+def _filas_csv(archivo):
+    muestra = archivo.read(4096)
+    archivo.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    # La línea 1 es el encabezado.
+    for linea, fila in enumerate(csv.DictReader(archivo, dialect=dialecto), start=2):
+        yield linea, {(k or '').strip(): v for k, v in fila.items()}
+
+
+def _filas_jsonl(archivo):
+    for linea, texto in enumerate(archivo, start=1):
+        if not texto.strip():
+            continue
+        try:
+            yield linea, json.loads(texto)
+        except json.JSONDecodeError as e:
+            yield linea, FilaInvalida(linea, f"JSON inválido ({e.msg}).")
+
+
+def _filas_json(archivo):
+    """ Recorre un arreglo JSON de objetos leyendo el archivo por bloques. """
+    decodificador = json.JSONDecoder()
+    bufer = archivo.read(_TAM_BLOQUE_JSON)
+    pos = _SEPARADORES.match(bufer).end()
+    if not bufer.startswith('[', pos):
+        raise ValueError("El archivo JSON debe ser un arreglo de productos.")
+    pos += 1
+    numero = 0
+    while True:
+        pos = _SEPARADORES.match(bufer, pos).end()
+        if bufer.startswith(']', pos):
+            return
+        try:
+            objeto, pos = decodificador.raw_decode(bufer, pos)
+        except json.JSONDecodeError:
+            # El producto quedó partido entre dos bloques: se lee el siguiente.
+            bloque = archivo.read(_TAM_BLOQUE_JSON)
+            if not bloque:
+                raise ValueError(f"JSON inválido después del producto {numero}.")
+            bufer = bufer[pos:] + bloque
+            pos = 0
+            continue
+        numero += 1
+        yield numero, objeto
+
+
+def leer_productos(ruta: str):
+    """
+    Genera (linea, (nombre, cantidad, costo)) por cada fila válida, o
+    (linea, FilaInvalida) por cada fila que no se pudo interpretar.
+    En JSON la "línea" es la posición del producto en el arreglo.
+    """
+    formato = formato_de_ruta(ruta)
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as archivo:
+        if formato == 'csv':
+            filas = _filas_csv(archivo)
+        elif formato == 'jsonl':
+            filas = _filas_jsonl(archivo)
+        else:
+            filas = _filas_json(archivo)
+        for linea, fila in filas:
+            if isinstance(fila, FilaInvalida):
+                yield linea, fila
+                continue
+            try:
+                yield linea, _producto(linea, fila)
+            except FilaInvalida as e:
+                yield linea, e
+
+
+def escribir_productos(ruta: str, productos) -> int:
+    """
+    Escribe un iterable de dicts (nombre, cantidad, costo, valor_total) en
+    el formato que indique la extensión. Retorna cuántas filas escribió.
+    Se escribe en un archivo temporal que reemplaza a 'ruta' solo al
+    terminar: si el iterable falla a mitad de camino (p. ej. una página que
+    no se pudo leer), la excepción se propaga y 'ruta' queda como estaba.
+    """
+    formato = formato_de_ruta(ruta)
+    temporal = ruta + '.tmp'
+    try:
+        n = _escribir(temporal, formato, productos)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    return n
+
+
+def _celda(valor):
+    """ Número para el CSV que _numero vuelve a leer igual: '1.125' sería ambiguo, se escribe '1.1250'. """
+    if not isinstance(valor, float):
+        return valor
+    texto = repr(valor)
+    entero, _, fraccion = texto.lstrip('-').partition('.')
+    if len(fraccion) == 3 and entero.lstrip('0'):
+        texto += '0'
+    return texto
+
+
+def _escribir(ruta: str, formato: str, productos) -> int:
+    n = 0
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        if formato == 'csv':
+            escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS_EXPORTACION, extrasaction='ignore')
+            escritor.writeheader()
+            for producto in productos:
+                escritor.writerow({k: _celda(v) for k, v in producto.items()})
+                n += 1
+        elif formato == 'jsonl':
+            for producto in productos:
+                archivo.write(json.dumps(producto, ensure_ascii=False) + "\n")
+                n += 1
+        else:
+            archivo.write("[")
+            for producto in productos:
+                archivo.write(("," if n else "") + "\n  " + json.dumps(producto, ensure_ascii=False))
+                n += 1
+            archivo.write("\n]\n")
+    return n
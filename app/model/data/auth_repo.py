@@ -1,16 +1,32 @@
 # app/model/data/auth_repo.py
+import dataclasses
+import threading
+import time
 
-from firebase_admin import auth as firebase_auth
-from firebase_admin import exceptions
+from app.model.data.instrumentacion import instrumentado
+from app.model.domain.usuario import Usuario
 
+# Las excepciones de firebase_admin se importan dentro de cada método: el SDK
+# solo se carga cuando de verdad se habla con Firebase.
+
+# Cuánto se recuerda el perfil (uid, nombre, rol) de un login en esta terminal.
+# Corto a propósito: un cambio de rol o un despido hecho en otra terminal se
+# nota a más tardar en este tiempo.
+PERFIL_TTL_SEGUNDOS = 120
+
+@instrumentado
 class AuthRepo:
     
-    def __init__(self, auth_client: firebase_auth, is_ready_status: bool):
+    def __init__(self, auth_client, is_ready_status: bool):
         """
         Inicializa el repositorio de autenticación.
         """
         self.auth_client = auth_client
         self._is_ready = is_ready_status
+
+        # Perfiles de login recientes: email normalizado -> (expira, perfil).
+        self._perfiles_lock = threading.Lock()
+        self._perfiles = {}
         
         if not self._is_ready:
                 print("❌ ATENCIÓN: AuthRepo inicializado, pero el servicio de autenticación no está listo.")
@@ -20,26 +36,53 @@ class AuthRepo:
         """ Propiedad para verificar el estado de la conexión. """
         return self._is_ready
 
-    def login_usuario(self, email: str, password: str) -> tuple[str | None, str | None]:
-        """ 
-        Simula login usando Admin SDK (Solo valida existencia de email).
-        En un sistema real, el Admin SDK no debe usarse para login de clientes.
-        Retorna (uid, rol) o (None, mensaje_error).
+    def obtener_perfil(self, email: str) -> tuple[Usuario | None, str | None]:
+        """
+        Perfil de sesión de un usuario en una sola consulta a Authentication:
+        el rol sale del custom claim 'rol' y el nombre del display_name.
+        Los campos que la cuenta no tenga vienen en None. Una cuenta
+        deshabilitada (empleado despedido) no tiene perfil.
+        Retorna (Usuario, None) o (None, mensaje_error).
         """
         if not self.is_ready:
             return None, "Error de conexión."
 
+        clave = str(email or '').strip().lower()
+        with self._perfiles_lock:
+            en_cache = self._perfiles.get(clave)
+            if en_cache and time.monotonic() < en_cache[0]:
+                return dataclasses.replace(en_cache[1]), None
+
+        from firebase_admin import auth as firebase_auth
+
         try:
-    
             user = self.auth_client.get_user_by_email(email)
-            rol = user.custom_claims.get('rol', 'cajero') if user.custom_claims else 'cajero'
-            
-            return user.uid, rol
-            
         except firebase_auth.UserNotFoundError:
             return None, "Usuario no encontrado o credenciales inválidas."
         except Exception as e:
             return None, f"Error inesperado en login: {e}"
+        if getattr(user, 'disabled', False):
+            return None, "La cuenta está deshabilitada."
+
+        perfil = Usuario(
+            uid=user.uid,
+            email=user.email or email,
+            nombre=user.display_name or None,
+            rol=(user.custom_claims or {}).get('rol'),
+        )
+        if perfil.nombre and perfil.rol:
+            with self._perfiles_lock:
+                self._perfiles[clave] = (time.monotonic() + PERFIL_TTL_SEGUNDOS, perfil)
+        return dataclasses.replace(perfil), None
+
+    def invalidar_perfil(self, uid: str | None = None):
+        """ Olvida el perfil en caché de un usuario (o todos si uid es None). """
+        with self._perfiles_lock:
+            if uid is None:
+                self._perfiles.clear()
+                return
+            for clave in [c for c, (_, perfil) in self._perfiles.items() if perfil.uid == uid]:
+                del self._perfiles[clave]
 
     def crear_usuario(self, email: str, password: str, rol: str = "cajero", nombre: str = "") -> str | str:
         """ 
@@ -47,6 +90,9 @@ class AuthRepo:
         como un Custom Claim.
         """
         if not self.is_ready: return "Error de conexión."
+
+        from firebase_admin import auth as firebase_auth
+        from firebase_admin import exceptions
             
         try:
 
@@ -58,6 +104,7 @@ class AuthRepo:
             
 
             self.auth_client.set_custom_user_claims(user.uid, {'rol': rol})
+            self.invalidar_perfil(user.uid)
             
             return user.uid
         
@@ -68,6 +115,27 @@ class AuthRepo:
         except Exception as e:
             return f"Error al crear usuario: {e}"
 
+    def revocar_acceso(self, uid: str) -> bool:
+        """
+        Deshabilita la cuenta en Authentication y le quita el rol (despido):
+        desde ese momento no puede iniciar sesión aunque la cuenta siga existiendo.
+        Si la cuenta ya no existe, también es un "éxito".
+        """
+        if not self.is_ready: return False
+
+        from firebase_admin import auth as firebase_auth
+
+        self.invalidar_perfil(uid)
+        try:
+            self.auth_client.update_user(uid, disabled=True)
+            self.auth_client.set_custom_user_claims(uid, None)
+            return True
+        except firebase_auth.UserNotFoundError:
+            return True
+        except Exception as e:
+            print(f"ERROR AuthRepo: Fallo al revocar el acceso de {uid}: {e}")
+            return False
+
     def eliminar_usuario_auth(self, uid: str) -> bool:
         """
         Elimina un usuario de Firebase Authentication (para Rollback o Despido).
@@ -75,6 +143,10 @@ class AuthRepo:
         if not self.is_ready: 
             print(f"Error AuthRepo: No listo para eliminar {uid}")
             return False
+
+        from firebase_admin import auth as firebase_auth
+
+        self.invalidar_perfil(uid)
         try:
             self.auth_client.delete_user(uid)
             print(f"Info AuthRepo: Usuario {uid} eliminado de Authentication.")
@@ -0,0 +1,185 @@
+# app/model/data/cola_local.py
+"""
+Cola local (SQLite) de documentos pendientes de subir a Firestore.
+
+Un pedido se guarda primero en disco y se confirma al cajero de inmediato;
+un hilo en segundo plano lo sube después, en lotes, reintentando con
+espera creciente mientras Firestore no responda. Si la aplicación se cierra
+o se corta la red, los pendientes siguen en el archivo y se suben en el
+próximo arranque.
+
+El ID que se entrega al encolar es el ID definitivo del documento en
+Firestore (se genera en el cliente), así que el reintento de un envío que
+sí había llegado no duplica el pedido.
+"""
+
+import json
+import secrets
+import sqlite3
+import string
+import threading
+import time
+
+RUTA_COLA_POR_DEFECTO = 'pedidos_pendientes.db'
+# Cada cuánto revisa la cola el hilo de envío cuando no hay novedades.
+INTERVALO_ENVIO_SEGUNDOS = 2.0
+# Espera máxima entre reintentos cuando Firestore no responde.
+ESPERA_MAXIMA_SEGUNDOS = 60.0
+# Documentos por envío (un lote de Firestore).
+TAM_ENVIO = 500
+
+_ALFABETO_ID = string.ascii_letters + string.digits
+
+
+def generar_id() -> str:
+    """ ID aleatorio de 20 caracteres, con el mismo formato que los automáticos de Firestore. """
+    return ''.join(secrets.choice(_ALFABETO_ID) for _ in range(20))
+
+
+class ColaLocal:
+    """
+    enviar(lista de (coleccion, doc_id, datos)) sube los documentos y
+    retorna el conjunto de doc_id confirmados; los demás se reintentan.
+    """
+
+    def __init__(self, ruta: str, enviar):
+        self.ruta = ruta
+        self._enviar = enviar
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        # WAL + synchronous=FULL: cada pedido queda en disco antes de confirmarse.
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=FULL")
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS pendientes (
+                doc_id TEXT PRIMARY KEY,
+                coleccion TEXT NOT NULL,
+                datos TEXT NOT NULL,
+                creado REAL NOT NULL,
+                intentos INTEGER NOT NULL DEFAULT 0,
+                ultimo_error TEXT
+            )
+        """)
+        self._conexion.commit()
+
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._espera = INTERVALO_ENVIO_SEGUNDOS
+
+    def encolar(self, coleccion: str, doc_id: str, datos: dict):
+        """ Guarda el documento en disco y avisa al hilo de envío. """
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO pendientes (doc_id, coleccion, datos, creado) VALUES (?, ?, ?, ?)",
+                (doc_id, coleccion, json.dumps(datos, ensure_ascii=False), time.time())
+            )
+            self._conexion.commit()
+        self._despertar.set()
+
+    def obtener(self, doc_id: str) -> dict | None:
+        """ Datos de un documento que sigue pendiente, o None. """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT datos FROM pendientes WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def pendientes(self, coleccion: str | None = None) -> dict:
+        """ {doc_id: datos} de lo que falta subir, en orden de llegada. """
+        with self._lock:
+            if coleccion is None:
+                filas = self._conexion.execute("SELECT doc_id, datos FROM pendientes ORDER BY creado").fetchall()
+            else:
+                filas = self._conexion.execute(
+                    "SELECT doc_id, datos FROM pendientes WHERE coleccion = ? ORDER BY creado", (coleccion,)
+                ).fetchall()
+        return {doc_id: json.loads(datos) for doc_id, datos in filas}
+
+    def __len__(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM pendientes").fetchone()[0]
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            return self._conexion.execute(
+                "SELECT 1 FROM pendientes WHERE doc_id = ?", (doc_id,)
+            ).fetchone() is not None
+
+    def vaciar(self) -> int:
+        """
+        Intenta subir todo lo pendiente, de a TAM_ENVIO documentos.
+        Retorna cuántos documentos quedan en la cola.
+        """
+        while True:
+            with self._lock:
+                filas = self._conexion.execute(
+                    "SELECT coleccion, doc_id, datos FROM pendientes ORDER BY creado LIMIT ?", (TAM_ENVIO,)
+                ).fetchall()
+            if not filas:
+                return 0
+
+            documentos = [(coleccion, doc_id, json.loads(datos)) for coleccion, doc_id, datos in filas]
+            try:
+                confirmados = set(self._enviar(documentos))
+                error = None
+            except Exception as e:
+                confirmados = set()
+                error = str(e)
+
+            with self._lock:
+                self._conexion.executemany(
+                    "DELETE FROM pendientes WHERE doc_id = ?", [(doc_id,) for doc_id in confirmados]
+                )
+                fallidos = [(error or "no confirmado", doc_id) for _, doc_id, _ in documentos if doc_id not in confirmados]
+                self._conexion.executemany(
+                    "UPDATE pendientes SET intentos = intentos + 1, ultimo_error = ? WHERE doc_id = ?", fallidos
+                )
+                self._conexion.commit()
+
+            if fallidos:
+                return len(self)
+
+    def iniciar(self):
+        """ Arranca el hilo que sube los pendientes (incluidos los de sesiones anteriores). """
+        if self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._bucle_envio, name='cola-local', daemon=True)
+        self._hilo.start()
+
+    def _bucle_envio(self):
+        while not self._detener.is_set():
+            self._despertar.wait(self._espera)
+            self._despertar.clear()
+            if self._detener.is_set():
+                break
+            try:
+                quedan = self.vaciar()
+            except Exception as e:
+                print(f"ERROR Cola local: {e}")
+                quedan = 1
+            # Con la red caída se espera cada vez más (hasta un máximo) para no insistir.
+            if quedan:
+                self._espera = min(self._espera * 2, ESPERA_MAXIMA_SEGUNDOS)
+            else:
+                self._espera = INTERVALO_ENVIO_SEGUNDOS
+
+    def cerrar(self, intentar_envio: bool = True) -> int:
+        """
+        Detiene el hilo; antes intenta subir lo pendiente una última vez.
+        Retorna cuántos documentos quedaron en disco para la próxima sesión.
+        """
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+            self._hilo = None
+        if intentar_envio:
+            try:
+                self.vaciar()
+            except Exception as e:
+                print(f"ERROR Cola local: {e}")
+        quedan = len(self)
+        with self._lock:
+            self._conexion.close()
+        return quedan
@@ -1,12 +1,72 @@
 # app/model/data/db_repo.py
 
-from firebase_admin import firestore
+import threading
+import time
 
+from app.model.data.cola_local import ColaLocal, generar_id
+from app.model.data.indices import normalizar_nombre
+from app.model.data.instrumentacion import instrumentado
+from app.model.data.finanzas_repo import COLECCION_RESUMEN_DIARIO, incrementos_resumen_diario
+from app.model.data.inventario_repo import incrementos_stock
+from app.model.data.lotes import Escritura, MAX_OPERACIONES_LOTE, OPS_POR_SEGUNDO_INICIAL, ResultadoLote, escribir_en_lotes
+from app.model.data.planes import EnHilo, Leer, Llamar, plan
+from app.model.data.tablero_pedidos import ESPERA_SNAPSHOT_INICIAL_SEGUNDOS, TableroPedidosActivos
+from app.model.data.versiones import marcar_escritura, version
+from app.model.domain.pedido import ItemPedido, Pedido
+from app.model.domain.personal import Empleado
+
+# Tiempo que se reutiliza el menú en memoria antes de volver a leerlo.
+MENU_TTL_SEGUNDOS = 300
+
+# Receta de cada ítem del menú: {id de documento de 'inventario': cantidad por unidad vendida}.
+# Al finalizar un pedido se descuenta del inventario en el mismo lote; valor_total
+# se ajusta con el costo leído junto con el menú (se renueva con la caché).
+CAMPO_RECETA = 'receta'
+
+# Campos normalizados de 'usuarios' para buscar por igualdad.
+CAMPO_NOMBRE_NORM = 'nombre_norm'
+CAMPO_EMAIL_NORM = 'email_norm'
+# Caché de búsquedas de personal: se descarta al escribir en 'usuarios'
+# (y por TTL, para los cambios hechos desde otras terminales).
+USUARIOS_TTL_SEGUNDOS = 120
+MAX_BUSQUEDAS_USUARIOS = 128
+# Coincidencias que se traen como máximo al buscar por nombre.
+MAX_COINCIDENCIAS_NOMBRE = 10
+
+
+def normalizar_email(email) -> str:
+    return str(email or '').strip().lower()
+
+@instrumentado
 class DbRepo:
     
-    def __init__(self, db_client: firestore.client, is_ready_status: bool):
+    def __init__(self, db_client, is_ready_status: bool, ruta_cola_pedidos: str | None = None):
         self.db = db_client
         self._is_ready = is_ready_status 
+
+        # Cola local opcional: los pedidos se guardan en disco y se suben en segundo plano.
+        self.cola_pedidos = None
+        if ruta_cola_pedidos and self._is_ready:
+            self.cola_pedidos = ColaLocal(ruta_cola_pedidos, self._enviar_pendientes)
+            self.cola_pedidos.iniciar()
+
+        # Tablero de pedidos activos (listener), se abre en la primera consulta.
+        self._tablero_lock = threading.Lock()
+        self._tablero = None
+        self._tablero_no_disponible = False
+
+        # Caché del menú: lista de ítems y tablas precompiladas item_id -> precio,
+        # item_id -> receta e ingrediente -> costo (para ajustar valor_total).
+        self._menu_lock = threading.Lock()
+        self._menu_cache = None
+        self._precios_menu = {}
+        self._recetas = {}
+        self._costos_ingredientes = {}
+        self._menu_expira = 0.0
+
+        # Caché de búsquedas de personal: (campo, valor) -> (version, expira, resultados).
+        self._usuarios_lock = threading.Lock()
+        self._usuarios_cache = {}
         
         if not self.is_ready:
             print("❌ ATENCIÓN: DbRepo inicializado, pero la conexión a Firestore no está lista.")
@@ -16,114 +76,540 @@ class DbRepo:
         return self._is_ready
 
 
-    def obtener_datos_usuario(self, uid: str) -> tuple[str | None, str | None]:
-        if not self.is_ready: return None, None
+    @plan
+    def obtener_registro_usuario(self, db, uid: str) -> dict | None:
+        """
+        Documento de 'usuarios' del uid (solo rol y nombre): {} si no existe
+        (p. ej. un empleado despedido) y None si no se pudo leer.
+        """
+        if not self.is_ready: return None
         try:
-            doc_ref = self.db.collection('usuarios').document(uid).get()
-            if doc_ref.exists:
-                data = doc_ref.to_dict()
-                return data.get('rol'), data.get('nombre')
-            return None, None
+            doc = yield Llamar(db.collection('usuarios').document(uid).get, field_paths=['rol', 'nombre'])
+            return (doc.to_dict() or {}) if doc.exists else {}
         except Exception as e:
-            print(f"ERROR DB: Fallo al obtener datos de usuario {uid}: {e}")
-            return None, None
+            print(f"ERROR DB: Fallo al leer el registro del usuario {uid}: {e}")
+            return None
 
-    def crear_registro_usuario(self, uid: str, email: str, nombre: str, rol: str) -> bool:
+    @plan
+    def crear_registro_usuario(self, db, uid: str, email: str, nombre: str, rol: str) -> bool:
         if not self.is_ready: return False
         try:
-            doc_ref = self.db.collection('usuarios').document(uid)
-            doc_ref.set({
+            doc_ref = db.collection('usuarios').document(uid)
+            yield Llamar(doc_ref.set, {
                 'nombre': nombre,
+                CAMPO_NOMBRE_NORM: normalizar_nombre(nombre),
                 'rol': rol,
                 'email': email,
+                CAMPO_EMAIL_NORM: normalizar_email(email),
                 'salario': 0.0, # Salario inicial
                 'puesto': rol # Puesto inicial
             })
+            marcar_escritura('usuarios')
             return True
         except Exception as e:
             print(f"ERROR DB: Fallo al crear registro de usuario {uid}: {e}")
             return False
 
-    def obtener_todos_los_documentos(self, collection_name: str) -> dict | None:
+    def _buscar_usuarios(self, db, campo: str, valor: str, limite: int) -> list[Empleado]:
+        """ Plan de búsqueda por igualdad en 'usuarios', con caché por versión y TTL. """
+        clave = (campo, valor, limite)
+        version_actual = version('usuarios')
+        with self._usuarios_lock:
+            en_cache = self._usuarios_cache.get(clave)
+            if en_cache and en_cache[0] == version_actual and time.monotonic() < en_cache[1]:
+                return list(en_cache[2])
+
+        docs = yield Leer(db.collection('usuarios').where(campo, '==', valor).limit(limite))
+        resultados = [Empleado.from_firestore(doc.id, doc.to_dict()) for doc in docs]
+
+        with self._usuarios_lock:
+            if len(self._usuarios_cache) >= MAX_BUSQUEDAS_USUARIOS:
+                self._usuarios_cache.clear()
+            self._usuarios_cache[clave] = (version_actual, time.monotonic() + USUARIOS_TTL_SEGUNDOS, resultados)
+        return list(resultados)
+
+    @plan
+    def buscar_usuarios_por_nombre(self, db, nombre: str) -> list[Empleado] | None:
+        """
+        Empleados cuyo nombre coincide exactamente (sin importar mayúsculas ni
+        espacios). Consulta de igualdad sobre 'nombre_norm': solo se leen los
+        que coinciden. Retorna [Empleado, ...] (más de uno si el nombre está
+        repetido) o None si falló.
+        """
         if not self.is_ready: return None
+        nombre_norm = normalizar_nombre(nombre)
+        if not nombre_norm: return []
         try:
-            docs = self.db.collection(collection_name).stream()
+            return (yield from self._buscar_usuarios(db, CAMPO_NOMBRE_NORM, nombre_norm, MAX_COINCIDENCIAS_NOMBRE))
+        except Exception as e:
+            print(f"ERROR DB: Fallo al buscar usuario por nombre '{nombre}': {e}")
+            return None
+
+    @plan
+    def buscar_usuarios_por_email(self, db, email: str) -> list[Empleado] | None:
+        """
+        Empleado con ese email (sin importar mayúsculas ni espacios), igual
+        que buscar_usuarios_por_nombre: [Empleado] (a lo más uno), [] si no
+        existe o None si falló.
+        """
+        if not self.is_ready: return None
+        email_norm = normalizar_email(email)
+        if not email_norm: return []
+        try:
+            return (yield from self._buscar_usuarios(db, CAMPO_EMAIL_NORM, email_norm, 1))
+        except Exception as e:
+            print(f"ERROR DB: Fallo al buscar usuario por email '{email}': {e}")
+            return None
+
+    def migrar_indices_usuarios(self) -> int:
+        """
+        Migración única: agrega 'nombre_norm' y 'email_norm' a los usuarios
+        creados antes de esos campos.
+        Retorna cuántos documentos se actualizaron, o -1 si falló.
+        """
+        if not self.is_ready: return -1
+        try:
+            def cambios():
+                for doc in self.db.collection('usuarios').stream():
+                    data = doc.to_dict() or {}
+                    campos = {}
+                    nombre_norm = normalizar_nombre(data.get('nombre'))
+                    if data.get(CAMPO_NOMBRE_NORM) != nombre_norm:
+                        campos[CAMPO_NOMBRE_NORM] = nombre_norm
+                    email_norm = normalizar_email(data.get('email'))
+                    if data.get(CAMPO_EMAIL_NORM) != email_norm:
+                        campos[CAMPO_EMAIL_NORM] = email_norm
+                    if campos:
+                        yield Escritura('update', 'usuarios', doc.id, campos)
+
+            resultado = self.escribir_en_lote(cambios())
+            return resultado.escritas if resultado.ok else -1
+        except Exception as e:
+            print(f"ERROR DB: Fallo al migrar los índices de usuarios: {e}")
+            return -1
+
+    @plan
+    def obtener_empleados(self, db) -> list[Empleado] | None:
+        """ Todo el personal de 'usuarios'; solo viajan los campos que usa Empleado. """
+        if not self.is_ready: return None
+        try:
+            docs = yield Leer(db.collection('usuarios').select(['nombre', 'rol', 'email', 'puesto', 'salario']))
+            return [Empleado.from_firestore(doc.id, doc.to_dict()) for doc in docs]
+        except Exception as e:
+            print(f"ERROR DB: Fallo al obtener el personal: {e}")
+            return None
+
+    @plan
+    def obtener_todos_los_documentos(self, db, collection_name: str) -> dict | None:
+        if not self.is_ready: return None
+        try:
+            docs = yield Leer(db.collection(collection_name))
             return {doc.id: doc.to_dict() for doc in docs}
         except Exception as e:
             print(f"ERROR DB: Fallo al obtener todos los documentos de {collection_name}: {e}")
             return None
 
-    def actualizar_documento(self, collection_name: str, doc_id: str, data: dict) -> bool:
+    @plan
+    def actualizar_documento(self, db, collection_name: str, doc_id: str, data: dict) -> bool:
         if not self.is_ready: return False
         try:
-            self.db.collection(collection_name).document(doc_id).set(data, merge=True)
+            yield Llamar(db.collection(collection_name).document(doc_id).set, data, merge=True)
+            marcar_escritura(collection_name)
+            if collection_name == 'menu':
+                self.invalidar_cache_menu()
             return True
         except Exception as e:
             print(f"ERROR DB: Fallo al actualizar documento {doc_id}: {e}")
             return False
 
-    def eliminar_documento(self, collection_name: str, doc_id: str) -> bool:
+    @plan
+    def eliminar_documento(self, db, collection_name: str, doc_id: str) -> bool:
         if not self.is_ready: return False
         try:
-            self.db.collection(collection_name).document(doc_id).delete()
+            yield Llamar(db.collection(collection_name).document(doc_id).delete)
+            marcar_escritura(collection_name)
+            if collection_name == 'menu':
+                self.invalidar_cache_menu()
             return True
         except Exception as e:
             print(f"ERROR DB: Fallo al eliminar documento {doc_id}: {e}")
             return False
 
+    def escribir_en_lote(self, operaciones, tam_lote: int = MAX_OPERACIONES_LOTE,
+                         ops_por_segundo: float | None = OPS_POR_SEGUNDO_INICIAL,
+                         guardar_ids: bool = False) -> ResultadoLote | None:
+        """
+        Escritura masiva: recibe un iterable de lotes.Escritura y las confirma
+        en lotes de hasta 500 operaciones, con control de ritmo.
+        Retorna el ResultadoLote (con los documentos que fallaron), o None si
+        la base no está lista. Con guardar_ids=True, resultado.ids trae el ID
+        de cada operación.
+        """
+        if not self.is_ready: return None
+        resultado = escribir_en_lotes(self.db, operaciones, tam_lote, ops_por_segundo, guardar_ids)
+        if resultado.colecciones:
+            marcar_escritura(*resultado.colecciones)
+            if 'menu' in resultado.colecciones:
+                self.invalidar_cache_menu()
+        for fallida in resultado.fallidas:
+            print(f"ERROR DB: Fallo al escribir {fallida['coleccion']}/{fallida['doc_id']}: {fallida['error']}")
+        return resultado
+
+
+    def _cargar_menu(self):
+        """ Lee la colección 'menu' y recompila la caché. Llamar con _menu_lock tomado. """
+        menu = []
+        precios = {}
+        recetas = {}
+        for doc in self.db.collection('menu').stream():
+            data = doc.to_dict()
+            data['id'] = doc.id 
+            menu.append(data)
+            try:
+                precios[str(doc.id)] = float(data.get('precio'))
+            except (TypeError, ValueError):
+                pass
+            receta = {}
+            for ingrediente_id, cantidad in (data.get(CAMPO_RECETA) or {}).items():
+                try:
+                    receta[str(ingrediente_id)] = float(cantidad)
+                except (TypeError, ValueError):
+                    pass
+            if receta:
+                recetas[str(doc.id)] = receta
+
+        # Costo de todos los ingredientes en una sola llamada; los que no
+        # existen en el inventario quedan fuera y no se descuentan.
+        costos = {}
+        ingredientes = {i for receta in recetas.values() for i in receta}
+        if ingredientes:
+            inventario = self.db.collection('inventario')
+            for doc in self.db.get_all([inventario.document(i) for i in sorted(ingredientes)], field_paths=['costo']):
+                if doc.exists:
+                    try:
+                        costos[doc.id] = float((doc.to_dict() or {}).get('costo') or 0.0)
+                    except (TypeError, ValueError):
+                        costos[doc.id] = 0.0
+            faltantes = sorted(ingredientes - costos.keys())
+            if faltantes:
+                print(f"ADVERTENCIA DB: Ingredientes de receta que no están en inventario (no se descuentan): {', '.join(faltantes)}")
+
+        self._menu_cache = menu
+        self._precios_menu = precios
+        self._recetas = recetas
+        self._costos_ingredientes = costos
+        self._menu_expira = time.monotonic() + MENU_TTL_SEGUNDOS
+
+    def _asegurar_menu(self, forzar_recarga=False):
+        """
+        Garantiza que la caché del menú esté vigente. Si la recarga falla
+        y hay una copia anterior, se sigue sirviendo esa copia.
+        """
+        with self._menu_lock:
+            vigente = self._menu_cache is not None and time.monotonic() < self._menu_expira
+            if vigente and not forzar_recarga:
+                return
+            try:
+                self._cargar_menu()
+            except Exception as e:
+                print(f"ERROR DB: Fallo al obtener el menú: {e}")
+                if self._menu_cache is None:
+                    raise
 
-    def obtener_menu(self):
-        if not self.is_ready: return []
+    def obtener_menu(self, forzar_recarga=False) -> list | None:
+        """
+        Devuelve el menú desde la caché (se relee de Firestore al vencer el TTL).
+        [] si la colección 'menu' está vacía y None si no se pudo leer.
+        """
+        if not self.is_ready: return None
         try:
-            docs = self.db.collection('menu').stream()
-            menu = []
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id 
-                menu.append(data)
-            return menu
-        except Exception as e:
-            print(f"ERROR DB: Fallo al obtener el menú: {e}")
-            return []
+            self._asegurar_menu(forzar_recarga)
+            return list(self._menu_cache)
+        except Exception:
+            return None
+
+    def obtener_precios_menu(self) -> dict | None:
+        """
+        Tabla item_id -> precio del menú en caché (compartida: no modificarla).
+        None si el menú no se pudo leer (y no hay copia anterior en caché).
+        """
+        if not self.is_ready: return None
+        try:
+            self._asegurar_menu()
+            return self._precios_menu
+        except Exception:
+            return None
 
-    def crear_pedido(self, pedido_data: dict) -> str | None:
+    def consumo_de_items(self, items: list[ItemPedido]) -> dict | None:
+        """
+        Ingredientes que consume una lista de ítems de pedido según las
+        recetas del menú en caché: {inventario_id: cantidad total}.
+        Retorna None si el menú (las recetas) no se pudo leer.
+        """
         if not self.is_ready: return None
+        if not items: return {}
         try:
-            timestamp, doc_ref = self.db.collection('pedidos').add(pedido_data)
+            self._asegurar_menu()
+        except Exception:
+            return None
+        recetas = self._recetas
+        consumo = {}
+        for item in items:
+            receta = recetas.get(item.item_id)
+            if not receta:
+                continue
+            unidades = float(item.cantidad)
+            for ingrediente_id, cantidad in receta.items():
+                consumo[ingrediente_id] = consumo.get(ingrediente_id, 0.0) + cantidad * unidades
+        return consumo
+
+    def invalidar_cache_menu(self):
+        """ Fuerza a que la próxima consulta del menú vuelva a leer Firestore. """
+        with self._menu_lock:
+            self._menu_expira = 0.0
+
+    @plan
+    def crear_pedido(self, db, pedido: Pedido) -> str | None:
+        """
+        Guarda un pedido nuevo y retorna su ID (también queda en pedido.id).
+        Con cola local, el pedido queda en disco y el ID (que será el mismo en
+        Firestore) se retorna sin esperar a la red.
+        """
+        if not self.is_ready: return None
+        pedido_data = pedido.to_firestore()
+        if self.cola_pedidos is not None:
+            try:
+                pedido_id = generar_id()
+                yield EnHilo(self.cola_pedidos.encolar, 'pedidos', pedido_id, pedido_data)
+                pedido.id = pedido_id
+                return pedido_id
+            except Exception as e:
+                print(f"ERROR DB: Fallo al guardar el pedido en la cola local: {e}")
+                # Si el disco falla, se intenta directo contra Firestore.
+        try:
+            timestamp, doc_ref = yield Llamar(db.collection('pedidos').add, pedido_data)
+            marcar_escritura('pedidos')
+            pedido.id = doc_ref.id
             return doc_ref.id
         except Exception as e:
             print(f"ERROR DB: Fallo al crear pedido: {e}")
             return None
 
-    def obtener_pedidos_activos(self):
-        if not self.is_ready: return {}
+    def _enviar_pendientes(self, documentos: list) -> set:
+        """ Sube los documentos de la cola local; retorna los doc_id confirmados. """
+        from google.api_core import exceptions as gexc
+
+        resultado = escribir_en_lotes(
+            self.db,
+            (Escritura('create', coleccion, doc_id, datos) for coleccion, doc_id, datos in documentos),
+            ops_por_segundo=None
+        )
+        confirmados = {doc_id for _, doc_id, _ in documentos}
+        for fallida in resultado.fallidas:
+            # Ya existe: un envío anterior llegó aunque no se alcanzó a borrar de la cola.
+            # Cualquier otro error (también Aborted, que hereda de Conflict) queda para reintentar.
+            if not isinstance(fallida['excepcion'], gexc.AlreadyExists):
+                confirmados.discard(fallida['doc_id'])
+        if resultado.colecciones:
+            marcar_escritura(*resultado.colecciones)
+        return confirmados
+
+    def sincronizar_pedidos(self) -> int:
+        """ Sube ya los pedidos de la cola local. Retorna cuántos siguen pendientes. """
+        if self.cola_pedidos is None: return 0
+        return self.cola_pedidos.vaciar()
+
+    def pedidos_pendientes_de_envio(self) -> int:
+        return len(self.cola_pedidos) if self.cola_pedidos is not None else 0
+
+    def _asegurar_enviado(self, pedido_id: str) -> bool:
+        """ Antes de modificar un pedido que sigue en la cola local, intenta subirlo. """
+        if self.cola_pedidos is None or pedido_id not in self.cola_pedidos:
+            return True
+        self.cola_pedidos.vaciar()
+        if pedido_id in self.cola_pedidos:
+            print(f"ERROR DB: El pedido {pedido_id} aún no se sincroniza con Firestore. Intenta de nuevo en un momento.")
+            return False
+        return True
+
+    def cerrar(self) -> int:
+        """
+        Detiene la cola local (intentando subir lo pendiente).
+        Retorna cuántos pedidos quedaron guardados sin subir.
+        """
+        with self._tablero_lock:
+            if self._tablero is not None:
+                self._tablero.detener()
+                self._tablero = None
+        if self.cola_pedidos is None: return 0
+        quedan = self.cola_pedidos.cerrar()
+        self.cola_pedidos = None
+        return quedan
+
+    def tablero_pedidos(self) -> TableroPedidosActivos | None:
+        """
+        Tablero de pedidos activos mantenido por un listener, o None si aún
+        no recibió el snapshot inicial o el cliente no soporta listeners.
+        """
+        if not self.is_ready or self._tablero_no_disponible: return None
+        espera = 0
+        with self._tablero_lock:
+            if self._tablero is None:
+                try:
+                    self._tablero = TableroPedidosActivos(self.db)
+                    self._tablero.iniciar(espera_segundos=0)
+                except Exception as e:
+                    print(f"ERROR DB: No se pudo abrir el listener de pedidos activos: {e}")
+                    self._tablero = None
+                    self._tablero_no_disponible = True
+                    return None
+                # Solo la primera vez se espera el snapshot inicial; después, si
+                # el listener sigue sin datos, se consulta sin esperar.
+                espera = ESPERA_SNAPSHOT_INICIAL_SEGUNDOS
+            tablero = self._tablero
+        return tablero if tablero.iniciar(espera_segundos=espera) else None
+
+    def _quitar_del_tablero(self, pedido_id: str):
+        tablero = self._tablero
+        if tablero is not None:
+            tablero.descartar(pedido_id)
+
+    @plan
+    def obtener_pedidos_activos(self, db) -> dict[str, Pedido] | None:
+        """
+        {pedido_id: Pedido} de los pedidos ACTIVO, incluidos los que siguen en
+        la cola local. None si no se pudieron leer de Firestore.
+        """
+        if not self.is_ready: return None
+        pendientes = {}
+        if self.cola_pedidos is not None:
+            # SQLite es bloqueante: en el repositorio asíncrono corre en un hilo.
+            en_cola = yield EnHilo(self.cola_pedidos.pendientes, 'pedidos')
+            pendientes = {
+                pid: Pedido.from_firestore(pid, data) for pid, data in en_cola.items()
+                if data.get('estado') == 'ACTIVO'
+            }
+        tablero = yield EnHilo(self.tablero_pedidos)
+        if tablero is not None:
+            activos = tablero.pedidos()
+            activos.update(pendientes)
+            return activos
         try:
-            query = self.db.collection('pedidos').where('estado', '==', 'ACTIVO').stream()
-            return {doc.id: doc.to_dict() for doc in query}
+            query = yield Leer(db.collection('pedidos').where('estado', '==', 'ACTIVO'))
+            activos = {doc.id: Pedido.from_firestore(doc.id, doc.to_dict()) for doc in query}
+            activos.update(pendientes)
+            return activos
         except Exception as e:
             print(f"ERROR DB: Fallo al obtener pedidos activos: {e}")
-            return {}
+            return None
             
-    def obtener_pedido_por_id(self, pedido_id: str):
+    @plan
+    def obtener_pedido_por_id(self, db, pedido_id: str) -> Pedido | None:
         if not self.is_ready: return None
+        if self.cola_pedidos is not None:
+            pendiente = yield EnHilo(self.cola_pedidos.obtener, pedido_id)
+            if pendiente is not None:
+                return Pedido.from_firestore(pedido_id, pendiente)
         try:
-            doc_ref = self.db.collection('pedidos').document(pedido_id).get()
-            return doc_ref.to_dict() if doc_ref.exists else None
+            doc_ref = yield Llamar(db.collection('pedidos').document(pedido_id).get)
+            return Pedido.from_firestore(pedido_id, doc_ref.to_dict()) if doc_ref.exists else None
         except Exception as e:
             print(f"ERROR DB: Fallo al obtener pedido {pedido_id}: {e}")
             return None
 
-    def actualizar_estado_pedido(self, pedido_id: str, nuevo_estado: str, fecha_iso: str = None):
+    @plan
+    def actualizar_estado_pedido(self, db, pedido_id: str, nuevo_estado: str, fecha_iso: str = None):
         if not self.is_ready: return False
+        if not (yield EnHilo(self._asegurar_enviado, pedido_id)): return False
         try:
-            doc_ref = self.db.collection('pedidos').document(pedido_id)
+            doc_ref = db.collection('pedidos').document(pedido_id)
             update_data = {'estado': nuevo_estado}
             
             if nuevo_estado == 'FINALIZADO' and fecha_iso:
                 update_data['fecha_finalizacion'] = fecha_iso
                 
-            doc_ref.update(update_data)
+            yield Llamar(doc_ref.update, update_data)
+            marcar_escritura('pedidos')
+            if nuevo_estado != 'ACTIVO':
+                self._quitar_del_tablero(pedido_id)
             return True
         except Exception as e:
             print(f"ERROR DB: Fallo al actualizar estado del pedido {pedido_id}: {e}")
             return False
+
+    @plan
+    def finalizar_pedido(self, db, pedido_id: str, total: float, cajero_uid: str, fecha_iso: str, dia: str,
+                         items: list[ItemPedido] | None = None) -> bool:
+        """
+        Marca el pedido como FINALIZADO, suma su total al resumen del día
+        ('AAAA-MM-DD') y, si se pasan sus items, descuenta del inventario los
+        ingredientes de la receta, todo en un mismo lote atómico con
+        incrementos del servidor: no se lee ni se bloquea el stock, así que
+        varias cajas pueden finalizar a la vez sin pisarse.
+
+        El pedido sí se lee: su update del lote lleva como precondición el
+        update_time de esa lectura. Si otra terminal lo finalizó (o cambió)
+        entre medio, Firestore rechaza el lote entero y no se cobra dos veces.
+        Si las recetas no se pueden leer no se finaliza: el pedido se
+        cobraría sin descontar su consumo del inventario.
+        """
+        if not self.is_ready: return False
+        if not (yield EnHilo(self._asegurar_enviado, pedido_id)): return False
+        from google.api_core import exceptions as gexc
+
+        pedido_ref = db.collection('pedidos').document(pedido_id)
+        for intento in range(2):
+            descuentos = (yield EnHilo(self._descuentos_de_stock, items)) if items else {}
+            if descuentos is None:
+                print(f"ERROR DB: No se pudieron leer las recetas del menú; el pedido {pedido_id} no se finaliza.")
+                return False
+            try:
+                leido = yield Llamar(pedido_ref.get, field_paths=['estado'])
+                if not leido.exists or (leido.to_dict() or {}).get('estado') != 'ACTIVO':
+                    print(f"ERROR DB: El pedido {pedido_id} ya no está activo; no se finaliza.")
+                    return False
+                lote = db.batch()
+                inventario = db.collection('inventario')
+                for ingrediente_id, (cantidad, costo) in descuentos.items():
+                    lote.update(inventario.document(ingrediente_id), incrementos_stock(-cantidad, costo))
+                lote.update(pedido_ref, {
+                    'estado': 'FINALIZADO',
+                    'fecha_finalizacion': fecha_iso
+                }, option=db.write_option(last_update_time=leido.update_time))
+                lote.set(
+                    db.collection(COLECCION_RESUMEN_DIARIO).document(dia),
+                    incrementos_resumen_diario(total, cajero_uid),
+                    merge=True
+                )
+                yield Llamar(lote.commit)
+                marcar_escritura('pedidos', COLECCION_RESUMEN_DIARIO)
+                if descuentos:
+                    marcar_escritura('inventario')
+                self._quitar_del_tablero(pedido_id)
+                return True
+            except gexc.FailedPrecondition:
+                print(f"ERROR DB: El pedido {pedido_id} cambió mientras se finalizaba (¿otra terminal?); no se aplicó nada.")
+                return False
+            except gexc.NotFound as e:
+                # Un ingrediente pudo borrarse después de cargar el menú: se
+                # recargan recetas y costos y se reintenta una vez.
+                if intento == 0 and descuentos:
+                    self.invalidar_cache_menu()
+                    continue
+                print(f"ERROR DB: Fallo al finalizar el pedido {pedido_id}: {e}")
+                return False
+            except Exception as e:
+                print(f"ERROR DB: Fallo al finalizar el pedido {pedido_id}: {e}")
+                return False
+        return False
+
+    def _descuentos_de_stock(self, items: list[ItemPedido]) -> dict | None:
+        """
+        {inventario_id: (cantidad a descontar, costo en caché)} de los
+        ingredientes que existen, o None si las recetas no se pudieron leer.
+        """
+        consumo = self.consumo_de_items(items)
+        if consumo is None:
+            return None
+        costos = self._costos_ingredientes
+        return {i: (cantidad, costos[i]) for i, cantidad in consumo.items() if i in costos}
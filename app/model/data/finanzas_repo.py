@@ -1,7 +1,69 @@
 # app/model/data/finanzas_repo.py
 import datetime
-from firebase_admin import firestore
+from collections import defaultdict
 
+from app.model.data.instrumentacion import instrumentado
+from app.model.data.lotes import Escritura, escribir_en_lotes
+from app.model.data.planes import Juntos, Leer, Llamar, plan
+from app.model.data.resiliencia import LecturaInterrumpida
+from app.model.data.versiones import marcar_escritura
+from app.model.domain.finanzas import MovimientoFinanciero
+from app.model.domain.pedido import Pedido
+
+try:
+    from zoneinfo import ZoneInfo
+    TZ_COLOMBIA = ZoneInfo("America/Bogota")
+except ImportError:
+
+    TZ_COLOMBIA = datetime.timezone(datetime.timedelta(hours=-5), name="America/Bogota")
+
+# Movimientos por página en los reportes paginados.
+TAM_PAGINA_MOVIMIENTOS = 500
+
+# Un documento por día (ID 'AAAA-MM-DD') con los totales de pedidos finalizados.
+COLECCION_RESUMEN_DIARIO = 'resumen_diario'
+
+# Pedidos por página al sincronizar el historial local (historial_local.py).
+TAM_PAGINA_HISTORIAL = 1000
+# Campos de 'pedidos' que guarda el historial local.
+CAMPOS_HISTORIAL = ['items', 'total', 'estado', 'cajero_uid', 'fecha_finalizacion']
+
+# Igual a firestore.Query.DESCENDING; como texto evita importar el SDK al arrancar.
+DESCENDENTE = 'DESCENDING'
+
+
+def dia_de_fecha(fecha) -> datetime.date | None:
+    """ Día (hora Colombia) de una fecha guardada como ISO string o Timestamp. """
+    try:
+        if isinstance(fecha, str):
+            fecha = datetime.datetime.fromisoformat(fecha.replace('Z', '+00:00'))
+        elif not hasattr(fecha, 'date'):
+            return None
+        if fecha.tzinfo is None:
+            return fecha.date()
+        return fecha.astimezone(TZ_COLOMBIA).date()
+    except Exception:
+        return None
+
+
+def incrementos_resumen_diario(total: float, cajero_uid: str) -> dict:
+    """ Payload (con incrementos del servidor) que suma un pedido al resumen del día. """
+    from firebase_admin import firestore
+
+    total = float(total or 0.0)
+    return {
+        'ingresos': firestore.Increment(total),
+        'pedidos': firestore.Increment(1),
+        'por_cajero': {
+            cajero_uid or 'desconocido': {
+                'ingresos': firestore.Increment(total),
+                'pedidos': firestore.Increment(1),
+            }
+        }
+    }
+
+
+@instrumentado
 class FinanzasRepo:
     
     def __init__(self, db, is_ready):
@@ -13,32 +75,240 @@ class FinanzasRepo:
         return self._is_ready
 
 
-    def guardar_movimiento(self, id_mov: str, data: dict) -> bool:
+    @plan
+    def guardar_movimiento(self, db, movimiento: MovimientoFinanciero) -> bool:
         if not self.is_ready: return False
         try:
-            self.db.collection('movimientos').document(id_mov).set(data)
+            yield Llamar(db.collection('movimientos').document(movimiento.id).set, movimiento.to_firestore())
+            marcar_escritura('movimientos')
             return True
         except Exception as e:
-            print(f"Error al guardar movimiento financiero {id_mov}: {e}")
+            print(f"Error al guardar movimiento financiero {movimiento.id}: {e}")
             return False
 
-    def obtener_todos_los_movimientos(self) -> dict:
-        if not self.is_ready: return {}
+    @plan
+    def obtener_todos_los_movimientos(self, db) -> list[MovimientoFinanciero]:
+        """ Todos los movimientos, del más reciente al más antiguo. """
+        if not self.is_ready: return []
         try:
    
-            docs = self.db.collection('movimientos').order_by('fecha_hora', direction=firestore.Query.DESCENDING).stream()
-            return {doc.id: doc.to_dict() for doc in docs}
+            docs = yield Leer(db.collection('movimientos').order_by('fecha_hora', direction=DESCENDENTE))
+            return [MovimientoFinanciero.from_firestore(doc.id, doc.to_dict()) for doc in docs]
         except Exception as e:
             print(f"Error al obtener movimientos financieros: {e}")
-            return {}
+            return []
+
+
+    @plan
+    def obtener_movimientos_paginados(self, db, limite: int = TAM_PAGINA_MOVIMIENTOS,
+                                      cursor=None) -> tuple[list, object | None] | None:
+        """
+        Una página de movimientos, del más reciente al más antiguo.
+        cursor es el valor devuelto por la página anterior (None para la primera).
+        Retorna ([MovimientoFinanciero, ...], cursor_siguiente); cursor_siguiente es None
+        cuando ya no hay más páginas. Retorna None si la página no se pudo leer.
+        """
+        if not self.is_ready: return None
+        try:
+            query = (
+                db.collection('movimientos')
+                .order_by('fecha_hora', direction=DESCENDENTE)
+                .limit(limite)
+            )
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = yield Leer(query)
+            siguiente = docs[-1] if len(docs) == limite else None
+            return [MovimientoFinanciero.from_firestore(doc.id, doc.to_dict()) for doc in docs], siguiente
+        except Exception as e:
+            print(f"Error al obtener página de movimientos financieros: {e}")
+            return None
 
+    def iterar_movimientos(self, tam_pagina: int = TAM_PAGINA_MOVIMIENTOS):
+        """
+        Recorre todos los movimientos página por página, sin cargarlos todos en memoria.
+        Lanza LecturaInterrumpida si una página no se pudo leer.
+        """
+        cursor = None
+        while True:
+            resultado = self.obtener_movimientos_paginados(tam_pagina, cursor)
+            if resultado is None:
+                raise LecturaInterrumpida("No se pudo leer una página de movimientos.")
+            pagina, cursor = resultado
+            yield from pagina
+            if cursor is None:
+                break
 
-    def obtener_pedidos_para_reporte(self) -> list:
+    @plan
+    def obtener_resumen_movimientos(self, db) -> dict | None:
+        """
+        Cantidad de movimientos y balance neto (suma de 'monto') calculados en
+        Firestore con una consulta de agregación: {'total': int, 'balance': float}.
+        """
+        if not self.is_ready: return None
+        try:
+            consulta = (
+                db.collection('movimientos')
+                .count(alias='total')
+                .sum('monto', alias='balance')
+            )
+            filas = yield Llamar(consulta.get)
+            valores = {r.alias: r.value for fila in filas for r in fila}
+            return {
+                'total': int(valores.get('total') or 0),
+                'balance': float(valores.get('balance') or 0.0),
+            }
+        except Exception as e:
+            print(f"Error al obtener el resumen de movimientos financieros: {e}")
+            return None
+
+    @plan
+    def obtener_pedidos_para_reporte(self, db) -> list[Pedido]:
         if not self.is_ready: return []
         try:
 
-            query = self.db.collection('pedidos').stream()
-            return [doc.to_dict() for doc in query]
+            query = yield Leer(db.collection('pedidos'))
+            return [Pedido.from_firestore(doc.id, doc.to_dict()) for doc in query]
         except Exception as e:
             print(f"Error al obtener pedidos para reporte de ingresos: {e}")
             return []
+
+    @plan
+    def obtener_ingresos_por_rango(self, db, inicio: datetime.datetime, fin: datetime.datetime) -> list | None:
+        """
+        Pedidos FINALIZADOS con inicio <= fecha_finalizacion < fin (fechas con zona horaria).
+        El filtro corre en Firestore y solo viajan los campos 'total' y
+        'fecha_finalizacion'. Retorna [{'total': float, 'fecha_finalizacion': datetime}],
+        o None si no se pudo leer.
+
+        'fecha_finalizacion' puede estar guardada como Timestamp o como ISO string,
+        y Firestore solo compara valores del mismo tipo, así que se hacen dos consultas
+        (en el repositorio asíncrono, en paralelo).
+        Las strings se acotan por fecha con un día de margen (por los distintos
+        desfases horarios) y se afinan aquí.
+        Requiere el índice compuesto pedidos: estado ASC, fecha_finalizacion ASC.
+        """
+        if not self.is_ready: return None
+        try:
+            base = (
+                db.collection('pedidos')
+                .where('estado', '==', 'FINALIZADO')
+                .select(['total', 'fecha_finalizacion'])
+            )
+            desde = (inicio - datetime.timedelta(days=1)).date().isoformat()
+            hasta = (fin + datetime.timedelta(days=1)).date().isoformat()
+            por_timestamp, por_texto = yield Juntos([
+                Leer(base.where('fecha_finalizacion', '>=', inicio).where('fecha_finalizacion', '<', fin)),
+                Leer(base.where('fecha_finalizacion', '>=', desde).where('fecha_finalizacion', '<', hasta)),
+            ])
+
+            resultados = []
+            for doc in por_timestamp:
+                data = doc.to_dict()
+                resultados.append({
+                    'total': float(data.get('total', 0.0) or 0.0),
+                    'fecha_finalizacion': data['fecha_finalizacion']
+                })
+
+            for doc in por_texto:
+                data = doc.to_dict()
+                try:
+                    fecha = datetime.datetime.fromisoformat(data['fecha_finalizacion'].replace('Z', '+00:00'))
+                except (KeyError, ValueError):
+                    continue
+                if fecha.tzinfo is None:
+                    fecha = fecha.replace(tzinfo=TZ_COLOMBIA)
+                if inicio <= fecha < fin:
+                    resultados.append({
+                        'total': float(data.get('total', 0.0) or 0.0),
+                        'fecha_finalizacion': fecha
+                    })
+            return resultados
+        except Exception as e:
+            print(f"Error al obtener ingresos por rango de fechas: {e}")
+            return None
+
+    @plan
+    def obtener_pedidos_finalizados_desde(self, db, desde, limite: int = TAM_PAGINA_HISTORIAL,
+                                          cursor=None) -> tuple[list, object | None] | None:
+        """
+        Una página de pedidos FINALIZADOS con fecha_finalizacion >= desde, en
+        orden de finalización; solo viajan los campos del historial local.
+        Firestore compara valores de un mismo tipo: con un datetime se
+        recorren los guardados como Timestamp y con un texto, los guardados
+        como ISO string.
+        Retorna ([Pedido, ...], cursor_siguiente); cursor_siguiente es None
+        cuando no hay más. Retorna None si la página no se pudo leer.
+        Usa el índice compuesto pedidos: estado ASC, fecha_finalizacion ASC.
+        """
+        if not self.is_ready: return None
+        try:
+            query = (
+                db.collection('pedidos')
+                .where('estado', '==', 'FINALIZADO')
+                .where('fecha_finalizacion', '>=', desde)
+                .order_by('fecha_finalizacion')
+                .select(CAMPOS_HISTORIAL)
+                .limit(limite)
+            )
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = yield Leer(query)
+            siguiente = docs[-1] if len(docs) == limite else None
+            return [Pedido.from_firestore(doc.id, doc.to_dict()) for doc in docs], siguiente
+        except Exception as e:
+            print(f"Error al obtener pedidos finalizados para el historial: {e}")
+            return None
+
+    @plan
+    def obtener_resumen_diario(self, db, dia: str) -> dict | None:
+        """
+        Lee el resumen de un día ('AAAA-MM-DD'): ingresos, pedidos y por_cajero.
+        Es una sola lectura, sin importar el tamaño del historial.
+        Retorna {} si ese día no hubo pedidos finalizados y None si falló.
+        """
+        if not self.is_ready: return None
+        try:
+            doc = yield Llamar(db.collection(COLECCION_RESUMEN_DIARIO).document(dia).get)
+            return doc.to_dict() if doc.exists else {}
+        except Exception as e:
+            print(f"Error al obtener el resumen diario {dia}: {e}")
+            return None
+
+    def reconstruir_resumenes_diarios(self) -> int:
+        """
+        Migración: recalcula todos los resúmenes diarios desde el historial de
+        pedidos finalizados (sobrescribe los existentes).
+        Retorna cuántos días se escribieron, o -1 si falló.
+        """
+        if not self.is_ready: return -1
+        try:
+            resumenes = defaultdict(lambda: {'ingresos': 0.0, 'pedidos': 0, 'por_cajero': {}})
+            query = self.db.collection('pedidos').where('estado', '==', 'FINALIZADO').stream()
+            for doc in query:
+                pedido = doc.to_dict()
+                dia = dia_de_fecha(pedido.get('fecha_finalizacion'))
+                if dia is None:
+                    continue
+                total = float(pedido.get('total', 0.0) or 0.0)
+                resumen = resumenes[dia.isoformat()]
+                resumen['ingresos'] += total
+                resumen['pedidos'] += 1
+                cajero = resumen['por_cajero'].setdefault(
+                    pedido.get('cajero_uid') or 'desconocido', {'ingresos': 0.0, 'pedidos': 0}
+                )
+                cajero['ingresos'] += total
+                cajero['pedidos'] += 1
+
+            resultado = escribir_en_lotes(self.db, (
+                Escritura('set', COLECCION_RESUMEN_DIARIO, dia, resumen)
+                for dia, resumen in resumenes.items()
+            ))
+            marcar_escritura(COLECCION_RESUMEN_DIARIO)
+            if not resultado.ok:
+                print(f"Error al reconstruir los resúmenes diarios: fallaron {len(resultado.fallidas)} días.")
+                return -1
+            return resultado.escritas
+        except Exception as e:
+            print(f"Error al reconstruir los resúmenes diarios: {e}")
+            return -1
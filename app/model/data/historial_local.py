@@ -0,0 +1,400 @@
+# app/model/data/historial_local.py
+"""
+Historial local de pedidos finalizados, guardado por columnas, para los
+reportes de ingresos.
+
+Cada pedido es una fila con fecha de finalización (segundos UNIX), total,
+cajero e ítems. Los cajeros y los ítems se guardan como códigos de un
+diccionario, y los ítems de todos los pedidos van en columnas planas con un
+índice de inicio por pedido. Las filas se mantienen ordenadas por fecha, así
+que un rango de fechas es un tramo contiguo de cada columna. Un reporte
+semanal o mensual se calcula sobre ese tramo sin leer Firestore.
+
+sincronizar() trae solo lo finalizado desde la última marca de agua
+(fecha_finalizacion más reciente que ya se tiene). Hay una marca para las
+fechas guardadas como Timestamp y otra para las guardadas como ISO string,
+porque Firestore no compara valores de tipos distintos. Se vuelve a leer un
+margen antes de cada marca, por si llegó tarde un pedido de una terminal con
+el reloj atrasado; los repetidos se descartan por ID.
+
+Las columnas son array.array de la biblioteca estándar y se guardan en un
+solo archivo binario. Si numpy está instalado, las consultas se vectorizan
+(bincount sobre vistas de las mismas columnas, sin copiarlas); si no, se
+recorren en Python, con el mismo resultado.
+"""
+
+import array
+import bisect
+import datetime
+import json
+import os
+import sys
+import threading
+
+from app.model.data.finanzas_repo import TAM_PAGINA_HISTORIAL, TZ_COLOMBIA
+
+RUTA_HISTORIAL_POR_DEFECTO = 'historial_pedidos.bin'
+# Tramo que se vuelve a leer antes de cada marca de agua al sincronizar.
+MARGEN_SINCRONIZACION = datetime.timedelta(minutes=15)
+
+_FORMATO = 'historial-pedidos/1'
+_EPOCA = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_SEGUNDOS_DIA = 86400
+# Colombia no tiene horario de verano: el día local es un desfase fijo sobre UTC.
+_DESFASE_LOCAL = datetime.datetime.now(TZ_COLOMBIA).utcoffset().total_seconds()
+
+# Columnas numéricas: (atributo, typecode de array).
+_COLUMNAS = (
+    ('fechas', 'd'),
+    ('totales', 'd'),
+    ('cajeros', 'i'),
+    ('items_inicio', 'q'),
+    ('items', 'i'),
+    ('cantidades', 'i'),
+)
+
+_numpy = None
+
+
+def _cargar_numpy():
+    """ El módulo numpy si está instalado; False si no. """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+
+def _segundos(fecha) -> float | None:
+    """ Segundos UNIX de una fecha guardada como Timestamp o ISO string (sin zona = hora Colombia). """
+    if isinstance(fecha, str):
+        try:
+            fecha = datetime.datetime.fromisoformat(fecha.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    elif not isinstance(fecha, datetime.datetime):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=TZ_COLOMBIA)
+    return fecha.timestamp()
+
+
+def _dia_local(segundos: float) -> int:
+    return int((segundos + _DESFASE_LOCAL) // _SEGUNDOS_DIA)
+
+
+def _fecha_de_dia(dia: int) -> datetime.date:
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=dia)
+
+
+class _Diccionario:
+    """ Codifica textos repetidos (cajeros, ítems) como enteros. """
+
+    def __init__(self, valores=()):
+        self.valores = list(valores)
+        self._codigos = {v: i for i, v in enumerate(self.valores)}
+
+    def codigo(self, valor: str) -> int:
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+
+class HistorialPedidos:
+    """
+    Historial columnar de pedidos finalizados. ruta=None lo deja solo en
+    memoria. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, ruta: str | None = RUTA_HISTORIAL_POR_DEFECTO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._vaciar()
+        # El archivo se lee en el primer uso, no al arrancar.
+        self._leido = False
+
+    def _asegurar_leido(self):
+        """ Lee el archivo la primera vez. Llamar con _lock tomado. """
+        if self._leido:
+            return
+        self._leido = True
+        if self.ruta and os.path.exists(self.ruta):
+            try:
+                self._cargar()
+            except Exception as e:
+                print(f"ADVERTENCIA: No se pudo leer el historial local '{self.ruta}' ({e}); se reconstruye desde Firestore.")
+                self._vaciar()
+
+    def _vaciar(self):
+        for nombre, tipo in _COLUMNAS:
+            setattr(self, nombre, array.array(tipo))
+        self.items_inicio.append(0)
+        self._ids = []
+        self._vistos = set()
+        self._cajeros = _Diccionario()
+        self._items_menu = _Diccionario()
+        # Marcas de agua: segundos UNIX (Timestamp) y el texto ISO más reciente.
+        self._marcas = {'timestamp': None, 'texto': None}
+        self._desordenado = False
+
+    def __len__(self):
+        with self._lock:
+            self._asegurar_leido()
+            return len(self._ids)
+
+    # --- Sincronización ---
+    def _desde(self, tipo: str):
+        """ Valor desde el que se leen los pedidos de un tipo de fecha (marca menos el margen). """
+        marca = self._marcas[tipo]
+        if tipo == 'timestamp':
+            if marca is None:
+                return _EPOCA
+            return datetime.datetime.fromtimestamp(marca, datetime.timezone.utc) - MARGEN_SINCRONIZACION
+        if marca is None:
+            # Toda string es >= '': la consulta recorre solo las fechas guardadas como texto.
+            return ''
+        try:
+            return (datetime.datetime.fromisoformat(marca.replace('Z', '+00:00')) - MARGEN_SINCRONIZACION).isoformat()
+        except ValueError:
+            return marca
+
+    def _avanzar_marca(self, tipo: str, fecha):
+        # Una fecha ilegible no mueve la marca (un texto raro podría saltarse pedidos válidos).
+        segundos = _segundos(fecha)
+        if segundos is None:
+            return
+        if tipo == 'timestamp':
+            fecha = segundos
+        marca = self._marcas[tipo]
+        if marca is None or fecha > marca:
+            self._marcas[tipo] = fecha
+
+    def _agregar(self, pedido) -> bool:
+        if pedido.id in self._vistos:
+            return False
+        segundos = _segundos(pedido.fecha_finalizacion)
+        if segundos is None:
+            return False
+        if self.fechas and segundos < self.fechas[-1]:
+            self._desordenado = True
+        self._ids.append(pedido.id)
+        self._vistos.add(pedido.id)
+        self.fechas.append(segundos)
+        self.totales.append(float(pedido.total))
+        self.cajeros.append(self._cajeros.codigo(pedido.cajero_uid or 'desconocido'))
+        for item in pedido.items:
+            self.items.append(self._items_menu.codigo(item.item_id))
+            self.cantidades.append(int(item.cantidad))
+        self.items_inicio.append(len(self.items))
+        return True
+
+    def sincronizar(self, finanzas_repo, tam_pagina: int = TAM_PAGINA_HISTORIAL) -> int:
+        """
+        Trae de Firestore los pedidos finalizados desde la última marca de
+        agua y los guarda en disco. Retorna cuántos pedidos nuevos llegaron,
+        o -1 si alguna página no se pudo leer (el historial quedó atrasado).
+        Si Firestore falla a mitad de camino, se conserva lo que alcanzó a
+        llegar y la próxima sincronización sigue desde ahí.
+        """
+        with self._lock:
+            self._asegurar_leido()
+            nuevos = 0
+            fallo = False
+            marcas = dict(self._marcas)
+            for tipo in ('timestamp', 'texto'):
+                desde = self._desde(tipo)
+                cursor = None
+                while not fallo:
+                    resultado = finanzas_repo.obtener_pedidos_finalizados_desde(desde, tam_pagina, cursor)
+                    if resultado is None:
+                        fallo = True
+                        break
+                    pagina, cursor = resultado
+                    for pedido in pagina:
+                        if isinstance(pedido.fecha_finalizacion, str) != (tipo == 'texto'):
+                            continue
+                        if self._agregar(pedido):
+                            nuevos += 1
+                        self._avanzar_marca(tipo, pedido.fecha_finalizacion)
+                    if cursor is None:
+                        break
+            if nuevos:
+                self._ordenar()
+            if nuevos or marcas != self._marcas:
+                self._guardar()
+            return -1 if fallo else nuevos
+
+    def sincronizado_hasta(self) -> datetime.datetime | None:
+        """ Fecha de finalización del pedido más reciente que hay en el historial. """
+        with self._lock:
+            self._asegurar_leido()
+            if not self.fechas:
+                return None
+            return datetime.datetime.fromtimestamp(self.fechas[-1], TZ_COLOMBIA)
+
+    def _ordenar(self):
+        """ Reordena todas las columnas por fecha (solo si llegaron filas fuera de orden). """
+        if not self._desordenado:
+            return
+        orden = sorted(range(len(self._ids)), key=self.fechas.__getitem__)
+        inicio = self.items_inicio
+        items = array.array('i')
+        cantidades = array.array('i')
+        items_inicio = array.array('q', [0])
+        for fila in orden:
+            a, b = inicio[fila], inicio[fila + 1]
+            items.extend(self.items[a:b])
+            cantidades.extend(self.cantidades[a:b])
+            items_inicio.append(len(items))
+        self.fechas = array.array('d', (self.fechas[f] for f in orden))
+        self.totales = array.array('d', (self.totales[f] for f in orden))
+        self.cajeros = array.array('i', (self.cajeros[f] for f in orden))
+        self.items, self.cantidades, self.items_inicio = items, cantidades, items_inicio
+        self._ids = [self._ids[f] for f in orden]
+        self._desordenado = False
+
+    # --- Archivo ---
+    def _guardar(self):
+        """ Escribe el archivo completo (en uno temporal que después lo reemplaza). """
+        if not self.ruta:
+            return
+        ids = '\n'.join(self._ids).encode('utf-8')
+        cabecera = json.dumps({
+            'formato': _FORMATO,
+            'orden_bytes': sys.byteorder,
+            'marcas': self._marcas,
+            'cajeros': self._cajeros.valores,
+            'items_menu': self._items_menu.valores,
+            'columnas': [[nombre, tipo, getattr(self, nombre).itemsize, len(getattr(self, nombre))]
+                         for nombre, tipo in _COLUMNAS],
+            'bytes_ids': len(ids),
+        }, ensure_ascii=False).encode('utf-8')
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(len(cabecera).to_bytes(8, 'little'))
+            f.write(cabecera)
+            for nombre, _ in _COLUMNAS:
+                getattr(self, nombre).tofile(f)
+            f.write(ids)
+        os.replace(temporal, self.ruta)
+
+    def _cargar(self):
+        with open(self.ruta, 'rb') as f:
+            largo = int.from_bytes(f.read(8), 'little')
+            if largo > os.path.getsize(self.ruta) - 8:
+                raise ValueError("archivo incompleto o de otro formato")
+            cabecera = json.loads(f.read(largo).decode('utf-8'))
+            if cabecera.get('formato') != _FORMATO:
+                raise ValueError(f"formato desconocido {cabecera.get('formato')!r}")
+            invertir = cabecera['orden_bytes'] != sys.byteorder
+            for nombre, tipo, tamano, n in cabecera['columnas']:
+                columna = array.array(tipo)
+                if columna.itemsize != tamano:
+                    raise ValueError(f"la columna '{nombre}' se guardó con otro tamaño de entero")
+                columna.fromfile(f, n)
+                if invertir:
+                    columna.byteswap()
+                setattr(self, nombre, columna)
+            ids = f.read(cabecera['bytes_ids']).decode('utf-8')
+        self._ids = ids.split('\n') if ids else []
+        if not (len(self._ids) == len(self.fechas) == len(self.items_inicio) - 1):
+            raise ValueError("columnas de distinto largo")
+        self._vistos = set(self._ids)
+        self._cajeros = _Diccionario(cabecera['cajeros'])
+        self._items_menu = _Diccionario(cabecera['items_menu'])
+        self._marcas = cabecera['marcas']
+
+    # --- Consultas (inicio <= fecha de finalización < fin, fechas con zona horaria) ---
+    def _tramo(self, inicio: datetime.datetime, fin: datetime.datetime) -> tuple[int, int]:
+        """ Filas [a, b) del rango. Llamar con _lock tomado. """
+        self._asegurar_leido()
+        return bisect.bisect_left(self.fechas, inicio.timestamp()), bisect.bisect_left(self.fechas, fin.timestamp())
+
+    def resumen(self, inicio: datetime.datetime, fin: datetime.datetime) -> dict:
+        """ {'pedidos': int, 'ingresos': float, 'ticket_promedio': float} del rango. """
+        with self._lock:
+            a, b = self._tramo(inicio, fin)
+            np = _cargar_numpy()
+            if np and b > a:
+                ingresos = float(np.frombuffer(self.totales, dtype=np.float64)[a:b].sum())
+            else:
+                ingresos = float(sum(self.totales[a:b]))
+        pedidos = b - a
+        return {
+            'pedidos': pedidos,
+            'ingresos': ingresos,
+            'ticket_promedio': ingresos / pedidos if pedidos else 0.0,
+        }
+
+    def ingresos_por_dia(self, inicio: datetime.datetime, fin: datetime.datetime) -> list[tuple]:
+        """ [(día, ingresos, pedidos)] de los días del rango que tuvieron pedidos, en orden. """
+        with self._lock:
+            a, b = self._tramo(inicio, fin)
+            if a == b:
+                return []
+            np = _cargar_numpy()
+            if np:
+                dias = ((np.frombuffer(self.fechas, dtype=np.float64)[a:b] + _DESFASE_LOCAL) // _SEGUNDOS_DIA).astype(np.int64)
+                primero = int(dias[0])
+                indices = dias - primero
+                ingresos = np.bincount(indices, weights=np.frombuffer(self.totales, dtype=np.float64)[a:b])
+                pedidos = np.bincount(indices)
+                return [
+                    (_fecha_de_dia(primero + int(k)), float(ingresos[k]), int(pedidos[k]))
+                    for k in np.flatnonzero(pedidos)
+                ]
+            por_dia = {}
+            for segundos, total in zip(self.fechas[a:b], self.totales[a:b]):
+                acumulado = por_dia.setdefault(_dia_local(segundos), [0.0, 0])
+                acumulado[0] += total
+                acumulado[1] += 1
+        return [(_fecha_de_dia(dia), ingresos, pedidos) for dia, (ingresos, pedidos) in por_dia.items()]
+
+    def ingresos_por_cajero(self, inicio: datetime.datetime, fin: datetime.datetime) -> list[tuple]:
+        """ [(cajero_uid, ingresos, pedidos)] del rango, de mayor a menor ingreso. """
+        with self._lock:
+            a, b = self._tramo(inicio, fin)
+            if a == b:
+                return []
+            cajeros = self._cajeros.valores
+            np = _cargar_numpy()
+            if np:
+                codigos = np.frombuffer(self.cajeros, dtype=np.int32)[a:b]
+                ingresos = np.bincount(codigos, weights=np.frombuffer(self.totales, dtype=np.float64)[a:b])
+                pedidos = np.bincount(codigos)
+                filas = [(cajeros[k], float(ingresos[k]), int(pedidos[k])) for k in np.flatnonzero(pedidos)]
+            else:
+                ingresos = [0.0] * len(cajeros)
+                pedidos = [0] * len(cajeros)
+                for codigo, total in zip(self.cajeros[a:b], self.totales[a:b]):
+                    ingresos[codigo] += total
+                    pedidos[codigo] += 1
+                filas = [(cajeros[k], ingresos[k], pedidos[k]) for k in range(len(cajeros)) if pedidos[k]]
+        return sorted(filas, key=lambda f: (-f[1], f[0]))
+
+    def items_mas_vendidos(self, inicio: datetime.datetime, fin: datetime.datetime, top: int = 10) -> list[tuple]:
+        """ [(item_id, unidades)] de los ítems más vendidos en el rango. """
+        with self._lock:
+            a, b = self._tramo(inicio, fin)
+            x, y = self.items_inicio[a], self.items_inicio[b]
+            if x == y:
+                return []
+            items_menu = self._items_menu.valores
+            np = _cargar_numpy()
+            if np:
+                unidades = np.bincount(
+                    np.frombuffer(self.items, dtype=np.int32)[x:y],
+                    weights=np.frombuffer(self.cantidades, dtype=np.int32)[x:y]
+                )
+                filas = [(items_menu[k], int(unidades[k])) for k in np.flatnonzero(unidades)]
+            else:
+                unidades = [0] * len(items_menu)
+                for codigo, cantidad in zip(self.items[x:y], self.cantidades[x:y]):
+                    unidades[codigo] += cantidad
+                filas = [(items_menu[k], unidades[k]) for k in range(len(items_menu)) if unidades[k]]
+        return sorted(filas, key=lambda f: (-f[1], f[0]))[:top]
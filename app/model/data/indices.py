@@ -0,0 +1,24 @@
+# app/model/data/indices.py
+"""
+Claves normalizadas para búsquedas indexadas en Firestore.
+
+Firestore solo compara valores exactos, así que los nombres se guardan
+además en una forma canónica (sin espacios sobrantes y en minúsculas)
+sobre la que se hacen consultas de igualdad y de rango.
+"""
+
+# Punto de código alto del plano básico: cierra un rango de prefijo.
+_FIN_PREFIJO = '\uf8ff'
+
+
+def normalizar_nombre(nombre) -> str:
+    """ 'Tomate  Chonto ' -> 'tomate chonto' """
+    return " ".join(str(nombre or '').split()).lower()
+
+
+def rango_prefijo(prefijo_norm: str) -> tuple[str, str]:
+    """
+    Devuelve (inicio, fin) para consultar nombres que empiezan por el prefijo:
+    where(campo, '>=', inicio).where(campo, '<', fin).
+    """
+    return prefijo_norm, prefijo_norm + _FIN_PREFIJO
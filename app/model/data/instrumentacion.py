@@ -0,0 +1,549 @@
+# app/model/data/instrumentacion.py
+"""
+Medición de las llamadas a Firestore por método de repositorio y por acción
+del menú.
+
+- @instrumentado (decorador de clase) mide cada método público de un
+  repositorio: llamadas, errores y latencia (histograma y percentiles).
+- ClienteMedido envuelve el cliente de Firestore y cuenta, dentro del método
+  que está corriendo, documentos leídos y escritos y bytes aproximados
+  (con las reglas de tamaño de almacenamiento de Firestore). Las lecturas se
+  cuentan como las factura Firestore: una consulta vacía cuesta una lectura.
+- La interfaz marca la acción del menú con marcar_accion(); todo lo que se
+  mida después queda agrupado bajo esa acción.
+
+El reporte (reporte_estadisticas) muestra qué métodos y qué opciones del
+menú cuestan más lecturas y más tiempo.
+"""
+
+import bisect
+import collections
+import contextvars
+import datetime
+import functools
+import inspect
+import threading
+import time
+
+# Límites superiores (ms) de los cubos del histograma de latencia.
+CUBOS_LATENCIA_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+# Muestras recientes que se guardan por clave para calcular percentiles.
+MUESTRAS_POR_CLAVE = 2048
+
+SIN_ACCION = '(sin acción de menú)'
+SIN_METODO = '(fuera de un repositorio)'
+
+_medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+_accion_actual = contextvars.ContextVar('accion_actual', default=SIN_ACCION)
+
+
+class _Medicion:
+    """ Contadores de una llamada en curso (los de las llamadas anidadas se suman al terminar). """
+    __slots__ = ('padre', 'lecturas', 'escrituras', 'bytes', 'errores_firestore')
+
+    def __init__(self, padre):
+        self.padre = padre
+        self.lecturas = 0
+        self.escrituras = 0
+        self.bytes = 0
+        self.errores_firestore = 0
+
+
+class _Acumulado:
+    """ Totales de una clave (método o acción). """
+    __slots__ = ('llamadas', 'errores', 'lecturas', 'escrituras', 'bytes', 'total_ms', 'cubos', 'muestras')
+
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.lecturas = 0
+        self.escrituras = 0
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.cubos = [0] * len(CUBOS_LATENCIA_MS)
+        self.muestras = collections.deque(maxlen=MUESTRAS_POR_CLAVE)
+
+    def agregar(self, ms: float, medicion: _Medicion, error: bool):
+        self.llamadas += 1
+        self.errores += int(error)
+        self.lecturas += medicion.lecturas
+        self.escrituras += medicion.escrituras
+        self.bytes += medicion.bytes
+        self.total_ms += ms
+        self.cubos[bisect.bisect_left(CUBOS_LATENCIA_MS, ms)] += 1
+        self.muestras.append(ms)
+
+    def percentil(self, p: float) -> float:
+        muestras = sorted(self.muestras)
+        if not muestras:
+            return 0.0
+        return muestras[min(len(muestras) - 1, int(p / 100 * len(muestras)))]
+
+
+class Estadisticas:
+    """ Registro compartido (seguro entre hilos) de todo lo medido. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.por_metodo: dict[str, _Acumulado] = {}
+        self.por_accion: dict[str, _Acumulado] = {}
+        self.por_metodo_y_accion: dict[tuple[str, str], _Acumulado] = {}
+
+    def registrar(self, metodo: str, ms: float, medicion: _Medicion, error: bool, nivel_superior: bool):
+        accion = _accion_actual.get()
+        with self._lock:
+            self.por_metodo.setdefault(metodo, _Acumulado()).agregar(ms, medicion, error)
+            self.por_metodo_y_accion.setdefault((metodo, accion), _Acumulado()).agregar(ms, medicion, error)
+            # Por acción solo cuentan las llamadas de primer nivel (las anidadas ya están incluidas).
+            if nivel_superior:
+                self.por_accion.setdefault(accion, _Acumulado()).agregar(ms, medicion, error)
+
+    def anotar_sin_metodo(self, lecturas: int, escrituras: int, bytes_: int):
+        """ Documentos movidos fuera de un método medido (p. ej. el hilo de un listener). """
+        with self._lock:
+            a = self.por_metodo.setdefault(SIN_METODO, _Acumulado())
+            a.lecturas += lecturas
+            a.escrituras += escrituras
+            a.bytes += bytes_
+
+    def reiniciar(self):
+        with self._lock:
+            self.por_metodo.clear()
+            self.por_accion.clear()
+            self.por_metodo_y_accion.clear()
+
+
+estadisticas = Estadisticas()
+
+
+def marcar_accion(nombre: str | None):
+    """ Agrupa lo que se mida a partir de ahora (en este hilo) bajo la acción 'nombre'. """
+    _accion_actual.set(nombre or SIN_ACCION)
+
+
+def accion_actual() -> str:
+    return _accion_actual.get()
+
+
+# --- Medición de métodos ---
+
+def _error_en_resultado(medicion: _Medicion) -> bool:
+    return medicion.errores_firestore > 0
+
+
+def _cerrar_medicion(metodo: str, inicio: float, medicion: _Medicion, error: bool):
+    ms = (time.perf_counter() - inicio) * 1000
+    padre = medicion.padre
+    if padre is not None:
+        padre.lecturas += medicion.lecturas
+        padre.escrituras += medicion.escrituras
+        padre.bytes += medicion.bytes
+        padre.errores_firestore += medicion.errores_firestore
+    estadisticas.registrar(metodo, ms, medicion, error or _error_en_resultado(medicion), padre is None)
+
+
+def _medir_funcion(metodo: str, funcion):
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        medicion = _Medicion(_medicion_actual.get())
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            return funcion(*args, **kwargs)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            _medicion_actual.reset(token)
+            _cerrar_medicion(metodo, inicio, medicion, error)
+    return envoltura
+
+
+def _medir_generador(metodo: str, funcion):
+    """
+    Un generador se mide desde la primera fila hasta que se agota o se
+    cierra; solo cuenta el tiempo que pasa dentro del generador.
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        medicion = _Medicion(_medicion_actual.get())
+        generador = funcion(*args, **kwargs)
+        segundos_dentro = 0.0
+        error = False
+        try:
+            while True:
+                token = _medicion_actual.set(medicion)
+                inicio = time.perf_counter()
+                try:
+                    valor = next(generador)
+                except StopIteration:
+                    return
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    segundos_dentro += time.perf_counter() - inicio
+                    _medicion_actual.reset(token)
+                yield valor
+        finally:
+            generador.close()
+            _cerrar_medicion(metodo, time.perf_counter() - segundos_dentro, medicion, error)
+    return envoltura
+
+
+def instrumentado(clase):
+    """ Decorador de clase: mide todos los métodos públicos (no las propiedades). """
+    for nombre, atributo in list(vars(clase).items()):
+        if nombre.startswith('_') or not inspect.isfunction(atributo):
+            continue
+        metodo = f"{clase.__name__}.{nombre}"
+        if inspect.isgeneratorfunction(atributo):
+            setattr(clase, nombre, _medir_generador(metodo, atributo))
+        else:
+            setattr(clase, nombre, _medir_funcion(metodo, atributo))
+    return clase
+
+
+# --- Conteo de documentos y bytes ---
+
+_TAMANO_FIJO = {type(None): 1, bool: 1, int: 8, float: 8, datetime.datetime: 8}
+
+
+def _tamano_texto(texto: str) -> int:
+    return (len(texto) if texto.isascii() else len(texto.encode('utf-8'))) + 1
+
+
+def tamano_valor(valor) -> int:
+    """ Tamaño de almacenamiento aproximado de un valor de Firestore. """
+    tipo = type(valor)
+    if tipo is str:
+        return _tamano_texto(valor)
+    fijo = _TAMANO_FIJO.get(tipo)
+    if fijo is not None:
+        return fijo
+    if isinstance(valor, dict):
+        total = 0
+        for clave, v in valor.items():
+            total += _tamano_texto(str(clave)) + tamano_valor(v)
+        return total
+    if isinstance(valor, (list, tuple)):
+        return sum(tamano_valor(v) for v in valor)
+    if isinstance(valor, str):
+        return _tamano_texto(valor)
+    if isinstance(valor, bytes):
+        return len(valor)
+    if isinstance(valor, bool):
+        return 1
+    return 8  # Números, fechas del SDK, transformaciones del servidor (Increment...) y otros.
+
+
+def _tamano_documento(ruta: str, data: dict | None) -> int:
+    # Nombre del documento + 32 bytes fijos + campos.
+    return len(ruta.encode('utf-8')) + 1 + 32 + (tamano_valor(data) if data else 0)
+
+
+def _contar(lecturas: int = 0, escrituras: int = 0, bytes_: int = 0):
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        estadisticas.anotar_sin_metodo(lecturas, escrituras, bytes_)
+        return
+    medicion.lecturas += lecturas
+    medicion.escrituras += escrituras
+    medicion.bytes += bytes_
+
+
+def _contar_error():
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.errores_firestore += 1
+
+
+def _real(objeto):
+    """ Objeto del SDK detrás de una envoltura (para pasarlo al cliente real). """
+    return objeto._objeto if isinstance(objeto, _Envoltura) else objeto
+
+
+def _llamar(funcion, *args, **kwargs):
+    try:
+        return funcion(*args, **kwargs)
+    except Exception:
+        _contar_error()
+        raise
+
+
+class _Envoltura:
+    """ Reenvía todo al objeto real salvo los métodos que se redefinen. """
+    __slots__ = ('_objeto',)
+
+    def __init__(self, objeto):
+        object.__setattr__(self, '_objeto', objeto)
+
+    def __getattr__(self, atributo):
+        return getattr(self._objeto, atributo)
+
+
+class SnapshotMedido(_Envoltura):
+    """ DocumentSnapshot: los bytes se cuentan cuando el repositorio lee los datos. """
+    __slots__ = ('_medicion', '_contado')
+
+    def __init__(self, snapshot, medicion):
+        super().__init__(snapshot)
+        object.__setattr__(self, '_medicion', medicion)
+        object.__setattr__(self, '_contado', False)
+
+    @property
+    def reference(self):
+        return DocumentoMedido(self._objeto.reference)
+
+    @property
+    def id(self):
+        return self._objeto.id
+
+    def to_dict(self):
+        data = self._objeto.to_dict()
+        if not self._contado and self._medicion is not None:
+            object.__setattr__(self, '_contado', True)
+            self._medicion.bytes += _tamano_documento(self._objeto.reference.path, data)
+        return data
+
+
+def _snapshots(iterable):
+    """ Cuenta los documentos que llegan (mínimo una lectura por consulta). """
+    medicion = _medicion_actual.get()
+    n = 0
+    try:
+        for snapshot in iterable:
+            n += 1
+            if medicion is not None:
+                medicion.lecturas += 1
+            yield SnapshotMedido(snapshot, medicion)
+    except Exception:
+        _contar_error()
+        raise
+    finally:
+        if medicion is None:
+            estadisticas.anotar_sin_metodo(max(1, n), 0, 0)
+        elif n == 0:
+            medicion.lecturas += 1
+
+
+class ConsultaMedida(_Envoltura):
+    """ Query / CollectionReference. """
+    __slots__ = ()
+
+    def _envolver(self, metodo, *args, **kwargs):
+        return ConsultaMedida(getattr(self._objeto, metodo)(*args, **kwargs))
+
+    def where(self, *args, **kwargs):
+        return self._envolver('where', *args, **kwargs)
+
+    def order_by(self, *args, **kwargs):
+        return self._envolver('order_by', *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._envolver('limit', *args, **kwargs)
+
+    def select(self, *args, **kwargs):
+        return self._envolver('select', *args, **kwargs)
+
+    def start_after(self, cursor):
+        return ConsultaMedida(self._objeto.start_after(_real(cursor)))
+
+    def document(self, *args, **kwargs):
+        return DocumentoMedido(self._objeto.document(*args, **kwargs))
+
+    def add(self, document_data, *args, **kwargs):
+        tiempo, ref = _llamar(self._objeto.add, document_data, *args, **kwargs)
+        _contar(escrituras=1, bytes_=_tamano_documento(ref.path, document_data))
+        return tiempo, DocumentoMedido(ref)
+
+    def stream(self, *args, **kwargs):
+        return _snapshots(_llamar(self._objeto.stream, *args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+    def count(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.count(*args, **kwargs))
+
+    def sum(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.sum(*args, **kwargs))
+
+    def avg(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.avg(*args, **kwargs))
+
+    def on_snapshot(self, callback):
+        def contar_y_avisar(docs, cambios, read_time):
+            # Llega desde el hilo del listener: se anota fuera de los métodos.
+            entrantes = sum(1 for c in cambios if c.type.name != 'REMOVED')
+            if entrantes:
+                _contar(lecturas=entrantes)
+            return callback(docs, cambios, read_time)
+
+        return self._objeto.on_snapshot(contar_y_avisar)
+
+
+class AgregacionMedida(_Envoltura):
+    """ AggregationQuery: se factura como una lectura por cada 1000 entradas (se cuenta 1). """
+    __slots__ = ()
+
+    def count(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.count(*args, **kwargs))
+
+    def sum(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.sum(*args, **kwargs))
+
+    def avg(self, *args, **kwargs):
+        return AgregacionMedida(self._objeto.avg(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        resultado = _llamar(self._objeto.get, *args, **kwargs)
+        _contar(lecturas=1)
+        return resultado
+
+
+class DocumentoMedido(_Envoltura):
+    """ DocumentReference. """
+    __slots__ = ()
+
+    def get(self, *args, **kwargs):
+        snapshot = _llamar(self._objeto.get, *args, **kwargs)
+        _contar(lecturas=1)
+        return SnapshotMedido(snapshot, _medicion_actual.get())
+
+    def set(self, document_data, *args, **kwargs):
+        resultado = _llamar(self._objeto.set, document_data, *args, **kwargs)
+        _contar(escrituras=1, bytes_=_tamano_documento(self._objeto.path, document_data))
+        return resultado
+
+    def create(self, document_data, *args, **kwargs):
+        resultado = _llamar(self._objeto.create, document_data, *args, **kwargs)
+        _contar(escrituras=1, bytes_=_tamano_documento(self._objeto.path, document_data))
+        return resultado
+
+    def update(self, field_updates, *args, **kwargs):
+        resultado = _llamar(self._objeto.update, field_updates, *args, **kwargs)
+        _contar(escrituras=1, bytes_=_tamano_documento(self._objeto.path, field_updates))
+        return resultado
+
+    def delete(self, *args, **kwargs):
+        resultado = _llamar(self._objeto.delete, *args, **kwargs)
+        _contar(escrituras=1)
+        return resultado
+
+    def collection(self, *args, **kwargs):
+        return ConsultaMedida(self._objeto.collection(*args, **kwargs))
+
+
+class LoteMedido(_Envoltura):
+    """ WriteBatch: las escrituras se cuentan al confirmar. """
+    __slots__ = ('_escrituras', '_bytes')
+
+    def __init__(self, lote):
+        super().__init__(lote)
+        object.__setattr__(self, '_escrituras', 0)
+        object.__setattr__(self, '_bytes', 0)
+
+    def _anotar(self, ref, data):
+        object.__setattr__(self, '_escrituras', self._escrituras + 1)
+        object.__setattr__(self, '_bytes', self._bytes + _tamano_documento(_real(ref).path, data))
+
+    def set(self, referencia, document_data, *args, **kwargs):
+        self._objeto.set(_real(referencia), document_data, *args, **kwargs)
+        self._anotar(referencia, document_data)
+        return self
+
+    def create(self, referencia, document_data, *args, **kwargs):
+        self._objeto.create(_real(referencia), document_data, *args, **kwargs)
+        self._anotar(referencia, document_data)
+        return self
+
+    def update(self, referencia, field_updates, *args, **kwargs):
+        self._objeto.update(_real(referencia), field_updates, *args, **kwargs)
+        self._anotar(referencia, field_updates)
+        return self
+
+    def delete(self, referencia, *args, **kwargs):
+        self._objeto.delete(_real(referencia), *args, **kwargs)
+        self._anotar(referencia, None)
+        return self
+
+    def commit(self, *args, **kwargs):
+        resultado = _llamar(self._objeto.commit, *args, **kwargs)
+        _contar(escrituras=self._escrituras, bytes_=self._bytes)
+        object.__setattr__(self, '_escrituras', 0)
+        object.__setattr__(self, '_bytes', 0)
+        return resultado
+
+
+class ClienteMedido(_Envoltura):
+    """ Cliente de Firestore que anota lecturas, escrituras y bytes en el método en curso. """
+    __slots__ = ()
+
+    def collection(self, *args, **kwargs):
+        return ConsultaMedida(self._objeto.collection(*args, **kwargs))
+
+    def document(self, *args, **kwargs):
+        return DocumentoMedido(self._objeto.document(*args, **kwargs))
+
+    def batch(self, *args, **kwargs):
+        return LoteMedido(self._objeto.batch(*args, **kwargs))
+
+    def get_all(self, referencias, *args, **kwargs):
+        referencias = [_real(ref) for ref in referencias]
+        medicion = _medicion_actual.get()
+        try:
+            for snapshot in self._objeto.get_all(referencias, *args, **kwargs):
+                _contar(lecturas=1)
+                yield SnapshotMedido(snapshot, medicion)
+        except Exception:
+            _contar_error()
+            raise
+
+
+# --- Reporte ---
+
+def _fila(nombre: str, a: _Acumulado) -> str:
+    promedio = a.total_ms / a.llamadas if a.llamadas else 0.0
+    return (f"{nombre[:48]:<48}{a.llamadas:>8}{a.errores:>6}{promedio:>9.1f}{a.percentil(50):>9.1f}"
+            f"{a.percentil(95):>9.1f}{a.percentil(99):>9.1f}{a.lecturas:>10}{a.escrituras:>9}{a.bytes / 1024:>10.1f}")
+
+
+def _encabezado(titulo: str) -> list[str]:
+    return [
+        "",
+        f"=== {titulo} ===",
+        f"{'':<48}{'llamadas':>8}{'err':>6}{'prom ms':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'leídos':>10}{'escritos':>9}{'KB':>10}",
+        "-" * 126,
+    ]
+
+
+def _histograma(a: _Acumulado) -> str:
+    partes = []
+    for limite, n in zip(CUBOS_LATENCIA_MS, a.cubos):
+        if n:
+            etiqueta = f"≤{limite:g}ms" if limite != float('inf') else f">{CUBOS_LATENCIA_MS[-2]:g}ms"
+            partes.append(f"{etiqueta}:{n}")
+    return "  ".join(partes)
+
+
+def reporte_estadisticas(top: int = 25) -> list[str]:
+    """ Líneas del reporte: acciones del menú y métodos, de más a menos documentos leídos. """
+    with estadisticas._lock:
+        por_accion = sorted(estadisticas.por_accion.items(), key=lambda par: (-par[1].lecturas, -par[1].total_ms))
+        por_metodo = sorted(estadisticas.por_metodo.items(), key=lambda par: (-par[1].lecturas, -par[1].total_ms))
+        detalle = sorted(estadisticas.por_metodo_y_accion.items(), key=lambda par: -par[1].lecturas)
+
+        if not por_metodo:
+            return ["Todavía no hay llamadas medidas."]
+
+        lineas = _encabezado("Por acción del menú")
+        lineas += [_fila(accion, a) for accion, a in por_accion[:top]]
+        lineas += _encabezado("Por método")
+        lineas += [_fila(metodo, a) for metodo, a in por_metodo[:top]]
+        lineas += _encabezado("Método dentro de cada acción (los que más leen)")
+        lineas += [_fila(f"{accion} → {metodo.split('.', 1)[-1]}", a) for (metodo, accion), a in detalle[:top]]
+        lineas += ["", "=== Histograma de latencia por método ==="]
+        lineas += [f"{metodo[:48]:<48}{_histograma(a)}" for metodo, a in por_metodo[:top] if a.llamadas]
+    return lineas
@@ -1,4 +1,44 @@
 
+from app.model.data.indices import normalizar_nombre, rango_prefijo
+from app.model.data.instrumentacion import instrumentado
+from app.model.data.lotes import Escritura, escribir_en_lotes, OPS_POR_SEGUNDO_INICIAL
+from app.model.data.planes import Juntos, Leer, Llamar, plan
+from app.model.data.resiliencia import LecturaInterrumpida
+from app.model.data.versiones import marcar_escritura
+from app.model.domain.pedido import ProductoInventario
+
+# Campo con el nombre normalizado; es la clave de búsqueda de los productos.
+CAMPO_NOMBRE_NORM = 'nombre_norm'
+
+# cantidad * costo guardado en cada producto, para sumar la valoración en el servidor.
+CAMPO_VALOR_TOTAL = 'valor_total'
+
+# Productos por página al exportar el inventario.
+TAM_PAGINA_INVENTARIO = 500
+
+
+def incrementos_stock(cantidad: float, costo: float) -> dict:
+    """
+    Payload (con incrementos del servidor) que suma 'cantidad' al stock de un
+    producto (negativa para descontar) y ajusta su valor_total con el costo.
+    """
+    from firebase_admin import firestore
+
+    cantidad = float(cantidad)
+    return {
+        'cantidad': firestore.Increment(cantidad),
+        CAMPO_VALOR_TOTAL: firestore.Increment(cantidad * float(costo or 0.0)),
+    }
+
+
+def _a_numero(valor) -> float:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@instrumentado
 class InventarioRepo:
     def __init__(self, db, is_ready):
         self.db = db
@@ -8,94 +48,286 @@ class InventarioRepo:
     def is_ready(self):
         return self._is_ready
 
-    def obtener_todo_inventario(self):
+    @plan
+    def obtener_todo_inventario(self, db) -> list[ProductoInventario] | None:
+        """ Todos los productos; [] si el inventario está vacío y None si no se pudo leer. """
         if not self.is_ready:
-            return []
+            return None
         try:
-            docs = self.db.collection('inventario').stream()
-            inventario = []
-            for doc in docs:
-                data = doc.to_dict() or {}
-                inventario.append((doc.id, dict(data)))
-            return inventario
+            docs = yield Leer(db.collection('inventario'))
+            return [ProductoInventario.from_firestore(doc.id, doc.to_dict() or {}) for doc in docs]
         except Exception as e:
             print(f"Error en InventarioRepo.obtener_todo_inventario: {e}")
-            return []
+            return None
 
-    def buscar_producto_por_nombre(self, nombre: str):
+    @staticmethod
+    def _consulta_exacta(db, nombre_norm: str):
+        return db.collection('inventario').where(CAMPO_NOMBRE_NORM, '==', nombre_norm)
+
+    @plan
+    def buscar_producto_por_nombre(self, db, nombre: str) -> list[ProductoInventario] | None:
+        """
+        Busca los productos cuyo nombre empieza por el texto dado.
+        Es una consulta de rango sobre 'nombre_norm': solo se leen los que coinciden.
+        Retorna [] si no hay coincidencias y None si la consulta falló.
+        """
         if not self.is_ready:
-            return []
+            return None
         try:
-            if not nombre or not str(nombre).strip():
+            prefijo = normalizar_nombre(nombre)
+            if not prefijo:
                 return []
-            nombre_lower = str(nombre).lower()
-            docs = self.db.collection('inventario').stream()
-            resultados = []
-            for doc in docs:
-                data = doc.to_dict() or {}
-                campo_nombre = str(
-                    data.get('nombre')
-                    or data.get('Nombre')
-                    or data.get('producto')
-                    or data.get('producto_nombre')
-                    or ''
-                ).lower()
-                if nombre_lower in campo_nombre:
-                    resultados.append((doc.id, dict(data)))
-            return resultados
+            inicio, fin = rango_prefijo(prefijo)
+            docs = yield Leer(
+                db.collection('inventario')
+                .where(CAMPO_NOMBRE_NORM, '>=', inicio)
+                .where(CAMPO_NOMBRE_NORM, '<', fin)
+            )
+            return [ProductoInventario.from_firestore(doc.id, doc.to_dict() or {}) for doc in docs]
         except Exception as e:
             print(f"Error en InventarioRepo.buscar_producto_por_nombre: {e}")
-            return []
+            return None
 
-    def agregar_o_actualizar_producto_por_nombre(self, nombre: str, cantidad: float, costo: float):
+    @plan
+    def agregar_o_actualizar_producto_por_nombre(self, db, nombre: str, cantidad: float, costo: float):
         if not self.is_ready:
             return False
         try:
             nombre_clean = str(nombre).strip()
-            if not nombre_clean:
+            nombre_norm = normalizar_nombre(nombre_clean)
+            if not nombre_norm:
                 return False
 
-            coleccion = self.db.collection('inventario')
-            encontrado_id = None
-            for doc in coleccion.stream():
-                data = doc.to_dict() or {}
-                campo_nombre = str(data.get('nombre') or data.get('Nombre') or '').strip().lower()
-                if campo_nombre == nombre_clean.lower():
-                    encontrado_id = doc.id
-                    break
-
-            payload = {
-                'nombre': nombre_clean,
-                'cantidad': float(cantidad),
-                'costo': float(costo)
-            }
+            payload = ProductoInventario.nuevo(None, nombre_clean, cantidad, costo).to_firestore()
+            payload[CAMPO_NOMBRE_NORM] = nombre_norm
 
-            if encontrado_id:
-                coleccion.document(encontrado_id).update(payload)
+            existentes = yield Leer(self._consulta_exacta(db, nombre_norm).limit(1))
+            if existentes:
+                yield Llamar(existentes[0].reference.update, payload)
             else:
-                coleccion.add(payload)
+                yield Llamar(db.collection('inventario').add, payload)
 
+            marcar_escritura('inventario')
             return True
         except Exception as e:
             print(f"Error en InventarioRepo.agregar_o_actualizar_producto_por_nombre: {e}")
             return False
 
-    def eliminar_producto_por_nombre(self, nombre: str):
+    @plan
+    def ajustar_stock_por_nombre(self, db, nombre: str, delta: float):
+        """
+        Suma 'delta' (o resta, si es negativo) a la cantidad del producto con
+        un incremento del servidor: dos terminales que ajustan a la vez no se
+        pisan. Retorna False si el producto no existe.
+        """
         if not self.is_ready:
             return False
         try:
-            nombre_clean = str(nombre).strip()
-            if not nombre_clean:
+            nombre_norm = normalizar_nombre(nombre)
+            if not nombre_norm:
                 return False
-            coleccion = self.db.collection('inventario')
-            removed = 0
-            for doc in coleccion.stream():
-                data = doc.to_dict() or {}
-                campo_nombre = str(data.get('nombre') or data.get('Nombre') or '').strip().lower()
-                if campo_nombre == nombre_clean.lower():
-                    coleccion.document(doc.id).delete()
-                    removed += 1
-            return removed > 0
+            existentes = yield Leer(self._consulta_exacta(db, nombre_norm).limit(1))
+            if not existentes:
+                return False
+            costo = _a_numero((existentes[0].to_dict() or {}).get('costo'))
+            yield Llamar(existentes[0].reference.update, incrementos_stock(delta, costo))
+            marcar_escritura('inventario')
+            return True
+        except Exception as e:
+            print(f"Error en InventarioRepo.ajustar_stock_por_nombre: {e}")
+            return False
+
+    @plan
+    def eliminar_producto_por_nombre(self, db, nombre: str):
+        """ Borra los productos con ese nombre (en el repositorio asíncrono, en paralelo). """
+        if not self.is_ready:
+            return False
+        try:
+            nombre_norm = normalizar_nombre(nombre)
+            if not nombre_norm:
+                return False
+            docs = yield Leer(self._consulta_exacta(db, nombre_norm))
+            yield Juntos(Llamar(doc.reference.delete) for doc in docs)
+            if docs:
+                marcar_escritura('inventario')
+            return len(docs) > 0
         except Exception as e:
             print(f"Error en InventarioRepo.eliminar_producto_por_nombre: {e}")
             return False
+
+    @plan
+    def obtener_mapa_nombres(self, db) -> dict | None:
+        """
+        {nombre_norm: id} de todo el inventario. La consulta solo trae el
+        campo 'nombre_norm', así el mapa se arma con una lectura liviana.
+        """
+        if not self.is_ready:
+            return None
+        try:
+            docs = yield Leer(db.collection('inventario').select([CAMPO_NOMBRE_NORM]))
+            mapa = {}
+            for doc in docs:
+                nombre_norm = (doc.to_dict() or {}).get(CAMPO_NOMBRE_NORM)
+                if nombre_norm:
+                    mapa.setdefault(nombre_norm, doc.id)
+            return mapa
+        except Exception as e:
+            print(f"Error en InventarioRepo.obtener_mapa_nombres: {e}")
+            return None
+
+    def importar_productos(self, productos, ops_por_segundo: float | None = OPS_POR_SEGUNDO_INICIAL) -> dict | None:
+        """
+        Agrega o actualiza muchos productos de una vez.
+        productos es un iterable de (nombre, cantidad, costo); se consume por
+        partes y se escribe en lotes de 500, así que puede ser un generador
+        sobre un archivo grande. Los existentes se resuelven contra un único
+        mapa de nombres leído al principio.
+        Retorna {'creados', 'actualizados', 'fallidos': [...]}, o None si falló.
+        """
+        if not self.is_ready:
+            return None
+        mapa = self.obtener_mapa_nombres()
+        if mapa is None:
+            return None
+        try:
+            coleccion = self.db.collection('inventario')
+            nuevos = set()
+            conteo = {'creados': 0, 'actualizados': 0}
+
+            def operaciones():
+                for nombre, cantidad, costo in productos:
+                    nombre_clean = str(nombre).strip()
+                    nombre_norm = normalizar_nombre(nombre_clean)
+                    if not nombre_norm:
+                        continue
+                    doc_id = mapa.get(nombre_norm)
+                    if doc_id is None:
+                        # El ID se genera en el cliente (sin RPC) para que una
+                        # fila repetida más adelante actualice el mismo documento.
+                        doc_id = coleccion.document().id
+                        mapa[nombre_norm] = doc_id
+                        nuevos.add(doc_id)
+                        conteo['creados'] += 1
+                    elif doc_id not in nuevos:
+                        conteo['actualizados'] += 1
+                    payload = ProductoInventario.nuevo(doc_id, nombre_clean, cantidad, costo).to_firestore()
+                    payload[CAMPO_NOMBRE_NORM] = nombre_norm
+                    yield Escritura('merge', 'inventario', doc_id, payload)
+
+            resultado = escribir_en_lotes(self.db, operaciones(), ops_por_segundo=ops_por_segundo)
+            if resultado.escritas:
+                marcar_escritura('inventario')
+            for fallida in resultado.fallidas:
+                if fallida['doc_id'] in nuevos:
+                    conteo['creados'] -= 1
+                else:
+                    conteo['actualizados'] -= 1
+            return {**conteo, 'fallidos': resultado.fallidas}
+        except Exception as e:
+            print(f"Error en InventarioRepo.importar_productos: {e}")
+            return None
+
+    @plan
+    def obtener_productos_paginados(self, db, limite: int = TAM_PAGINA_INVENTARIO,
+                                    cursor=None) -> tuple[list, object | None] | None:
+        """
+        Una página del inventario, en orden de ID.
+        Retorna ([ProductoInventario, ...], cursor_siguiente); cursor_siguiente
+        es None cuando no hay más. Retorna None si la página no se pudo leer.
+        """
+        if not self.is_ready:
+            return None
+        try:
+            query = db.collection('inventario').limit(limite)
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = yield Leer(query)
+            siguiente = docs[-1] if len(docs) == limite else None
+            return [ProductoInventario.from_firestore(doc.id, doc.to_dict() or {}) for doc in docs], siguiente
+        except Exception as e:
+            print(f"Error en InventarioRepo.obtener_productos_paginados: {e}")
+            return None
+
+    def iterar_productos(self, tam_pagina: int = TAM_PAGINA_INVENTARIO):
+        """
+        Recorre todo el inventario página por página, sin cargarlo todo en memoria.
+        Lanza LecturaInterrumpida si una página no se pudo leer.
+        """
+        cursor = None
+        while True:
+            resultado = self.obtener_productos_paginados(tam_pagina, cursor)
+            if resultado is None:
+                raise LecturaInterrumpida("No se pudo leer una página del inventario.")
+            pagina, cursor = resultado
+            yield from pagina
+            if cursor is None:
+                break
+
+    @plan
+    def obtener_resumen_inventario(self, db) -> dict | None:
+        """
+        Totales del inventario calculados en Firestore (una consulta de
+        agregación, sin descargar documentos):
+        {'productos': int, 'unidades': float, 'valor_total': float}.
+        """
+        if not self.is_ready:
+            return None
+        try:
+            consulta = (
+                db.collection('inventario')
+                .count(alias='productos')
+                .sum('cantidad', alias='unidades')
+                .sum(CAMPO_VALOR_TOTAL, alias='valor_total')
+            )
+            filas = yield Llamar(consulta.get)
+            valores = {r.alias: r.value for fila in filas for r in fila}
+            return {
+                'productos': int(valores.get('productos') or 0),
+                'unidades': float(valores.get('unidades') or 0.0),
+                'valor_total': float(valores.get('valor_total') or 0.0),
+            }
+        except Exception as e:
+            print(f"Error en InventarioRepo.obtener_resumen_inventario: {e}")
+            return None
+
+    def migrar_campos_derivados(self) -> int:
+        """
+        Migración única: agrega 'nombre_norm' y 'valor_total' a los productos
+        creados antes de esos campos (incluye los que usan 'Nombre' o
+        'producto' como campo de nombre).
+        Retorna cuántos documentos se actualizaron, o -1 si falló.
+        """
+        if not self.is_ready:
+            return -1
+        try:
+            resultado = escribir_en_lotes(self.db, self._cambios_derivados())
+            if resultado.escritas:
+                marcar_escritura('inventario')
+            if not resultado.ok:
+                print(f"Error en InventarioRepo.migrar_campos_derivados: fallaron {len(resultado.fallidas)} productos.")
+                return -1
+            return resultado.escritas
+        except Exception as e:
+            print(f"Error en InventarioRepo.migrar_campos_derivados: {e}")
+            return -1
+
+    def _cambios_derivados(self):
+        """ Genera las actualizaciones de 'nombre_norm'/'valor_total' que faltan. """
+        for doc in self.db.collection('inventario').stream():
+            data = doc.to_dict() or {}
+            nombre = (
+                data.get('nombre')
+                or data.get('Nombre')
+                or data.get('producto')
+                or data.get('producto_nombre')
+                or ''
+            )
+            cambios = {}
+            nombre_norm = normalizar_nombre(nombre)
+            if nombre_norm and data.get(CAMPO_NOMBRE_NORM) != nombre_norm:
+                cambios[CAMPO_NOMBRE_NORM] = nombre_norm
+            valor_total = _a_numero(data.get('cantidad')) * _a_numero(data.get('costo'))
+            if data.get(CAMPO_VALOR_TOTAL) != valor_total:
+                cambios[CAMPO_VALOR_TOTAL] = valor_total
+            if cambios:
+                yield Escritura('update', 'inventario', doc.id, cambios)
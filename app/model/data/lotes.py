@@ -0,0 +1,204 @@
+# app/model/data/lotes.py
+"""
+Escritura masiva con lotes (WriteBatch) de Firestore.
+
+Las operaciones se agrupan en lotes de hasta 500 (el máximo de Firestore),
+así un import o una migración paga un viaje de ida y vuelta por lote y no
+uno por documento. Un lote es atómico: si el servidor lo rechaza por algún
+documento, se parte en mitades y se reintenta para saber exactamente cuáles
+fallaron. Solo se parte por errores de un documento (no existe, ya existe,
+datos inválidos, precondición): si Firestore pide bajar el ritmo (cuota,
+429) o el lote chocó con otra escritura (Aborted), se espera y se reintenta
+el lote entero, más despacio.
+
+El ritmo de escritura sigue la regla 500/50/5 de Firestore: empieza en 500
+operaciones por segundo y sube un 50 % cada 5 minutos.
+"""
+
+import itertools
+import random
+import time
+
+# Máximo de operaciones por lote que acepta Firestore.
+MAX_OPERACIONES_LOTE = 500
+# Ritmo inicial (operaciones por segundo) y cómo sube con el tiempo.
+OPS_POR_SEGUNDO_INICIAL = 500
+AUMENTO_RITMO = 1.5
+SEGUNDOS_ENTRE_AUMENTOS = 5 * 60
+# Reintentos de un lote rechazado por cuota o contención, con espera creciente.
+REINTENTOS_LOTE = 5
+ESPERA_LOTE_INICIAL_SEGUNDOS = 1.0
+ESPERA_LOTE_MAXIMA_SEGUNDOS = 30.0
+
+TIPOS_ESCRITURA = ('set', 'merge', 'create', 'update', 'delete')
+
+
+class Escritura:
+    """
+    Una operación del lote.
+      - 'set' / 'merge': escribe el documento (merge=True en el segundo caso).
+      - 'create': crea el documento; si doc_id es None se genera uno.
+      - 'update': actualiza campos de un documento existente.
+      - 'delete': borra el documento (datos se ignora).
+    """
+    __slots__ = ('tipo', 'coleccion', 'doc_id', 'datos')
+
+    def __init__(self, tipo: str, coleccion: str, doc_id: str | None = None, datos: dict | None = None):
+        if tipo not in TIPOS_ESCRITURA:
+            raise ValueError(f"Tipo de escritura no válido: {tipo}")
+        if doc_id is None and tipo != 'create':
+            raise ValueError(f"La operación '{tipo}' necesita un doc_id.")
+        self.tipo = tipo
+        self.coleccion = coleccion
+        self.doc_id = doc_id
+        self.datos = datos
+
+
+class ResultadoLote:
+    """
+    Resumen de una escritura masiva: conteos y las operaciones que fallaron.
+    'ids' (el ID de cada operación, en el orden recibido) solo se llena si se
+    pidió con guardar_ids=True; si no, es None y la memoria no crece con el import.
+    """
+
+    def __init__(self, guardar_ids: bool = False):
+        self.escritas = 0
+        self.lotes = 0
+        self.ids: list[str] | None = [] if guardar_ids else None
+        self.fallidas: list[dict] = []  # {'coleccion', 'doc_id', 'error', 'excepcion'}
+        self.colecciones: set[str] = set()
+
+    @property
+    def ok(self) -> bool:
+        return not self.fallidas
+
+    def __repr__(self):
+        return f"ResultadoLote(escritas={self.escritas}, fallidas={len(self.fallidas)}, lotes={self.lotes})"
+
+
+class _Regulador:
+    """ Limita las operaciones por segundo, con el aumento gradual de 500/50/5. """
+
+    def __init__(self, ops_por_segundo: float | None):
+        self.ritmo = ops_por_segundo
+        self._inicio = time.monotonic()
+        self._disponible_en = self._inicio
+
+    def _ritmo_actual(self, ahora: float) -> float:
+        aumentos = int((ahora - self._inicio) // SEGUNDOS_ENTRE_AUMENTOS)
+        return self.ritmo * (AUMENTO_RITMO ** aumentos)
+
+    def esperar(self, n_operaciones: int):
+        if not self.ritmo:
+            return
+        ahora = time.monotonic()
+        if self._disponible_en > ahora:
+            time.sleep(self._disponible_en - ahora)
+            ahora = self._disponible_en
+        self._disponible_en = ahora + n_operaciones / self._ritmo_actual(ahora)
+
+    def frenar(self):
+        """ Firestore pidió bajar el ritmo: se reduce a la mitad. """
+        if self.ritmo:
+            self.ritmo /= 2
+
+
+def _referencia(db, op: Escritura):
+    coleccion = db.collection(op.coleccion)
+    return coleccion.document(op.doc_id) if op.doc_id is not None else coleccion.document()
+
+
+def _agregar(lote, ref, op: Escritura):
+    if op.tipo == 'set':
+        lote.set(ref, op.datos or {})
+    elif op.tipo == 'merge':
+        lote.set(ref, op.datos or {}, merge=True)
+    elif op.tipo == 'create':
+        lote.create(ref, op.datos or {})
+    elif op.tipo == 'update':
+        lote.update(ref, op.datos or {})
+    else:
+        lote.delete(ref)
+
+
+def _es_error_de_documento(error: Exception) -> bool:
+    """
+    True si el rechazo se debe al contenido del lote (un documento que no
+    existe, que ya existe, datos inválidos, una precondición). Los errores de
+    red, de cuota o del servidor afectan a todo el lote por igual, así que no
+    vale la pena partirlo.
+    """
+    from google.api_core import exceptions as gexc
+    return isinstance(error, (gexc.NotFound, gexc.AlreadyExists, gexc.InvalidArgument, gexc.FailedPrecondition))
+
+
+def _es_error_de_ritmo(error: Exception) -> bool:
+    """ True si Firestore pide escribir más despacio (cuota, 429) o el lote chocó con otra escritura. """
+    from google.api_core import exceptions as gexc
+    return isinstance(error, (gexc.ResourceExhausted, gexc.TooManyRequests, gexc.Aborted))
+
+
+def _espera_lote(intento: int) -> float:
+    return random.uniform(0, min(ESPERA_LOTE_MAXIMA_SEGUNDOS, ESPERA_LOTE_INICIAL_SEGUNDOS * (2 ** intento)))
+
+
+def _confirmar(db, pares: list, resultado: ResultadoLote, regulador: _Regulador):
+    """
+    Confirma un grupo. Si Firestore pide bajar el ritmo, espera y lo
+    reintenta entero; si lo rechaza por algún documento, lo parte en mitades
+    hasta aislar los documentos fallidos.
+    """
+    intento = 0
+    while True:
+        lote = db.batch()
+        for op, ref in pares:
+            _agregar(lote, ref, op)
+        try:
+            lote.commit()
+            resultado.lotes += 1
+            resultado.escritas += len(pares)
+            resultado.colecciones.update(op.coleccion for op, _ in pares)
+            return
+        except Exception as e:
+            if _es_error_de_ritmo(e) and intento < REINTENTOS_LOTE:
+                regulador.frenar()
+                time.sleep(_espera_lote(intento))
+                intento += 1
+                continue
+            if len(pares) == 1 or not _es_error_de_documento(e):
+                for op, ref in pares:
+                    resultado.fallidas.append({'coleccion': op.coleccion, 'doc_id': ref.id, 'error': str(e), 'excepcion': e})
+                return
+            mitad = len(pares) // 2
+            _confirmar(db, pares[:mitad], resultado, regulador)
+            _confirmar(db, pares[mitad:], resultado, regulador)
+            return
+
+
+def escribir_en_lotes(db, operaciones, tam_lote: int = MAX_OPERACIONES_LOTE,
+                      ops_por_segundo: float | None = OPS_POR_SEGUNDO_INICIAL,
+                      guardar_ids: bool = False) -> ResultadoLote:
+    """
+    Escribe un iterable de Escritura en lotes de hasta tam_lote operaciones.
+    El iterable se consume por partes, así se puede pasar un generador con
+    millones de filas sin cargarlas todas en memoria.
+    ops_por_segundo=None desactiva el control de ritmo.
+    guardar_ids=True guarda en resultado.ids el ID de cada operación (útil
+    con 'create' sin doc_id); por defecto solo se guardan los que fallaron.
+    """
+    tam_lote = max(1, min(int(tam_lote), MAX_OPERACIONES_LOTE))
+    regulador = _Regulador(ops_por_segundo)
+    resultado = ResultadoLote(guardar_ids)
+    operaciones = iter(operaciones)
+
+    while True:
+        grupo = list(itertools.islice(operaciones, tam_lote))
+        if not grupo:
+            break
+        pares = [(op, _referencia(db, op)) for op in grupo]
+        if resultado.ids is not None:
+            resultado.ids.extend(ref.id for _, ref in pares)
+        regulador.esperar(len(pares))
+        _confirmar(db, pares, resultado, regulador)
+
+    return resultado
@@ -0,0 +1,122 @@
+# app/model/data/planes.py
+"""
+Cuerpo común de los repositorios síncronos (DbRepo, InventarioRepo,
+FinanzasRepo) y de sus contrapartes asíncronas (repos_async.py).
+
+Cada operación se escribe una sola vez como un plan: un generador que recibe
+el cliente, arma consultas y payloads y cede (yield) cada llamada de red
+como un paso. El plan no sabe si el cliente es síncrono o asíncrono; quien
+lo corre sí:
+
+    @plan
+    def obtener_resumen_diario(self, db, dia):
+        doc = yield Llamar(db.collection(COLECCION_RESUMEN_DIARIO).document(dia).get)
+        return doc.to_dict() if doc.exists else {}
+
+    repo.obtener_resumen_diario(dia)              # corre el plan con repo.db
+    await repo_async.obtener_resumen_diario(dia)  # el mismo plan con el AsyncClient
+
+Si la llamada falla, la excepción se lanza dentro del plan (en el yield),
+así que los try/except, reintentos y mensajes de error del plan valen para
+los dos.
+"""
+
+import asyncio
+import functools
+import inspect
+
+
+class Llamar:
+    """ Una llamada al cliente (get, set, update, delete, add, commit, agregación). """
+    __slots__ = ('funcion', 'args', 'kwargs')
+
+    def __init__(self, funcion, *args, **kwargs):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+
+
+class Leer:
+    """ Todos los documentos de una consulta, como lista. """
+    __slots__ = ('consulta',)
+
+    def __init__(self, consulta):
+        self.consulta = consulta
+
+
+class EnHilo(Llamar):
+    """
+    Trabajo síncrono del repositorio (caché del menú, cola local, listener).
+    El plan síncrono lo llama directo; el asíncrono, en un hilo aparte.
+    """
+    __slots__ = ()
+
+
+class Juntos:
+    """ Pasos independientes: el síncrono los corre en orden, el asíncrono a la vez. Resultado: lista. """
+    __slots__ = ('pasos',)
+
+    def __init__(self, pasos):
+        self.pasos = list(pasos)
+
+
+def _ejecutar(paso):
+    if isinstance(paso, Leer):
+        return list(paso.consulta.stream())
+    if isinstance(paso, Juntos):
+        return [_ejecutar(p) for p in paso.pasos]
+    return paso.funcion(*paso.args, **paso.kwargs)
+
+
+async def _ejecutar_async(paso, cupo: asyncio.Semaphore):
+    if isinstance(paso, Juntos):
+        return list(await asyncio.gather(*(_ejecutar_async(p, cupo) for p in paso.pasos)))
+    if isinstance(paso, EnHilo):
+        return await asyncio.to_thread(paso.funcion, *paso.args, **paso.kwargs)
+    async with cupo:
+        if isinstance(paso, Leer):
+            return [doc async for doc in paso.consulta.stream()]
+        resultado = paso.funcion(*paso.args, **paso.kwargs)
+        return await resultado if inspect.isawaitable(resultado) else resultado
+
+
+def correr(generador):
+    """ Corre un plan con un cliente síncrono; devuelve lo que retorna el plan. """
+    resultado, error = None, None
+    while True:
+        try:
+            paso = generador.throw(error) if error is not None else generador.send(resultado)
+        except StopIteration as fin:
+            return fin.value
+        try:
+            resultado, error = _ejecutar(paso), None
+        except Exception as e:
+            resultado, error = None, e
+
+
+async def correr_async(generador, cupo: asyncio.Semaphore):
+    """ Corre un plan con un cliente asíncrono; cada llamada de red ocupa un lugar del cupo. """
+    resultado, error = None, None
+    while True:
+        try:
+            paso = generador.throw(error) if error is not None else generador.send(resultado)
+        except StopIteration as fin:
+            return fin.value
+        try:
+            resultado, error = await _ejecutar_async(paso, cupo), None
+        except Exception as e:
+            resultado, error = None, e
+
+
+def plan(funcion):
+    """
+    Decorador de método: funcion(self, db, ...) es un plan y el método
+    resultante lo corre con self.db. El plan queda en .plan para que el
+    repositorio asíncrono lo corra con su propio cliente.
+    """
+    @functools.wraps(funcion)
+    def metodo(self, *args, **kwargs):
+        return correr(funcion(self, self.db, *args, **kwargs))
+
+    metodo.plan = funcion
+    return metodo
@@ -0,0 +1,206 @@
+# app/model/data/repos_async.py
+"""
+Versiones asíncronas de DbRepo, InventarioRepo y FinanzasRepo sobre el
+AsyncClient de Firestore (firebase_init.db_async).
+
+Tienen los mismos métodos que los síncronos, como corrutinas, así que las
+lecturas de varias colecciones se pueden lanzar juntas:
+
+    resumen, movimientos, personal = await asyncio.gather(
+        inventario.obtener_resumen_inventario(),
+        finanzas.obtener_resumen_movimientos(),
+        db.obtener_empleados(),
+    )
+
+Cada repositorio asíncrono envuelve al síncrono y comparte con él su estado
+(caché del menú y de personal, cola local de pedidos, tablero de pedidos
+activos). Las operaciones puntuales corren el mismo plan que el método
+síncrono (planes.py) con el AsyncClient: consultas, payloads y decodificación
+están escritos una sola vez y solo cambia la E/S. Las operaciones con estado
+propio o de escritura masiva con ritmo (importaciones, migraciones, la cola
+local) corren el método síncrono en un hilo con asyncio.to_thread.
+
+Las llamadas en curso de cada repositorio se limitan con un semáforo (cupo);
+varios repositorios pueden compartir el mismo para acotar el total.
+"""
+
+import asyncio
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.finanzas_repo import TAM_PAGINA_MOVIMIENTOS, FinanzasRepo
+from app.model.data.inventario_repo import TAM_PAGINA_INVENTARIO, InventarioRepo
+from app.model.data.planes import correr_async
+from app.model.data.resiliencia import LecturaInterrumpida
+
+# Llamadas a Firestore en curso a la vez por repositorio (si no se comparte un cupo).
+MAX_LLAMADAS_EN_CURSO = 16
+# Pedidos que finaliza a la vez finalizar_pedidos.
+MAX_FINALIZACIONES_EN_CURSO = 8
+
+
+async def reunir_limitado(corrutinas, limite: int) -> list:
+    """
+    Como asyncio.gather, pero con a lo más 'limite' corrutinas corriendo a la
+    vez. Los resultados vuelven en el mismo orden.
+    """
+    cupo = asyncio.Semaphore(limite)
+
+    async def con_cupo(corrutina):
+        async with cupo:
+            return await corrutina
+
+    return await asyncio.gather(*(con_cupo(c) for c in corrutinas))
+
+
+def _en_hilo(nombre: str):
+    """ Método async que corre en un hilo el método homónimo del repositorio síncrono. """
+
+    async def metodo(self, *args, **kwargs):
+        async with self._cupo:
+            return await asyncio.to_thread(getattr(self.sync, nombre), *args, **kwargs)
+
+    metodo.__name__ = nombre
+    metodo.__doc__ = f"Igual que el método síncrono '{nombre}', corriendo en un hilo aparte."
+    return metodo
+
+
+def _con_plan(metodo_sincrono):
+    """ Método async que corre con el AsyncClient el plan del método síncrono. """
+    plan = metodo_sincrono.plan
+
+    async def metodo(self, *args, **kwargs):
+        return await correr_async(plan(self.sync, self.db, *args, **kwargs), self._cupo)
+
+    metodo.__name__ = metodo_sincrono.__name__
+    metodo.__doc__ = metodo_sincrono.__doc__
+    return metodo
+
+
+class _RepoAsync:
+    """ Base: repositorio síncrono que se envuelve, cliente asíncrono y cupo de llamadas. """
+
+    def __init__(self, sync, db_async, cupo: asyncio.Semaphore | None = None):
+        self.sync = sync
+        self.db = db_async
+        self._cupo = cupo or asyncio.Semaphore(MAX_LLAMADAS_EN_CURSO)
+
+    @property
+    def is_ready(self):
+        return self.sync.is_ready
+
+
+class InventarioRepoAsync(_RepoAsync):
+
+    def __init__(self, sync: InventarioRepo, db_async, cupo: asyncio.Semaphore | None = None):
+        super().__init__(sync, db_async, cupo)
+
+    obtener_todo_inventario = _con_plan(InventarioRepo.obtener_todo_inventario)
+    buscar_producto_por_nombre = _con_plan(InventarioRepo.buscar_producto_por_nombre)
+    agregar_o_actualizar_producto_por_nombre = _con_plan(InventarioRepo.agregar_o_actualizar_producto_por_nombre)
+    ajustar_stock_por_nombre = _con_plan(InventarioRepo.ajustar_stock_por_nombre)
+    eliminar_producto_por_nombre = _con_plan(InventarioRepo.eliminar_producto_por_nombre)
+    obtener_mapa_nombres = _con_plan(InventarioRepo.obtener_mapa_nombres)
+    obtener_productos_paginados = _con_plan(InventarioRepo.obtener_productos_paginados)
+    obtener_resumen_inventario = _con_plan(InventarioRepo.obtener_resumen_inventario)
+
+    # Escritura masiva con ritmo (lotes.escribir_en_lotes): en un hilo.
+    importar_productos = _en_hilo('importar_productos')
+    migrar_campos_derivados = _en_hilo('migrar_campos_derivados')
+
+    async def iterar_productos(self, tam_pagina: int = TAM_PAGINA_INVENTARIO):
+        """ Recorre todo el inventario página por página (async for); LecturaInterrumpida si una falla. """
+        cursor = None
+        while True:
+            resultado = await self.obtener_productos_paginados(tam_pagina, cursor)
+            if resultado is None:
+                raise LecturaInterrumpida("No se pudo leer una página del inventario.")
+            pagina, cursor = resultado
+            for producto in pagina:
+                yield producto
+            if cursor is None:
+                break
+
+
+class FinanzasRepoAsync(_RepoAsync):
+
+    def __init__(self, sync: FinanzasRepo, db_async, cupo: asyncio.Semaphore | None = None):
+        super().__init__(sync, db_async, cupo)
+
+    guardar_movimiento = _con_plan(FinanzasRepo.guardar_movimiento)
+    obtener_todos_los_movimientos = _con_plan(FinanzasRepo.obtener_todos_los_movimientos)
+    obtener_movimientos_paginados = _con_plan(FinanzasRepo.obtener_movimientos_paginados)
+    obtener_resumen_movimientos = _con_plan(FinanzasRepo.obtener_resumen_movimientos)
+    obtener_pedidos_para_reporte = _con_plan(FinanzasRepo.obtener_pedidos_para_reporte)
+    obtener_ingresos_por_rango = _con_plan(FinanzasRepo.obtener_ingresos_por_rango)
+    obtener_pedidos_finalizados_desde = _con_plan(FinanzasRepo.obtener_pedidos_finalizados_desde)
+    obtener_resumen_diario = _con_plan(FinanzasRepo.obtener_resumen_diario)
+
+    # Recorre todo el historial y escribe en lotes con ritmo: en un hilo.
+    reconstruir_resumenes_diarios = _en_hilo('reconstruir_resumenes_diarios')
+
+    async def iterar_movimientos(self, tam_pagina: int = TAM_PAGINA_MOVIMIENTOS):
+        """ Recorre todos los movimientos página por página (async for); LecturaInterrumpida si una falla. """
+        cursor = None
+        while True:
+            resultado = await self.obtener_movimientos_paginados(tam_pagina, cursor)
+            if resultado is None:
+                raise LecturaInterrumpida("No se pudo leer una página de movimientos.")
+            pagina, cursor = resultado
+            for movimiento in pagina:
+                yield movimiento
+            if cursor is None:
+                break
+
+
+class DbRepoAsync(_RepoAsync):
+    """
+    Contraparte asíncrona de DbRepo. Usa la caché del menú, la de búsquedas
+    de personal, la cola local y el tablero de pedidos del repo síncrono.
+    """
+
+    def __init__(self, sync: DbRepo, db_async, cupo: asyncio.Semaphore | None = None):
+        super().__init__(sync, db_async, cupo)
+
+    obtener_registro_usuario = _con_plan(DbRepo.obtener_registro_usuario)
+    crear_registro_usuario = _con_plan(DbRepo.crear_registro_usuario)
+    buscar_usuarios_por_nombre = _con_plan(DbRepo.buscar_usuarios_por_nombre)
+    buscar_usuarios_por_email = _con_plan(DbRepo.buscar_usuarios_por_email)
+    obtener_empleados = _con_plan(DbRepo.obtener_empleados)
+    obtener_todos_los_documentos = _con_plan(DbRepo.obtener_todos_los_documentos)
+    actualizar_documento = _con_plan(DbRepo.actualizar_documento)
+    eliminar_documento = _con_plan(DbRepo.eliminar_documento)
+
+    # Migración y escritura masiva con ritmo: en un hilo.
+    migrar_indices_usuarios = _en_hilo('migrar_indices_usuarios')
+    escribir_en_lote = _en_hilo('escribir_en_lote')
+
+    # La caché del menú es del repo síncrono (se carga en un hilo cuando vence).
+    obtener_menu = _en_hilo('obtener_menu')
+    obtener_precios_menu = _en_hilo('obtener_precios_menu')
+    consumo_de_items = _en_hilo('consumo_de_items')
+
+    async def invalidar_cache_menu(self):
+        """ Fuerza a que la próxima consulta del menú vuelva a leer Firestore. """
+        self.sync.invalidar_cache_menu()
+
+    crear_pedido = _con_plan(DbRepo.crear_pedido)
+
+    # Cola local (SQLite) y listener de pedidos activos: en un hilo.
+    sincronizar_pedidos = _en_hilo('sincronizar_pedidos')
+    pedidos_pendientes_de_envio = _en_hilo('pedidos_pendientes_de_envio')
+    cerrar = _en_hilo('cerrar')
+    tablero_pedidos = _en_hilo('tablero_pedidos')
+
+    obtener_pedidos_activos = _con_plan(DbRepo.obtener_pedidos_activos)
+    obtener_pedido_por_id = _con_plan(DbRepo.obtener_pedido_por_id)
+    actualizar_estado_pedido = _con_plan(DbRepo.actualizar_estado_pedido)
+    finalizar_pedido = _con_plan(DbRepo.finalizar_pedido)
+
+    async def finalizar_pedidos(self, finalizaciones, max_en_curso: int = MAX_FINALIZACIONES_EN_CURSO) -> list[bool]:
+        """
+        Finaliza varios pedidos (p. ej. el cierre de caja) con hasta
+        max_en_curso lotes en vuelo a la vez. finalizaciones es un iterable de
+        tuplas con los argumentos de finalizar_pedido; retorna un bool por
+        pedido, en el mismo orden. Cada pedido es su propio lote atómico.
+        """
+        return await reunir_limitado((self.finalizar_pedido(*f) for f in finalizaciones), max_en_curso)
@@ -0,0 +1,387 @@
+# app/model/data/resiliencia.py
+"""
+Reintentos con espera exponencial, plazos por llamada y cortacircuito para
+Firestore y Firebase Auth.
+
+Los repositorios atrapan cualquier excepción y devuelven un valor de fallo
+(None, False) distinto del resultado vacío, así que la resiliencia se aplica
+una capa más abajo, en el cliente:
+
+- Los errores se clasifican. RECHAZADA: el servidor no ejecutó la operación
+  (sin servicio, cuota, contención), se puede repetir cualquier llamada.
+  INCIERTA: la operación pudo haberse aplicado (plazo vencido, error interno),
+  solo se repiten las lecturas; repetir un add() o un Increment duplicaría.
+  El resto (NotFound, InvalidArgument, permisos...) no se reintenta.
+- Entre intentos se espera un tiempo aleatorio entre 0 y
+  espera_inicial * 2^intento (jitter completo), sin pasar de espera_maxima.
+- Cada llamada tiene un plazo total: cada intento recibe como timeout lo
+  que queda del plazo, y no se reintenta si ya no queda tiempo.
+- Tras FALLOS_PARA_ABRIR fallos seguidos del servicio, el cortacircuito se
+  abre y las llamadas fallan al instante con CircuitoAbierto durante
+  ENFRIAMIENTO_SEGUNDOS; después deja pasar una llamada de prueba y se
+  cierra si esa responde.
+
+Las consultas (stream, get_all) solo se reintentan si fallan antes de
+entregar el primer documento; a mitad de camino se propaga el error para no
+entregar documentos repetidos.
+"""
+
+import random
+import threading
+import time
+
+# Errores según si la operación pudo ejecutarse.
+RECHAZADA = 'rechazada'
+INCIERTA = 'incierta'
+PERMANENTE = 'permanente'
+
+# Intentos y plazo (segundos) por llamada.
+INTENTOS_LECTURA = 4
+INTENTOS_ESCRITURA = 3
+PLAZO_LECTURA_SEGUNDOS = 15.0
+PLAZO_ESCRITURA_SEGUNDOS = 20.0
+ESPERA_INICIAL_SEGUNDOS = 0.1
+ESPERA_MAXIMA_SEGUNDOS = 2.0
+# Cortacircuito.
+FALLOS_PARA_ABRIR = 5
+ENFRIAMIENTO_SEGUNDOS = 30.0
+
+MENSAJE_SIN_CONEXION = "⚠️ Sin conexión con la base de datos. Intenta de nuevo en unos segundos."
+
+
+class CircuitoAbierto(Exception):
+    """ El servicio viene fallando: la llamada se rechaza sin intentarla. """
+
+
+class LecturaInterrumpida(Exception):
+    """ Un recorrido página por página falló a mitad de camino: lo entregado está incompleto. """
+
+
+_clases_error = None
+
+
+def _cargar_clases_error():
+    """ Clases de error transitorio de google-api-core y firebase_admin (si están instaladas). """
+    global _clases_error
+    if _clases_error is not None:
+        return _clases_error
+
+    rechazadas, inciertas = [], [ConnectionError, TimeoutError]
+    try:
+        from google.api_core import exceptions as gexc
+        # Los mismos códigos que el SDK reintenta en un commit.
+        rechazadas += [gexc.ServiceUnavailable, gexc.ResourceExhausted, gexc.Aborted]
+        inciertas += [gexc.DeadlineExceeded, gexc.InternalServerError, gexc.GatewayTimeout, gexc.Unknown]
+    except ImportError:
+        pass
+    try:
+        from firebase_admin import exceptions as fexc
+        rechazadas += [fexc.UnavailableError, fexc.ResourceExhaustedError, fexc.AbortedError]
+        inciertas += [fexc.DeadlineExceededError, fexc.InternalError, fexc.UnknownError]
+    except ImportError:
+        pass
+    _clases_error = (tuple(rechazadas), tuple(inciertas))
+    return _clases_error
+
+
+def clasificar(error: BaseException) -> str:
+    """ RECHAZADA, INCIERTA o PERMANENTE. """
+    rechazadas, inciertas = _cargar_clases_error()
+    if isinstance(error, rechazadas):
+        return RECHAZADA
+    if isinstance(error, inciertas):
+        return INCIERTA
+    return PERMANENTE
+
+
+class Politica:
+    """ Cuántas veces y por cuánto tiempo se intenta una llamada. """
+    __slots__ = ('intentos', 'plazo', 'espera_inicial', 'espera_maxima', 'solo_rechazadas')
+
+    def __init__(self, intentos: int, plazo: float, espera_inicial: float = ESPERA_INICIAL_SEGUNDOS,
+                 espera_maxima: float = ESPERA_MAXIMA_SEGUNDOS, solo_rechazadas: bool = False):
+        self.intentos = max(1, int(intentos))
+        self.plazo = plazo
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        # Escrituras: solo se repiten si el servidor no llegó a ejecutarlas.
+        self.solo_rechazadas = solo_rechazadas
+
+    def reintentable(self, error: BaseException) -> bool:
+        tipo = clasificar(error)
+        return tipo == RECHAZADA or (tipo == INCIERTA and not self.solo_rechazadas)
+
+    def espera(self, intento: int) -> float:
+        return random.uniform(0, min(self.espera_maxima, self.espera_inicial * (2 ** intento)))
+
+
+POLITICA_LECTURA = Politica(INTENTOS_LECTURA, PLAZO_LECTURA_SEGUNDOS)
+POLITICA_ESCRITURA = Politica(INTENTOS_ESCRITURA, PLAZO_ESCRITURA_SEGUNDOS, solo_rechazadas=True)
+
+
+class Cortacircuito:
+    """ Cerrado → (fallos seguidos) → abierto → (enfriamiento) → semiabierto → cerrado/abierto. """
+
+    def __init__(self, nombre: str, fallos_para_abrir: int = FALLOS_PARA_ABRIR,
+                 enfriamiento_segundos: float = ENFRIAMIENTO_SEGUNDOS):
+        self.nombre = nombre
+        self.fallos_para_abrir = fallos_para_abrir
+        self.enfriamiento_segundos = enfriamiento_segundos
+        self._lock = threading.Lock()
+        self._fallos = 0
+        self._abierto_hasta = 0.0
+        self._prueba_hasta = 0.0
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._fallos < self.fallos_para_abrir:
+                return 'cerrado'
+            return 'abierto' if time.monotonic() < self._abierto_hasta else 'semiabierto'
+
+    @property
+    def abierto(self) -> bool:
+        return self.estado == 'abierto'
+
+    def permitir(self, plazo: float):
+        """ Lanza CircuitoAbierto si la llamada no debe intentarse. """
+        with self._lock:
+            if self._fallos < self.fallos_para_abrir:
+                return
+            ahora = time.monotonic()
+            if ahora < self._abierto_hasta or ahora < self._prueba_hasta:
+                raise CircuitoAbierto(
+                    f"{self.nombre} no responde ({self._fallos} fallos seguidos); "
+                    f"se reintentará en {max(self._abierto_hasta, self._prueba_hasta) - ahora:.0f} s."
+                )
+            # Semiabierto: pasa una sola llamada de prueba (la prueba vence con su plazo).
+            self._prueba_hasta = ahora + plazo
+
+    def exito(self):
+        with self._lock:
+            self._fallos = 0
+            self._prueba_hasta = 0.0
+
+    def fallo(self, error: BaseException):
+        # Un error permanente (NotFound, datos inválidos...) quiere decir que el servicio respondió.
+        if clasificar(error) == PERMANENTE:
+            self.exito()
+            return
+        with self._lock:
+            self._fallos += 1
+            self._prueba_hasta = 0.0
+            if self._fallos >= self.fallos_para_abrir:
+                self._abierto_hasta = time.monotonic() + self.enfriamiento_segundos
+
+    def reiniciar(self):
+        with self._lock:
+            self._fallos = 0
+            self._abierto_hasta = 0.0
+            self._prueba_hasta = 0.0
+
+
+circuito_firestore = Cortacircuito('Firestore')
+circuito_auth = Cortacircuito('Firebase Auth')
+
+
+def _esperar_o_rendirse(politica: Politica, intento: int, fin: float) -> bool:
+    """ Duerme antes del próximo intento; False si ya no hay intentos o tiempo. """
+    if intento + 1 >= politica.intentos:
+        return False
+    espera = politica.espera(intento)
+    if time.monotonic() + espera >= fin:
+        return False
+    time.sleep(espera)
+    return True
+
+
+def ejecutar(funcion, politica: Politica, circuito: Cortacircuito, *args, con_plazo: bool = True, **kwargs):
+    """
+    Llama a funcion(*args, **kwargs) con reintentos. Con con_plazo=True se
+    le pasa timeout= (lo que queda del plazo) y retry=None (los reintentos
+    los decide esta capa, no el SDK).
+    """
+    fin = time.monotonic() + politica.plazo
+    # Si quien llama ya fijó un timeout, se respeta el suyo.
+    con_plazo = con_plazo and 'timeout' not in kwargs
+    intento = 0
+    while True:
+        circuito.permitir(politica.plazo)
+        if con_plazo:
+            kwargs['timeout'] = max(0.001, fin - time.monotonic())
+            kwargs.setdefault('retry', None)
+        try:
+            resultado = funcion(*args, **kwargs)
+        except Exception as e:
+            circuito.fallo(e)
+            if not politica.reintentable(e) or not _esperar_o_rendirse(politica, intento, fin):
+                raise
+            intento += 1
+            continue
+        circuito.exito()
+        return resultado
+
+
+def _iterar(fabricar, politica: Politica, circuito: Cortacircuito, envolver):
+    """ Como ejecutar(), para los métodos que devuelven un generador de snapshots. """
+    fin = time.monotonic() + politica.plazo
+    intento = 0
+    while True:
+        circuito.permitir(politica.plazo)
+        entregados = 0
+        try:
+            for snapshot in fabricar(timeout=max(0.001, fin - time.monotonic()), retry=None):
+                if not entregados:
+                    circuito.exito()
+                entregados += 1
+                yield envolver(snapshot)
+        except Exception as e:
+            circuito.fallo(e)
+            if entregados or not politica.reintentable(e) or not _esperar_o_rendirse(politica, intento, fin):
+                raise
+            intento += 1
+            continue
+        if not entregados:
+            circuito.exito()
+        return
+
+
+# --- Cliente de Firestore con reintentos ---
+
+def _real(objeto):
+    return objeto._objeto if isinstance(objeto, (_Referencia, _Lote, _Snapshot)) else objeto
+
+
+class _Snapshot:
+    """ DocumentSnapshot cuya .reference también reintenta. """
+    __slots__ = ('_objeto', '_circuito')
+
+    def __init__(self, snapshot, circuito):
+        self._objeto = snapshot
+        self._circuito = circuito
+
+    @property
+    def reference(self):
+        return _Referencia(self._objeto.reference, self._circuito)
+
+    @property
+    def id(self):
+        return self._objeto.id
+
+    def to_dict(self):
+        return self._objeto.to_dict()
+
+    def __getattr__(self, atributo):
+        return getattr(self._objeto, atributo)
+
+
+# Métodos que solo arman la consulta o la referencia (no hablan con el servidor).
+_ENCADENABLES = frozenset({
+    'collection', 'document', 'where', 'order_by', 'limit', 'limit_to_last', 'offset', 'select',
+    'start_after', 'start_at', 'end_before', 'end_at', 'count', 'sum', 'avg',
+})
+_ESCRITURAS = frozenset({'set', 'create', 'update', 'delete'})
+
+
+class _Referencia:
+    """ Cliente, colección, documento, consulta o agregación. """
+    __slots__ = ('_objeto', '_circuito')
+
+    def __init__(self, objeto, circuito):
+        self._objeto = objeto
+        self._circuito = circuito
+
+    def _envolver(self, resultado):
+        if isinstance(resultado, list):
+            return [self._envolver(r) for r in resultado]
+        if hasattr(resultado, 'reference') and hasattr(resultado, 'to_dict'):
+            return _Snapshot(resultado, self._circuito)
+        return resultado
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._objeto, atributo)
+        if atributo in _ENCADENABLES:
+            return lambda *args, **kwargs: _Referencia(
+                valor(*[_real(a) for a in args], **kwargs), self._circuito
+            )
+        if atributo == 'get':
+            return lambda *args, **kwargs: self._envolver(
+                ejecutar(valor, POLITICA_LECTURA, self._circuito, *args, **kwargs)
+            )
+        if atributo in _ESCRITURAS:
+            return lambda *args, **kwargs: ejecutar(valor, POLITICA_ESCRITURA, self._circuito, *args, **kwargs)
+        return valor
+
+    def _snapshot(self, snapshot):
+        return _Snapshot(snapshot, self._circuito)
+
+    def stream(self, *args, **kwargs):
+        return _iterar(
+            lambda **plazo: self._objeto.stream(*args, **{**plazo, **kwargs}),
+            POLITICA_LECTURA, self._circuito, self._snapshot
+        )
+
+    def get_all(self, referencias, *args, **kwargs):
+        referencias = [_real(ref) for ref in referencias]
+        return _iterar(
+            lambda **plazo: self._objeto.get_all(referencias, *args, **{**plazo, **kwargs}),
+            POLITICA_LECTURA, self._circuito, self._snapshot
+        )
+
+    def add(self, document_data, *args, **kwargs):
+        tiempo, ref = ejecutar(self._objeto.add, POLITICA_ESCRITURA, self._circuito, document_data, *args, **kwargs)
+        return tiempo, _Referencia(ref, self._circuito)
+
+    def batch(self, *args, **kwargs):
+        return _Lote(self._objeto.batch(*args, **kwargs), self._circuito)
+
+
+class _Lote:
+    """ WriteBatch: armar el lote es local; solo commit() habla con el servidor. """
+    __slots__ = ('_objeto', '_circuito')
+
+    def __init__(self, lote, circuito):
+        self._objeto = lote
+        self._circuito = circuito
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._objeto, atributo)
+        if atributo in _ESCRITURAS:
+            def agregar(referencia, *args, **kwargs):
+                valor(_real(referencia), *args, **kwargs)
+                return self
+            return agregar
+        return valor
+
+    def commit(self, *args, **kwargs):
+        return ejecutar(self._objeto.commit, POLITICA_ESCRITURA, self._circuito, *args, **kwargs)
+
+
+class ClienteResiliente(_Referencia):
+    """ Cliente de Firestore con reintentos, plazo y cortacircuito en cada lectura y escritura. """
+    __slots__ = ()
+
+    def __init__(self, db, circuito: Cortacircuito = circuito_firestore):
+        super().__init__(db, circuito)
+
+
+class ServicioResiliente:
+    """
+    Lo mismo para un servicio de funciones (firebase_admin.auth): get_*,
+    list_* y verify_* son lecturas, el resto escrituras. Estas funciones no
+    aceptan timeout, así que el plazo solo limita los reintentos.
+    """
+    __slots__ = ('_objeto', '_circuito')
+
+    PREFIJOS_LECTURA = ('get_', 'list_', 'verify_')
+
+    def __init__(self, servicio, circuito: Cortacircuito = circuito_auth):
+        self._objeto = servicio
+        self._circuito = circuito
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._objeto, atributo)
+        if not callable(valor) or isinstance(valor, type):
+            return valor
+        politica = POLITICA_LECTURA if atributo.startswith(self.PREFIJOS_LECTURA) else POLITICA_ESCRITURA
+        return lambda *args, **kwargs: ejecutar(valor, politica, self._circuito, *args, con_plazo=False, **kwargs)
@@ -0,0 +1,104 @@
+# app/model/data/tablero_pedidos.py
+"""
+Tablero en memoria de los pedidos activos, alimentado por un listener.
+
+En lugar de consultar where('estado', '==', 'ACTIVO') cada vez que alguien
+abre la lista, se deja abierto un on_snapshot sobre esa consulta: Firestore
+envía el resultado inicial y después solo los documentos que entran, cambian
+o salen, y el tablero aplica esos cambios sobre su copia. Leer la lista es
+entonces un acceso a memoria, y lo que hace otra caja aparece en segundos.
+"""
+
+import threading
+
+from app.model.domain.pedido import Pedido
+
+COLECCION_PEDIDOS = 'pedidos'
+ESTADO_ACTIVO = 'ACTIVO'
+# Cuánto se espera el snapshot inicial antes de recurrir a una consulta normal.
+ESPERA_SNAPSHOT_INICIAL_SEGUNDOS = 5.0
+
+
+class TableroPedidosActivos:
+    """ Copia local de los pedidos ACTIVO, mantenida al día por on_snapshot. """
+
+    def __init__(self, db_client):
+        self.db = db_client
+        self._pedidos: dict[str, Pedido] = {}
+        self._cambio = threading.Condition()
+        self._version = 0
+        self._listo = False
+        self._activo = False
+        self._escucha = None
+
+    @property
+    def listo(self) -> bool:
+        """ True cuando ya llegó el snapshot inicial. """
+        return self._listo
+
+    @property
+    def version(self) -> int:
+        """ Aumenta con cada snapshot aplicado (sirve para esperar_cambio). """
+        return self._version
+
+    def iniciar(self, espera_segundos: float = ESPERA_SNAPSHOT_INICIAL_SEGUNDOS) -> bool:
+        """
+        Abre el listener (una sola vez) y espera el snapshot inicial.
+        Retorna True si el tablero quedó listo dentro de la espera.
+        """
+        if self._escucha is None:
+            self._activo = True
+            consulta = self.db.collection(COLECCION_PEDIDOS).where('estado', '==', ESTADO_ACTIVO)
+            self._escucha = consulta.on_snapshot(self._al_cambiar)
+        with self._cambio:
+            return self._cambio.wait_for(lambda: self._listo, timeout=espera_segundos)
+
+    def _al_cambiar(self, docs, cambios, read_time):
+        """ Aplica los cambios incrementales (llega desde el hilo del listener). """
+        with self._cambio:
+            if not self._activo:
+                return
+            for cambio in cambios:
+                pedido_id = cambio.document.id
+                if cambio.type.name == 'REMOVED':
+                    self._pedidos.pop(pedido_id, None)
+                else:
+                    self._pedidos[pedido_id] = Pedido.from_firestore(pedido_id, cambio.document.to_dict())
+            self._listo = True
+            self._version += 1
+            self._cambio.notify_all()
+
+    def descartar(self, pedido_id: str):
+        """
+        Quita un pedido que esta terminal acaba de cerrar, sin esperar a que
+        el listener lo confirme (el SDK de servidor no aplica escrituras locales).
+        """
+        with self._cambio:
+            if self._pedidos.pop(pedido_id, None) is not None:
+                self._version += 1
+                self._cambio.notify_all()
+
+    def pedidos(self) -> dict[str, Pedido]:
+        """ {pedido_id: Pedido} de los pedidos activos, sin ir a Firestore (compartidos: no modificarlos). """
+        with self._cambio:
+            return dict(self._pedidos)
+
+    def esperar_cambio(self, version: int, timeout: float | None = None) -> int:
+        """ Bloquea hasta que la versión sea distinta de 'version' (o venza timeout). Retorna la versión actual. """
+        with self._cambio:
+            self._cambio.wait_for(lambda: self._version != version, timeout=timeout)
+            return self._version
+
+    def detener(self):
+        """ Cierra el listener; el tablero deja de actualizarse. """
+        self._activo = False
+        if self._escucha is not None:
+            try:
+                self._escucha.unsubscribe()
+            except Exception as e:
+                print(f"ERROR DB: Fallo al cerrar el listener de pedidos: {e}")
+            self._escucha = None
+        with self._cambio:
+            self._listo = False
+            self._pedidos = {}
+            self._cambio.notify_all()
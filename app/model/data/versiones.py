@@ -0,0 +1,27 @@
+# app/model/data/versiones.py
+"""
+Contador de versiones por colección, compartido por todos los repositorios
+del proceso. Cada escritura exitosa incrementa la versión de la colección,
+así las cachés derivadas (p. ej. el contexto del asistente) saben cuándo
+quedaron viejas sin volver a leer Firestore.
+
+Solo ve las escrituras hechas desde este proceso.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_versiones: dict[str, int] = {}
+
+
+def marcar_escritura(*colecciones: str):
+    """ Registra que se escribió en las colecciones dadas. """
+    with _lock:
+        for coleccion in colecciones:
+            _versiones[coleccion] = _versiones.get(coleccion, 0) + 1
+
+
+def version(*colecciones: str) -> tuple:
+    """ Sello de versión de un conjunto de colecciones. """
+    with _lock:
+        return tuple(_versiones.get(coleccion, 0) for coleccion in colecciones)
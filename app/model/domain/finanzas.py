@@ -1,19 +1,34 @@
 # app/model/domain/finanzas.py
+from dataclasses import dataclass
 
+
+@dataclass(slots=True)
 class MovimientoFinanciero:
-    """ Representa un ingreso o un egreso """
-    def __init__(self, id_mov, tipo, descripcion, monto, fecha):
-        self.id_mov = id_mov
-        self.tipo = tipo  # "ingreso" o "egreso"
-        self.descripcion = descripcion
-        self.monto = monto
-        self.fecha = fecha
+    """ Representa un ingreso o un egreso (los egresos llevan monto negativo). """
+    id: str
+    tipo: str  # "ingreso" o "egreso"
+    descripcion: str
+    monto: float
+    fecha_hora: str  # ISO string
+
+    @classmethod
+    def from_firestore(cls, doc_id: str, data: dict) -> 'MovimientoFinanciero':
+        try:
+            monto = float(data.get('monto') or 0.0)
+        except (TypeError, ValueError):
+            monto = 0.0
+        return cls(
+            id=doc_id,
+            tipo=data.get('tipo') or 'N/A',
+            descripcion=data.get('descripcion') or 'Sin descripción',
+            monto=monto,
+            fecha_hora=data.get('fecha_hora') or '',
+        )
 
-    def a_diccionario(self):
+    def to_firestore(self) -> dict:
         return {
-            "id_mov": self.id_mov,
-            "tipo": self.tipo,
-            "descripcion": self.descripcion,
-            "monto": self.monto,
-            "fecha": self.fecha
-        }
\ No newline at end of file
+            'tipo': self.tipo,
+            'descripcion': self.descripcion,
+            'monto': self.monto,
+            'fecha_hora': self.fecha_hora,
+        }
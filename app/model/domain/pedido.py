@@ -1,34 +1,105 @@
+# app/model/domain/pedido.py
+from dataclasses import dataclass, field
 
+
+def _numero(valor, defecto: float = 0.0) -> float:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+@dataclass(slots=True)
+class ItemPedido:
+    """ Una línea del pedido: ítem del menú y cuántas unidades. """
+    item_id: str
+    cantidad: int = 1
+
+    @classmethod
+    def from_firestore(cls, data: dict) -> 'ItemPedido':
+        try:
+            cantidad = int(data.get('cantidad', 1))
+        except (TypeError, ValueError):
+            cantidad = 1
+        return cls(str(data.get('item_id')), cantidad)
+
+    def to_firestore(self) -> dict:
+        return {'item_id': self.item_id, 'cantidad': self.cantidad}
+
+
+@dataclass(slots=True)
 class Pedido:
-    """ Representa un Pedido. Es solo un molde de datos """
-    def __init__(self, id_pedido, cliente, productos, total, estado="pendiente"):
-        self.id_pedido = id_pedido
-        self.cliente = cliente
-        self.productos = productos  # Esto será una lista de diccionarios
-        self.total = total
-        self.estado = estado
-
-    def a_diccionario(self):
-        """ Convierte el objeto a un diccionario para guardarlo en Firebase """
-        return {
-            "id_pedido": self.id_pedido,
-            "cliente": self.cliente,
-            "productos": self.productos,
-            "total": self.total,
-            "estado": self.estado
+    """ Un pedido de la colección 'pedidos'. Las fechas se guardan tal como vienen (ISO string o Timestamp). """
+    id: str | None
+    items: list[ItemPedido] = field(default_factory=list)
+    total: float = 0.0
+    estado: str = 'ACTIVO'
+    cajero_uid: str = ''
+    fecha_creacion: object = None
+    fecha_finalizacion: object = None
+
+    @classmethod
+    def from_firestore(cls, doc_id: str | None, data: dict) -> 'Pedido':
+        """ Convierte el documento en una sola pasada; los campos que falten quedan con su valor por defecto. """
+        return cls(
+            id=doc_id,
+            items=[ItemPedido.from_firestore(item) for item in data.get('items') or () if isinstance(item, dict)],
+            total=_numero(data.get('total')),
+            estado=data.get('estado') or 'ACTIVO',
+            cajero_uid=data.get('cajero_uid') or '',
+            fecha_creacion=data.get('fecha_creacion'),
+            fecha_finalizacion=data.get('fecha_finalizacion'),
+        )
+
+    def to_firestore(self) -> dict:
+        """ Documento para Firestore (sin el ID, que es la clave del documento). """
+        data = {
+            'items': [item.to_firestore() for item in self.items],
+            'total': self.total,
+            'estado': self.estado,
+            'cajero_uid': self.cajero_uid,
+            'fecha_creacion': self.fecha_creacion,
         }
+        if self.fecha_finalizacion is not None:
+            data['fecha_finalizacion'] = self.fecha_finalizacion
+        return data
+
 
+@dataclass(slots=True)
 class ProductoInventario:
-    """ Representa un producto en nuestro inventario """
-    def __init__(self, nombre, precio, stock):
-        self.nombre = nombre
-        self.precio = precio
-        self.stock = stock
-
-    def a_diccionario(self):
-        """ Convierte el producto a diccionario para Firebase """
+    """ Un producto de la colección 'inventario'. """
+    id: str | None
+    nombre: str
+    cantidad: float = 0.0
+    costo: float = 0.0
+    valor_total: float = 0.0
+
+    @classmethod
+    def nuevo(cls, doc_id: str | None, nombre: str, cantidad: float, costo: float) -> 'ProductoInventario':
+        """ Producto con valor_total calculado (cantidad * costo). """
+        cantidad, costo = float(cantidad), float(costo)
+        return cls(doc_id, str(nombre).strip(), cantidad, costo, cantidad * costo)
+
+    @classmethod
+    def from_firestore(cls, doc_id: str | None, data: dict) -> 'ProductoInventario':
+        """ Acepta también los nombres de campo de los documentos antiguos ('Nombre', 'producto', 'qty', 'precio'...). """
+        nombre = data.get('nombre') or data.get('Nombre') or data.get('producto') or data.get('producto_nombre') or ''
+        cantidad = _numero(data.get('cantidad', data.get('qty')))
+        costo = _numero(data.get('costo', data.get('precio', data.get('precio_costo'))))
+        valor_total = data.get('valor_total')
+        return cls(
+            id=doc_id,
+            nombre=str(nombre),
+            cantidad=cantidad,
+            costo=costo,
+            valor_total=cantidad * costo if valor_total is None else _numero(valor_total),
+        )
+
+    def to_firestore(self) -> dict:
+        """ Documento para Firestore (el repositorio agrega la clave de búsqueda 'nombre_norm'). """
         return {
-            "nombre": self.nombre,
-            "precio": self.precio,
-            "stock": self.stock
+            'nombre': self.nombre,
+            'cantidad': self.cantidad,
+            'costo': self.costo,
+            'valor_total': self.valor_total,
         }
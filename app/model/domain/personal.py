@@ -1,16 +1,37 @@
+# app/model/domain/personal.py
+from dataclasses import dataclass
 
+
+@dataclass(slots=True)
 class Empleado:
-    """ Representa a un empleado """
-    def __init__(self, id_empleado, nombre, puesto, salario):
-        self.id_empleado = id_empleado
-        self.nombre = nombre
-        self.puesto = puesto
-        self.salario = salario
+    """ Un empleado de la colección 'usuarios'. """
+    id: str
+    nombre: str = 'N/A'
+    rol: str = 'N/A'
+    email: str = 'N/A'
+    puesto: str = 'No asignado'
+    salario: float = 0.0
+
+    @classmethod
+    def from_firestore(cls, doc_id: str, data: dict) -> 'Empleado':
+        try:
+            salario = float(data.get('salario') or 0.0)
+        except (TypeError, ValueError):
+            salario = 0.0
+        return cls(
+            id=doc_id,
+            nombre=data.get('nombre') or 'N/A',
+            rol=data.get('rol') or 'N/A',
+            email=data.get('email') or 'N/A',
+            puesto=data.get('puesto') or 'No asignado',
+            salario=salario,
+        )
 
-    def a_diccionario(self):
+    def to_firestore(self) -> dict:
         return {
-            "id_empleado": self.id_empleado,
-            "nombre": self.nombre,
-            "puesto": self.puesto,
-            "salario": self.salario
+            'nombre': self.nombre,
+            'rol': self.rol,
+            'email': self.email,
+            'puesto': self.puesto,
+            'salario': self.salario,
         }
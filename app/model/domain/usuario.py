@@ -1,8 +1,11 @@
+# app/model/domain/usuario.py
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
 class Usuario:
-    """Clase de dominio para representar un usuario activo en el sistema."""
-    def __init__(self, uid: str, email: str, nombre: str, rol: str):
-        self.uid = uid
-        self.email = email
-        self.nombre = nombre
-        self.rol = rol
-        
\ No newline at end of file
+    """ Usuario con sesión activa (o el perfil leído de Authentication, donde nombre y rol pueden faltar). """
+    uid: str
+    email: str
+    nombre: str | None
+    rol: str | None
@@ -1,34 +1,118 @@
 
 import os
 import json
-import google.generativeai as genai
+import queue
+import threading
+import time
 from dotenv import load_dotenv
 
+from app.view_model.contexto_snapshot import ContextoSnapshot, FuenteNoDisponible
+from app.view_model.historial_chat import HistorialChat
+
 load_dotenv()
 
 # --- CONFIGURACIÓN DE GEMINI ---
 API_KEY = os.environ.get("GEMINI_API_KEY")
 
-_chat_session = None
-_is_ai_ready = False 
+# Las reglas van como instrucción de sistema: no se repiten en cada turno.
+INSTRUCCIONES_SISTEMA = """
+Actúa como un Consultor de Negocios y Analista de Marketing para un restaurante. 
+Tu trabajo es analizar los datos de contexto proporcionados y responder al gerente.
 
-try:
-    if API_KEY:
-        genai.configure(api_key=API_KEY)
-        
- 
-        model = genai.GenerativeModel('gemini-2.5-flash') 
-        
-        _chat_session = model.start_chat(history=[])
-        
-        _is_ai_ready = True 
-        print(" Asistente AI (Gemini) inicializado correctamente.")
-        
-    else:
-        print(" ERROR AI: La clave GEMINI_API_KEY no se encontró en el archivo .env")
+REGLAS IMPORTANTES:
+1.  **Análisis de Datos (Objetivo):** Para preguntas sobre hechos (ej: "¿cuántos tomates hay?", "¿quién es el cajero?"), bázate **estrictamente** en los datos de contexto. Si los datos no existen, indícalo.
+2.  **Estrategias (Creativo y Objetivo):** Para preguntas sobre estrategias (ej: "cómo mejorar ventas", "ideas de marketing"), usa tu conocimiento general de negocios para dar sugerencias **objetivas** y **prácticas** que un restaurante pequeño podría implementar.
+3.  **Usa el Contexto como Inspiración:** Si te pido ideas de marketing y ves que el balance financiero es negativo ($-500), sugiere estrategias de bajo costo (ej. redes sociales). Si ves poco stock de 'tomate', sugiere una promoción para productos que no usen tomate.
+4.  **Fuera de Ámbito:** Si la pregunta no tiene relación con el negocio (ej. fútbol, clima), indica amablemente que no tienes esa información, ya que tu enfoque es el restaurante.
+
+Responde como un consultor experto y conciso.
+"""
+
+# El SDK de Gemini tarda en importarse: el modelo se configura la primera vez
+# que alguien abre el asistente, no al arrancar la aplicación.
+_modelo = None
+_lock_modelo = threading.Lock()
+_is_ai_ready = bool(API_KEY)
+
+if not API_KEY:
+    print(" ERROR AI: La clave GEMINI_API_KEY no se encontró en el archivo .env")
+
+
+def _obtener_modelo():
+    """ Importa y configura Gemini en el primer uso. Retorna el modelo o None. """
+    global _modelo, _is_ai_ready
+    with _lock_modelo:
+        if _modelo is None and _is_ai_ready:
+            try:
+                import google.generativeai as genai
+                genai.configure(api_key=API_KEY)
+                _modelo = genai.GenerativeModel('gemini-2.5-flash', system_instruction=INSTRUCCIONES_SISTEMA)
+            except Exception as e:
+                print(f" ERROR AI: No se pudo configurar Gemini. Revisa la clave. Detalle: {e}")
+                _is_ai_ready = False
+        return _modelo
+
+
+# Marca de fin en la cola de fragmentos de una respuesta en curso.
+_FIN_RESPUESTA = object()
+
+
+class RespuestaEnCurso:
+    """
+    Respuesta del asistente que se genera en un hilo aparte.
 
-except Exception as e:
-    print(f" ERROR AI: No se pudo configurar Gemini. Revisa la clave. Detalle: {e}")
+    El hilo arma el contexto, llama al modelo en modo streaming y deja cada
+    fragmento en una cola; la UI los consume con fragmentos() a medida que
+    llegan y puede cancelar sin perder la conversación.
+    """
+
+    def __init__(self, generar):
+        self._cola = queue.Queue()
+        self._cancelada = threading.Event()
+        self.inicio = time.perf_counter()
+        self.ttft = None          # segundos hasta el primer fragmento
+        self.duracion = None      # segundos hasta el final
+        self._hilo = threading.Thread(target=self._ejecutar, args=(generar,), daemon=True)
+        self._hilo.start()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+
+    def _ejecutar(self, generar):
+        try:
+            for fragmento in generar(self):
+                if self.cancelada:
+                    break
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.inicio
+                self._cola.put(fragmento)
+        except Exception as e:
+            self._cola.put(f"Error en la comunicación con la API de Gemini: {e}")
+        finally:
+            self.duracion = time.perf_counter() - self.inicio
+            self._cola.put(_FIN_RESPUESTA)
+
+    def fragmentos(self):
+        """ Itera los fragmentos de texto a medida que llegan. """
+        while True:
+            try:
+                # Espera corta para que Ctrl-C se atienda enseguida en el hilo de la UI.
+                fragmento = self._cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if fragmento is _FIN_RESPUESTA:
+                return
+            yield fragmento
+
+    def cancelar(self):
+        """ Deja de recibir la respuesta; el turno no se guarda en el historial. """
+        self._cancelada.set()
+
+
+# Límites del resumen de inventario que se envía al modelo.
+MAX_PRODUCTOS_CONTEXTO = 200
+UMBRAL_STOCK_BAJO = 5
 
 
 class AIViewModel:
@@ -41,6 +125,16 @@ class AIViewModel:
         self.inventario_repo = inventario_repo
         self.finanzas_repo = finanzas_repo
         self.db_repo = db_repo 
+
+        # Los resúmenes se arman una vez y se reutilizan hasta que los repos escriban.
+        self.contexto = ContextoSnapshot()
+        self.contexto.registrar('inventario', ('inventario',), self._obtener_contexto_inventario)
+        self.contexto.registrar('finanzas', ('movimientos',), self._obtener_contexto_finanzas)
+        self.contexto.registrar('personal', ('usuarios',), self._obtener_contexto_personal)
+
+        # Conversación acotada por presupuesto de tokens (los turnos viejos se resumen).
+        self.historial = HistorialChat()
+        self._lock_historial = threading.Lock()
         
     @property
     def is_ready(self):
@@ -48,25 +142,42 @@ class AIViewModel:
         return _is_ai_ready
 
     def _obtener_contexto_inventario(self):
- 
+        """
+        Resumen compacto del inventario: totales, stock bajo y una tabla
+        nombre/cantidad/costo limitada a MAX_PRODUCTOS_CONTEXTO filas.
+        """
         if not self.inventario_repo.is_ready: return "Error: Inventario no disponible."
         productos = self.inventario_repo.obtener_todo_inventario()
+        if productos is None: raise FuenteNoDisponible("Error: No se pudo leer el inventario.")
         if not productos: return "El inventario está vacío."
-        productos_limpios = [{k: v for k, v in p.items() if isinstance(v, (str, int, float, bool, list))} for p in productos if isinstance(p, dict)]
-        return json.dumps(productos_limpios, indent=2, ensure_ascii=False)
+
+        filas = [[p.nombre, p.cantidad, p.costo] for p in productos]
+        filas.sort(key=lambda f: f[0].lower())
+
+        resumen = {
+            "total_productos": len(filas),
+            "unidades_totales": sum(f[1] for f in filas),
+            "valor_total_inventario": round(sum(f[1] * f[2] for f in filas), 2),
+            "stock_bajo": [f[0] for f in filas if f[1] <= UMBRAL_STOCK_BAJO][:50],
+            "columnas": ["nombre", "cantidad", "costo"],
+            "productos": filas[:MAX_PRODUCTOS_CONTEXTO],
+        }
+        if len(filas) > MAX_PRODUCTOS_CONTEXTO:
+            resumen["nota"] = f"Lista recortada a {MAX_PRODUCTOS_CONTEXTO} de {len(filas)} productos."
+        return json.dumps(resumen, ensure_ascii=False, separators=(',', ':'))
 
     def _obtener_contexto_finanzas(self):
         """
         Devuelve un resumen de los movimientos (Ventas/Gastos manuales).
         """
         if not self.finanzas_repo.is_ready: return "Error: Finanzas no disponible."
-        movimientos = self.finanzas_repo.obtener_todos_los_movimientos()
-        if not movimientos: return "No hay movimientos financieros (ventas/gastos manuales)."
+        resumen = self.finanzas_repo.obtener_resumen_movimientos()
+        if resumen is None: raise FuenteNoDisponible("Error: No se pudo leer el resumen financiero.")
+        if not resumen['total']: return "No hay movimientos financieros (ventas/gastos manuales)."
         
-        balance = sum(mov.get('monto', 0) for mov in movimientos.values())
         resumen = {
-            "balance_neto_movimientos_manuales": f"${balance:,.2f}",
-            "total_movimientos_registrados": len(movimientos)
+            "balance_neto_movimientos_manuales": f"${resumen['balance']:,.2f}",
+            "total_movimientos_registrados": resumen['total']
         }
         return json.dumps(resumen, indent=2)
 
@@ -75,61 +186,97 @@ class AIViewModel:
         Obtiene la lista de personal (empleados) desde la colección 'usuarios'.
         """
         if not self.db_repo.is_ready: return "Error: DB Repo no disponible."
-        personal_docs = self.db_repo.obtener_todos_los_documentos('usuarios')
-        if not personal_docs: return "No hay personal registrado."
-            
-        lista_personal = []
-        for uid, datos in personal_docs.items():
-            if isinstance(datos, dict): 
-                lista_personal.append({
-                    "nombre": datos.get('nombre', 'N/A'),
-                    "rol": datos.get('rol', 'N/A'),
-                    "puesto": datos.get('puesto', 'No asignado')
-                })
-        return json.dumps(lista_personal, indent=2, ensure_ascii=False)
+        empleados = self.db_repo.obtener_empleados()
+        if empleados is None: raise FuenteNoDisponible("Error: No se pudo leer el personal.")
+        if not empleados: return "No hay personal registrado."
 
+        lista_personal = [
+            {"nombre": e.nombre, "rol": e.rol, "puesto": e.puesto}
+            for e in empleados
+        ]
+        return json.dumps(lista_personal, ensure_ascii=False, separators=(',', ':'))
 
-    def preguntar_al_asistente(self, pregunta_usuario: str) -> str:
+
+    def _armar_contexto(self, contexto: dict) -> str:
+        return (
+            f"INVENTARIO (Productos en stock y su costo):\n{contexto['inventario']}\n\n"
+            f"FINANZAS (Resumen de movimientos manuales, gastos/ingresos):\n{contexto['finanzas']}\n\n"
+            f"PERSONAL (Lista de empleados y sus roles):\n{contexto['personal']}"
+        )
+
+    def _generar_respuesta(self, pregunta_usuario: str, en_curso: RespuestaEnCurso):
         """
-        Construye el prompt con TODO el contexto y pregunta al modelo.
+        Corre en el hilo de RespuestaEnCurso: arma el contexto, llama al modelo
+        en modo streaming y, si no se canceló, guarda el turno en el historial.
         """
-        if not self.is_ready or not _chat_session:
+        contexto, sello = self.contexto.obtener()
+        with self._lock_historial:
+            contexto_reenviado = self.historial.actualizar_contexto(self._armar_contexto(contexto), sello)
+            contenido = self.historial.construir_contenido(pregunta_usuario)
+
+        modelo = _obtener_modelo()
+        if modelo is None:
+            raise RuntimeError("el modelo no está configurado")
+        response = modelo.generate_content(contenido, stream=True)
+        partes = []
+        for chunk in response:
+            if en_curso.cancelada:
+                return
+            texto = chunk.text
+            if texto:
+                partes.append(texto)
+                yield texto
+
+        uso = getattr(response, 'usage_metadata', None)
+        with self._lock_historial:
+            self.historial.registrar_turno(
+                pregunta_usuario,
+                "".join(partes).strip(),
+                tokens_prompt=getattr(uso, 'prompt_token_count', None),
+                tokens_respuesta=getattr(uso, 'candidates_token_count', None),
+                tokens_en_cache=getattr(uso, 'cached_content_token_count', None),
+                contexto_reenviado=contexto_reenviado,
+                ttft_ms=round(en_curso.ttft * 1000) if en_curso.ttft is not None else None
+            )
+
+    def precalentar(self):
+        """
+        Configura Gemini y arma el contexto en segundo plano, para que la
+        primera pregunta no espere por eso. Se llama al abrir el asistente.
+        """
+        if not self.is_ready:
+            return
+
+        def _calentar():
+            _obtener_modelo()
+            self.contexto.obtener()
+
+        threading.Thread(target=_calentar, name='asistente-precalentar', daemon=True).start()
+
+    def iniciar_respuesta(self, pregunta_usuario: str) -> RespuestaEnCurso | str:
+        """
+        Empieza a generar la respuesta fuera del hilo de la UI.
+        Retorna la RespuestaEnCurso, o un texto de error si el asistente no está disponible.
+        """
+        if not self.is_ready:
             return "ERROR: El Asistente AI no está disponible. Revisa tu GEMINI_API_KEY."
+        return RespuestaEnCurso(lambda en_curso: self._generar_respuesta(pregunta_usuario, en_curso))
 
-        contexto_inventario = self._obtener_contexto_inventario()
-        contexto_finanzas = self._obtener_contexto_finanzas()
-        contexto_personal = self._obtener_contexto_personal()
-        
-   
-        prompt_completo = f"""
-        Actúa como un Consultor de Negocios y Analista de Marketing para un restaurante. 
-        Tu trabajo es analizar los datos de contexto proporcionados y responder al gerente.
-
-        REGLAS IMPORTANTES:
-        1.  **Análisis de Datos (Objetivo):** Para preguntas sobre hechos (ej: "¿cuántos tomates hay?", "¿quién es el cajero?"), bázate **estrictamente** en los datos de contexto. Si los datos no existen, indícalo.
-        2.  **Estrategias (Creativo y Objetivo):** Para preguntas sobre estrategias (ej: "cómo mejorar ventas", "ideas de marketing"), usa tu conocimiento general de negocios para dar sugerencias **objetivas** y **prácticas** que un restaurante pequeño podría implementar.
-        3.  **Usa el Contexto como Inspiración:** Si te pido ideas de marketing y ves que el balance financiero es negativo ($-500), sugiere estrategias de bajo costo (ej. redes sociales). Si ves poco stock de 'tomate', sugiere una promoción para productos que no usen tomate.
-        4.  **Fuera de Ámbito:** Si la pregunta no tiene relación con el negocio (ej. fútbol, clima), indica amablemente que no tienes esa información, ya que tu enfoque es el restaurante.
-
-        --- DATOS DE CONTEXTO ---
-        INVENTARIO (Productos en stock y su costo):
-        {contexto_inventario}
-        
-        FINANZAS (Resumen de movimientos manuales, gastos/ingresos):
-        {contexto_finanzas}
-        
-        PERSONAL (Lista de empleados y sus roles):
-        {contexto_personal}
-        
-        --- PREGUNTA DEL GERENTE ---
-        {pregunta_usuario}
-        
-        --- TU RESPUESTA (Consultor experto y conciso) ---
+    def preguntar_al_asistente(self, pregunta_usuario: str) -> str:
+        """
+        Versión bloqueante: espera la respuesta completa y la retorna como texto.
         """
+        en_curso = self.iniciar_respuesta(pregunta_usuario)
+        if isinstance(en_curso, str):
+            return en_curso
+        return "".join(en_curso.fragmentos()).strip()
 
-        try:
-            print("...Contactando al Asistente AI...")
-            response = _chat_session.send_message(prompt_completo)
-            return response.text.strip()
-        except Exception as e:
-            return f"Error en la comunicación con la API de Gemini: {e}"
+    def obtener_metricas_chat(self) -> list:
+        """ Tokens por turno de la conversación actual. """
+        return list(self.historial.metricas)
+
+    def reiniciar_conversacion(self):
+        """ Empieza una conversación nueva con el asistente. """
+        with self._lock_historial:
+            self.historial.reiniciar()
+        return "Conversación reiniciada."
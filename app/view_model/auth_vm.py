@@ -2,7 +2,15 @@
 from app.model.data.db_repo import DbRepo 
 from app.model.data.auth_repo import AuthRepo
 
-from app.model.domain.usuario import Usuario
+# Módulos que ve cada rol en la consola ('registro' es el alta de usuarios y
+# 'estadisticas' el reporte de instrumentación).
+# El servicio local usa el mismo mapa para autorizar las llamadas de las terminales.
+MODULOS_POR_ROL = {
+    'administrador': frozenset({'pedidos', 'inventario', 'finanzas', 'personal', 'ai', 'registro', 'estadisticas'}),
+    'gerente': frozenset({'pedidos', 'inventario', 'finanzas', 'personal', 'ai', 'estadisticas'}),
+    'cajero': frozenset({'pedidos'}),
+    'cocinero': frozenset({'pedidos', 'inventario'}),
+}
 
 class AuthViewModel:
     
@@ -13,23 +21,36 @@ class AuthViewModel:
 
     def intentar_login(self, email, password):
         """
-        Intenta autenticar al usuario y, si tiene éxito, carga sus datos
-        desde la base de datos (DbRepo).
+        Intenta autenticar al usuario. El rol y el nombre salen de la cuenta
+        de Authentication (custom claim 'rol' y display_name), en una sola
+        consulta. Un despido deshabilita la cuenta y le quita el rol, así que
+        ese mismo perfil ya lo rechaza.
+        Solo las cuentas antiguas sin esos datos leen su documento de
+        'usuarios'; si no existe o no se puede leer, el login se rechaza.
         """
 
-        uid, resultado = self.auth_repo.login_usuario(email, password)
+        perfil, resultado = self.auth_repo.obtener_perfil(email)
         
-        if not uid:
+        if not perfil:
             return f"Error: {resultado}" 
-            
-        # 3. Buscamos los datos completos del usuario en Firestore
-        rol_db, nombre_db = self.db_repo.obtener_datos_usuario(uid) 
+
+        uid = perfil.uid
+        rol_db, nombre_db = perfil.rol, perfil.nombre
+        if not rol_db or not nombre_db:
+            registro = self.db_repo.obtener_registro_usuario(uid)
+            if registro is None:
+                return "Error: No se pudo verificar la cuenta en la base de datos. Intenta de nuevo en unos segundos."
+            if not registro:
+                return "Error: La cuenta ya no está registrada en el sistema."
+            rol_db = rol_db or registro.get('rol')
+            nombre_db = nombre_db or registro.get('nombre')
         
         if not rol_db or not nombre_db:
             return f"Error: Usuario autenticado (UID: {uid}), pero no se encontraron sus datos (rol/nombre) en la base de datos."
 
         # 4. Guardamos el usuario en la sesión
-        self.usuario_actual = Usuario(uid, email, nombre_db, rol_db)
+        perfil.nombre, perfil.rol = nombre_db, rol_db
+        self.usuario_actual = perfil
         return f"Login exitoso. Bienvenido, {nombre_db}. Tu rol es: {rol_db.upper()}"
         
 
@@ -64,6 +85,12 @@ class AuthViewModel:
         self.usuario_actual = None
         return "Sesión cerrada."
         
+    def puede_usar(self, modulo: str) -> bool:
+        """ True si hay sesión y el rol del usuario actual incluye el módulo (ver MODULOS_POR_ROL). """
+        if not self.usuario_actual or not self.usuario_actual.rol:
+            return False
+        return modulo in MODULOS_POR_ROL.get(self.usuario_actual.rol.lower(), ())
+
     def verificar_rol_acceso(self, roles_permitidos: list) -> bool:
         """ 
          Lógica de permisos actualizada.
@@ -0,0 +1,143 @@
+# app/view_model/contexto_snapshot.py
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.model.data.versiones import version
+
+# Red de seguridad para escrituras hechas desde otras terminales, que el
+# contador de versiones de este proceso no ve.
+TTL_CONTEXTO_SEGUNDOS = 600
+# Un resumen armado tras una lectura fallida se reintenta pronto.
+TTL_FALLO_SEGUNDOS = 15
+# Cuánto se espera a una fuente antes de responder sin sus datos.
+TIMEOUT_FUENTE_SEGUNDOS = 8
+# Hilos para leer las fuentes en paralelo (una por fuente).
+MAX_HILOS_CONTEXTO = 3
+
+
+class FuenteNoDisponible(Exception):
+    """
+    El constructor de una fuente no pudo leer sus datos. El mensaje es el
+    texto que se muestra en su lugar, y queda en caché solo TTL_FALLO_SEGUNDOS.
+    """
+
+
+class ContextoSnapshot:
+    """
+    Caché versionada de los resúmenes de contexto del asistente.
+
+    Cada fuente (inventario, finanzas, personal) declara de qué colecciones
+    depende; su resumen se reconstruye solo cuando alguna de ellas cambió de
+    versión o venció el TTL. Mientras tanto las preguntas no leen Firestore.
+
+    Las fuentes vencidas se reconstruyen en paralelo. Si alguna tarda más que
+    timeout_segundos, la respuesta sigue con una nota de "datos no
+    disponibles" en su lugar; la lectura termina en segundo plano y queda en
+    caché para la próxima pregunta. Si la lectura falla (el constructor lanza
+    FuenteNoDisponible), el mensaje de error se guarda con un TTL corto.
+    """
+
+    def __init__(self, ttl_segundos: float = TTL_CONTEXTO_SEGUNDOS,
+                 timeout_segundos: float = TIMEOUT_FUENTE_SEGUNDOS,
+                 max_hilos: int = MAX_HILOS_CONTEXTO,
+                 ttl_fallo_segundos: float = TTL_FALLO_SEGUNDOS):
+        self.ttl_segundos = ttl_segundos
+        self.ttl_fallo_segundos = ttl_fallo_segundos
+        self.timeout_segundos = timeout_segundos
+        self._lock = threading.Lock()
+        self._fuentes = {}   # nombre -> (colecciones, constructor)
+        self._cache = {}     # nombre -> (version, expira, texto)
+        self._generaciones = {}  # nombre -> cuántas veces cambió el texto
+        self._en_curso = {}  # nombre -> Future de la reconstrucción pendiente
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix='contexto')
+
+    def registrar(self, nombre: str, colecciones: tuple, constructor):
+        """ constructor() devuelve el texto del resumen de esa fuente (o lanza FuenteNoDisponible). """
+        self._fuentes[nombre] = (tuple(colecciones), constructor)
+        self._generaciones.setdefault(nombre, 0)
+
+    def _vigente(self, nombre: str) -> bool:
+        colecciones, _ = self._fuentes[nombre]
+        en_cache = self._cache.get(nombre)
+        return (
+            en_cache is not None
+            and en_cache[0] == version(*colecciones)
+            and time.monotonic() < en_cache[1]
+        )
+
+    def _reconstruir(self, nombre: str):
+        """ Corre en el pool: lee la fuente y guarda el texto en caché. """
+        colecciones, constructor = self._fuentes[nombre]
+        # La versión se toma antes de leer: si alguien escribe mientras tanto,
+        # la próxima consulta vuelve a reconstruir.
+        version_actual = version(*colecciones)
+        try:
+            texto, ttl = constructor(), self.ttl_segundos
+        except FuenteNoDisponible as e:
+            texto, ttl = str(e), self.ttl_fallo_segundos
+        with self._lock:
+            anterior = self._cache.get(nombre)
+            if anterior is None or anterior[2] != texto:
+                self._generaciones[nombre] += 1
+            self._cache[nombre] = (version_actual, time.monotonic() + ttl, texto)
+            self._en_curso.pop(nombre, None)
+
+    def _fallo_reconstruccion(self, nombre: str, futuro):
+        if futuro.exception() is not None:
+            print(f"Error al armar el contexto de {nombre}: {futuro.exception()}")
+            with self._lock:
+                self._en_curso.pop(nombre, None)
+
+    def obtener(self) -> tuple[dict, tuple]:
+        """
+        Devuelve ({fuente: texto}, sello). El sello cambia solo cuando cambia
+        el texto de alguna fuente (o cuando alguna no estuvo disponible), así
+        que sirve para saber si hay que volver a enviar el contexto al modelo.
+        """
+        pendientes = {}
+        with self._lock:
+            for nombre in self._fuentes:
+                if self._vigente(nombre):
+                    continue
+                # Si ya hay una lectura en curso (p. ej. una que venció el
+                # timeout antes), se espera esa en lugar de lanzar otra.
+                futuro = self._en_curso.get(nombre)
+                if futuro is None:
+                    # Con el contexto de quien pregunta: la lectura queda a nombre de su acción del menú.
+                    futuro = self._pool.submit(contextvars.copy_context().run, self._reconstruir, nombre)
+                    futuro.add_done_callback(lambda f, n=nombre: self._fallo_reconstruccion(n, f))
+                    self._en_curso[nombre] = futuro
+                pendientes[nombre] = futuro
+
+        if pendientes:
+            wait(pendientes.values(), timeout=self.timeout_segundos)
+
+        with self._lock:
+            textos = {}
+            no_disponibles = []
+            for nombre in self._fuentes:
+                futuro = pendientes.get(nombre)
+                en_cache = self._cache.get(nombre)
+                if (futuro is not None and not futuro.done()) or en_cache is None:
+                    no_disponibles.append(nombre)
+                    textos[nombre] = f"Datos de {nombre} no disponibles en este momento."
+                else:
+                    textos[nombre] = en_cache[2]
+            sello = self.sello()
+            if no_disponibles:
+                sello += (('no_disponibles', tuple(no_disponibles)),)
+            return textos, sello
+
+    def sello(self) -> tuple:
+        return tuple(sorted(self._generaciones.items()))
+
+    def invalidar(self, nombre: str | None = None):
+        """ Descarta una fuente (o todas) para forzar su reconstrucción. """
+        with self._lock:
+            if nombre is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(nombre, None)
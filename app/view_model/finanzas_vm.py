@@ -1,64 +1,48 @@
 
 import datetime
-try:
-    from zoneinfo import ZoneInfo
-    TZ_COLOMBIA = ZoneInfo("America/Bogota")
-except ImportError:
+import itertools
 
-    TZ_COLOMBIA = datetime.timezone(datetime.timedelta(hours=-5), name="America/Bogota")
+from app.model.data.finanzas_repo import TZ_COLOMBIA
+from app.model.data.resiliencia import MENSAJE_SIN_CONEXION, LecturaInterrumpida
+from app.model.domain.finanzas import MovimientoFinanciero
 
 
-class MovimientoFinanciero:
-    def __init__(self, id_mov, tipo, descripcion, monto, fecha_hora):
-        self.id = id_mov
-        self.tipo = tipo
-        self.descripcion = descripcion
-        self.monto = monto
-        self.fecha_hora = fecha_hora
-    
-    def a_diccionario(self):
-        return {
-            "tipo": self.tipo,
-            "descripcion": self.descripcion,
-            "monto": self.monto,
-            "fecha_hora": self.fecha_hora # ISO string format
-        }
+# Ítems que muestra el reporte de ingresos.
+TOP_ITEMS_REPORTE = 10
+
 
 class FinanzasViewModel:
     
-    def __init__(self, finanzas_repo):
+    def __init__(self, finanzas_repo, historial=None):
         self.finanzas_repo = finanzas_repo 
+        # Historial local (columnar) de pedidos finalizados para los reportes por período.
+        self.historial = historial
 
-    def calcular_ingresos_del_dia(self):
+    def calcular_ingresos_del_dia(self, motor: str = 'resumen'):
+        """
+        Suma los pedidos finalizados hoy.
+        motor='resumen' lee el documento de resumen diario (una lectura);
+        motor='consulta' filtra los pedidos del día en Firestore (lee solo los de hoy).
+        """
         if not self.finanzas_repo.is_ready:
             return "Error: Repositorio de finanzas no está listo."
         
         try:
             hoy = datetime.datetime.now(TZ_COLOMBIA).date()
-            pedidos = self.finanzas_repo.obtener_pedidos_para_reporte() 
-            ingresos_totales = 0.0
-            
-            for pedido in pedidos:
-                fecha_str = pedido.get('fecha_finalizacion') # Buscamos la fecha de finalización
-                total = pedido.get('total', 0.0)
-                estado = pedido.get('estado', 'ACTIVO').upper()
-
-                if estado != 'FINALIZADO' or not fecha_str:
-                    continue # Ignoramos pedidos no finalizados
-
-                try:
-                    if isinstance(fecha_str, str):
-                        # Manejo de formatos ISO/Zoulou
-                        fecha_pedido = datetime.datetime.fromisoformat(fecha_str.replace('Z', '+00:00')).date()
-                    elif hasattr(fecha_str, 'date'): # Si es un Timestamp de Firebase
-                        fecha_pedido = fecha_str.astimezone(TZ_COLOMBIA).date()
-                    else:
-                        continue
-                except Exception:
-                    continue 
-                
-                if fecha_pedido == hoy:
-                    ingresos_totales += float(total) 
+
+            if motor == 'consulta':
+                inicio = datetime.datetime.combine(hoy, datetime.time.min, tzinfo=TZ_COLOMBIA)
+                fin = inicio + datetime.timedelta(days=1)
+                pedidos = self.finanzas_repo.obtener_ingresos_por_rango(inicio, fin)
+                if pedidos is None:
+                    return MENSAJE_SIN_CONEXION
+                ingresos_totales = sum(float(p.get('total') or 0.0) for p in pedidos)
+            else:
+                # El resumen del día se mantiene al finalizar cada pedido: una sola lectura.
+                resumen = self.finanzas_repo.obtener_resumen_diario(hoy.isoformat())
+                if resumen is None:
+                    return "Error: No se pudo leer el resumen de ingresos del día."
+                ingresos_totales = float(resumen.get('ingresos', 0.0) or 0.0)
 
             if ingresos_totales == 0.0:
                 return f"No se registraron ingresos (pedidos finalizados) en la fecha {hoy.isoformat()}."
@@ -70,38 +54,106 @@ class FinanzasViewModel:
             return f"Error al calcular ingresos: {e}"
 
 
-    def obtener_reporte_gastos(self):
-        movimientos = self.finanzas_repo.obtener_todos_los_movimientos()
+    def iterar_reporte_gastos(self):
+        """
+        Genera el reporte de gastos línea por línea, leyendo los movimientos
+        página por página (ya vienen ordenados por fecha descendente).
+        Si una página falla a mitad del reporte, se marca como parcial.
+        """
+        movimientos = self.finanzas_repo.iterar_movimientos()
+        try:
+            primero = next(movimientos, None)
+        except LecturaInterrumpida:
+            yield MENSAJE_SIN_CONEXION
+            return
         
-        if not movimientos:
-            return "No hay movimientos financieros (gastos o ingresos manuales) registrados."
+        if primero is None:
+            yield "No hay movimientos financieros (gastos o ingresos manuales) registrados."
+            return
             
-        respuesta = "==== REPORTE DE GASTOS Y MOVIMIENTOS ====\n"
-        respuesta += f"{'Fecha':<20}{'Tipo':<10}{'Monto':<15}{'Descripción':<40}\n"
-        respuesta += "-" * 85 + "\n"
+        yield "==== REPORTE DE GASTOS Y MOVIMIENTOS ===="
+        yield f"{'Fecha':<20}{'Tipo':<10}{'Monto':<15}{'Descripción':<40}"
+        yield "-" * 85
         
         balance_parcial = 0.0
+        completo = True
         
-        # Ordenamos por fecha de forma descendente
-        for id_mov, detalles in sorted(movimientos.items(), key=lambda item: item[1].get('fecha_hora', ''), reverse=True):
-            tipo = detalles.get('tipo', 'N/A').upper()
-            monto = detalles.get('monto', 0.0)
-            descripcion = detalles.get('descripcion', 'Sin descripción')
-            fecha_hora_str = detalles.get('fecha_hora', '')
-            
-            fecha_str = fecha_hora_str[:16].replace('T', ' ') if fecha_hora_str else 'N/A'
-            balance_parcial += monto 
-            
-            monto_str = f"${monto:,.2f}"
-            if tipo == 'EGRESO':
-                monto_str = f"(${abs(monto):,.2f})" # Paréntesis para negativo
-            
-            respuesta += f"{fecha_str:<20}{tipo:<10}{monto_str:<15}{descripcion:<40}\n"
+        try:
+            for movimiento in itertools.chain([primero], movimientos):
+                tipo = movimiento.tipo.upper()
+                monto = movimiento.monto
+                descripcion = movimiento.descripcion
+                fecha_hora_str = movimiento.fecha_hora
+                
+                fecha_str = fecha_hora_str[:16].replace('T', ' ') if fecha_hora_str else 'N/A'
+                balance_parcial += monto 
+                
+                monto_str = f"${monto:,.2f}"
+                if tipo == 'EGRESO':
+                    monto_str = f"(${abs(monto):,.2f})" # Paréntesis para negativo
+                
+                yield f"{fecha_str:<20}{tipo:<10}{monto_str:<15}{descripcion:<40}"
+        except LecturaInterrumpida:
+            completo = False
             
-        respuesta += "-" * 85 + "\n"
+        yield "-" * 85
+        if not completo:
+            yield "⚠️ REPORTE PARCIAL: se perdió la conexión y faltan movimientos; el balance no está completo."
         # ✅ CORRECCIÓN 3: Asegurar formato :,.2f para balance neto
-        respuesta += f"BALANCE NETO (Movimientos Manuales): ${balance_parcial:,.2f}"
-        return respuesta
+        yield f"BALANCE NETO (Movimientos Manuales): ${balance_parcial:,.2f}"
+
+    def iterar_reporte_ingresos(self, dias: int = 7):
+        """
+        Reporte de ingresos de los últimos 'dias' días (incluido hoy): totales,
+        ingresos por día, por cajero e ítems más vendidos. Primero trae al
+        historial local los pedidos finalizados desde la última sincronización
+        y después calcula todo sobre los datos locales.
+        """
+        if self.historial is None or not self.finanzas_repo.is_ready:
+            yield "Error: Historial de pedidos no disponible."
+            return
+
+        sin_conexion = self.historial.sincronizar(self.finanzas_repo) < 0
+
+        hoy = datetime.datetime.now(TZ_COLOMBIA).date()
+        fin = datetime.datetime.combine(hoy, datetime.time.min, tzinfo=TZ_COLOMBIA) + datetime.timedelta(days=1)
+        inicio = fin - datetime.timedelta(days=dias)
+        resumen = self.historial.resumen(inicio, fin)
+
+        if resumen['pedidos'] == 0:
+            if sin_conexion:
+                yield MENSAJE_SIN_CONEXION
+                return
+            yield f"No hay pedidos finalizados en los últimos {dias} días."
+            return
+
+        yield f"==== REPORTE DE INGRESOS: {inicio.date().isoformat()} a {hoy.isoformat()} ===="
+        if sin_conexion:
+            hasta = self.historial.sincronizado_hasta()
+            yield f"(Sin conexión: datos hasta {hasta:%Y-%m-%d %H:%M})"
+        yield f"Pedidos: {resumen['pedidos']}   Ingresos: ${resumen['ingresos']:,.2f}   Ticket promedio: ${resumen['ticket_promedio']:,.2f}"
+
+        yield ""
+        yield f"{'Día':<14}{'Pedidos':>10}{'Ingresos':>18}"
+        yield "-" * 42
+        for dia, ingresos, pedidos in self.historial.ingresos_por_dia(inicio, fin):
+            yield f"{dia.isoformat():<14}{pedidos:>10}{f'${ingresos:,.2f}':>18}"
+
+        yield ""
+        yield f"{'Cajero':<30}{'Pedidos':>10}{'Ingresos':>18}"
+        yield "-" * 58
+        for cajero, ingresos, pedidos in self.historial.ingresos_por_cajero(inicio, fin):
+            yield f"{cajero:<30}{pedidos:>10}{f'${ingresos:,.2f}':>18}"
+
+        yield ""
+        yield f"{'Ítem del menú':<30}{'Unidades':>10}"
+        yield "-" * 40
+        for item_id, unidades in self.historial.items_mas_vendidos(inicio, fin, TOP_ITEMS_REPORTE):
+            yield f"{item_id:<30}{unidades:>10}"
+
+    def obtener_reporte_gastos(self):
+        """ Reporte completo como un solo texto (para quien no pueda consumirlo línea por línea). """
+        return "\n".join(self.iterar_reporte_gastos())
 
     
     def registrar_gasto(self, descripcion, monto_str):
@@ -138,7 +190,7 @@ class FinanzasViewModel:
             id_mov = f"MOV-{datetime.datetime.now().timestamp()}"
             mov = MovimientoFinanciero(id_mov, tipo, descripcion, monto_final, fecha_hora)
             
-            exito = self.finanzas_repo.guardar_movimiento(id_mov, mov.a_diccionario())
+            exito = self.finanzas_repo.guardar_movimiento(mov)
             
             if exito:
                 return f"Movimiento '{tipo.upper()}' registrado por ${abs(monto_num):,.2f}"
@@ -0,0 +1,113 @@
+# app/view_model/historial_chat.py
+
+# Tokens que puede ocupar la conversación reciente antes de compactarla.
+PRESUPUESTO_TOKENS_HISTORIAL = 4000
+# Tamaño máximo del resumen de los turnos compactados.
+MAX_CARACTERES_RESUMEN = 2000
+# Cuánto de cada pregunta/respuesta antigua se conserva en el resumen.
+CARACTERES_POR_TURNO_RESUMIDO = 240
+
+
+def estimar_tokens(texto: str) -> int:
+    """ Aproximación de ~4 caracteres por token, para cuando el API no informa el uso. """
+    return max(1, len(texto or '') // 4)
+
+
+def _recortar(texto: str, limite: int) -> str:
+    texto = " ".join((texto or '').split())
+    return texto if len(texto) <= limite else texto[:limite - 1] + "…"
+
+
+class Turno:
+    """ Una pregunta del gerente y la respuesta del asistente. """
+    def __init__(self, pregunta: str, respuesta: str):
+        self.pregunta = pregunta
+        self.respuesta = respuesta
+        self.tokens = estimar_tokens(pregunta) + estimar_tokens(respuesta)
+
+
+class HistorialChat:
+    """
+    Historial acotado de la conversación con el asistente.
+
+    Cada solicitud al modelo se arma así:
+      1. el contexto del negocio (uno solo, el más reciente),
+      2. el resumen de los turnos viejos ya compactados,
+      3. los turnos recientes, que caben en el presupuesto de tokens,
+      4. la pregunta nueva.
+    El contexto y el resumen van al principio y solo cambian cuando cambian
+    los datos o se compacta, así el prefijo se mantiene estable entre
+    preguntas (y el modelo puede reutilizarlo de su caché implícita).
+    """
+
+    def __init__(self, presupuesto_tokens: int = PRESUPUESTO_TOKENS_HISTORIAL):
+        self.presupuesto_tokens = presupuesto_tokens
+        self.turnos: list[Turno] = []
+        self.resumen = ""
+        self.metricas: list[dict] = []
+        self._contexto = ""
+        self._sello_contexto = None
+
+    def actualizar_contexto(self, texto: str, sello) -> bool:
+        """ Reemplaza el contexto si cambió. Retorna True si hubo que reemplazarlo. """
+        if sello == self._sello_contexto and texto == self._contexto:
+            return False
+        self._contexto = texto
+        self._sello_contexto = sello
+        return True
+
+    def construir_contenido(self, pregunta: str) -> list[dict]:
+        """ Lista de mensajes (formato de Gemini) para la pregunta nueva. """
+        contenido = []
+        if self._contexto:
+            contenido.append({'role': 'user', 'parts': [f"--- DATOS DE CONTEXTO ---\n{self._contexto}"]})
+            contenido.append({'role': 'model', 'parts': ["Entendido, usaré estos datos."]})
+        if self.resumen:
+            contenido.append({'role': 'user', 'parts': [f"--- RESUMEN DE LA CONVERSACIÓN ANTERIOR ---\n{self.resumen}"]})
+            contenido.append({'role': 'model', 'parts': ["Entendido."]})
+        for turno in self.turnos:
+            contenido.append({'role': 'user', 'parts': [turno.pregunta]})
+            contenido.append({'role': 'model', 'parts': [turno.respuesta]})
+        contenido.append({'role': 'user', 'parts': [pregunta]})
+        return contenido
+
+    def registrar_turno(self, pregunta: str, respuesta: str, tokens_prompt: int | None = None,
+                        tokens_respuesta: int | None = None, tokens_en_cache: int | None = None,
+                        contexto_reenviado: bool = False, ttft_ms: int | None = None):
+        """ Guarda el turno con sus tokens y compacta si se pasó del presupuesto. """
+        self.turnos.append(Turno(pregunta, respuesta))
+        self.metricas.append({
+            'turno': len(self.metricas) + 1,
+            'tokens_prompt': tokens_prompt,
+            'tokens_respuesta': tokens_respuesta if tokens_respuesta is not None else estimar_tokens(respuesta),
+            'tokens_en_cache': tokens_en_cache,
+            'contexto_reenviado': contexto_reenviado,
+            'ttft_ms': ttft_ms,
+        })
+        self._compactar()
+
+    def _compactar(self):
+        """ Pasa los turnos más viejos al resumen hasta caber en el presupuesto. """
+        total = sum(t.tokens for t in self.turnos)
+        lineas = []
+        # El último turno siempre se conserva completo.
+        while total > self.presupuesto_tokens and len(self.turnos) > 1:
+            turno = self.turnos.pop(0)
+            total -= turno.tokens
+            lineas.append(
+                f"- P: {_recortar(turno.pregunta, CARACTERES_POR_TURNO_RESUMIDO)}"
+                f" | R: {_recortar(turno.respuesta, CARACTERES_POR_TURNO_RESUMIDO)}"
+            )
+        if lineas:
+            resumen = "\n".join(filter(None, [self.resumen] + lineas))
+            # Si el resumen crece demasiado, se descartan sus líneas más antiguas.
+            while len(resumen) > MAX_CARACTERES_RESUMEN and "\n" in resumen:
+                resumen = resumen.split("\n", 1)[1]
+            self.resumen = resumen
+
+    def reiniciar(self):
+        """ Olvida la conversación (el contexto se vuelve a enviar en la próxima pregunta). """
+        self.turnos.clear()
+        self.resumen = ""
+        self._contexto = ""
+        self._sello_contexto = None
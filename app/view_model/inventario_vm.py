@@ -1,73 +1,38 @@
 # app/view_model/inventario_vm.py
+import os
+
+from app.model.data.archivos_inventario import FilaInvalida, escribir_productos, leer_productos
+from app.model.data.resiliencia import MENSAJE_SIN_CONEXION, LecturaInterrumpida
+
+# Cuántos errores de filas se muestran al terminar un import.
+MAX_ERRORES_MOSTRADOS = 20
 
 class InventarioViewModel:
     def __init__(self, inventario_repo):
         self.inventario_repo = inventario_repo
 
-    def _extract(self, item):
-        """
-        Normaliza distintas formas de item en (id, data_dict).
-        Soporta:
-         - (id, dict)
-         - {'id': id, ...}
-         - dict (con 'id' dentro)
-        """
-
-        if isinstance(item, (list, tuple)) and len(item) == 2:
-            pid, data = item
-            if isinstance(data, dict):
-                return str(pid), dict(data)
-
-            return str(pid), {"valor": data}
-
-        if isinstance(item, dict):
-            if 'id' in item:
-                pid = item.get('id')
-                data = dict(item)
-                data.pop('id', None)
-                return str(pid), data
-
-            nombre = item.get('nombre') or item.get('Nombre') or item.get('producto')
-            pid = nombre if nombre else 'N/A'
-            return str(pid), dict(item)
-
-        return 'N/A', {"valor": item}
-
-    def _formatear_item(self, doc_id, data):
-        if not isinstance(data, dict):
-            return f"ID: {doc_id} | Datos no válidos"
-        nombre = data.get('nombre') or data.get('Nombre') or data.get('producto') or ''
-        cantidad = data.get('cantidad') or data.get('qty') or 0
-        costo = data.get('costo') or data.get('precio') or data.get('precio_costo') or 0.0
-        try:
-            costo_f = float(costo)
-        except Exception:
-            costo_f = 0.0
-        return f"ID: {doc_id} | Nombre: {nombre} | Cantidad: {cantidad} | Costo: ${costo_f:.2f}"
+    def _formatear_item(self, producto):
+        return f"ID: {producto.id} | Nombre: {producto.nombre} | Cantidad: {producto.cantidad:g} | Costo: ${producto.costo:.2f}"
 
     def listar_inventario(self):
         try:
             inventario = self.inventario_repo.obtener_todo_inventario()
+            if inventario is None:
+                return MENSAJE_SIN_CONEXION
             if not inventario:
                 return "Inventario vacío."
-            lines = []
-            for item in inventario:
-                pid, data = self._extract(item)
-                lines.append(self._formatear_item(pid, data))
-            return "\n".join(lines)
+            return "\n".join(self._formatear_item(producto) for producto in inventario)
         except Exception as e:
             return f"Error al listar inventario: {e}"
 
     def buscar_producto(self, nombre):
         try:
             resultados = self.inventario_repo.buscar_producto_por_nombre(nombre)
+            if resultados is None:
+                return MENSAJE_SIN_CONEXION
             if not resultados:
                 return f"No se encontraron productos con el nombre '{nombre}'."
-            lines = []
-            for item in resultados:
-                pid, data = self._extract(item)
-                lines.append(self._formatear_item(pid, data))
-            return "\n".join(lines) if lines else f"No se encontraron productos con el nombre '{nombre}'."
+            return "\n".join(self._formatear_item(producto) for producto in resultados)
         except Exception as e:
             return f"Error al buscar producto: {e}"
 
@@ -83,8 +48,74 @@ class InventarioViewModel:
         ok = self.inventario_repo.agregar_o_actualizar_producto_por_nombre(nombre_norm, cantidad, precio)
         return f" Producto '{nombre_norm}' agregado/actualizado." if ok else f"❌ No se pudo agregar/actualizar '{nombre_norm}'."
 
+    def ajustar_stock(self, nombre, delta_str):
+        """ Suma o resta unidades al stock sin sobrescribir la cantidad (ej: '5' o '-2.5'). """
+        try:
+            delta = float(str(delta_str).replace(',', '.'))
+        except Exception:
+            return "Error: La cantidad a ajustar debe ser un número."
+        if not nombre or not str(nombre).strip():
+            return "Error: El nombre no puede estar vacío."
+        if delta == 0:
+            return "No hay nada que ajustar."
+        nombre = str(nombre).strip()
+        ok = self.inventario_repo.ajustar_stock_por_nombre(nombre, delta)
+        return f" Stock de '{nombre}' ajustado en {delta:+g}." if ok else f"❌ No se encontró '{nombre}' o no se pudo ajustar."
+
     def eliminar_producto(self, nombre):
         if not nombre or not str(nombre).strip():
             return "Error: El nombre no puede estar vacío."
         ok = self.inventario_repo.eliminar_producto_por_nombre(nombre)
-        return f" Producto '{nombre}' eliminado." if ok else f" No se encontró '{nombre}'.." 
+        return f" Producto '{nombre}' eliminado." if ok else f" No se encontró '{nombre}'.."
+
+    def _filas_validas(self, ruta, errores: list, conteo: dict):
+        """ Filas válidas del archivo; las inválidas se cuentan y se guardan las primeras. """
+        try:
+            for linea, fila in leer_productos(ruta):
+                if isinstance(fila, FilaInvalida):
+                    conteo['invalidas'] += 1
+                    if len(errores) < MAX_ERRORES_MOSTRADOS:
+                        errores.append(str(fila))
+                    continue
+                yield fila
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            # Se detiene la lectura; lo ya leído se guarda igual.
+            conteo['error_archivo'] = str(e)
+
+    def importar_inventario(self, ruta):
+        """ Importa un archivo CSV, JSON Lines (.jsonl) o JSON (arreglo) de productos. """
+        ruta = str(ruta or '').strip().strip('"')
+        if not ruta or not os.path.isfile(ruta):
+            return f"Error: No se encontró el archivo '{ruta}'."
+        errores = []
+        conteo = {'invalidas': 0, 'error_archivo': None}
+        resultado = self.inventario_repo.importar_productos(self._filas_validas(ruta, errores, conteo))
+        if resultado is None:
+            return "❌ No se pudo importar el inventario."
+
+        lines = [f" Importación de '{ruta}': {resultado['creados']} productos nuevos, "
+                 f"{resultado['actualizados']} actualizados."]
+        if conteo['error_archivo']:
+            lines.append(f"⚠️ La lectura se detuvo antes del final: {conteo['error_archivo']}")
+        if conteo['invalidas']:
+            lines.append(f"⚠️ {conteo['invalidas']} filas ignoradas por datos inválidos:")
+            lines.extend(f"   {error}" for error in errores)
+            if conteo['invalidas'] > len(errores):
+                lines.append(f"   ... y {conteo['invalidas'] - len(errores)} más.")
+        if resultado['fallidos']:
+            lines.append(f"❌ {len(resultado['fallidos'])} productos no se pudieron guardar.")
+        return "\n".join(lines)
+
+    def exportar_inventario(self, ruta):
+        """ Exporta todo el inventario (CSV, .jsonl o .json según la extensión), página por página. """
+        ruta = str(ruta or '').strip().strip('"')
+        if not ruta:
+            return "Error: La ruta no puede estar vacía."
+
+        try:
+            n = escribir_productos(ruta, (p.to_firestore() for p in self.inventario_repo.iterar_productos()))
+        except LecturaInterrumpida:
+            return f"❌ Exportación incompleta: se perdió la conexión a mitad del inventario; no se escribió '{ruta}'."
+        except Exception as e:
+            return f"Error al exportar inventario: {e}"
+        return f" {n} productos exportados a '{ruta}'."
@@ -1,9 +1,17 @@
+import time
 import pytz
 from datetime import datetime
 
+from app.model.data.resiliencia import MENSAJE_SIN_CONEXION
+from app.model.domain.pedido import ItemPedido, Pedido
+
 
 TZ_COLOMBIA = pytz.timezone('America/Bogota')
 
+# Precios del menú de ejemplo que se muestra cuando la colección 'menu' está vacía.
+PRECIOS_PLACEHOLDER = {'1': 12.50, '2': 15.00, '3': 3.00}
+NOMBRES_PLACEHOLDER = {'1': 'Hamburguesa Clásica', '2': 'Pizza Personal', '3': 'Refresco Grande'}
+
 class PedidosViewModel:
     """
     Clase que gestiona la lógica de negocio relacionada con la toma, 
@@ -20,6 +28,8 @@ class PedidosViewModel:
         para una presentación sencilla.
         """
         menu_items = self.db_repo.obtener_menu()
+        if menu_items is None:
+            return {"ERROR": MENSAJE_SIN_CONEXION}
         if not menu_items:
 
             return {
@@ -41,18 +51,24 @@ class PedidosViewModel:
         """
         if not items:
             return "Error: La lista de items está vacía."
-            
-        total = self._calcular_total_simulado(items)
+
+        items = [ItemPedido.from_firestore(item) if isinstance(item, dict) else item for item in items]
+        total, desconocidos = self._calcular_total(items)
+        if total is None:
+            return "Error: No se pudo leer el menú para calcular el total. Intenta de nuevo en unos segundos."
+        if desconocidos:
+            return f"Error: Los items {', '.join(desconocidos)} no existen en el menú."
         
-        pedido_data = {
-            'items': items,
-            'total': total,
-            'estado': 'ACTIVO',
-            'cajero_uid': cajero_uid,
-            'fecha_creacion': datetime.now(TZ_COLOMBIA).isoformat()
-        }
+        pedido = Pedido(
+            id=None,
+            items=items,
+            total=total,
+            estado='ACTIVO',
+            cajero_uid=cajero_uid,
+            fecha_creacion=datetime.now(TZ_COLOMBIA).isoformat()
+        )
         
-        pedido_id = self.db_repo.crear_pedido(pedido_data)
+        pedido_id = self.db_repo.crear_pedido(pedido)
         
         if pedido_id:
             return f" Pedido creado con éxito. Total: {total:.2f} USD. ID: {pedido_id}"
@@ -65,48 +81,131 @@ class PedidosViewModel:
         """
         pedidos = self.db_repo.obtener_pedidos_activos()
         
+        if pedidos is None:
+            pendientes = self.db_repo.pedidos_pendientes_de_envio()
+            if pendientes:
+                return f"{MENSAJE_SIN_CONEXION}\n({pendientes} pedido(s) guardados en esta terminal esperan para subir.)"
+            return MENSAJE_SIN_CONEXION
         if not pedidos:
             return "No hay pedidos activos en este momento."
             
         output = "--- PEDIDOS ACTIVOS ---\n"
   
-        for pid, data in sorted(pedidos.items()):
-            cajero_identificador = data['cajero_uid'][:4] + '...' 
-            output += f"ID: {pid} | Estado: {data['estado']} | Total: {data['total']:.2f} USD | Cajero: {cajero_identificador}\n"
+        for pid, pedido in sorted(pedidos.items()):
+            cajero_identificador = pedido.cajero_uid[:4] + '...' 
+            output += f"ID: {pid} | Estado: {pedido.estado} | Total: {pedido.total:.2f} USD | Cajero: {cajero_identificador}\n"
         output += "-----------------------"
         return output
 
+    def version_pedidos(self) -> int:
+        """ Versión actual del tablero de pedidos activos (0 si no hay listener). """
+        tablero = self.db_repo.tablero_pedidos()
+        return tablero.version if tablero is not None else 0
+
+    def esperar_cambio_pedidos(self, version: int, timeout: float) -> int:
+        """
+        Espera a que cambie algún pedido activo (o a que pase 'timeout').
+        Sin listener disponible simplemente espera el tiempo indicado.
+        """
+        tablero = self.db_repo.tablero_pedidos()
+        if tablero is None:
+            time.sleep(timeout)
+            return version
+        return tablero.esperar_cambio(version, timeout)
+
+    def pantalla_cocina(self) -> str:
+        """
+        Vista de cocina: pedidos activos del más antiguo al más reciente, con
+        los platos y el tiempo de espera. Se arma con el tablero en memoria.
+        """
+        pedidos = self.db_repo.obtener_pedidos_activos()
+        ahora = datetime.now(TZ_COLOMBIA)
+        if pedidos is None:
+            return f"=== COCINA | {ahora.strftime('%H:%M:%S')} ===\n{MENSAJE_SIN_CONEXION}"
+        output = f"=== COCINA | {ahora.strftime('%H:%M:%S')} | {len(pedidos)} pedido(s) activo(s) ===\n"
+        if not pedidos:
+            return output + "Sin pedidos pendientes."
+
+        nombres = {item['id']: item['nombre'] for item in (self.db_repo.obtener_menu() or [])} or NOMBRES_PLACEHOLDER
+        for pid, pedido in sorted(pedidos.items(), key=lambda par: str(par[1].fecha_creacion or '')):
+            try:
+                minutos = int((ahora - datetime.fromisoformat(pedido.fecha_creacion)).total_seconds() // 60)
+                espera = f"{minutos} min"
+            except (TypeError, ValueError):
+                espera = "?"
+            output += f"\n[{pid[:6]}] hace {espera}\n"
+            for item in pedido.items:
+                output += f"   {item.cantidad} x {nombres.get(item.item_id, item.item_id)}\n"
+        return output.rstrip("\n")
+
+    def cancelar_pedido(self, pedido_id: str):
+        """ Marca un pedido activo como 'CANCELADO' (no suma a los ingresos). """
+        pedido = self.db_repo.obtener_pedido_por_id(pedido_id)
+
+        if not pedido:
+            return f"Error: No se encontró el pedido con ID {pedido_id}."
+
+        if pedido.estado != 'ACTIVO':
+            return f"El pedido {pedido_id} no está activo (estado: {pedido.estado})."
+
+        if self.db_repo.actualizar_estado_pedido(pedido_id, 'CANCELADO'):
+            return f"Pedido {pedido_id} CANCELADO."
+        return "❌ Error al actualizar el estado del pedido en la base de datos."
+
     def finalizar_pedido(self, pedido_id: str):
         """
-        Marca un pedido como 'FINALIZADO', simulando el proceso de cobro.
+        Marca un pedido como 'FINALIZADO', simulando el proceso de cobro,
+        y suma su total al resumen de ingresos del día.
         """
         pedido = self.db_repo.obtener_pedido_por_id(pedido_id)
         
         if not pedido:
             return f"Error: No se encontró el pedido con ID {pedido_id}."
             
-        if pedido.get('estado') == 'FINALIZADO':
+        if pedido.estado == 'FINALIZADO':
             return f"El pedido {pedido_id} ya ha sido finalizado y cobrado."
 
 
-        success = self.db_repo.actualizar_estado_pedido(pedido_id, 'FINALIZADO')
+        ahora = datetime.now(TZ_COLOMBIA)
+        success = self.db_repo.finalizar_pedido(
+            pedido_id,
+            pedido.total,
+            pedido.cajero_uid,
+            ahora.isoformat(),
+            ahora.date().isoformat(),
+            items=pedido.items
+        )
         
         if success:
-            return f"✅ Pedido {pedido_id} FINALIZADO y cobrado. Total: {pedido.get('total', 0):.2f} USD."
-        else:
-            return "❌ Error al actualizar el estado del pedido en la base de datos."
+            return f"✅ Pedido {pedido_id} FINALIZADO y cobrado. Total: {pedido.total:.2f} USD."
+        # Otra terminal pudo finalizarlo entre la lectura y el lote (que se rechaza entero).
+        actual = self.db_repo.obtener_pedido_por_id(pedido_id)
+        if actual and actual.estado == 'FINALIZADO':
+            return f"El pedido {pedido_id} ya ha sido finalizado y cobrado."
+        # Sin recetas no se finaliza: no se podría descontar el inventario.
+        if pedido.items and self.db_repo.obtener_menu() is None:
+            return "❌ No se pudo leer el menú para descontar el inventario; el pedido no se finalizó. Intenta de nuevo."
+        return "❌ Error al actualizar el estado del pedido en la base de datos."
             
-    def _calcular_total_simulado(self, items: list) -> float:
+    def _calcular_total(self, items: list[ItemPedido]) -> tuple[float | None, list]:
         """
-        Función auxiliar para calcular el total basado en precios simulados.
-        En una aplicación real, se consultaría la base de datos o el menú real.
+        Calcula el total con la tabla de precios del menú en caché (sin
+        lecturas a Firestore mientras la caché esté vigente).
+        Retorna (total, ids_desconocidos), o (None, []) si el menú no se pudo
+        leer. Los precios de ejemplo solo se usan si la colección 'menu' está
+        vacía, nunca para cubrir un fallo de lectura.
         """
-
-        precios = {'1': 12.50, '2': 15.00, '3': 3.00}
+        precios = self.db_repo.obtener_precios_menu()
+        if precios is None:
+            return None, []
+        if not precios and self.db_repo.obtener_menu() == []:
+            precios = PRECIOS_PLACEHOLDER
         total = 0.0
+        desconocidos = []
         for item in items:
-            item_id = str(item['item_id'])
-            cantidad = item['cantidad']
-            if item_id in precios:
-                total += precios[item_id] * cantidad
-        return total
+            precio = precios.get(item.item_id)
+            if precio is None:
+                desconocidos.append(item.item_id)
+            else:
+                total += precio * item.cantidad
+        return total, desconocidos
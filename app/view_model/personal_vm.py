@@ -20,25 +20,56 @@ class PersonalViewModel:
             return "Error: Conexión a la base de datos no disponible."
             
         try:
-            personal_docs = self.db_repo.obtener_todos_los_documentos('usuarios') 
+            empleados = self.db_repo.obtener_empleados()
             
-            if not personal_docs:
+            if empleados is None:
+                return "Error: No se pudo leer la lista de personal."
+            if not empleados:
                 return "No hay personal registrado en el sistema."
             
             respuesta = "==== LISTA DE EMPLEADOS ====\n"
             respuesta += f"{'ID Interno (UID)':<30}{'Nombre':<30}{'Puesto (Rol)':<15}\n"
             respuesta += "-" * 75 + "\n"
             
-            for uid, datos in personal_docs.items():
-                nombre = datos.get('nombre', 'N/A')
-                rol = datos.get('rol', 'N/A').upper()
-                respuesta += f"{uid:<30}{nombre:<30}{rol:<15}\n"
+            for empleado in empleados:
+                respuesta += f"{empleado.id:<30}{empleado.nombre:<30}{empleado.rol.upper():<15}\n"
 
             return respuesta
             
         except Exception as e:
             return f"Error al listar el personal: {e}"
 
+    def _resolver_empleado(self, identificador):
+        """
+        Busca un empleado por nombre exacto o por email (si trae '@').
+        Retorna (Empleado, None) o (None, mensaje_de_error).
+        Si el nombre está repetido no elige ninguno: lista las coincidencias.
+        """
+        identificador = str(identificador or '').strip()
+        if not identificador:
+            return None, "Error: Debes indicar el nombre o el email del empleado."
+
+        if '@' in identificador:
+            encontrados = self.db_repo.buscar_usuarios_por_email(identificador)
+            if encontrados is None:
+                return None, "Error: No se pudo leer la lista de personal."
+            if not encontrados:
+                return None, f"Error: No se encontró un empleado con el email '{identificador}'."
+            return encontrados[0], None
+
+        coincidencias = self.db_repo.buscar_usuarios_por_nombre(identificador)
+        if coincidencias is None:
+            return None, "Error: No se pudo leer la lista de personal."
+        if not coincidencias:
+            return None, f"Error: No se encontró un empleado con el nombre '{identificador}'."
+        if len(coincidencias) > 1:
+            lineas = [f"Error: Hay {len(coincidencias)} empleados llamados '{identificador}':"]
+            for empleado in coincidencias:
+                lineas.append(f"  - {empleado.id} | {empleado.email} | {empleado.rol.upper()}")
+            lineas.append("Indica el email del empleado para elegir uno.")
+            return None, "\n".join(lineas)
+        return coincidencias[0], None
+
     def contratar_empleado(self, nombre, puesto, salario):
         """
         Actualiza el salario y puesto de un empleado existente en Firestore.
@@ -50,21 +81,12 @@ class PersonalViewModel:
             return "Error: El salario debe ser un número positivo."
         
         try:
-
-            personal_docs = self.db_repo.obtener_todos_los_documentos('usuarios')
-            if not personal_docs:
-                 return "Error: No se pudo leer la lista de personal."
-
-            target_uid = None
-            for uid, datos in personal_docs.items():
-                if datos.get('nombre', '').lower().strip() == nombre.lower().strip():
-                    target_uid = uid
-                    break
-            
-            if not target_uid:
-                return f"Error: No se encontró un usuario registrado con el nombre '{nombre}'."
+            empleado, error = self._resolver_empleado(nombre)
+            if error:
+                return error
+            target_uid = empleado.id
                 
-            # 2. Actualizamos el documento en Firestore
+            # Actualizamos el documento en Firestore
             datos_contrato = {'puesto': puesto.lower(), 'salario': salario}
             exito = self.db_repo.actualizar_documento('usuarios', target_uid, datos_contrato)
             
@@ -80,43 +102,35 @@ class PersonalViewModel:
     def despedir_empleado(self, nombre):
         """
         Elimina permanentemente a un empleado de Firestore Y de Authentication.
+        Primero se le quita el acceso (cuenta deshabilitada y sin rol): si eso
+        falla no se borra nada, para no dejar una cuenta que aún puede entrar.
         """
         if not self.db_repo.is_ready or not self.auth_repo.is_ready:
             return "Error: Los repositorios de datos no están listos."
 
         try:
-
-            personal_docs = self.db_repo.obtener_todos_los_documentos('usuarios')
-            if not personal_docs:
-                    return "Error: No se pudo leer la lista de personal."
-
-            target_uid = None
-            target_email = None
-            
-            for uid, datos in personal_docs.items():
-                if datos.get('nombre', '').lower().strip() == nombre.lower().strip():
-                    target_uid = uid
-                    target_email = datos.get('email', 'N/A')
-                    break
-            
-            if not target_uid:
-                return f"Error: No se encontró un empleado con el nombre '{nombre}'."
+            empleado, error = self._resolver_empleado(nombre)
+            if error:
+                return error
+            target_uid, target_email = empleado.id, empleado.email
 
 
             print(f"Iniciando despido de: {nombre} (UID: {target_uid})...")
 
+            if not self.auth_repo.revocar_acceso(target_uid):
+                return f"Error: No se pudo bloquear el acceso de '{nombre}' en Authentication. No se eliminó nada; intenta de nuevo."
 
             exito_db = self.db_repo.eliminar_documento('usuarios', target_uid)
             
             if not exito_db:
 
-                return f"Error CRÍTICO: Se encontró al empleado, pero no se pudo eliminar de Firestore (DB)."
+                return f"Error CRÍTICO: Se bloqueó el acceso de '{nombre}', pero no se pudo eliminar de Firestore (DB)."
 
             exito_auth = self.auth_repo.eliminar_usuario_auth(target_uid)
 
             if not exito_auth:
      
-                return f"ADVERTENCIA: Empleado '{nombre}' eliminado de Firestore (DB), pero falló la eliminación de Authentication (Login).\nDebe eliminarse manualmente desde la consola de Firebase (Email: {target_email})."
+                return f"ADVERTENCIA: Empleado '{nombre}' eliminado de Firestore (DB), pero falló la eliminación de Authentication (Login).\nSu cuenta quedó deshabilitada y no puede iniciar sesión; debe eliminarse manualmente desde la consola de Firebase (Email: {target_email})."
 
             return f"✅ Despido completado. El empleado '{nombre}' ha sido eliminado de Firestore y de Authentication."
 
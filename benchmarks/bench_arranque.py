@@ -0,0 +1,138 @@
+# benchmarks/bench_arranque.py
+"""
+Benchmark del arranque: cuánto tarda en aparecer el menú de login.
+
+Corre 'main.py' en un directorio temporal con credenciales de prueba (una
+clave RSA generada al vuelo, sin conexión real) y mide el tiempo hasta que
+se imprime el primer "Selecciona una opción". Además muestra el desglose de
+'python -X importtime' de 'import main' con los módulos más costosos.
+
+Uso:
+    python -m benchmarks.bench_arranque
+    python -m benchmarks.bench_arranque --repeticiones 10 --top 15
+    python -m benchmarks.bench_arranque --raiz /ruta/a/otra/copia   # comparar versiones
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_LOGIN = "Selecciona una opción"
+TIMEOUT_SEGUNDOS = 60
+
+
+def _credenciales_de_prueba(ruta: str):
+    """ Escribe un serviceAccountKey.json con formato válido (no sirve para conectarse). """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    clave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = clave.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({
+            'type': 'service_account',
+            'project_id': 'bench-arranque',
+            'private_key_id': 'bench',
+            'private_key': pem,
+            'client_email': 'bench@bench-arranque.iam.gserviceaccount.com',
+            'client_id': '0',
+            'token_uri': 'https://oauth2.googleapis.com/token',
+        }, f)
+
+
+def _entorno(raiz: str) -> dict:
+    entorno = dict(os.environ)
+    entorno['PYTHONPATH'] = raiz
+    entorno['PYTHONUNBUFFERED'] = '1'
+    entorno['GEMINI_API_KEY'] = entorno.get('GEMINI_API_KEY', 'clave-de-prueba')
+    entorno['TERM'] = entorno.get('TERM', 'dumb')
+    return entorno
+
+
+def tiempo_hasta_login(raiz: str, directorio: str) -> float:
+    """ Segundos desde que arranca 'python main.py' hasta que pide la opción de login. """
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(raiz, 'main.py')],
+        cwd=directorio,
+        env=_entorno(raiz),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        leido = b''
+        objetivo = PROMPT_LOGIN.encode('utf-8')
+        while objetivo not in leido:
+            fragmento = proceso.stdout.read1(4096)
+            if not fragmento:
+                raise RuntimeError(f"main.py terminó sin mostrar el login:\n{leido.decode('utf-8', 'replace')}")
+            leido += fragmento
+            if time.perf_counter() - inicio > TIMEOUT_SEGUNDOS:
+                raise RuntimeError("main.py no mostró el login a tiempo.")
+        return time.perf_counter() - inicio
+    finally:
+        proceso.kill()
+        proceso.wait()
+
+
+def desglose_importaciones(raiz: str, directorio: str) -> list[tuple[str, float, float]]:
+    """ [(modulo, propio_ms, acumulado_ms)] de 'import main', según -X importtime. """
+    salida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=directorio,
+        env=_entorno(raiz),
+        capture_output=True,
+        text=True,
+    ).stderr
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, modulo = linea[len('import time:'):].split('|', 2)
+        filas.append((modulo.rstrip(), int(propio) / 1000, int(acumulado) / 1000))
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del arranque hasta el login.")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Módulos más costosos a mostrar.")
+    parser.add_argument('--raiz', default=RAIZ_REPO, help="Copia del proyecto a medir.")
+    args = parser.parse_args(argv)
+    raiz = os.path.abspath(args.raiz)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        _credenciales_de_prueba(os.path.join(directorio, 'serviceAccountKey.json'))
+
+        # Una corrida descartada para calentar la caché de bytecode y del disco.
+        tiempo_hasta_login(raiz, directorio)
+        tiempos = [tiempo_hasta_login(raiz, directorio) * 1000 for _ in range(args.repeticiones)]
+        filas = desglose_importaciones(raiz, directorio)
+
+    print(f"Proyecto: {raiz}")
+    print(f"Tiempo hasta el login: mediana {statistics.median(tiempos):.0f} ms | "
+          f"mín {min(tiempos):.0f} ms | máx {max(tiempos):.0f} ms ({args.repeticiones} corridas)")
+
+    total = next((acumulado for modulo, _, acumulado in filas if modulo.strip() == 'main'), None)
+    if total is not None:
+        print(f"'import main': {total:.0f} ms")
+    print()
+    print(f"{'Módulo (más costosos, acumulado)':<60}{'propio ms':>12}{'acum. ms':>12}")
+    print("-" * 84)
+    for modulo, propio, acumulado in sorted(filas, key=lambda f: f[2], reverse=True)[:args.top]:
+        print(f"{modulo[:59]:<60}{propio:>12.1f}{acumulado:>12.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# benchmarks/bench_async.py
+"""
+Benchmark de los repositorios asíncronos contra los síncronos.
+
+Cada carga toca varias colecciones. La versión síncrona hace las llamadas
+una tras otra, como hoy los ViewModels; la asíncrona las lanza juntas con
+asyncio.gather (acotadas por el cupo de llamadas en curso). Se comparan el
+tiempo, los documentos leídos/escritos y que los resultados sean iguales.
+
+Sin latencia las dos versiones cuestan lo mismo (el Firestore en memoria
+no espera), así que por defecto se simulan 20 ms por RPC.
+
+Uso:
+    python -m benchmarks.bench_async --escala 0.05
+    python -m benchmarks.bench_async --latencia-ms 50 --max-en-curso 4
+    python -m benchmarks.bench_async --filtro Cierre --json salida.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import statistics
+import sys
+import time
+
+from app.backend.firestore_memoria import ClienteFirestoreMemoria
+from app.backend.auth_memoria import AuthMemoria
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.finanzas_repo import FinanzasRepo, TZ_COLOMBIA
+from app.model.data.inventario_repo import InventarioRepo
+from app.model.data.repos_async import (
+    MAX_FINALIZACIONES_EN_CURSO, MAX_LLAMADAS_EN_CURSO, DbRepoAsync, FinanzasRepoAsync, InventarioRepoAsync
+)
+from app.model.domain.pedido import ItemPedido
+
+from benchmarks.bench_repos import MENU, sembrar
+
+# Pedidos que se finalizan en la carga "Cierre de caja".
+PEDIDOS_POR_CIERRE = 40
+# Productos que se buscan en la carga "Búsqueda de productos".
+BUSQUEDAS_POR_CARGA = 20
+# Días que cubre la carga "Reporte mensual".
+DIAS_REPORTE = 30
+
+
+def construir(db, cupo: asyncio.Semaphore) -> dict:
+    """ Repos síncronos sobre el sustituto y sus contrapartes asíncronas (mismo cupo). """
+    db_async = db.asincrono()
+    ctx = {
+        'db_repo': DbRepo(db, True),
+        'finanzas_repo': FinanzasRepo(db, True),
+        'inventario_repo': InventarioRepo(db, True),
+    }
+    ctx['db_async'] = DbRepoAsync(ctx['db_repo'], db_async, cupo)
+    ctx['finanzas_async'] = FinanzasRepoAsync(ctx['finanzas_repo'], db_async, cupo)
+    ctx['inventario_async'] = InventarioRepoAsync(ctx['inventario_repo'], db_async, cupo)
+    return ctx
+
+
+def _pedidos_para_cierre(db, datos: dict, etiqueta: str, cantidad: int) -> list:
+    """ Carga pedidos ACTIVO nuevos (sin contar lecturas) y devuelve los argumentos de finalizar_pedido. """
+    ahora = datetime.datetime.now(TZ_COLOMBIA)
+    cajero = datos['cajeros'][0]
+    pedidos = {}
+    finalizaciones = []
+    for k in range(cantidad):
+        pid = f"CIERRE-{etiqueta}-{k:04d}"
+        items = [{'item_id': str(1 + (k + j) % len(MENU)), 'cantidad': 1 + j} for j in range(2)]
+        total = sum(MENU[it['item_id']]['precio'] * it['cantidad'] for it in items)
+        pedidos[pid] = {
+            'items': items, 'total': total, 'estado': 'ACTIVO',
+            'cajero_uid': cajero, 'fecha_creacion': ahora.isoformat(),
+        }
+        finalizaciones.append((
+            pid, total, cajero, ahora.isoformat(), ahora.date().isoformat(),
+            [ItemPedido(it['item_id'], it['cantidad']) for it in items]
+        ))
+    db.cargar('pedidos', pedidos)
+    return finalizaciones
+
+
+def cargas(ctx: dict, datos: dict, db, max_en_curso: int) -> dict:
+    """
+    Devuelve {'Carga': (preparar(i, modo), sincrona(args), asincrona(args))}.
+    preparar arma los argumentos de la repetición i fuera de la medición.
+    """
+    db_repo, finanzas_repo, inventario_repo = ctx['db_repo'], ctx['finanzas_repo'], ctx['inventario_repo']
+    db_async, finanzas_async, inventario_async = ctx['db_async'], ctx['finanzas_async'], ctx['inventario_async']
+    n_inv = datos['volumenes']['inventario']
+    hoy = datetime.datetime.now(TZ_COLOMBIA)
+    inicio_mes = hoy - datetime.timedelta(days=DIAS_REPORTE)
+    dias = [(hoy - datetime.timedelta(days=d)).date().isoformat() for d in range(DIAS_REPORTE)]
+
+    def sin_argumentos(i, modo):
+        return ()
+
+    def contexto_sync():
+        return (
+            inventario_repo.obtener_resumen_inventario(),
+            finanzas_repo.obtener_resumen_movimientos(),
+            db_repo.obtener_empleados(),
+            db_repo.obtener_pedidos_activos(),
+            finanzas_repo.obtener_resumen_diario(dias[0]),
+        )
+
+    async def contexto_async():
+        return tuple(await asyncio.gather(
+            inventario_async.obtener_resumen_inventario(),
+            finanzas_async.obtener_resumen_movimientos(),
+            db_async.obtener_empleados(),
+            db_async.obtener_pedidos_activos(),
+            finanzas_async.obtener_resumen_diario(dias[0]),
+        ))
+
+    def reporte_sync():
+        return (
+            finanzas_repo.obtener_ingresos_por_rango(inicio_mes, hoy),
+            [finanzas_repo.obtener_resumen_diario(d) for d in dias],
+            finanzas_repo.obtener_resumen_movimientos(),
+        )
+
+    async def reporte_async():
+        ingresos, resumenes, movimientos = await asyncio.gather(
+            finanzas_async.obtener_ingresos_por_rango(inicio_mes, hoy),
+            asyncio.gather(*(finanzas_async.obtener_resumen_diario(d) for d in dias)),
+            finanzas_async.obtener_resumen_movimientos(),
+        )
+        return ingresos, list(resumenes), movimientos
+
+    def nombres(i, modo):
+        paso = max(1, n_inv // BUSQUEDAS_POR_CARGA)
+        return ([f"Producto {(k * paso + i) % n_inv:05d}" for k in range(BUSQUEDAS_POR_CARGA)],)
+
+    def busqueda_sync(lista):
+        return [inventario_repo.buscar_producto_por_nombre(n) for n in lista]
+
+    async def busqueda_async(lista):
+        return list(await asyncio.gather(*(inventario_async.buscar_producto_por_nombre(n) for n in lista)))
+
+    def cierre(i, modo):
+        return (_pedidos_para_cierre(db, datos, f"{modo}-{i}", PEDIDOS_POR_CIERRE),)
+
+    def cierre_sync(finalizaciones):
+        return [db_repo.finalizar_pedido(*f) for f in finalizaciones]
+
+    async def cierre_async(finalizaciones):
+        return await db_async.finalizar_pedidos(finalizaciones, max_en_curso)
+
+    return {
+        'Contexto del asistente (5 consultas, 4 colecciones)': (sin_argumentos, contexto_sync, contexto_async),
+        f'Reporte mensual ({DIAS_REPORTE + 3} lecturas)': (sin_argumentos, reporte_sync, reporte_async),
+        f'Búsqueda de {BUSQUEDAS_POR_CARGA} productos': (nombres, busqueda_sync, busqueda_async),
+        f'Cierre de caja ({PEDIDOS_POR_CIERRE} pedidos)': (cierre, cierre_sync, cierre_async),
+    }
+
+
+def _asentar(db):
+    """ Deja que el listener de pedidos activos procese lo que se cargó al preparar. """
+    time.sleep(3 * db.latencia_ms / 1000.0 + 0.01)
+
+
+def medir(preparar, funcion, db, repeticiones: int, modo: str, loop=None) -> dict:
+    """ Ejecuta una carga varias veces; con loop, funcion es una corrutina. """
+    tiempos = []
+    lecturas = escrituras = llamadas = 0
+    resultado = None
+    for i in range(repeticiones):
+        args = preparar(i, modo)
+        _asentar(db)
+        db.reiniciar_contadores()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            if loop is None:
+                resultado = funcion(*args)
+            else:
+                resultado = loop.run_until_complete(funcion(*args))
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        c = db.contadores()
+        lecturas += c['lecturas']
+        escrituras += c['escrituras']
+        llamadas += c['llamadas']
+    return {
+        'ms_mediana': statistics.median(tiempos),
+        'ms_min': min(tiempos),
+        'lecturas': lecturas / repeticiones,
+        'escrituras': escrituras / repeticiones,
+        'rpcs': llamadas / repeticiones,
+        'resultado': resultado,
+    }
+
+
+def imprimir_tabla(resultados: dict):
+    print(f"{'Carga':<52}{'sync ms':>10}{'async ms':>10}{'x':>7}{'leídos s/a':>16}{'escritos s/a':>16}{'iguales':>9}")
+    print("-" * 120)
+    for nombre, r in resultados.items():
+        s, a = r['sync'], r['async']
+        print(f"{nombre:<52}{s['ms_mediana']:>10.1f}{a['ms_mediana']:>10.1f}{r['aceleracion']:>7.1f}"
+              f"{s['lecturas']:>8.0f}/{a['lecturas']:<7.0f}{s['escrituras']:>8.0f}/{a['escrituras']:<7.0f}"
+              f"{'sí' if r['iguales'] else 'NO':>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de repositorios asíncronos contra síncronos.")
+    parser.add_argument('--escala', type=float, default=0.05, help="Fracción de los volúmenes de producción.")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--latencia-ms', type=float, default=20.0, help="Latencia simulada por RPC.")
+    parser.add_argument('--max-en-curso', type=int, default=MAX_LLAMADAS_EN_CURSO,
+                        help="Llamadas en curso a la vez entre todos los repositorios asíncronos.")
+    parser.add_argument('--filtro', default='', help="Solo cargas cuyo nombre contenga este texto.")
+    parser.add_argument('--json', dest='ruta_json', help="Guarda los resultados en este archivo.")
+    args = parser.parse_args(argv)
+
+    db = ClienteFirestoreMemoria(latencia_ms=args.latencia_ms)
+    auth = AuthMemoria()
+
+    inicio = time.perf_counter()
+    datos = sembrar(db, auth, args.escala)
+    print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s: {datos['volumenes']}")
+    print(f"Latencia por RPC: {args.latencia_ms:g} ms; llamadas en curso: {args.max_en_curso}")
+
+    loop = asyncio.new_event_loop()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx = construir(db, asyncio.Semaphore(args.max_en_curso))
+        max_cierre = min(args.max_en_curso, MAX_FINALIZACIONES_EN_CURSO)
+        tabla = cargas(ctx, datos, db, max_cierre)
+
+        resultados = {}
+        for nombre, (preparar, sincrona, asincrona) in tabla.items():
+            if args.filtro and args.filtro.lower() not in nombre.lower():
+                continue
+            # Una vuelta sin medir: abre el listener de pedidos y carga el menú en caché.
+            with contextlib.redirect_stdout(io.StringIO()):
+                sincrona(*preparar(0, 'previa'))
+            r_sync = medir(preparar, sincrona, db, args.repeticiones, 'sync')
+            r_async = medir(preparar, asincrona, db, args.repeticiones, 'async', loop)
+            resultados[nombre] = {
+                'sync': r_sync,
+                'async': r_async,
+                'aceleracion': r_sync['ms_mediana'] / max(r_async['ms_mediana'], 1e-9),
+                'iguales': r_sync.pop('resultado') == r_async.pop('resultado'),
+            }
+    finally:
+        loop.close()
+
+    print()
+    imprimir_tabla(resultados)
+
+    if args.ruta_json:
+        with open(args.ruta_json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'volumenes': datos['volumenes'], 'latencia_ms': args.latencia_ms,
+                'max_en_curso': args.max_en_curso, 'resultados': resultados,
+            }, f, indent=2)
+        print(f"\nResultados guardados en {args.ruta_json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+# benchmarks/bench_repos.py
+"""
+Benchmark de los repositorios y ViewModels sobre el Firestore en memoria.
+
+Siembra volúmenes de producción (10k productos, 200k pedidos, 50k
+movimientos, 500 usuarios), mide cada método público y cuenta los
+documentos leídos/escritos por llamada.
+
+Uso:
+    python -m benchmarks.bench_repos                   # volúmenes reales
+    python -m benchmarks.bench_repos --escala 0.05     # corrida rápida
+    python -m benchmarks.bench_repos --filtro Inventario --json salida.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import inspect
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from app.backend.firestore_memoria import ClienteFirestoreMemoria
+from app.backend.auth_memoria import AuthMemoria
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.auth_repo import AuthRepo
+from app.model.data.finanzas_repo import FinanzasRepo
+from app.model.data.historial_local import HistorialPedidos
+from app.model.data.inventario_repo import InventarioRepo, CAMPO_NOMBRE_NORM, CAMPO_VALOR_TOTAL
+from app.model.data.indices import normalizar_nombre
+from app.model.data.instrumentacion import ClienteMedido
+from app.model.data.lotes import Escritura
+from app.model.data.resiliencia import ClienteResiliente, ServicioResiliente
+from app.model.domain.finanzas import MovimientoFinanciero
+from app.model.domain.pedido import ItemPedido, Pedido
+
+from app.view_model.auth_vm import AuthViewModel
+from app.view_model.pedidos_vm import PedidosViewModel
+from app.view_model.inventario_vm import InventarioViewModel
+from app.view_model.finanzas_vm import FinanzasViewModel, TZ_COLOMBIA
+from app.view_model.personal_vm import PersonalViewModel
+from app.view_model.ai_vm import AIViewModel
+
+VOLUMENES = {
+    'inventario': 10_000,
+    'pedidos': 200_000,
+    'movimientos': 50_000,
+    'usuarios': 500,
+}
+
+# Claves de construir() que son los clientes sustitutos y no repos ni ViewModels.
+SUSTITUTOS = ('db', 'auth')
+
+ROLES = ['cajero'] * 6 + ['cocinero'] * 3 + ['gerente', 'administrador']
+
+MENU = {
+    str(i): {'nombre': f"Plato {i}", 'precio': round(5 + i * 1.5, 2)}
+    for i in range(1, 31)
+}
+
+
+def _nombre_producto(i: int) -> str:
+    return f"Producto {i:05d}"
+
+
+def _primer_fragmento(en_curso):
+    """ Espera el primer fragmento de una respuesta del asistente y la cancela. """
+    if isinstance(en_curso, str):
+        return en_curso
+    fragmento = next(en_curso.fragmentos(), None)
+    en_curso.cancelar()
+    return fragmento
+
+
+def sembrar(db: ClienteFirestoreMemoria, auth: AuthMemoria, escala: float = 1.0, semilla: int = 42) -> dict:
+    """ Carga datos realistas en los sustitutos y devuelve lo necesario para los casos. """
+    rnd = random.Random(semilla)
+    n = {col: max(1, int(total * escala)) for col, total in VOLUMENES.items()}
+    ahora = datetime.datetime.now(TZ_COLOMBIA)
+
+    inventario = {}
+    for i in range(n['inventario']):
+        cantidad = float(rnd.randint(0, 200))
+        costo = round(rnd.uniform(0.5, 80.0), 2)
+        inventario[f"INV{i:05d}"] = {
+            'nombre': _nombre_producto(i),
+            CAMPO_NOMBRE_NORM: normalizar_nombre(_nombre_producto(i)),
+            'cantidad': cantidad,
+            'costo': costo,
+            CAMPO_VALOR_TOTAL: cantidad * costo,
+        }
+    db.cargar('inventario', inventario)
+
+    # Cada plato consume de 2 a 4 productos del inventario.
+    db.cargar('menu', {
+        k: {**v, 'receta': {
+            f"INV{rnd.randrange(n['inventario']):05d}": round(rnd.uniform(0.05, 0.5), 2)
+            for _ in range(rnd.randint(2, 4))
+        }}
+        for k, v in MENU.items()
+    })
+
+    usuarios = {}
+    cuentas = []
+    for i in range(n['usuarios']):
+        uid = f"UID{i:05d}"
+        rol = ROLES[i % len(ROLES)]
+        nombre = f"Empleado {i:04d}"
+        email = f"empleado{i:04d}@restaurante.test"
+        usuarios[uid] = {
+            'nombre': nombre, 'nombre_norm': normalizar_nombre(nombre), 'rol': rol,
+            'email': email, 'email_norm': email,
+            'salario': float(rnd.randint(1_300_000, 4_000_000)), 'puesto': rol,
+        }
+        cuentas.append((uid, email, nombre, {'rol': rol}))
+    db.cargar('usuarios', usuarios)
+    auth.cargar(cuentas)
+    cajeros = [uid for uid, d in usuarios.items() if d['rol'] == 'cajero'] or list(usuarios)
+
+    pedidos = {}
+    activos = []
+    for i in range(n['pedidos']):
+        pid = f"PED{i:07d}"
+        creado = ahora - datetime.timedelta(minutes=rnd.randint(0, 365 * 24 * 60))
+        items = [
+            {'item_id': rnd.choice(list(MENU)), 'cantidad': rnd.randint(1, 3)}
+            for _ in range(rnd.randint(1, 4))
+        ]
+        total = sum(MENU[it['item_id']]['precio'] * it['cantidad'] for it in items)
+        data = {
+            'items': items,
+            'total': round(total, 2),
+            'estado': 'FINALIZADO',
+            'cajero_uid': rnd.choice(cajeros),
+            'fecha_creacion': creado.isoformat(),
+        }
+        if rnd.random() < 0.02:
+            data['estado'] = 'ACTIVO'
+            activos.append(pid)
+        else:
+            finalizado = creado + datetime.timedelta(minutes=rnd.randint(5, 90))
+            # Parte del historial se guardó como Timestamp y parte como ISO string.
+            data['fecha_finalizacion'] = finalizado if rnd.random() < 0.1 else finalizado.isoformat()
+        pedidos[pid] = data
+    db.cargar('pedidos', pedidos)
+
+    db.cargar('movimientos', {
+        f"MOV-{i:06d}": {
+            'tipo': tipo,
+            'descripcion': f"Movimiento {i}",
+            'monto': monto if tipo == 'ingreso' else -monto,
+            'fecha_hora': (ahora - datetime.timedelta(minutes=rnd.randint(0, 365 * 24 * 60))).isoformat(),
+        }
+        for i in range(n['movimientos'])
+        for tipo, monto in [(rnd.choice(['ingreso', 'egreso']), round(rnd.uniform(1_000, 500_000), 2))]
+    })
+
+    # Estado posterior a las migraciones (app.backend.migraciones).
+    with contextlib.redirect_stdout(io.StringIO()):
+        FinanzasRepo(db, True).reconstruir_resumenes_diarios()
+    db.reiniciar_contadores()
+
+    return {
+        'volumenes': n,
+        'activos': activos,
+        'cajeros': cajeros,
+        'usuarios': usuarios,
+    }
+
+
+def construir(db, auth) -> dict:
+    """ Arma repos y ViewModels igual que main.py, pero sobre los sustitutos. """
+    db_medido = ClienteMedido(ClienteResiliente(db))
+    ctx = {
+        'db_repo': DbRepo(db_medido, True),
+        'auth_repo': AuthRepo(ServicioResiliente(auth), True),
+        'finanzas_repo': FinanzasRepo(db_medido, True),
+        'inventario_repo': InventarioRepo(db_medido, True),
+    }
+    ctx['auth_vm'] = AuthViewModel(ctx['auth_repo'], ctx['db_repo'])
+    ctx['pedidos_vm'] = PedidosViewModel(ctx['db_repo'])
+    ctx['inventario_vm'] = InventarioViewModel(ctx['inventario_repo'])
+    # Historial de pedidos solo en memoria (sin archivo).
+    ctx['historial'] = HistorialPedidos(None)
+    ctx['finanzas_vm'] = FinanzasViewModel(ctx['finanzas_repo'], ctx['historial'])
+    ctx['personal_vm'] = PersonalViewModel(ctx['auth_repo'], ctx['db_repo'])
+    ctx['ai_vm'] = AIViewModel(ctx['inventario_repo'], ctx['finanzas_repo'], ctx['db_repo'])
+    # Los sustitutos, para los casos que simulan fallos (no se buscan métodos sin caso en ellos).
+    ctx['db'] = db
+    ctx['auth'] = auth
+    return ctx
+
+
+def casos(ctx: dict, datos: dict) -> dict:
+    """
+    Devuelve {'Clase.metodo': funcion(i)}. La función recibe el número de
+    repetición para que los casos que escriben no repitan el mismo documento.
+    """
+    db_repo = ctx['db_repo']
+    auth_repo = ctx['auth_repo']
+    finanzas_repo = ctx['finanzas_repo']
+    inventario_repo = ctx['inventario_repo']
+    n_inv = datos['volumenes']['inventario']
+    activos = list(datos['activos'])
+    uids = sorted(datos['usuarios'])
+    uid_ref = uids[0]
+    email_ref = datos['usuarios'][uid_ref]['email']
+    nombre_ref = datos['usuarios'][uid_ref]['nombre']
+    cajero = datos['cajeros'][0]
+
+    def siguiente_activo(i):
+        return activos.pop() if activos else 'NO-EXISTE'
+
+    def _despedible(i):
+        # Cada repetición despide a un empleado distinto, empezando por el final.
+        return datos['usuarios'][uids[-1 - (i % len(uids))]]['nombre']
+
+    def _eliminable(i):
+        return _nombre_producto(n_inv - 1 - i)
+
+    # Archivo de proveedor: la mitad son productos existentes y la mitad nuevos.
+    carpeta = tempfile.mkdtemp(prefix='bench_inventario_')
+    ruta_import = os.path.join(carpeta, 'proveedor.csv')
+    with open(ruta_import, 'w', encoding='utf-8') as f:
+        f.write("nombre,cantidad,costo\n")
+        for k in range(0, 2 * min(n_inv, 250), 2):
+            f.write(f"{_nombre_producto(k)},{k % 40},{2.5 + k % 7}\n")
+    # Repo con cola local de pedidos (SQLite en la carpeta temporal).
+    db_repo_cola = DbRepo(db_repo.db, True, ruta_cola_pedidos=os.path.join(carpeta, 'cola.db'))
+    # Repo sin listener: obtener_pedidos_activos vuelve a la consulta de siempre.
+    db_repo_consulta = DbRepo(db_repo.db, True)
+    db_repo_consulta._tablero_no_disponible = True
+    filas_import = [(_nombre_producto(k), 10.0, 3.0) for k in range(1, 2 * min(n_inv, 250), 2)]
+
+    historial = ctx['historial']
+    hoy = datetime.datetime.now(TZ_COLOMBIA)
+    fin_mes = hoy + datetime.timedelta(days=1)
+    inicio_mes = fin_mes - datetime.timedelta(days=30)
+
+    def historial_al_dia():
+        # Los casos de consulta miden el historial ya sincronizado (la sincronización tiene sus casos).
+        historial.sincronizar(finanzas_repo)
+        return historial
+
+    return {
+        # --- Repositorios ---
+        'DbRepo.obtener_registro_usuario': lambda i: db_repo.obtener_registro_usuario(uid_ref),
+        'DbRepo.crear_registro_usuario': lambda i: db_repo.crear_registro_usuario(f"BENCH{i}", f"bench{i}@x.test", f"Bench {i}", 'cajero'),
+        'DbRepo.obtener_todos_los_documentos': lambda i: db_repo.obtener_todos_los_documentos('usuarios'),
+        'DbRepo.obtener_empleados': lambda i: db_repo.obtener_empleados(),
+        'DbRepo.buscar_usuarios_por_nombre': lambda i: db_repo.buscar_usuarios_por_nombre(nombre_ref),
+        'DbRepo.buscar_usuarios_por_email': lambda i: db_repo.buscar_usuarios_por_email(email_ref),
+        'DbRepo.migrar_indices_usuarios': lambda i: db_repo.migrar_indices_usuarios(),
+        'DbRepo.actualizar_documento': lambda i: db_repo.actualizar_documento('usuarios', uid_ref, {'salario': 2_000_000.0 + i}),
+        'DbRepo.eliminar_documento': lambda i: db_repo.eliminar_documento('usuarios', f"BENCH{i}"),
+        'DbRepo.escribir_en_lote[500 docs]': lambda i: db_repo.escribir_en_lote(
+            (Escritura('set', 'bench_lote', f"L{i}-{k:03d}", {'k': k}) for k in range(500)), ops_por_segundo=None),
+        'DbRepo.obtener_menu': lambda i: db_repo.obtener_menu(),
+        'DbRepo.obtener_precios_menu': lambda i: db_repo.obtener_precios_menu(),
+        'DbRepo.invalidar_cache_menu': lambda i: db_repo.invalidar_cache_menu(),
+        'DbRepo.consumo_de_items': lambda i: db_repo.consumo_de_items([ItemPedido('1', 2), ItemPedido('7', 1)]),
+        'DbRepo.crear_pedido': lambda i: db_repo.crear_pedido(Pedido(None, [ItemPedido('1', 1)], 6.5, 'ACTIVO', cajero)),
+        'DbRepo.crear_pedido[cola local]': lambda i: db_repo_cola.crear_pedido(Pedido(None, [ItemPedido('1', 1)], 6.5, 'ACTIVO', cajero)),
+        'DbRepo.sincronizar_pedidos': lambda i: db_repo_cola.sincronizar_pedidos(),
+        'DbRepo.pedidos_pendientes_de_envio': lambda i: db_repo_cola.pedidos_pendientes_de_envio(),
+        'DbRepo.cerrar': lambda i: db_repo.cerrar(),
+        'DbRepo.obtener_pedidos_activos': lambda i: db_repo.obtener_pedidos_activos(),
+        'DbRepo.obtener_pedidos_activos[consulta]': lambda i: db_repo_consulta.obtener_pedidos_activos(),
+        'DbRepo.tablero_pedidos': lambda i: db_repo.tablero_pedidos(),
+        'DbRepo.obtener_pedido_por_id': lambda i: db_repo.obtener_pedido_por_id('PED0000001'),
+        'DbRepo.finalizar_pedido': lambda i: db_repo.finalizar_pedido(siguiente_activo(i), 25.0, cajero, datetime.datetime.now(TZ_COLOMBIA).isoformat(), datetime.datetime.now(TZ_COLOMBIA).date().isoformat()),
+        'DbRepo.finalizar_pedido[con receta]': lambda i: db_repo.finalizar_pedido(siguiente_activo(i), 25.0, cajero, datetime.datetime.now(TZ_COLOMBIA).isoformat(), datetime.datetime.now(TZ_COLOMBIA).date().isoformat(), items=[ItemPedido('1', 2), ItemPedido('7', 1)]),
+        'DbRepo.actualizar_estado_pedido': lambda i: db_repo.actualizar_estado_pedido('PED0000001', 'FINALIZADO', datetime.datetime.now(TZ_COLOMBIA).isoformat()),
+        'AuthRepo.obtener_perfil': lambda i: auth_repo.obtener_perfil(email_ref),
+        'AuthRepo.invalidar_perfil': lambda i: auth_repo.invalidar_perfil(uid_ref),
+        'AuthRepo.crear_usuario': lambda i: auth_repo.crear_usuario(f"nuevo{i}@x.test", 'secreto123', 'cajero', f"Nuevo {i}"),
+        'AuthRepo.revocar_acceso': lambda i: auth_repo.revocar_acceso(f"NO-EXISTE-{i}"),
+        'AuthRepo.eliminar_usuario_auth': lambda i: auth_repo.eliminar_usuario_auth(f"NO-EXISTE-{i}"),
+        'FinanzasRepo.guardar_movimiento': lambda i: finanzas_repo.guardar_movimiento(MovimientoFinanciero(f"MOV-BENCH-{i}", 'egreso', 'bench', -10.0, datetime.datetime.now(TZ_COLOMBIA).isoformat())),
+        'FinanzasRepo.obtener_todos_los_movimientos': lambda i: finanzas_repo.obtener_todos_los_movimientos(),
+        'FinanzasRepo.obtener_movimientos_paginados': lambda i: finanzas_repo.obtener_movimientos_paginados(),
+        'FinanzasRepo.iterar_movimientos': lambda i: sum(1 for _ in finanzas_repo.iterar_movimientos()),
+        'FinanzasRepo.iterar_movimientos[primera fila]': lambda i: next(finanzas_repo.iterar_movimientos(), None),
+        'FinanzasRepo.obtener_pedidos_para_reporte': lambda i: finanzas_repo.obtener_pedidos_para_reporte(),
+        'FinanzasRepo.obtener_ingresos_por_rango': lambda i: finanzas_repo.obtener_ingresos_por_rango(
+            datetime.datetime.combine(datetime.datetime.now(TZ_COLOMBIA).date(), datetime.time.min, tzinfo=TZ_COLOMBIA),
+            datetime.datetime.combine(datetime.datetime.now(TZ_COLOMBIA).date(), datetime.time.min, tzinfo=TZ_COLOMBIA) + datetime.timedelta(days=1)),
+        'FinanzasRepo.obtener_pedidos_finalizados_desde': lambda i: finanzas_repo.obtener_pedidos_finalizados_desde(inicio_mes),
+        'FinanzasRepo.obtener_resumen_movimientos': lambda i: finanzas_repo.obtener_resumen_movimientos(),
+        'FinanzasRepo.obtener_resumen_diario': lambda i: finanzas_repo.obtener_resumen_diario(datetime.datetime.now(TZ_COLOMBIA).date().isoformat()),
+        'FinanzasRepo.reconstruir_resumenes_diarios': lambda i: finanzas_repo.reconstruir_resumenes_diarios(),
+        'HistorialPedidos.sincronizar[inicial]': lambda i: HistorialPedidos(None).sincronizar(finanzas_repo),
+        'HistorialPedidos.sincronizar': lambda i: historial.sincronizar(finanzas_repo),
+        'HistorialPedidos.sincronizado_hasta': lambda i: historial.sincronizado_hasta(),
+        'HistorialPedidos.resumen[30 días]': lambda i: historial_al_dia().resumen(inicio_mes, fin_mes),
+        'HistorialPedidos.ingresos_por_dia[30 días]': lambda i: historial_al_dia().ingresos_por_dia(inicio_mes, fin_mes),
+        'HistorialPedidos.ingresos_por_cajero[30 días]': lambda i: historial_al_dia().ingresos_por_cajero(inicio_mes, fin_mes),
+        'HistorialPedidos.items_mas_vendidos[30 días]': lambda i: historial_al_dia().items_mas_vendidos(inicio_mes, fin_mes),
+        'InventarioRepo.obtener_todo_inventario': lambda i: inventario_repo.obtener_todo_inventario(),
+        'InventarioRepo.obtener_todo_inventario[1 fallo transitorio]': lambda i: (
+            ctx['db'].simular_fallos(1), inventario_repo.obtener_todo_inventario()),
+        'InventarioRepo.buscar_producto_por_nombre': lambda i: inventario_repo.buscar_producto_por_nombre('Producto 0001'),
+        'InventarioRepo.agregar_o_actualizar_producto_por_nombre': lambda i: inventario_repo.agregar_o_actualizar_producto_por_nombre(_nombre_producto(i), 50 + i, 3.5),
+        'InventarioRepo.ajustar_stock_por_nombre': lambda i: inventario_repo.ajustar_stock_por_nombre('Producto 00003', -1),
+        'InventarioRepo.eliminar_producto_por_nombre': lambda i: inventario_repo.eliminar_producto_por_nombre(_eliminable(i)),
+        'InventarioRepo.migrar_campos_derivados': lambda i: inventario_repo.migrar_campos_derivados(),
+        'InventarioRepo.obtener_resumen_inventario': lambda i: inventario_repo.obtener_resumen_inventario(),
+        'InventarioRepo.obtener_mapa_nombres': lambda i: inventario_repo.obtener_mapa_nombres(),
+        'InventarioRepo.importar_productos': lambda i: inventario_repo.importar_productos(filas_import, ops_por_segundo=None),
+        'InventarioRepo.obtener_productos_paginados': lambda i: inventario_repo.obtener_productos_paginados(),
+        'InventarioRepo.iterar_productos[primera fila]': lambda i: next(inventario_repo.iterar_productos()),
+
+        # --- ViewModels ---
+        'AuthViewModel.intentar_login': lambda i: ctx['auth_vm'].intentar_login(email_ref, 'secreto'),
+        'AuthViewModel.intentar_login[sin caché]': lambda i: (auth_repo.invalidar_perfil(), ctx['auth_vm'].intentar_login(email_ref, 'secreto')),
+        'AuthViewModel.registrar_usuario_y_rol': lambda i: ctx['auth_vm'].registrar_usuario_y_rol(f"vm{i}@x.test", 'secreto123', f"VM {i}", 'cajero'),
+        'AuthViewModel.cerrar_sesion': lambda i: ctx['auth_vm'].cerrar_sesion(),
+        'AuthViewModel.puede_usar': lambda i: ctx['auth_vm'].puede_usar('pedidos'),
+        'AuthViewModel.verificar_rol_acceso': lambda i: ctx['auth_vm'].verificar_rol_acceso(['cajero']),
+        'PedidosViewModel.obtener_menu': lambda i: ctx['pedidos_vm'].obtener_menu(),
+        'PedidosViewModel.crear_pedido': lambda i: ctx['pedidos_vm'].crear_pedido([{'item_id': '1', 'cantidad': 2}, {'item_id': '7', 'cantidad': 1}], cajero),
+        'PedidosViewModel.ver_pedidos_activos': lambda i: ctx['pedidos_vm'].ver_pedidos_activos(),
+        'PedidosViewModel.finalizar_pedido': lambda i: ctx['pedidos_vm'].finalizar_pedido(siguiente_activo(i)),
+        'PedidosViewModel.cancelar_pedido': lambda i: ctx['pedidos_vm'].cancelar_pedido(siguiente_activo(i)),
+        'PedidosViewModel.pantalla_cocina': lambda i: ctx['pedidos_vm'].pantalla_cocina(),
+        'PedidosViewModel.version_pedidos': lambda i: ctx['pedidos_vm'].version_pedidos(),
+        'PedidosViewModel.esperar_cambio_pedidos': lambda i: ctx['pedidos_vm'].esperar_cambio_pedidos(-1, timeout=0),
+        'InventarioViewModel.listar_inventario': lambda i: ctx['inventario_vm'].listar_inventario(),
+        'InventarioViewModel.buscar_producto': lambda i: ctx['inventario_vm'].buscar_producto('Producto 0002'),
+        'InventarioViewModel.agregar_o_actualizar_producto': lambda i: ctx['inventario_vm'].agregar_o_actualizar_producto(_nombre_producto(100 + i), '20', '4.5'),
+        'InventarioViewModel.ajustar_stock': lambda i: ctx['inventario_vm'].ajustar_stock('Producto 00004', '2.5'),
+        'InventarioViewModel.eliminar_producto': lambda i: ctx['inventario_vm'].eliminar_producto(_eliminable(50 + i)),
+        'InventarioViewModel.importar_inventario': lambda i: ctx['inventario_vm'].importar_inventario(ruta_import),
+        'InventarioViewModel.exportar_inventario': lambda i: ctx['inventario_vm'].exportar_inventario(os.path.join(carpeta, f"export{i}.csv")),
+        'FinanzasViewModel.calcular_ingresos_del_dia': lambda i: ctx['finanzas_vm'].calcular_ingresos_del_dia(),
+        'FinanzasViewModel.calcular_ingresos_del_dia[consulta]': lambda i: ctx['finanzas_vm'].calcular_ingresos_del_dia('consulta'),
+        'FinanzasViewModel.obtener_reporte_gastos': lambda i: ctx['finanzas_vm'].obtener_reporte_gastos(),
+        'FinanzasViewModel.iterar_reporte_gastos[primera fila]': lambda i: next(ctx['finanzas_vm'].iterar_reporte_gastos()),
+        'FinanzasViewModel.iterar_reporte_ingresos[7 días]': lambda i: list(ctx['finanzas_vm'].iterar_reporte_ingresos(7)),
+        'FinanzasViewModel.iterar_reporte_ingresos[30 días]': lambda i: list(ctx['finanzas_vm'].iterar_reporte_ingresos(30)),
+        'FinanzasViewModel.registrar_gasto': lambda i: ctx['finanzas_vm'].registrar_gasto('bench', '1.500,50'),
+        'FinanzasViewModel.registrar_movimiento': lambda i: ctx['finanzas_vm'].registrar_movimiento('ingreso', 'bench', '2500'),
+        'PersonalViewModel.listar_personal': lambda i: ctx['personal_vm'].listar_personal(),
+        'PersonalViewModel.contratar_empleado': lambda i: ctx['personal_vm'].contratar_empleado(nombre_ref, 'cajero', 2_100_000.0),
+        'PersonalViewModel.despedir_empleado': lambda i: ctx['personal_vm'].despedir_empleado(_despedible(i)),
+        'AIViewModel._obtener_contexto_inventario': lambda i: ctx['ai_vm']._obtener_contexto_inventario(),
+        'AIViewModel._obtener_contexto_finanzas': lambda i: ctx['ai_vm']._obtener_contexto_finanzas(),
+        'AIViewModel._obtener_contexto_personal': lambda i: ctx['ai_vm']._obtener_contexto_personal(),
+        'AIViewModel.contexto.obtener': lambda i: ctx['ai_vm'].contexto.obtener(),
+        'AIViewModel.contexto.obtener[sin caché]': lambda i: (ctx['ai_vm'].contexto.invalidar(), ctx['ai_vm'].contexto.obtener()),
+        'AIViewModel.obtener_metricas_chat': lambda i: ctx['ai_vm'].obtener_metricas_chat(),
+        'AIViewModel.reiniciar_conversacion': lambda i: ctx['ai_vm'].reiniciar_conversacion(),
+        'AIViewModel.precalentar': lambda i: ctx['ai_vm'].precalentar(),
+        'AIViewModel.preguntar_al_asistente': lambda i: ctx['ai_vm'].preguntar_al_asistente('¿Cuántos productos hay?'),
+        'AIViewModel.iniciar_respuesta[primer fragmento]': lambda i: _primer_fragmento(ctx['ai_vm'].iniciar_respuesta('¿Qué falta en bodega?')),
+    }
+
+
+def metodos_sin_caso(ctx: dict, tabla: dict) -> list[str]:
+    """ Lista los métodos públicos de repos y ViewModels que no tienen caso. """
+    # Las variantes de un caso ('Clase.metodo[variante]') cubren al método.
+    cubiertos = {clave.split('[')[0] for clave in tabla}
+    faltantes = []
+    for clave_ctx, obj in ctx.items():
+        if clave_ctx in SUSTITUTOS:
+            continue
+        clase = type(obj)
+        for nombre, miembro in inspect.getmembers(clase, inspect.isfunction):
+            if nombre.startswith('_'):
+                continue
+            clave = f"{clase.__name__}.{nombre}"
+            if clave not in cubiertos:
+                faltantes.append(clave)
+    return sorted(faltantes)
+
+
+def medir(funcion, db, auth, repeticiones: int) -> dict:
+    """ Ejecuta un caso varias veces y devuelve tiempos y documentos por llamada. """
+    tiempos = []
+    lecturas = escrituras = llamadas = 0
+    for i in range(repeticiones):
+        db.reiniciar_contadores()
+        auth.reiniciar_contadores()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcion(i)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        c = db.contadores()
+        lecturas += c['lecturas']
+        escrituras += c['escrituras']
+        llamadas += c['llamadas'] + auth.llamadas
+    return {
+        'ms_mediana': statistics.median(tiempos),
+        'ms_min': min(tiempos),
+        'lecturas': lecturas / repeticiones,
+        'escrituras': escrituras / repeticiones,
+        'rpcs': llamadas / repeticiones,
+    }
+
+
+def imprimir_tabla(resultados: dict):
+    print(f"{'Caso':<58}{'ms (med)':>10}{'ms (min)':>10}{'leídos':>10}{'escritos':>10}{'RPCs':>7}")
+    print("-" * 105)
+    for nombre, r in resultados.items():
+        print(f"{nombre:<58}{r['ms_mediana']:>10.2f}{r['ms_min']:>10.2f}"
+              f"{r['lecturas']:>10.1f}{r['escrituras']:>10.1f}{r['rpcs']:>7.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de repositorios y ViewModels.")
+    parser.add_argument('--escala', type=float, default=1.0, help="Fracción de los volúmenes de producción.")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--latencia-ms', type=float, default=0.0, help="Latencia simulada por RPC.")
+    parser.add_argument('--filtro', default='', help="Solo casos cuyo nombre contenga este texto.")
+    parser.add_argument('--json', dest='ruta_json', help="Guarda los resultados en este archivo.")
+    args = parser.parse_args(argv)
+
+    db = ClienteFirestoreMemoria(latencia_ms=args.latencia_ms)
+    auth = AuthMemoria(latencia_ms=args.latencia_ms)
+
+    inicio = time.perf_counter()
+    datos = sembrar(db, auth, args.escala)
+    print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s: {datos['volumenes']}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = construir(db, auth)
+    tabla = casos(ctx, datos)
+
+    faltantes = metodos_sin_caso(ctx, tabla)
+    if faltantes:
+        print(f"⚠️ Métodos públicos sin caso de benchmark: {', '.join(faltantes)}")
+
+    resultados = {}
+    for nombre, funcion in tabla.items():
+        if args.filtro and args.filtro.lower() not in nombre.lower():
+            continue
+        resultados[nombre] = medir(funcion, db, auth, args.repeticiones)
+
+    print()
+    imprimir_tabla(resultados)
+
+    if args.ruta_json:
+        with open(args.ruta_json, 'w', encoding='utf-8') as f:
+            json.dump({'volumenes': datos['volumenes'], 'resultados': resultados}, f, indent=2)
+        print(f"\nResultados guardados en {args.ruta_json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+# conftest.py
+"""
+Configuración de pytest. Al estar en la raíz del repositorio, pytest la
+agrega a sys.path y 'import app' funciona sin PYTHONPATH.
+
+Las pruebas corren sobre los sustitutos en memoria de Firestore y de
+Authentication (app/backend/firestore_memoria.py y auth_memoria.py).
+"""
+
+import pytest
+
+from app.backend.auth_memoria import AuthMemoria
+from app.backend.firestore_memoria import ClienteFirestoreMemoria
+
+
+@pytest.fixture
+def db():
+    return ClienteFirestoreMemoria()
+
+
+@pytest.fixture
+def auth():
+    return AuthMemoria()
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 from dotenv import load_dotenv
@@ -11,13 +12,19 @@ load_dotenv()
 # y la estructura es la que se usa abajo. La elimino para simplificar.
 # sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.backend.firebase_init import db, auth_service, is_ready 
+# 'db' y 'auth_service' son clientes diferidos: Firebase se conecta en el
+# primer uso (o en segundo plano con precalentar), no al importar.
+from app.backend.firebase_init import db, auth_service, is_ready, precalentar
 
 # --- Importamos los Repositorios ---
 from app.model.data.db_repo import DbRepo
+from app.model.data.cola_local import RUTA_COLA_POR_DEFECTO
+from app.model.data.historial_local import HistorialPedidos, RUTA_HISTORIAL_POR_DEFECTO
 from app.model.data.auth_repo import AuthRepo 
 from app.model.data.finanzas_repo import FinanzasRepo 
 from app.model.data.inventario_repo import InventarioRepo
+from app.model.data.instrumentacion import ClienteMedido
+from app.model.data.resiliencia import ClienteResiliente, ServicioResiliente
 
 # --- Importamos los ViewModels (Lógica) ---
 from app.view_model.auth_vm import AuthViewModel 
@@ -30,30 +37,116 @@ from app.view_model.ai_vm import AIViewModel # Importar el VM del AI
 # Importamos la Interfaz de Consola (Vista)
 from app.UI.interfaz import InterfazConsola # Aseguramos la minúscula 'ui'
 
-def main():
+# Servicio local: una sola conexión a Firebase para todas las cajas del local.
+from app.backend.servicio_local import (
+    ClienteServicio, ErrorServicio, HOST_POR_DEFECTO, PUERTO_POR_DEFECTO, ServicioLocal, ejecutar_servicio
+)
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(description="Sistema del restaurante (consola).")
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('--servidor', action='store_true',
+                      help="Corre el servicio local que comparten las terminales (sin interfaz).")
+    modo.add_argument('--cliente', action='store_true',
+                      help="Terminal liviana: usa el servicio local en lugar de conectarse a Firebase.")
+    parser.add_argument('--host', default=os.getenv('SERVICIO_LOCAL_HOST', HOST_POR_DEFECTO))
+    parser.add_argument('--puerto', type=int, default=int(os.getenv('SERVICIO_LOCAL_PUERTO', PUERTO_POR_DEFECTO)))
+    return parser.parse_args(argv)
+
+
+def _asistente_de_sesion(ai_vm):
+    """ Asistente para una terminal: conversación propia, caché de contexto compartida. """
+    asistente = AIViewModel(ai_vm.inventario_repo, ai_vm.finanzas_repo, ai_vm.db_repo)
+    asistente.contexto = ai_vm.contexto
+    return asistente
+
+
+def main_cliente(args):
+    """ Terminal liviana: la misma interfaz, con los ViewModels del servicio local. """
+    print(f"Conectando con el servicio local en {args.host}:{args.puerto}...")
+    try:
+        cliente = ClienteServicio(args.host, args.puerto, clave=os.getenv('SERVICIO_LOCAL_CLAVE'))
+    except (OSError, ErrorServicio) as e:
+        print(f"\n❌ ERROR: No se pudo conectar con el servicio local: {e}")
+        return
+
+    try:
+        ui = InterfazConsola(
+            cliente.vista('auth'),
+            cliente.vista('pedidos'),
+            cliente.vista('inventario'),
+            cliente.vista('finanzas'),
+            cliente.vista('personal'),
+            cliente.vista('ai'),
+            fuente_estadisticas=cliente.estadisticas
+        )
+        if not ui.ai_vm.is_ready:
+            print("⚠️ ADVERTENCIA: Asistente AI no disponible en el servicio local.")
+        ui.mostrar_menu_inicio()
+    except (OSError, ErrorServicio) as e:
+        print(f"\nERROR: Se perdió la conexión con el servicio local: {e}")
+    finally:
+        cliente.cerrar()
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    if args.cliente:
+        return main_cliente(args)
+
     print("Iniciando la aplicación...")
 
     if not is_ready:
-        print("\n❌ ERROR CRÍTICO: Firebase no se inicializó correctamente.")
+        print("\n❌ ERROR CRÍTICO: No se encontraron las credenciales de Firebase (serviceAccountKey.json).")
         return
 
+    db_repo = None
     try:
         # 1. Creamos los Repositorios (Conexión a Datos)
-        db_repo = DbRepo(db, is_ready)
-        auth_repo = AuthRepo(auth_service, is_ready)
-        finanzas_repo = FinanzasRepo(db, is_ready) 
-        inventario_repo = InventarioRepo(db, is_ready) 
+        # Los repositorios reciben el cliente medido: cada método anota sus lecturas y escrituras.
+        # Debajo, cada llamada a Firebase tiene reintentos, plazo y cortacircuito.
+        db_medido = ClienteMedido(ClienteResiliente(db))
+        # Los pedidos se guardan primero en una cola local (SQLite) y se suben en segundo plano.
+        db_repo = DbRepo(db_medido, is_ready, ruta_cola_pedidos=RUTA_COLA_POR_DEFECTO)
+        auth_repo = AuthRepo(ServicioResiliente(auth_service), is_ready)
+        finanzas_repo = FinanzasRepo(db_medido, is_ready) 
+        inventario_repo = InventarioRepo(db_medido, is_ready) 
 
         # 2. Creamos los ViewModels (Lógica de Negocio)
         auth_vm = AuthViewModel(auth_repo, db_repo)
         pedidos_vm = PedidosViewModel(db_repo) 
         inventario_vm = InventarioViewModel(inventario_repo) 
-        finanzas_vm = FinanzasViewModel(finanzas_repo) 
+        # Los reportes por período se calculan sobre un historial local de pedidos finalizados.
+        finanzas_vm = FinanzasViewModel(finanzas_repo, HistorialPedidos(RUTA_HISTORIAL_POR_DEFECTO))
         personal_vm = PersonalViewModel(auth_repo, db_repo) 
         
         # Pasamos TODOS los repos de contexto al AI
         ai_vm = AIViewModel(inventario_repo, finanzas_repo, db_repo) 
 
+        if args.servidor:
+            # auth y ai guardan la sesión y la conversación: uno por terminal conectada.
+            try:
+                servicio = ServicioLocal(
+                    compartidos={
+                        'pedidos': pedidos_vm,
+                        'inventario': inventario_vm,
+                        'finanzas': finanzas_vm,
+                        'personal': personal_vm,
+                    },
+                    por_sesion={
+                        'auth': lambda: AuthViewModel(auth_repo, db_repo),
+                        'ai': lambda: _asistente_de_sesion(ai_vm),
+                    },
+                    host=args.host, puerto=args.puerto, clave=os.getenv('SERVICIO_LOCAL_CLAVE')
+                )
+            except ErrorServicio as e:
+                print(f"\n❌ ERROR: {e} (SERVICIO_LOCAL_CLAVE en .env)")
+                return
+            precalentar()
+            ejecutar_servicio(servicio)
+            return
+
         # 3. Creamos la Interfaz de Usuario (View)
         # Notar que InterfazConsola ahora recibe 6 argumentos, lo cual es la corrección al error inicial.
         ui = InterfazConsola(
@@ -65,7 +158,8 @@ def main():
             ai_vm # Pasamos el nuevo VM
         )
 
-        print("Conexión a Firebase exitosa.")
+        # La conexión se abre mientras el usuario escribe su login.
+        precalentar()
         
         # Aviso si el AI no se conectó
         if not ai_vm.is_ready:
@@ -79,5 +173,11 @@ def main():
         print(f"\nERROR FATAL AL INICIAR: No se pudo iniciar la aplicación.")
         print(f"Detalle: {e}")
 
+    finally:
+        if db_repo is not None:
+            quedan = db_repo.cerrar()
+            if quedan:
+                print(f"⚠️ {quedan} pedidos quedaron guardados en este equipo; se subirán al volver a abrir la aplicación.")
+
 if __name__ == "__main__":
     main()
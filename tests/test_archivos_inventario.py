@@ -0,0 +1,107 @@
+# tests/test_archivos_inventario.py
+import pytest
+
+from app.model.data import archivos_inventario
+from app.model.data.archivos_inventario import FilaInvalida, _numero, escribir_productos, leer_productos
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('1500', 1500.0),
+    ('1500.5', 1500.5),
+    ('1500,5', 1500.5),
+    ('1.500,50', 1500.5),
+    ('1,500.50', 1500.5),
+    ('1.500.000', 1500000.0),
+    ('1,500,000', 1500000.0),
+    ('$ 2.000,25', 2000.25),
+    ('-3,5', -3.5),
+    ('0.125', 0.125),
+    ('.5', 0.5),
+    (7, 7.0),
+])
+def test_numero_acepta_formatos(texto, esperado):
+    assert _numero(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', [
+    '1.500',        # ¿miles o decimal?
+    '1,500',
+    '1.50.0',
+    '1.500,5.0',
+    '12,34,567',
+    'abc',
+    '',
+    'nan',
+    'inf',
+    '1e400',
+])
+def test_numero_rechaza_ambiguos_e_invalidos(texto):
+    with pytest.raises(ValueError):
+        _numero(texto)
+
+
+def test_csv_exportado_se_vuelve_a_leer_igual(tmp_path):
+    ruta = str(tmp_path / 'inventario.csv')
+    productos = [
+        {'nombre': 'Harina', 'cantidad': 1.125, 'costo': 2500.0, 'valor_total': 2812.5},
+        {'nombre': 'Sal', 'cantidad': 3, 'costo': 0.5, 'valor_total': 1.5},
+    ]
+    assert escribir_productos(ruta, productos) == 2
+
+    leidos = [fila for _, fila in leer_productos(ruta)]
+    assert leidos == [('Harina', 1.125, 2500.0), ('Sal', 3.0, 0.5)]
+
+
+def test_exportacion_fallida_no_toca_el_archivo(tmp_path):
+    ruta = tmp_path / 'inventario.jsonl'
+    ruta.write_text('anterior\n', encoding='utf-8')
+
+    def productos():
+        yield {'nombre': 'Harina', 'cantidad': 1, 'costo': 1, 'valor_total': 1}
+        raise RuntimeError('página perdida')
+
+    with pytest.raises(RuntimeError):
+        escribir_productos(str(ruta), productos())
+    assert ruta.read_text(encoding='utf-8') == 'anterior\n'
+    assert not (tmp_path / 'inventario.jsonl.tmp').exists()
+
+
+@pytest.mark.parametrize('tam_bloque', [1, 7, 64 * 1024])
+def test_json_se_lee_por_bloques(tmp_path, monkeypatch, tam_bloque):
+    monkeypatch.setattr(archivos_inventario, '_TAM_BLOQUE_JSON', tam_bloque)
+    ruta = str(tmp_path / 'inventario.json')
+    productos = [
+        {'nombre': f'Insumo "{i}" ñ', 'cantidad': i + 0.5, 'costo': 1000.0 * i, 'valor_total': 0.0}
+        for i in range(20)
+    ]
+    assert escribir_productos(ruta, productos) == 20
+
+    leidos = list(leer_productos(ruta))
+    assert leidos == [(i + 1, (f'Insumo "{i}" ñ', i + 0.5, 1000.0 * i)) for i in range(20)]
+
+
+def test_json_que_no_es_arreglo_se_rechaza(tmp_path):
+    ruta = tmp_path / 'inventario.json'
+    ruta.write_text('{"nombre": "Sal"}', encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        list(leer_productos(str(ruta)))
+
+
+def test_filas_invalidas_se_reportan_sin_detener_la_lectura(tmp_path):
+    ruta = tmp_path / 'inventario.jsonl'
+    ruta.write_text(
+        '{"nombre": "Sal", "cantidad": "2"}\n'
+        '{"nombre": "Azúcar", "cantidad": "mucho"}\n'
+        '\n'
+        'no es json\n'
+        '{"cantidad": 1}\n'
+        '{"producto": "Harina", "qty": "1.500,5", "precio": 3}\n',
+        encoding='utf-8'
+    )
+
+    leidos = list(leer_productos(str(ruta)))
+    assert [linea for linea, fila in leidos if isinstance(fila, FilaInvalida)] == [2, 4, 5]
+    assert [fila for _, fila in leidos if not isinstance(fila, FilaInvalida)] == [
+        ('Sal', 2.0, 0.0), ('Harina', 1500.5, 3.0),
+    ]
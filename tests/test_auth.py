@@ -0,0 +1,69 @@
+# tests/test_auth.py
+import pytest
+
+from app.model.data.auth_repo import AuthRepo
+from app.model.data.db_repo import DbRepo
+from app.view_model.auth_vm import AuthViewModel
+from app.view_model.personal_vm import PersonalViewModel
+
+
+@pytest.fixture
+def repos(db, auth):
+    db_repo = DbRepo(db, True)
+    yield AuthRepo(auth, True), db_repo
+    db_repo.cerrar()
+
+
+@pytest.fixture
+def ana(repos):
+    auth_repo, db_repo = repos
+    AuthViewModel(auth_repo, db_repo).registrar_usuario_y_rol('ana@local.com', 'secreto1', 'Ana', 'cajero')
+    return 'ana@local.com'
+
+
+def _falla(*args, **kwargs):
+    raise RuntimeError('Authentication no disponible')
+
+
+def test_login_con_claims_no_lee_firestore(repos, ana, db):
+    auth_repo, db_repo = repos
+    vm = AuthViewModel(auth_repo, db_repo)
+    db.reiniciar_contadores()
+
+    assert vm.intentar_login(ana, 'secreto1').startswith('Login exitoso')
+    assert vm.usuario_actual.rol == 'cajero'
+    assert db.lecturas == 0
+    assert vm.puede_usar('pedidos')
+    assert not vm.puede_usar('finanzas')
+
+
+def test_cuenta_antigua_sin_claims_usa_su_documento(repos, auth, db):
+    auth_repo, db_repo = repos
+    auth.cargar([('U1', 'luis@local.com', None, None)])
+    db.cargar('usuarios', {'U1': {'rol': 'cocinero', 'nombre': 'Luis'}})
+    vm = AuthViewModel(auth_repo, db_repo)
+
+    assert vm.intentar_login('luis@local.com', 'secreto1').startswith('Login exitoso')
+    assert (vm.usuario_actual.rol, vm.usuario_actual.nombre) == ('cocinero', 'Luis')
+
+
+def test_login_rechazado_tras_despido_aunque_falle_borrar_en_auth(repos, ana, auth):
+    auth_repo, db_repo = repos
+    # El perfil queda en caché, como en la terminal donde ya inició sesión.
+    assert AuthViewModel(auth_repo, db_repo).intentar_login(ana, 'secreto1').startswith('Login exitoso')
+
+    auth.delete_user = _falla
+    assert PersonalViewModel(auth_repo, db_repo).despedir_empleado('Ana').startswith('ADVERTENCIA')
+
+    vm = AuthViewModel(auth_repo, db_repo)
+    assert vm.intentar_login(ana, 'secreto1').startswith('Error')
+    assert vm.usuario_actual is None
+
+
+def test_despido_no_borra_nada_si_no_se_pudo_bloquear_el_acceso(repos, ana, auth, db):
+    auth_repo, db_repo = repos
+    auth.update_user = _falla
+
+    assert PersonalViewModel(auth_repo, db_repo).despedir_empleado('Ana').startswith('Error')
+    assert db.tamano('usuarios') == 1
+    assert AuthViewModel(auth_repo, db_repo).intentar_login(ana, 'secreto1').startswith('Login exitoso')
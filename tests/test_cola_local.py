@@ -0,0 +1,64 @@
+# tests/test_cola_local.py
+import pytest
+from google.api_core import exceptions as gexc
+
+from app.model.data import lotes
+from app.model.data.cola_local import ColaLocal
+from app.model.data.db_repo import DbRepo
+
+PEDIDO = {'estado': 'ACTIVO', 'total': 10.0, 'items': [], 'cajero_uid': 'cajero1'}
+
+
+@pytest.fixture
+def cola(db, tmp_path):
+    # Sin iniciar() no hay hilo de envío: cada prueba decide cuándo se sube.
+    cola = ColaLocal(str(tmp_path / 'cola.db'), DbRepo(db, True)._enviar_pendientes)
+    yield cola
+    cola.cerrar(intentar_envio=False)
+
+
+def test_vaciar_sube_y_borra_de_la_cola(db, cola):
+    cola.encolar('pedidos', 'P1', PEDIDO)
+    cola.encolar('pedidos', 'P2', PEDIDO)
+    assert cola.obtener('P1') == PEDIDO
+
+    assert cola.vaciar() == 0
+    assert len(cola) == 0
+    assert db.collection('pedidos').document('P1').get().exists
+
+
+def test_documento_ya_subido_cuenta_como_confirmado(db, cola):
+    db.cargar('pedidos', {'P1': dict(PEDIDO)})
+    cola.encolar('pedidos', 'P1', PEDIDO)
+    cola.encolar('pedidos', 'P2', PEDIDO)
+
+    assert cola.vaciar() == 0
+    assert db.tamano('pedidos') == 2
+
+
+@pytest.mark.parametrize('error', [gexc.Aborted, gexc.ServiceUnavailable, gexc.DeadlineExceeded])
+def test_envio_fallido_queda_en_la_cola(db, cola, error, monkeypatch):
+    monkeypatch.setattr(lotes, 'ESPERA_LOTE_INICIAL_SEGUNDOS', 0.0)
+    cola.encolar('pedidos', 'P1', PEDIDO)
+    # Un lote abortado se reintenta entero antes de darse por fallido.
+    db.simular_fallos(lotes.REINTENTOS_LOTE + 1 if error is gexc.Aborted else 1, error)
+
+    assert cola.vaciar() == 1
+    assert 'P1' in cola
+    assert not db.collection('pedidos').document('P1').get().exists
+
+    assert cola.vaciar() == 0
+    assert db.collection('pedidos').document('P1').get().exists
+
+
+def test_pendientes_sobreviven_al_reinicio(db, tmp_path):
+    ruta = str(tmp_path / 'cola.db')
+    cola = ColaLocal(ruta, DbRepo(db, True)._enviar_pendientes)
+    cola.encolar('pedidos', 'P1', PEDIDO)
+    assert cola.cerrar(intentar_envio=False) == 1
+
+    repo = DbRepo(db, True, ruta_cola_pedidos=ruta)
+    assert repo.sincronizar_pedidos() == 0
+    assert repo.cerrar() == 0
+    assert db.collection('pedidos').document('P1').get().exists
+
@@ -0,0 +1,73 @@
+# tests/test_finanzas.py
+import datetime
+
+import pytest
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.finanzas_repo import TZ_COLOMBIA, FinanzasRepo
+from app.model.data.resiliencia import MENSAJE_SIN_CONEXION
+from app.view_model.finanzas_vm import FinanzasViewModel
+
+
+@pytest.fixture
+def vm(db):
+    return FinanzasViewModel(FinanzasRepo(db, True))
+
+
+def _hoy(horas: int) -> datetime.datetime:
+    hoy = datetime.datetime.now(TZ_COLOMBIA).date()
+    return datetime.datetime.combine(hoy, datetime.time(horas), tzinfo=TZ_COLOMBIA)
+
+
+def test_ingresos_del_dia_por_consulta(db, vm):
+    db.cargar('pedidos', {
+        'P1': {'estado': 'FINALIZADO', 'total': 10.0, 'fecha_finalizacion': _hoy(9)},
+        'P2': {'estado': 'FINALIZADO', 'total': 5.5, 'fecha_finalizacion': _hoy(10).isoformat()},
+        'P3': {'estado': 'FINALIZADO', 'total': None, 'fecha_finalizacion': _hoy(11)},
+        'P4': {'estado': 'ACTIVO', 'total': 99.0, 'fecha_finalizacion': _hoy(12)},
+    })
+    assert '$15.50' in vm.calcular_ingresos_del_dia(motor='consulta')
+
+
+def test_dia_sin_pedidos(vm):
+    assert vm.calcular_ingresos_del_dia(motor='consulta').startswith('No se registraron ingresos')
+
+
+def test_fallo_de_lectura_no_se_reporta_como_dia_sin_ingresos(db, vm):
+    db.simular_fallos(1)
+    assert vm.finanzas_repo.obtener_ingresos_por_rango(_hoy(0), _hoy(23)) is None
+
+    db.simular_fallos(1)
+    assert vm.calcular_ingresos_del_dia(motor='consulta') == MENSAJE_SIN_CONEXION
+
+
+def test_reconstruir_resumenes_coincide_con_los_incrementos(db):
+    db.cargar('pedidos', {
+        'P1': {'estado': 'ACTIVO', 'total': 10.0, 'items': [], 'cajero_uid': 'c1'},
+        'P2': {'estado': 'ACTIVO', 'total': 4.5, 'items': [], 'cajero_uid': 'c2'},
+    })
+    db_repo = DbRepo(db, True)
+    try:
+        assert db_repo.finalizar_pedido('P1', 10.0, 'c1', '2026-01-01T12:00:00-05:00', '2026-01-01')
+        assert db_repo.finalizar_pedido('P2', 4.5, 'c2', '2026-01-01T13:00:00-05:00', '2026-01-01')
+    finally:
+        db_repo.cerrar()
+    repo = FinanzasRepo(db, True)
+    incremental = repo.obtener_resumen_diario('2026-01-01')
+
+    db.collection('resumen_diario').document('2026-01-01').delete()
+    assert repo.reconstruir_resumenes_diarios() == 1
+    assert repo.obtener_resumen_diario('2026-01-01') == incremental == {
+        'ingresos': 14.5, 'pedidos': 2,
+        'por_cajero': {'c1': {'ingresos': 10.0, 'pedidos': 1}, 'c2': {'ingresos': 4.5, 'pedidos': 1}},
+    }
+
+
+def test_ingresos_del_dia_por_resumen_es_una_lectura(db, vm):
+    hoy = datetime.datetime.now(TZ_COLOMBIA).date().isoformat()
+    db.cargar('resumen_diario', {hoy: {'ingresos': 42.0, 'pedidos': 3, 'por_cajero': {}}})
+    db.reiniciar_contadores()
+
+    assert '$42.00' in vm.calcular_ingresos_del_dia()
+    assert db.lecturas == 1
+    assert vm.finanzas_repo.obtener_resumen_diario('2000-01-01') == {}
@@ -0,0 +1,104 @@
+# tests/test_historial_local.py
+import datetime
+
+from app.model.data.finanzas_repo import TZ_COLOMBIA, FinanzasRepo
+from app.model.data.historial_local import HistorialPedidos
+
+UTC = datetime.timezone.utc
+
+
+def _pedido(fecha) -> dict:
+    return {'estado': 'FINALIZADO', 'total': 10.0, 'cajero_uid': 'cajero1', 'fecha_finalizacion': fecha,
+            'items': [{'item_id': '1', 'cantidad': 1}]}
+
+
+def _por_timestamp(n: int, desde: int = 0) -> dict:
+    base = datetime.datetime(2026, 1, 1, 12, tzinfo=UTC)
+    return {f'T{i:03d}': _pedido(base + datetime.timedelta(minutes=i)) for i in range(desde, desde + n)}
+
+
+def _por_texto(n: int, desde: int = 0) -> dict:
+    base = datetime.datetime(2026, 1, 2, 12, tzinfo=UTC)
+    return {f'S{i:03d}': _pedido((base + datetime.timedelta(minutes=i)).isoformat()) for i in range(desde, desde + n)}
+
+
+def test_sincronizar_trae_solo_lo_nuevo(db):
+    db.cargar('pedidos', {**_por_timestamp(30), **_por_texto(20)})
+    repo = FinanzasRepo(db, True)
+    historial = HistorialPedidos(ruta=None)
+
+    assert historial.sincronizar(repo, tam_pagina=7) == 50
+    # El margen vuelve a leer los últimos pedidos, pero no se repiten.
+    assert historial.sincronizar(repo, tam_pagina=7) == 0
+    assert len(historial) == 50
+
+    db.cargar('pedidos', {**_por_timestamp(3, desde=30), **_por_texto(2, desde=20)})
+    assert historial.sincronizar(repo, tam_pagina=7) == 5
+    assert len(historial) == 55
+
+
+def test_sincronizar_lee_desde_la_marca_de_agua(db):
+    db.cargar('pedidos', _por_timestamp(200))
+    repo = FinanzasRepo(db, True)
+    historial = HistorialPedidos(ruta=None)
+    historial.sincronizar(repo, tam_pagina=50)
+
+    db.cargar('pedidos', _por_timestamp(1, desde=200))
+    db.reiniciar_contadores()
+    assert historial.sincronizar(repo, tam_pagina=50) == 1
+    # Solo el margen de 15 minutos antes de la marca, no los 200 pedidos.
+    assert db.lecturas <= 20
+
+
+def test_sincronizar_fallida_retorna_menos_uno_y_se_recupera(db):
+    db.cargar('pedidos', _por_timestamp(30))
+    repo = FinanzasRepo(db, True)
+    historial = HistorialPedidos(ruta=None)
+
+    db.simular_fallos(1)
+    assert historial.sincronizar(repo, tam_pagina=10) == -1
+    assert historial.sincronizar(repo, tam_pagina=10) == 30
+    assert len(historial) == 30
+
+
+def test_sincronizar_persiste_en_disco(db, tmp_path):
+    db.cargar('pedidos', _por_timestamp(12))
+    repo = FinanzasRepo(db, True)
+    ruta = str(tmp_path / 'historial.bin')
+    assert HistorialPedidos(ruta).sincronizar(repo) == 12
+
+    recargado = HistorialPedidos(ruta)
+    assert len(recargado) == 12
+    assert recargado.sincronizar(repo) == 0
+
+
+def test_consultas_por_periodo(db):
+    def pedido(dia, hora, total, cajero, items):
+        fecha = datetime.datetime(2026, 3, dia, hora, tzinfo=TZ_COLOMBIA)
+        return {'estado': 'FINALIZADO', 'total': total, 'cajero_uid': cajero, 'fecha_finalizacion': fecha,
+                'items': [{'item_id': item_id, 'cantidad': cantidad} for item_id, cantidad in items]}
+
+    db.cargar('pedidos', {
+        'A': pedido(1, 8, 10.0, 'ana', [('1', 2)]),
+        'B': pedido(1, 23, 5.0, 'luis', [('2', 1), ('1', 1)]),
+        'C': pedido(2, 0, 20.0, 'ana', [('3', 4)]),
+        'D': pedido(4, 12, 7.0, 'luis', [('2', 3)]),
+    })
+    historial = HistorialPedidos(ruta=None)
+    assert historial.sincronizar(FinanzasRepo(db, True)) == 4
+
+    inicio = datetime.datetime(2026, 3, 1, tzinfo=TZ_COLOMBIA)
+    fin = datetime.datetime(2026, 3, 3, tzinfo=TZ_COLOMBIA)
+    # Del 1 al 3 de marzo (fin excluido): A, B y C, agrupados por día en hora de Colombia.
+    assert historial.resumen(inicio, fin) == {'pedidos': 3, 'ingresos': 35.0, 'ticket_promedio': 35.0 / 3}
+    assert historial.ingresos_por_dia(inicio, fin) == [
+        (datetime.date(2026, 3, 1), 15.0, 2), (datetime.date(2026, 3, 2), 20.0, 1),
+    ]
+    assert historial.ingresos_por_cajero(inicio, fin) == [('ana', 30.0, 2), ('luis', 5.0, 1)]
+    assert historial.items_mas_vendidos(inicio, fin) == [('3', 4), ('1', 3), ('2', 1)]
+    assert historial.items_mas_vendidos(inicio, fin, top=1) == [('3', 4)]
+
+    vacio = datetime.datetime(2026, 3, 3, tzinfo=TZ_COLOMBIA), datetime.datetime(2026, 3, 4, tzinfo=TZ_COLOMBIA)
+    assert historial.resumen(*vacio) == {'pedidos': 0, 'ingresos': 0.0, 'ticket_promedio': 0.0}
+    assert historial.ingresos_por_dia(*vacio) == historial.ingresos_por_cajero(*vacio) == []
+    assert historial.items_mas_vendidos(*vacio) == []
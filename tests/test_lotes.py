@@ -0,0 +1,88 @@
+# tests/test_lotes.py
+import pytest
+from google.api_core import exceptions as gexc
+
+from app.backend.firestore_memoria import LoteMemoria
+from app.model.data import lotes
+from app.model.data.lotes import Escritura, _Regulador, escribir_en_lotes
+
+
+@pytest.fixture
+def commits(monkeypatch):
+    """ Cuenta los commits intentados (también los que fallan) y quita las esperas entre reintentos. """
+    monkeypatch.setattr(lotes, 'ESPERA_LOTE_INICIAL_SEGUNDOS', 0.0)
+    intentos = []
+    commit = LoteMemoria.commit
+
+    def contar(self, **kwargs):
+        intentos.append(len(self._ops))
+        return commit(self, **kwargs)
+    monkeypatch.setattr(LoteMemoria, 'commit', contar)
+    return intentos
+
+
+def _sets(n: int):
+    return (Escritura('set', 'productos', f'P{i:03d}', {'cantidad': i}) for i in range(n))
+
+
+def test_agrupa_en_lotes_de_tam_lote(db, commits):
+    resultado = escribir_en_lotes(db, _sets(1200), ops_por_segundo=None)
+
+    assert resultado.ok and resultado.escritas == 1200
+    assert commits == [500, 500, 200]
+    assert resultado.ids is None
+
+
+def test_error_de_documento_parte_el_lote_y_aisla_los_fallidos(db, commits):
+    db.cargar('productos', {f'P{i:03d}': {'cantidad': 0} for i in range(8) if i != 5})
+    operaciones = [Escritura('update', 'productos', f'P{i:03d}', {'cantidad': 1}) for i in range(8)]
+
+    resultado = escribir_en_lotes(db, operaciones, ops_por_segundo=None)
+
+    assert [f['doc_id'] for f in resultado.fallidas] == ['P005']
+    assert isinstance(resultado.fallidas[0]['excepcion'], gexc.NotFound)
+    assert resultado.escritas == 7
+    # 8 → 4+4 → 2+2 → 1+1: siete commits, no uno por documento.
+    assert len(commits) == 7
+
+
+@pytest.mark.parametrize('error', [gexc.ResourceExhausted, gexc.TooManyRequests, gexc.Aborted])
+def test_cuota_o_contencion_reintenta_el_lote_entero(db, commits, error):
+    db.simular_fallos(2, error)
+
+    resultado = escribir_en_lotes(db, _sets(500), ops_por_segundo=None)
+
+    assert resultado.ok and resultado.escritas == 500 and resultado.lotes == 1
+    assert commits == [500, 500, 500]
+
+
+def test_cuota_persistente_no_parte_el_lote(db, commits):
+    db.simular_fallos(lotes.REINTENTOS_LOTE + 1, gexc.ResourceExhausted)
+
+    resultado = escribir_en_lotes(db, _sets(500), ops_por_segundo=None)
+
+    assert len(resultado.fallidas) == 500 and resultado.escritas == 0
+    assert commits == [500] * (lotes.REINTENTOS_LOTE + 1)
+
+
+def test_error_de_red_no_parte_el_lote(db, commits):
+    db.simular_fallos(1, gexc.ServiceUnavailable)
+
+    resultado = escribir_en_lotes(db, _sets(10), ops_por_segundo=None)
+
+    assert len(resultado.fallidas) == 10
+    assert commits == [10]
+
+
+def test_guardar_ids_es_opcional(db):
+    resultado = escribir_en_lotes(db, (Escritura('create', 'x', None, {'a': i}) for i in range(3)),
+                                  ops_por_segundo=None, guardar_ids=True)
+    assert len(resultado.ids) == 3
+    assert all(db.collection('x').document(doc_id).get().exists for doc_id in resultado.ids)
+
+
+def test_regulador_frena_a_la_mitad():
+    regulador = _Regulador(500)
+    regulador.frenar()
+    assert regulador.ritmo == 250
+    _Regulador(None).frenar()  # sin control de ritmo no hace nada
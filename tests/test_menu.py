@@ -0,0 +1,87 @@
+# tests/test_menu.py
+import pytest
+
+from app.model.data.db_repo import DbRepo
+from app.model.domain.pedido import ItemPedido
+from app.view_model.pedidos_vm import PedidosViewModel
+
+MENU = {
+    '1': {'nombre': 'Arepa', 'precio': 5.0},
+    '2': {'nombre': 'Jugo', 'precio': '2.5'},
+    '3': {'nombre': 'Sin precio'},
+}
+
+
+def _menu():
+    # cargar() guarda los mismos dicts: cada prueba usa su copia.
+    return {item_id: dict(datos) for item_id, datos in MENU.items()}
+
+
+@pytest.fixture
+def repo(db):
+    repo = DbRepo(db, True)
+    yield repo
+    repo.cerrar()
+
+
+def test_precios_salen_de_la_cache(db, repo):
+    db.cargar('menu', _menu())
+    assert repo.obtener_precios_menu() == {'1': 5.0, '2': 2.5}
+
+    db.reiniciar_contadores()
+    for _ in range(5):
+        repo.obtener_precios_menu()
+        repo.obtener_menu()
+    assert db.lecturas == 0
+
+
+def test_invalidar_vuelve_a_leer(db, repo):
+    db.cargar('menu', _menu())
+    repo.obtener_precios_menu()
+    db.cargar('menu', {'1': {'nombre': 'Arepa', 'precio': 6.0}})
+    assert repo.obtener_precios_menu()['1'] == 5.0
+
+    repo.invalidar_cache_menu()
+    assert repo.obtener_precios_menu()['1'] == 6.0
+
+
+def test_escribir_en_el_menu_invalida_la_cache(db, repo):
+    db.cargar('menu', _menu())
+    repo.obtener_precios_menu()
+
+    assert repo.actualizar_documento('menu', '1', {'precio': 7.0})
+    assert repo.obtener_precios_menu()['1'] == 7.0
+
+
+def test_fallo_al_recargar_sirve_la_copia_anterior(db, repo):
+    db.cargar('menu', _menu())
+    repo.obtener_precios_menu()
+    repo.invalidar_cache_menu()
+
+    db.simular_fallos(1)
+    assert repo.obtener_precios_menu()['1'] == 5.0
+
+
+def test_fallo_sin_copia_anterior_es_none(db, repo):
+    db.simular_fallos(1)
+    assert repo.obtener_precios_menu() is None
+
+
+def test_crear_pedido_con_precios_del_menu(db, repo):
+    db.cargar('menu', _menu())
+    vm = PedidosViewModel(repo)
+
+    assert 'Total: 12.50' in vm.crear_pedido([ItemPedido('1', 2), ItemPedido('2', 1)], 'cajero1')
+    assert 'no existen en el menú' in vm.crear_pedido([ItemPedido('1', 1), ItemPedido('9', 1)], 'cajero1')
+
+
+def test_menu_vacio_usa_el_de_ejemplo(repo):
+    vm = PedidosViewModel(repo)
+    assert 'Total: 15.00' in vm.crear_pedido([ItemPedido('2', 1)], 'cajero1')
+
+
+def test_menu_ilegible_no_crea_el_pedido(db, repo):
+    vm = PedidosViewModel(repo)
+    db.simular_fallos(1)
+    assert vm.crear_pedido([ItemPedido('1', 1)], 'cajero1').startswith('Error: No se pudo leer el menú')
+    assert db.tamano('pedidos') == 0
@@ -0,0 +1,85 @@
+# tests/test_paginacion.py
+import pytest
+
+from app.model.data.finanzas_repo import FinanzasRepo
+from app.model.data.inventario_repo import InventarioRepo
+from app.model.data.resiliencia import MENSAJE_SIN_CONEXION, LecturaInterrumpida
+from app.view_model.finanzas_vm import FinanzasViewModel
+
+
+def _movimientos(n: int) -> dict:
+    return {
+        f'M{i:03d}': {
+            'tipo': 'EGRESO', 'monto': -1.0, 'descripcion': f'gasto {i}',
+            'fecha_hora': f'2024-01-01T{i // 60:02d}:{i % 60:02d}:00',
+        }
+        for i in range(n)
+    }
+
+
+@pytest.fixture
+def finanzas(db):
+    return FinanzasRepo(db, True)
+
+
+@pytest.mark.parametrize('cantidad', [0, 7, 9, 10])
+def test_movimientos_se_recorren_una_sola_vez(db, finanzas, cantidad):
+    db.cargar('movimientos', _movimientos(cantidad))
+
+    ids = [m.id for m in finanzas.iterar_movimientos(tam_pagina=3)]
+
+    # Del más reciente al más antiguo, sin repetir ni saltar (9 es múltiplo exacto de la página).
+    assert ids == [f'M{i:03d}' for i in reversed(range(cantidad))]
+
+
+def test_pagina_exacta_termina_con_una_pagina_vacia(db, finanzas):
+    db.cargar('movimientos', _movimientos(3))
+
+    pagina, cursor = finanzas.obtener_movimientos_paginados(3)
+    assert len(pagina) == 3 and cursor is not None
+    assert finanzas.obtener_movimientos_paginados(3, cursor) == ([], None)
+
+
+@pytest.mark.parametrize('cantidad', [5, 6])
+def test_productos_se_recorren_una_sola_vez(db, cantidad):
+    db.cargar('inventario', {
+        f'I{i}': {'nombre': f'Insumo {i}', 'cantidad': i, 'unidad': 'kg'} for i in range(cantidad)
+    })
+
+    ids = [p.id for p in InventarioRepo(db, True).iterar_productos(tam_pagina=2)]
+
+    assert sorted(ids) == [f'I{i}' for i in range(cantidad)]
+
+
+def test_pagina_que_falla_interrumpe_la_lectura(db, finanzas):
+    db.cargar('movimientos', _movimientos(5))
+    movimientos = finanzas.iterar_movimientos(tam_pagina=2)
+    next(movimientos)
+    next(movimientos)
+
+    db.simular_fallos(1)
+    with pytest.raises(LecturaInterrumpida):
+        next(movimientos)
+
+
+def test_reporte_de_gastos_sin_conexion(db, finanzas):
+    db.cargar('movimientos', _movimientos(5))
+    db.simular_fallos(1)
+
+    assert list(FinanzasViewModel(finanzas).iterar_reporte_gastos()) == [MENSAJE_SIN_CONEXION]
+
+
+def test_reporte_de_gastos_parcial(db, finanzas, monkeypatch):
+    db.cargar('movimientos', _movimientos(5))
+    leer_pagina = finanzas.obtener_movimientos_paginados
+    paginas = []
+
+    def segunda_pagina_falla(tam_pagina, cursor=None):
+        paginas.append(cursor)
+        return None if len(paginas) == 2 else leer_pagina(2, cursor)
+
+    monkeypatch.setattr(finanzas, 'obtener_movimientos_paginados', segunda_pagina_falla)
+    lineas = list(FinanzasViewModel(finanzas).iterar_reporte_gastos())
+
+    assert any(linea.startswith('⚠️ REPORTE PARCIAL') for linea in lineas)
+    assert lineas[-1].endswith('$-2.00')
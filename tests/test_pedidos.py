@@ -0,0 +1,102 @@
+# tests/test_pedidos.py
+import asyncio
+
+import pytest
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.repos_async import DbRepoAsync
+from app.model.domain.pedido import ItemPedido
+from app.view_model.pedidos_vm import PedidosViewModel
+
+PEDIDO = {'estado': 'ACTIVO', 'total': 10.0, 'items': [], 'cajero_uid': 'cajero1',
+          'fecha_creacion': '2026-01-01T12:00:00-05:00'}
+
+
+@pytest.fixture
+def db_repo(db):
+    db.cargar('pedidos', {'P1': dict(PEDIDO)})
+    repo = DbRepo(db, True)
+    yield repo
+    repo.cerrar()
+
+
+def _resumen(db):
+    return db.collection('resumen_diario').document('2026-01-01').get().to_dict()
+
+
+def _resumen_hoy(db):
+    return next(iter(db._colecciones['resumen_diario'].values()))
+
+
+def test_finalizar_dos_veces_cuenta_el_pedido_una_sola_vez(db, db_repo):
+    args = ('P1', 10.0, 'cajero1', '2026-01-01T12:30:00-05:00', '2026-01-01')
+    assert db_repo.finalizar_pedido(*args) is True
+    assert db_repo.finalizar_pedido(*args) is False
+
+    assert _resumen(db)['pedidos'] == 1
+    assert _resumen(db)['ingresos'] == 10.0
+
+
+def test_finalizar_rechaza_si_el_pedido_cambio_tras_leerlo(db, db_repo):
+    ref = db.collection('pedidos').document('P1')
+    leido = ref.get()
+    ref.update({'estado': 'FINALIZADO'})
+
+    lote = db.batch()
+    lote.update(ref, {'estado': 'FINALIZADO'}, option=db.write_option(last_update_time=leido.update_time))
+    lote.set(db.collection('resumen_diario').document('2026-01-01'), {'pedidos': 1})
+    with pytest.raises(Exception):
+        lote.commit()
+    # El lote se rechaza entero.
+    assert db.tamano('resumen_diario') == 0
+
+
+def test_finalizaciones_concurrentes_solo_una_gana(db, db_repo):
+    repo_async = DbRepoAsync(db_repo, db.asincrono())
+
+    async def finalizar_tres():
+        return await asyncio.gather(*(
+            repo_async.finalizar_pedido('P1', 10.0, 'cajero1', '2026-01-01T12:30:00-05:00', '2026-01-01')
+            for _ in range(3)
+        ))
+
+    assert sorted(asyncio.run(finalizar_tres())) == [False, False, True]
+    assert _resumen(db)['pedidos'] == 1
+
+
+def test_vm_informa_pedido_ya_finalizado(db_repo):
+    vm = PedidosViewModel(db_repo)
+    assert 'FINALIZADO' in vm.finalizar_pedido('P1')
+    assert 'ya ha sido finalizado' in vm.finalizar_pedido('P1')
+
+
+def _menu_caido(*args):
+    raise RuntimeError('menú no disponible')
+
+
+def test_sin_recetas_no_se_finaliza_ni_se_cobra(db, monkeypatch):
+    db.cargar('inventario', {'PAN': {'nombre': 'Pan', 'cantidad': 10.0, 'costo': 1.0, 'valor_total': 10.0}})
+    db.cargar('menu', {'1': {'nombre': 'Sánduche', 'precio': 10.0, 'receta': {'PAN': 2}}})
+    db.cargar('pedidos', {'P1': dict(PEDIDO, items=[{'item_id': '1', 'cantidad': 1}])})
+    repo = DbRepo(db, True)
+    vm = PedidosViewModel(repo)
+    try:
+        monkeypatch.setattr(repo, '_cargar_menu', _menu_caido)
+        assert 'no se finalizó' in vm.finalizar_pedido('P1')
+        assert db.collection('pedidos').document('P1').get().to_dict()['estado'] == 'ACTIVO'
+        assert db.tamano('resumen_diario') == 0
+
+        monkeypatch.undo()
+        assert 'FINALIZADO' in vm.finalizar_pedido('P1')
+        assert db.collection('inventario').document('PAN').get().to_dict()['cantidad'] == 8.0
+        assert _resumen_hoy(db)['pedidos'] == 1
+    finally:
+        repo.cerrar()
+
+
+def test_consumo_de_items_sin_menu_es_none(db, monkeypatch):
+    repo = DbRepo(db, True)
+    monkeypatch.setattr(repo, '_cargar_menu', _menu_caido)
+    assert repo.consumo_de_items([ItemPedido('1', 1)]) is None
+    assert repo.consumo_de_items([]) == {}
+    repo.cerrar()
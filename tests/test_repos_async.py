@@ -0,0 +1,44 @@
+# tests/test_repos_async.py
+import asyncio
+import threading
+
+import pytest
+
+from app.model.data.db_repo import DbRepo
+from app.model.data.repos_async import DbRepoAsync
+from app.model.domain.pedido import Pedido
+
+
+@pytest.fixture
+def repo_con_cola(db, tmp_path):
+    repo = DbRepo(db, True, ruta_cola_pedidos=str(tmp_path / 'cola.db'))
+    yield repo
+    repo.cerrar()
+
+
+def test_cola_local_no_corre_en_el_loop(db, repo_con_cola, monkeypatch):
+    """ Las lecturas de la cola (SQLite, bloqueantes) van a un hilo, no al hilo del event loop. """
+    cola = repo_con_cola.cola_pedidos
+    hilos = []
+    for nombre in ('obtener', 'pendientes'):
+        original = getattr(cola, nombre)
+
+        def espiar(*args, _original=original):
+            hilos.append(threading.current_thread())
+            return _original(*args)
+        monkeypatch.setattr(cola, nombre, espiar)
+
+    pedido_id = repo_con_cola.crear_pedido(Pedido(None, [], 10.0, 'ACTIVO', 'cajero1'))
+    repo_async = DbRepoAsync(repo_con_cola, db.asincrono())
+
+    async def leer():
+        return (
+            threading.current_thread(),
+            await repo_async.obtener_pedido_por_id(pedido_id),
+            await repo_async.obtener_pedidos_activos(),
+        )
+
+    hilo_loop, pedido, activos = asyncio.run(leer())
+    assert pedido.total == 10.0
+    assert pedido_id in activos
+    assert len(hilos) >= 2 and hilo_loop not in hilos
@@ -0,0 +1,108 @@
+# tests/test_servicio_local.py
+import asyncio
+import threading
+
+import pytest
+
+from app.backend.servicio_local import ClienteServicio, ErrorServicio, ServicioLocal
+from app.model.data.auth_repo import AuthRepo
+from app.model.data.db_repo import DbRepo
+from app.model.data.inventario_repo import InventarioRepo
+from app.view_model.auth_vm import AuthViewModel
+from app.view_model.inventario_vm import InventarioViewModel
+from app.view_model.pedidos_vm import PedidosViewModel
+
+
+@pytest.fixture
+def servicio(db, auth):
+    auth_repo, db_repo = AuthRepo(auth, True), DbRepo(db, True)
+    admin = AuthViewModel(auth_repo, db_repo)
+    admin.registrar_usuario_y_rol('caja@local.com', 'secreto1', 'Caja', 'cajero')
+    admin.registrar_usuario_y_rol('jefe@local.com', 'secreto1', 'Jefe', 'gerente')
+    db.cargar('menu', {'1': {'nombre': 'Arepa', 'precio': 5.0}})
+
+    servicio = ServicioLocal(
+        compartidos={'pedidos': PedidosViewModel(db_repo), 'inventario': InventarioViewModel(InventarioRepo(db, True))},
+        por_sesion={'auth': lambda: AuthViewModel(auth_repo, db_repo)},
+        puerto=0,
+    )
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(servicio.iniciar())
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    clientes = []
+
+    def conectar():
+        cliente = ClienteServicio(puerto=servicio.puerto)
+        clientes.append(cliente)
+        return cliente
+    yield conectar
+
+    for cliente in clientes:
+        cliente.cerrar()
+    asyncio.run_coroutine_threadsafe(servicio.detener(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    hilo.join(timeout=5)
+    db_repo.cerrar()
+
+
+def _login(cliente, email):
+    assert cliente.vista('auth').intentar_login(email, 'secreto1').startswith('Login exitoso')
+
+
+def test_host_de_red_sin_clave_no_arranca():
+    with pytest.raises(ErrorServicio):
+        ServicioLocal({}, {}, host='0.0.0.0')
+
+
+def test_sin_sesion_solo_se_puede_iniciar_sesion(servicio):
+    cliente = servicio()
+    pedidos = cliente.vista('pedidos')
+
+    assert not hasattr(pedidos, 'ver_pedidos_activos')
+    with pytest.raises(ErrorServicio):
+        cliente.llamar('pedidos', 'ver_pedidos_activos')
+    with pytest.raises(ErrorServicio):
+        cliente.estadisticas()
+    assert cliente.vista('auth').usuario_actual is None
+
+
+def test_el_rol_limita_los_modulos(servicio):
+    cliente = servicio()
+    _login(cliente, 'caja@local.com')
+
+    assert 'No hay pedidos activos' in cliente.vista('pedidos').ver_pedidos_activos()
+    assert not hasattr(cliente.vista('inventario'), 'listar_inventario')
+    with pytest.raises(ErrorServicio):
+        cliente.llamar('inventario', 'listar_inventario')
+    with pytest.raises(ErrorServicio):
+        cliente.llamar('auth', 'registrar_usuario_y_rol', 'z@local.com', 'secreto1', 'Z', 'administrador')
+    with pytest.raises(ErrorServicio):
+        cliente.estadisticas()
+
+    cliente.vista('auth').cerrar_sesion()
+    with pytest.raises(ErrorServicio):
+        cliente.llamar('pedidos', 'ver_pedidos_activos')
+
+
+def test_archivos_del_servicio_no_se_publican(servicio):
+    cliente = servicio()
+    _login(cliente, 'jefe@local.com')
+    inventario = cliente.vista('inventario')
+
+    assert 'inventario' in inventario.listar_inventario().lower()
+    assert not hasattr(inventario, 'exportar_inventario')
+    with pytest.raises(ErrorServicio):
+        cliente.llamar('inventario', 'exportar_inventario', '/tmp/robado.csv')
+    assert isinstance(cliente.estadisticas(), list)
+
+
+def test_cajero_del_pedido_sale_de_la_sesion(servicio, db):
+    cliente = servicio()
+    _login(cliente, 'caja@local.com')
+    uid = cliente.vista('auth').usuario_actual.uid
+
+    resultado = cliente.vista('pedidos').crear_pedido([{'item_id': '1', 'cantidad': 2}], 'OTRO-CAJERO')
+
+    pedido_id = resultado.rsplit('ID: ', 1)[1]
+    assert db.collection('pedidos').document(pedido_id).get().to_dict()['cajero_uid'] == uid
@@ -0,0 +1,105 @@
+# tests/test_tablero_pedidos.py
+import pytest
+
+from app.model.data.db_repo import DbRepo
+from app.view_model.pedidos_vm import PedidosViewModel
+
+ESPERA = 5.0
+
+
+def _pedido(estado='ACTIVO', fecha='2026-01-01T12:00:00-05:00', items=()):
+    return {'estado': estado, 'total': 10.0, 'cajero_uid': 'cajero1', 'fecha_creacion': fecha,
+            'items': [{'item_id': item_id, 'cantidad': cantidad} for item_id, cantidad in items]}
+
+
+@pytest.fixture
+def db_repo(db):
+    db.cargar('pedidos', {'P1': _pedido(), 'P2': _pedido(estado='FINALIZADO')})
+    repo = DbRepo(db, True)
+    yield repo
+    repo.cerrar()
+
+
+@pytest.fixture
+def tablero(db_repo):
+    tablero = db_repo.tablero_pedidos()
+    assert tablero is not None
+    return tablero
+
+
+def _esperar(tablero, condicion):
+    version = tablero.version
+    while not condicion(tablero.pedidos()):
+        nueva = tablero.esperar_cambio(version, ESPERA)
+        assert nueva != version, "el listener no entregó el cambio"
+        version = nueva
+
+
+def test_snapshot_inicial_solo_trae_los_activos(tablero):
+    assert tablero.listo
+    assert set(tablero.pedidos()) == {'P1'}
+
+
+def test_refleja_pedidos_nuevos_cambiados_y_cerrados(db, tablero):
+    pedidos = db.collection('pedidos')
+
+    pedidos.document('P3').set(_pedido())
+    _esperar(tablero, lambda activos: 'P3' in activos)
+
+    pedidos.document('P3').update({'total': 25.0})
+    _esperar(tablero, lambda activos: activos['P3'].total == 25.0)
+
+    pedidos.document('P1').update({'estado': 'FINALIZADO'})
+    _esperar(tablero, lambda activos: 'P1' not in activos)
+    assert set(tablero.pedidos()) == {'P3'}
+
+
+def test_esperar_cambio_despierta_con_la_nueva_version(db, tablero):
+    version = tablero.version
+    db.collection('pedidos').document('P3').set(_pedido())
+
+    assert tablero.esperar_cambio(version, ESPERA) > version
+
+
+def test_esperar_cambio_sin_novedades_vence(tablero):
+    version = tablero.version
+    assert tablero.esperar_cambio(version, 0.05) == version
+
+
+def test_activos_salen_del_tablero_sin_leer_firestore(db, db_repo, tablero):
+    db.reiniciar_contadores()
+
+    assert set(db_repo.obtener_pedidos_activos()) == {'P1'}
+    assert db.lecturas == 0
+
+
+def test_finalizar_lo_quita_del_tablero_sin_esperar_al_listener(db_repo, tablero):
+    version = tablero.version
+    assert db_repo.actualizar_estado_pedido('P1', 'CANCELADO') is True
+
+    assert 'P1' not in tablero.pedidos()
+    assert tablero.version > version
+
+
+def test_sin_listener_consulta_firestore(db, db_repo, monkeypatch):
+    def sin_listener(self, callback):
+        raise NotImplementedError("sin listeners")
+
+    monkeypatch.setattr(type(db.collection('pedidos').where('estado', '==', 'ACTIVO')), 'on_snapshot', sin_listener)
+
+    assert db_repo.tablero_pedidos() is None
+    assert set(db_repo.obtener_pedidos_activos()) == {'P1'}
+
+
+def test_pantalla_cocina_ordena_por_antiguedad(db, db_repo, tablero):
+    db.cargar('menu', {'A': {'nombre': 'Arepa', 'precio': 5.0}})
+    pedidos = db.collection('pedidos')
+    pedidos.document('NUEVO1').set(_pedido(fecha='2026-01-01T12:30:00-05:00', items=[('A', 2)]))
+    pedidos.document('VIEJO1').set(_pedido(fecha='2026-01-01T11:00:00-05:00', items=[('A', 1)]))
+    _esperar(tablero, lambda activos: {'NUEVO1', 'VIEJO1'} <= set(activos))
+
+    pantalla = PedidosViewModel(db_repo).pantalla_cocina()
+
+    assert '3 pedido(s) activo(s)' in pantalla
+    assert pantalla.index('[VIEJO1]') < pantalla.index('[P1]') < pantalla.index('[NUEVO1]')
+    assert '2 x Arepa' in pantalla